@@ -0,0 +1,349 @@
+# analysis/rolling.py
+"""
+Operadores de janela deslizante com custo O(1) amortizado por valor.
+
+Incremental: cada operador guarda os últimos `period` valores; push() entra
+com um valor e devolve o resultado da janela (None até ela encher, exceto
+máximo/mínimo, que valem com o que houver), peek() devolve o que push()
+devolveria sem mexer no estado.
+
+    highs = RollingMax(14)
+    for candle in m1: hi = highs.push(candle["max"])
+
+Sobre listas: rolling_sum/mean/mean_std/max/min/wma devolvem um valor por
+janela completa, da mais antiga para a mais nova; com `last` só as `last`
+últimas janelas são calculadas (o custo é period + last, não o tamanho da
+lista):
+
+    prev, curr = rolling_mean(closes, 34, last=2)
+
+Somas corridas acumulam resíduo de arredondamento; os operadores
+incrementais recalculam a janela do zero a cada RESYNC valores.
+"""
+from collections import deque
+from operator import mul
+from typing import List, Optional, Sequence, Tuple
+
+RESYNC = 1024
+
+
+def _first_end(count: int, period: int, last: Optional[int]) -> int:
+    # índice da vela que fecha a primeira janela pedida
+    if last is None:
+        return period - 1
+    return max(period - 1, count - last)
+
+
+class RollingSum:
+    """
+    Soma dos últimos `period` valores.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.window = deque()
+        self.total = 0.0
+        self.pushes = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.window) == self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.total if self.full else None
+
+    def _next(self, value: float) -> float:
+        return self.total + value - (self.window[0] if self.full else 0.0)
+
+    def push(self, value: float) -> Optional[float]:
+        window = self.window
+        window.append(value)
+        total = self.total + value
+        if len(window) > self.period:
+            total -= window.popleft()
+        self.pushes += 1
+        if self.pushes % RESYNC == 0:
+            total = sum(window)
+        self.total = total
+        return total if len(window) == self.period else None
+
+    def peek(self, value: float) -> Optional[float]:
+        if len(self.window) < self.period - 1:
+            return None
+        return self._next(value)
+
+
+class RollingMean(RollingSum):
+    """
+    Média simples dos últimos `period` valores.
+    """
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.total / self.period if self.full else None
+
+    def push(self, value: float) -> Optional[float]:
+        total = RollingSum.push(self, value)
+        return total / self.period if total is not None else None
+
+    def peek(self, value: float) -> Optional[float]:
+        total = super().peek(value)
+        return total / self.period if total is not None else None
+
+
+class RollingVariance:
+    """
+    Variância populacional (divide por `period`, como as Bollinger do
+    main.py) dos últimos `period` valores, por Welford: a média e a soma dos
+    quadrados dos desvios andam juntas a cada valor que entra/sai.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.pushes = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.window) == self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return max(self.m2, 0.0) / self.period if self.full else None
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.value
+        return variance ** 0.5 if variance is not None else None
+
+    def _next(self, value: float) -> Tuple[float, float]:
+        mean, m2 = self.mean, self.m2
+        if len(self.window) == self.period:
+            # troca o mais velho pelo novo
+            old = self.window[0]
+            new_mean = mean + (value - old) / self.period
+            return new_mean, m2 + (value - old) * (value - new_mean + old - mean)
+        count = len(self.window) + 1
+        delta = value - mean
+        new_mean = mean + delta / count
+        return new_mean, m2 + delta * (value - new_mean)
+
+    def push(self, value: float) -> Optional[float]:
+        self.mean, self.m2 = self._next(value)
+        window = self.window
+        window.append(value)
+        if len(window) > self.period:
+            window.popleft()
+        self.pushes += 1
+        if self.pushes % RESYNC == 0:
+            self.mean = sum(window) / len(window)
+            self.m2 = sum((x - self.mean) ** 2 for x in window)
+        return max(self.m2, 0.0) / self.period if len(window) == self.period else None
+
+    def peek(self, value: float) -> Optional[float]:
+        if len(self.window) < self.period - 1:
+            return None
+        return max(self._next(value)[1], 0.0) / self.period
+
+
+class RollingMax:
+    """
+    Máximo dos últimos `period` valores com deque monotônica.
+    """
+    largest = True
+
+    def __init__(self, period: int):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.index = -1
+        self.items = deque()  # (índice, valor), do extremo pro mais novo
+
+    @property
+    def full(self) -> bool:
+        return self.index >= self.period - 1
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.items[0][1] if self.items else None
+
+    def _beats(self, new: float, old: float) -> bool:
+        return new >= old if self.largest else new <= old
+
+    def push(self, value: float) -> float:
+        self.index += 1
+        items = self.items
+        while items and self._beats(value, items[-1][1]):
+            items.pop()
+        items.append((self.index, value))
+        while items[0][0] <= self.index - self.period:
+            items.popleft()
+        return items[0][1]
+
+    def peek(self, value: float) -> float:
+        lo = self.index + 1 - self.period + 1
+        for i, old in self.items:
+            if i >= lo:
+                return value if self._beats(value, old) else old
+        return value
+
+
+class RollingMin(RollingMax):
+    """
+    Mínimo dos últimos `period` valores com deque monotônica.
+    """
+    largest = False
+
+
+class RollingWMA:
+    """
+    Média ponderada dos últimos `period` valores, pesos 1..period do mais
+    velho pro mais novo (TechnicalAnalysis.calculate_wma do main.py).
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.divisor = period * (period + 1) / 2
+        self.reset()
+
+    def reset(self):
+        self.sums = RollingSum(self.period)
+        self.weighted = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self.sums.full
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.weighted / self.divisor if self.full else None
+
+    def _next(self, value: float) -> float:
+        # cheia: todos os pesos caem 1 (o mais velho sai) e o novo entra com `period`
+        if len(self.sums.window) == self.period:
+            return self.weighted - self.sums.total + self.period * value
+        return self.weighted + (len(self.sums.window) + 1) * value
+
+    def push(self, value: float) -> Optional[float]:
+        self.weighted = self._next(value)
+        total = self.sums.push(value)
+        if self.sums.pushes % RESYNC == 0:
+            self.weighted = sum(map(mul, self.sums.window, range(1, self.period + 1)))
+        return self.weighted / self.divisor if total is not None else None
+
+    def peek(self, value: float) -> Optional[float]:
+        if len(self.sums.window) < self.period - 1:
+            return None
+        return self._next(value) / self.divisor
+
+
+def rolling_sum(values: Sequence[float], period: int, last: Optional[int] = None) -> List[float]:
+    """
+    Soma de cada janela de `period` valores.
+    """
+    end = _first_end(len(values), period, last)
+    if end >= len(values):
+        return []
+    total = sum(values[end - period + 1:end + 1])
+    out = [total]
+    for i in range(end + 1, len(values)):
+        total += values[i] - values[i - period]
+        out.append(total)
+    return out
+
+
+def rolling_mean(values: Sequence[float], period: int, last: Optional[int] = None) -> List[float]:
+    """
+    Média simples de cada janela de `period` valores.
+    """
+    return [total / period for total in rolling_sum(values, period, last)]
+
+
+def rolling_mean_std(values: Sequence[float], period: int,
+                     last: Optional[int] = None) -> List[Tuple[float, float]]:
+    """
+    (média, desvio padrão populacional) de cada janela de `period` valores.
+    A primeira janela é calculada em duas passadas, as seguintes por Welford.
+    """
+    end = _first_end(len(values), period, last)
+    if end >= len(values):
+        return []
+    window = values[end - period + 1:end + 1]
+    mean = sum(window) / period
+    m2 = sum((x - mean) ** 2 for x in window)
+    out = [(mean, (m2 / period) ** 0.5)]
+    for i in range(end + 1, len(values)):
+        new, old = values[i], values[i - period]
+        new_mean = mean + (new - old) / period
+        m2 += (new - old) * (new - new_mean + old - mean)
+        mean = new_mean
+        out.append((mean, (max(m2, 0.0) / period) ** 0.5))
+    return out
+
+
+def _extremes(values: Sequence[float], period: int, last: Optional[int], largest: bool) -> List[float]:
+    end = _first_end(len(values), period, last)
+    if end >= len(values):
+        return []
+    items = deque()  # índices, do extremo pro mais novo
+    out = []
+    for i in range(end - period + 1, len(values)):
+        value = values[i]
+        if largest:
+            while items and value >= values[items[-1]]:
+                items.pop()
+        else:
+            while items and value <= values[items[-1]]:
+                items.pop()
+        items.append(i)
+        if items[0] <= i - period:
+            items.popleft()
+        if i >= end:
+            out.append(values[items[0]])
+    return out
+
+
+def rolling_max(values: Sequence[float], period: int, last: Optional[int] = None) -> List[float]:
+    """
+    Máximo de cada janela de `period` valores.
+    """
+    return _extremes(values, period, last, True)
+
+
+def rolling_min(values: Sequence[float], period: int, last: Optional[int] = None) -> List[float]:
+    """
+    Mínimo de cada janela de `period` valores.
+    """
+    return _extremes(values, period, last, False)
+
+
+def rolling_wma(values: Sequence[float], period: int, last: Optional[int] = None) -> List[float]:
+    """
+    Média ponderada (pesos 1..period, o mais novo pesa mais) de cada janela.
+    """
+    end = _first_end(len(values), period, last)
+    if end >= len(values):
+        return []
+    window = values[end - period + 1:end + 1]
+    divisor = period * (period + 1) / 2
+    weighted = sum(map(mul, window, range(1, period + 1)))
+    out = [weighted / divisor]
+    if end + 1 == len(values):
+        return out
+    total = sum(window)
+    for i in range(end + 1, len(values)):
+        new = values[i]
+        weighted += period * new - total
+        total += new - values[i - period]
+        out.append(weighted / divisor)
+    return out
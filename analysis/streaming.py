@@ -0,0 +1,439 @@
+# analysis/streaming.py
+"""
+Indicadores incrementais, um estado por (ativo, timeframe).
+
+update() entra com a vela que fechou e custa O(1); preview() devolve o valor
+como se a vela ao vivo fechasse agora, sem mexer no estado.
+
+Com wilder=True (padrão) os valores são os de technical_indicators
+(calculate_ema/atr/rsi/adx/choppiness) sobre todo o histórico recebido; as
+funções de lá cortam em period*6..10 velas, então só batem enquanto o
+histórico cabe nessa janela. Com wilder=False são os de
+TechnicalAnalysis/BehaviorAnalysis do main.py (médias simples da janela).
+"""
+import math
+from bisect import bisect_right
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from analysis.rolling import RollingMax, RollingMin, RollingSum
+from exnovaapi.candles import CandleSeries
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class EMA:
+    """
+    EMA semeada com a SMA dos primeiros `period` fechamentos.
+    Igual nos dois modos.
+    """
+
+    def __init__(self, period: int, wilder: bool = True):
+        self.period = period
+        self.k = 2.0 / (period + 1.0)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.seed = 0.0
+        self.value = None
+
+    def _next(self, close: float):
+        count = self.count + 1
+        if count < self.period:
+            return count, self.seed + close, None
+        if count == self.period:
+            seed = self.seed + close
+            return count, seed, seed / self.period
+        return count, self.seed, (close * self.k) + (self.value * (1 - self.k))
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        self.count, self.seed, self.value = self._next(close)
+        return self.value
+
+    def preview(self, high: float, low: float, close: float) -> Optional[float]:
+        return self._next(close)[2]
+
+
+class ATR:
+    """
+    wilder=True: RMA de Wilder dos TR; wilder=False: média simples dos
+    últimos `period` TR.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = True):
+        self.period = period
+        self.wilder = wilder
+        self.reset()
+
+    def reset(self):
+        self.prev_close = None
+        self.count = 0
+        self.total = 0.0
+        self.trs = deque()
+        self.value = None
+
+    def _next(self, high: float, low: float, close: float):
+        p = self.period
+        tr = _true_range(high, low, self.prev_close)
+        count = self.count + 1
+        if self.wilder:
+            if count < p:
+                return count, self.total + tr, None, tr
+            if count == p:
+                total = self.total + tr
+                return count, total, total / p, tr
+            return count, self.total, (self.value * (p - 1) + tr) / p, tr
+        total = self.total + tr - (self.trs[0] if count > p else 0.0)
+        return count, total, (total / p if count >= p else None), tr
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is not None:
+            self.count, self.total, self.value, tr = self._next(high, low, close)
+            if not self.wilder:
+                self.trs.append(tr)
+                if len(self.trs) > self.period:
+                    self.trs.popleft()
+        self.prev_close = close
+        return self.value
+
+    def preview(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        return self._next(high, low, close)[2]
+
+
+class RSI:
+    """
+    wilder=True: médias de Wilder dos ganhos/perdas; wilder=False: somas dos
+    últimos `period` ganhos/perdas (Cutler).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = True):
+        self.period = period
+        self.wilder = wilder
+        self.reset()
+
+    def reset(self):
+        self.prev_close = None
+        self.count = 0
+        self.gain = 0.0
+        self.loss = 0.0
+        self.losing = 0  # perdas > 0 na janela (wilder=False)
+        self.diffs = deque()
+        self.value = None
+
+    @staticmethod
+    def _rsi(gain: float, loss: float) -> float:
+        if loss == 0:
+            return 100.0
+        rs = gain / max(loss, 1e-12)
+        return 100.0 - (100.0 / (1.0 + rs))
+
+    def _next(self, close: float):
+        p = self.period
+        diff = close - self.prev_close
+        count = self.count + 1
+        if self.wilder:
+            g, l = (diff, 0.0) if diff >= 0 else (0.0, abs(diff))
+            if count < p:
+                return count, self.gain + g, self.loss + l, self.losing, None
+            if count == p:
+                gain, loss = (self.gain + g) / p, (self.loss + l) / p
+            else:
+                gain = (self.gain * (p - 1) + g) / p
+                loss = (self.loss * (p - 1) + l) / p
+            return count, gain, loss, self.losing, self._rsi(gain, loss)
+        g, l = (diff, 0.0) if diff > 0 else (0.0, abs(diff))
+        gain, loss, losing = self.gain + g, self.loss + l, self.losing + (l > 0)
+        if count > p:
+            old_g, old_l = self.diffs[0]
+            gain, loss, losing = gain - old_g, loss - old_l, losing - (old_l > 0)
+        if not losing:
+            # sem perda na janela a soma é 0 exato, não o resíduo das subtrações
+            loss = 0.0
+        return count, gain, loss, losing, (self._rsi(gain, loss) if count >= p else None)
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is not None:
+            self.count, self.gain, self.loss, self.losing, self.value = self._next(close)
+            if not self.wilder:
+                diff = close - self.prev_close
+                self.diffs.append((diff, 0.0) if diff > 0 else (0.0, abs(diff)))
+                if len(self.diffs) > self.period:
+                    self.diffs.popleft()
+        self.prev_close = close
+        return self.value
+
+    def preview(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        return self._next(close)[4]
+
+
+class ADX:
+    """
+    ADX + DI+/DI- com as somas suavizadas de Wilder.
+    wilder=True: ADX = média de Wilder dos DX (calculate_adx do
+    technical_indicators, {"adx": 0.0, ...} até ter `period` DX);
+    wilder=False: ADX = média simples dos últimos `period` DX, contando o DX
+    da semente (BehaviorAnalysis.calculate_adx, None até 2*period velas).
+
+    Com `window`, over(n) devolve o BehaviorAnalysis.calculate_adx das
+    últimas n velas (n <= window), com a semente na primeira delas como o
+    cálculo em lote faz. A suavização é linear: guardando a soma exponencial
+    E(t) = a*E(t-1) + x(t) desde o início do stream (a = 1 - 1/period), a
+    soma suavizada de uma janela semeada em c é a^(t-c)*(semente - E(c)) + E(t),
+    então cada DX das últimas `period` velas sai em O(1).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = True, window: Optional[int] = None):
+        self.period = period
+        self.wilder = wilder
+        self.window = window
+        self.decay = 1.0 - 1.0 / period
+        self.powers = [self.decay ** k for k in range(window)] if window else None
+        self.reset()
+
+    def reset(self):
+        self.prev = None  # (high, low, close) da vela anterior
+        self.count = 0
+        self.sums = (0.0, 0.0, 0.0)  # TR, +DM, -DM suavizados
+        self.dx_count = 0
+        self.dx_total = 0.0
+        self.dxs = deque()
+        self.adx = None
+        self.value = None
+        self.ewm = (0.0, 0.0, 0.0)  # E(t) de TR, +DM, -DM
+        self.trail = deque(maxlen=self.window - 1) if self.window else None  # ((TR, +DM, -DM), E(t))
+
+    def _moves(self, high: float, low: float):
+        prev_high, prev_low, prev_close = self.prev
+        up_move = high - prev_high
+        down_move = prev_low - low
+        pdm = up_move if (up_move > down_move and up_move > 0) else 0.0
+        mdm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        return _true_range(high, low, prev_close), pdm, mdm
+
+    def _dx(self, tr: float, pdm: float, mdm: float):
+        if self.wilder:
+            di_plus = 100.0 * (pdm / max(tr, 1e-12))
+            di_minus = 100.0 * (mdm / max(tr, 1e-12))
+            dx = 100.0 * (abs(di_plus - di_minus) / max(di_plus + di_minus, 1e-12))
+            return di_plus, di_minus, dx
+        di_plus = (pdm / tr) * 100 if tr else 0
+        di_minus = (mdm / tr) * 100 if tr else 0
+        denom = di_plus + di_minus
+        dx = (abs(di_plus - di_minus) / denom) * 100 if denom else 0
+        return di_plus, di_minus, dx
+
+    def _next(self, high: float, low: float, close: float):
+        p = self.period
+        tr, pdm, mdm = self._moves(high, low)
+        count = self.count + 1
+        s_tr, s_pdm, s_mdm = self.sums
+        if count <= p:
+            sums = (s_tr + tr, s_pdm + pdm, s_mdm + mdm)
+            if count < p or self.wilder:
+                # Wilder só tira DX depois da primeira suavização
+                return count, sums, self.dx_count, self.dx_total, self.adx, None, None
+        else:
+            sums = (s_tr - (s_tr / p) + tr, s_pdm - (s_pdm / p) + pdm, s_mdm - (s_mdm / p) + mdm)
+        di_plus, di_minus, dx = self._dx(*sums)
+        dx_count = self.dx_count + 1
+        if self.wilder:
+            dx_total, adx = self.dx_total, self.adx
+            if dx_count <= p:
+                dx_total += dx
+                if dx_count == p:
+                    adx = dx_total / p
+            else:
+                adx = (adx * (p - 1) + dx) / p
+            value = {"adx": adx if adx is not None else 0.0, "di_plus": di_plus, "di_minus": di_minus}
+            return count, sums, dx_count, dx_total, adx, value, dx
+        dx_total = self.dx_total + dx - (self.dxs[0] if dx_count > p else 0.0)
+        value = None
+        if dx_count >= p:
+            value = {"adx": dx_total / p, "di_plus": di_plus, "di_minus": di_minus}
+        return count, sums, dx_count, dx_total, None, value, dx
+
+    def update(self, high: float, low: float, close: float) -> Optional[Dict[str, float]]:
+        if self.prev is not None:
+            self.count, self.sums, self.dx_count, self.dx_total, self.adx, value, dx = \
+                self._next(high, low, close)
+            if value is not None:
+                self.value = value
+            if dx is not None and not self.wilder:
+                self.dxs.append(dx)
+                if len(self.dxs) > self.period:
+                    self.dxs.popleft()
+            if self.trail is not None:
+                moves = self._moves(high, low)
+                d = self.decay
+                self.ewm = tuple(d * e + x for e, x in zip(self.ewm, moves))
+                self.trail.append((moves, self.ewm))
+        self.prev = (high, low, close)
+        return self.value
+
+    def over(self, count: int) -> Optional[Dict[str, float]]:
+        """
+        BehaviorAnalysis.calculate_adx das últimas `count` velas recebidas
+        (precisa de `window`); None com menos de 2*period velas ou se o
+        stream ainda não viu `count` velas (aí o chamador usa o batch).
+        """
+        p = self.period
+        trail = self.trail
+        m = count - 1  # TR/DM da janela
+        if m + 1 < 2 * p or m > len(trail):
+            return None
+        start = len(trail) - m
+        seed_end = start + p - 1
+        seeds = [0.0, 0.0, 0.0]
+        for j in range(start, seed_end + 1):
+            moves = trail[j][0]
+            for i in range(3):
+                seeds[i] += moves[i]
+        offsets = [sd - e for sd, e in zip(seeds, trail[seed_end][1])]
+        dx_total = 0.0
+        for t in range(len(trail) - p, len(trail)):
+            w = self.powers[t - seed_end]
+            ewm = trail[t][1]
+            sums = []
+            for i in range(3):
+                value = w * offsets[i] + ewm[i]
+                # resíduo de arredondamento onde a soma da janela é zero
+                sums.append(value if value > 1e-12 * ewm[i] else 0.0)
+            di_plus, di_minus, dx = self._dx(*sums)
+            dx_total += dx
+        return {"adx": dx_total / p, "di_plus": di_plus, "di_minus": di_minus}
+
+    def preview(self, high: float, low: float, close: float) -> Optional[Dict[str, float]]:
+        if self.prev is None:
+            return None
+        value = self._next(high, low, close)[5]
+        return value if value is not None else self.value
+
+
+class Choppiness:
+    """
+    CHOP = 100 * log10( sum(TR,n) / (maxHigh(n)-minLow(n)) ) / log10(n)
+    Igual nos dois modos; faixa sem amplitude dá 50.0 (como no main.py).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = True):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.prev_close = None
+        self.trs = RollingSum(self.period)
+        self.highs = RollingMax(self.period)
+        self.lows = RollingMin(self.period)
+        self.value = None
+
+    def _chop(self, total: float, hi: float, lo: float) -> float:
+        den = hi - lo
+        if den <= 0:
+            return 50.0
+        return 100.0 * (math.log10(total / den) / max(math.log10(float(self.period)), 1e-12))
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        hi = self.highs.push(high)
+        lo = self.lows.push(low)
+        if self.prev_close is not None:
+            total = self.trs.push(_true_range(high, low, self.prev_close))
+            if total is not None:
+                self.value = self._chop(total, hi, lo)
+        self.prev_close = close
+        return self.value
+
+    def preview(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        total = self.trs.peek(_true_range(high, low, self.prev_close))
+        if total is None:
+            return None
+        return self._chop(total, self.highs.peek(high), self.lows.peek(low))
+
+
+class IndicatorSet:
+    """
+    Os indicadores incrementais de uma série (ativo, timeframe).
+    """
+
+    def __init__(self, indicators: Dict[str, object]):
+        self.indicators = indicators
+        self.last_from = None
+
+    def __getitem__(self, name: str):
+        return self.indicators[name].value
+
+    def reset(self):
+        for indicator in self.indicators.values():
+            indicator.reset()
+        self.last_from = None
+
+    def update(self, high: float, low: float, close: float, from_: Optional[int] = None) -> Dict[str, object]:
+        """
+        Entra com uma vela fechada.
+        """
+        for indicator in self.indicators.values():
+            indicator.update(high, low, close)
+        self.last_from = from_
+        return self.values()
+
+    def preview(self, high: float, low: float, close: float) -> Dict[str, object]:
+        """
+        Valores com a vela ao vivo, sem mexer no estado.
+        """
+        return {name: indicator.preview(high, low, close) for name, indicator in self.indicators.items()}
+
+    def values(self) -> Dict[str, object]:
+        return {name: indicator.value for name, indicator in self.indicators.items()}
+
+    def feed(self, candles) -> Dict[str, object]:
+        """
+        Entra só com as velas fechadas mais novas que a última vista.
+        Se a série não contém a última vela vista (buraco longo ou outra
+        janela), recomeça do zero com ela toda.
+        """
+        series = CandleSeries.from_candles(candles)
+        stamps = series.from_
+        start = 0
+        if self.last_from is not None:
+            start = bisect_right(stamps, self.last_from)
+            if start == 0 or stamps[start - 1] != self.last_from:
+                self.reset()
+                start = 0
+        highs, lows, closes = series.max, series.min, series.close
+        for i in range(start, len(stamps)):
+            for indicator in self.indicators.values():
+                indicator.update(highs[i], lows[i], closes[i])
+        if start < len(stamps):
+            self.last_from = stamps[-1]
+        return self.values()
+
+
+class IndicatorBook:
+    """
+    Um IndicatorSet por (ativo, timeframe), criado na primeira vez.
+    factory() devolve o dict nome -> indicador de uma série nova.
+    """
+
+    def __init__(self, factory: Callable[[], Dict[str, object]]):
+        self.factory = factory
+        self.sets = {}
+
+    def get(self, asset: str, size: int) -> IndicatorSet:
+        key = (asset, size)
+        stream = self.sets.get(key)
+        if stream is None:
+            stream = self.sets[key] = IndicatorSet(self.factory())
+        return stream
+
+    def feed(self, asset: str, size: int, candles) -> IndicatorSet:
+        stream = self.get(asset, size)
+        stream.feed(candles)
+        return stream
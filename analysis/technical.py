@@ -1,26 +1,7 @@
 # analysis/technical.py
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Callable
 
-def _as_float(x, default=None):
-    try:
-        if x is None:
-            return default
-        return float(x)
-    except:
-        return default
-
-def _normalize_candle(c: Dict) -> Optional[Dict[str, float]]:
-    """
-    Normaliza um candle vindo da API para floats seguros.
-    Retorna None se faltar algum campo essencial.
-    """
-    o = _as_float(c.get("open"))
-    h = _as_float(c.get("max"))
-    l = _as_float(c.get("min"))
-    cl = _as_float(c.get("close"))
-    if o is None or h is None or l is None or cl is None:
-        return None
-    return {"open": o, "high": h, "low": l, "close": cl, "from": int(c.get("from", 0) or 0)}
+from exnovaapi.candles import CandleSeries
 
 def _pivot_points(candles: List[Dict], window_size: int, lookback: int = 300) -> Dict[str, List[Dict[str, Any]]]:
     """
@@ -35,36 +16,34 @@ def _pivot_points(candles: List[Dict], window_size: int, lookback: int = 300) ->
 
     # recorta lookback para ficar leve
     start = max(0, len(candles) - lookback)
-    sliced = candles[start:]
-
-    norm = []
-    for c in sliced:
-        nc = _normalize_candle(c)
-        if nc:
-            norm.append(nc)
+    norm = CandleSeries.from_candles(candles[start:])
 
     if len(norm) < (2 * window_size + 1):
         return {"highs": [], "lows": []}
 
+    highs, lows, stamps = norm.max, norm.min, norm.from_
+    # O laço interno sai no primeiro vizinho que desfaz topo e fundo: só chega
+    # ao passo k+1 a vela que é extremo estrito de um raio k, e no máximo
+    # 2n/(k+1) velas são. O total é O(n log window_size), sem fatiar listas,
+    # e roda mais rápido que duas passadas de máximo/mínimo deslizante.
     for i in range(window_size, len(norm) - window_size):
-        mid = norm[i]
-        mh = mid["high"]
-        ml = mid["low"]
+        mh = highs[i]
+        ml = lows[i]
 
         is_hi = True
         is_lo = True
         for j in range(1, window_size + 1):
-            if not (mh > norm[i - j]["high"] and mh > norm[i + j]["high"]):
+            if not (mh > highs[i - j] and mh > highs[i + j]):
                 is_hi = False
-            if not (ml < norm[i - j]["low"] and ml < norm[i + j]["low"]):
+            if not (ml < lows[i - j] and ml < lows[i + j]):
                 is_lo = False
             if (not is_hi) and (not is_lo):
                 break
 
         if is_hi:
-            piv_hi.append({"i": start + i, "price": mh, "ts": mid["from"]})
+            piv_hi.append({"i": start + i, "price": mh, "ts": stamps[i]})
         if is_lo:
-            piv_lo.append({"i": start + i, "price": ml, "ts": mid["from"]})
+            piv_lo.append({"i": start + i, "price": ml, "ts": stamps[i]})
 
     return {"highs": piv_hi, "lows": piv_lo}
 
@@ -72,29 +51,30 @@ def _cluster_levels(levels: List[float], tolerance_pct: float = 0.0015) -> List[
     """
     Agrupa níveis parecidos em "zonas" com força.
     tolerance_pct: 0.0015 = 0.15% de distância para juntar.
+
+    Com os níveis em ordem crescente, uma zona que ficou para trás não
+    alcança mais nenhum nível, então só a última zona é testada; o preço
+    dela é a média corrida (soma/hits) dos níveis que entraram.
     """
     if not levels:
         return []
 
     lv = sorted([float(x) for x in levels if x is not None])
     zones = []
+    total = 0.0
 
     for p in lv:
-        placed = False
-        for z in zones:
-            ref = z["price"]
-            if ref > 0 and abs(p - ref) / ref <= tolerance_pct:
-                z["hits"] += 1
-                z["prices"].append(p)
-                z["price"] = sum(z["prices"]) / len(z["prices"])
-                placed = True
-                break
-        if not placed:
-            zones.append({"price": p, "hits": 1, "prices": [p]})
+        z = zones[-1] if zones else None
+        ref = z["price"] if z else 0.0
+        if ref > 0 and abs(p - ref) / ref <= tolerance_pct:
+            total += p
+            z["hits"] += 1
+            z["price"] = total / z["hits"]
+        else:
+            total = p
+            zones.append({"price": p, "hits": 1})
 
     zones.sort(key=lambda x: x["hits"], reverse=True)
-    for z in zones:
-        z.pop("prices", None)
     return zones
 
 def get_sr_zones(
@@ -133,6 +113,29 @@ def get_h1_sr_zones(h1_candles: List[Dict]) -> Tuple[List[float], List[float]]:
     z = get_sr_zones(h1_candles, window_size=8, tolerance_pct=0.0020, top_n=6, lookback=400)
     return z["resistance"], z["support"]
 
+class ZoneTracker:
+    """
+    Zonas de S/R por (ativo, timeframe), recalculadas só quando a série
+    chega com uma vela fechada nova; nos outros scans saem do cache.
+    compute(candles) devolve as zonas (padrão: get_sr_zones do M15).
+    """
+
+    def __init__(self, compute: Optional[Callable[[CandleSeries], Dict[str, Any]]] = None):
+        self.compute = compute or (lambda candles: get_sr_zones(candles, window_size=5, tolerance_pct=0.0015,
+                                                                top_n=6, lookback=400))
+        self.zones = {}
+
+    def get(self, asset: str, candles: List[Dict], size: Optional[int] = None) -> Dict[str, Any]:
+        series = CandleSeries.from_candles(candles)
+        if not series:
+            return self.compute(series)
+        key = (asset, size or series.size)
+        mark = (series.from_[-1], len(series))
+        cached = self.zones.get(key)
+        if cached is None or cached[0] != mark:
+            cached = self.zones[key] = (mark, self.compute(series))
+        return cached[1]
+
 def detect_structure(
     candles: List[Dict],
     pivot_window: int = 3,
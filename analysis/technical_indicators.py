@@ -2,6 +2,8 @@
 import math
 from typing import List, Dict, Optional, Any
 
+from exnovaapi.candles import CandleSeries
+
 # Padrões com pandas_ta ficam opcionais (pra não matar CPU em scan massivo)
 try:
     import pandas as pd
@@ -11,40 +13,26 @@ except:
     _HAS_TA = False
 
 
-def _as_float(x, default=None):
-    try:
-        if x is None:
-            return default
-        return float(x)
-    except:
-        return default
-
-
-def _norm(c: Dict) -> Optional[Dict[str, float]]:
-    o = _as_float(c.get("open"))
-    h = _as_float(c.get("max"))
-    l = _as_float(c.get("min"))
-    cl = _as_float(c.get("close"))
-    if o is None or h is None or l is None or cl is None:
-        return None
-    return {"open": o, "high": h, "low": l, "close": cl}
-
+def _series(candles, max_len: int = 500) -> CandleSeries:
+    """
+    Últimos max_len candles como CandleSeries (colunas de float).
 
-def _norm_list(candles: List[Dict], max_len: int = 500) -> List[Dict[str, float]]:
-    sliced = candles[-max_len:] if len(candles) > max_len else candles
-    out = []
-    for c in sliced:
-        nc = _norm(c)
-        if nc:
-            out.append(nc)
-    return out
+    Uma lista de dicts é recortada antes de descartar as velas sem preço,
+    como no _norm_list antigo: uma vela inválida na janela deixa max_len-1.
+    Uma série já normalizada (sem velas inválidas) só é recortada, sem
+    converter de novo. Dicts com "high"/"low" valem como "max"/"min" e a
+    série sai em ordem de "from" (ver CandleSeries.from_candles).
+    """
+    if not isinstance(candles, CandleSeries):
+        candles = CandleSeries.from_candles(candles[-max_len:] if len(candles) > max_len else candles)
+    return candles[-max_len:] if len(candles) > max_len else candles
 
 
 def calculate_ema(candles: List[Dict], period: int) -> Optional[float]:
-    c = _norm_list(candles, max_len=period * 6)
+    c = _series(candles, max_len=period * 6)
     if len(c) < period:
         return None
-    closes = [x["close"] for x in c]
+    closes = c.close
     k = 2.0 / (period + 1.0)
     ema = sum(closes[:period]) / period
     for price in closes[period:]:
@@ -53,15 +41,16 @@ def calculate_ema(candles: List[Dict], period: int) -> Optional[float]:
 
 
 def calculate_atr(candles: List[Dict], period: int = 14) -> Optional[float]:
-    c = _norm_list(candles, max_len=period * 8)
+    c = _series(candles, max_len=period * 8)
     if len(c) < period + 1:
         return None
 
+    highs, lows, closes = c.max, c.min, c.close
     trs = []
     for i in range(1, len(c)):
-        high = c[i]["high"]
-        low = c[i]["low"]
-        prev_close = c[i - 1]["close"]
+        high = highs[i]
+        low = lows[i]
+        prev_close = closes[i - 1]
         tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
         trs.append(tr)
 
@@ -76,11 +65,11 @@ def calculate_atr(candles: List[Dict], period: int = 14) -> Optional[float]:
 
 
 def calculate_rsi(candles: List[Dict], period: int = 14) -> Optional[float]:
-    c = _norm_list(candles, max_len=period * 8)
+    c = _series(candles, max_len=period * 8)
     if len(c) < period + 1:
         return None
 
-    closes = [x["close"] for x in c]
+    closes = c.close
     gains = []
     losses = []
     for i in range(1, len(closes)):
@@ -113,7 +102,7 @@ def calculate_adx(candles: List[Dict], period: int = 14) -> Optional[Dict[str, f
     ADX + DI+/DI- (Welles Wilder).
     Retorna: {"adx": x, "di_plus": x, "di_minus": x}
     """
-    c = _norm_list(candles, max_len=period * 10)
+    c = _series(candles, max_len=period * 10)
     if len(c) < period + 2:
         return None
 
@@ -121,12 +110,13 @@ def calculate_adx(candles: List[Dict], period: int = 14) -> Optional[Dict[str, f
     plus_dm = []
     minus_dm = []
 
+    highs, lows, closes = c.max, c.min, c.close
     for i in range(1, len(c)):
-        high = c[i]["high"]
-        low = c[i]["low"]
-        prev_high = c[i - 1]["high"]
-        prev_low = c[i - 1]["low"]
-        prev_close = c[i - 1]["close"]
+        high = highs[i]
+        low = lows[i]
+        prev_high = highs[i - 1]
+        prev_low = lows[i - 1]
+        prev_close = closes[i - 1]
 
         up_move = high - prev_high
         down_move = prev_low - low
@@ -180,7 +170,7 @@ def calculate_choppiness(candles: List[Dict], period: int = 14) -> Optional[floa
     CHOP = 100 * log10( sum(TR,n) / (maxHigh(n)-minLow(n)) ) / log10(n)
     Quanto maior, mais mercado preso.
     """
-    c = _norm_list(candles, max_len=period * 8)
+    c = _series(candles, max_len=period * 8)
     if len(c) < period + 1:
         return None
 
@@ -191,10 +181,11 @@ def calculate_choppiness(candles: List[Dict], period: int = 14) -> Optional[floa
     hi = -1e18
     lo = 1e18
 
+    highs, lows, closes = w.max, w.min, w.close
     for i in range(1, len(w)):
-        high = w[i]["high"]
-        low = w[i]["low"]
-        prev_close = w[i - 1]["close"]
+        high = highs[i]
+        low = lows[i]
+        prev_close = closes[i - 1]
         tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
         tr_sum += tr
         if high > hi:
@@ -234,17 +225,11 @@ def check_candlestick_pattern(candles: List[Dict]) -> Optional[str]:
     if len(candles) < 6:
         return None
 
-    rows = []
-    for c in candles[-60:]:
-        nc = _norm(c)
-        if not nc:
-            continue
-        rows.append({"open": nc["open"], "high": nc["high"], "low": nc["low"], "close": nc["close"]})
-
-    if len(rows) < 10:
+    c = _series(candles, max_len=60)
+    if len(c) < 10:
         return None
 
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame({"open": c.open, "high": c.max, "low": c.min, "close": c.close})
 
     df.ta.cdl_pattern(
         name=[
@@ -0,0 +1 @@
+"""Performance benchmarks for the Exnova API and the trading bot."""
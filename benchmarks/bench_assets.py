@@ -0,0 +1,96 @@
+"""Active id -> asset name lookup cost in the streaming handlers.
+
+Replays candle-generated frames for 130 assets through the old
+``list(ACTIVES.keys())[list(ACTIVES.values()).index(id)]`` lookup and the
+:mod:`exnovaapi.assets` reverse index, and reports the share of a core
+spent at a realistic stream rate::
+
+    python -m benchmarks.bench_assets
+    python -m benchmarks.bench_assets --assets 130 --rate 4
+"""
+
+import argparse
+import json
+import time
+
+import exnovaapi.constants as OP_code
+from exnovaapi.assets import name_of
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.ws.received.candle_generated import candle_generated_realtime
+from benchmarks.traffic import asset_names, prepare_api
+
+
+def _list_index(active_id):
+    return list(OP_code.ACTIVES.keys())[list(OP_code.ACTIVES.values()).index(active_id)]
+
+
+def _frames(assets, count):
+    names = asset_names(assets)
+    now = int(time.time())
+    messages = []
+    for i in range(count):
+        asset = names[i % len(names)]
+        messages.append({"name": "candle-generated", "msg": {
+            "active_id": OP_code.ACTIVES[asset], "size": 60, "from": now - now % 60,
+            "to": now - now % 60 + 60, "open": 1.0, "close": 1.0, "min": 1.0,
+            "max": 1.0, "volume": 1, "at": now * 1000000000}})
+    return messages
+
+
+def _best(fn, items, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(items) * 1e6
+
+
+def run(assets=130, count=20000, repeat=3):
+    messages = _frames(assets, count)
+    ids = [m["msg"]["active_id"] for m in messages]
+    results = {"lookup": {}, "handler": {}}
+    results["lookup"]["list.index"] = _best(_list_index, ids, repeat)
+    results["lookup"]["assets"] = _best(name_of, ids, repeat)
+
+    api = ExnovaAPI("localhost", "bench", "bench")
+    prepare_api(api, [json.dumps(m) for m in messages[:assets]])
+
+    def old_handler(message):
+        # the handler body before the reverse index, lookup included
+        _list_index(message["msg"]["active_id"])
+        candle_generated_realtime(api, message)
+
+    def new_handler(message):
+        candle_generated_realtime(api, message)
+
+    handler_old = _best(old_handler, messages, repeat)
+    handler_new = _best(new_handler, messages, repeat)
+    # old_handler paid for both lookups, take the reverse index one back out
+    results["handler"]["list.index"] = handler_old - results["lookup"]["assets"]
+    results["handler"]["assets"] = handler_new
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, default=130)
+    parser.add_argument("--rate", type=float, default=4,
+                        help="candle-generated frames per second per asset")
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = run(args.assets, args.count)
+    frames_per_sec = args.assets * args.rate
+    print("%d assets, %.0f frames/s, %d entries in ACTIVES"
+          % (args.assets, frames_per_sec, len(OP_code.ACTIVES)))
+    for section, rows in results.items():
+        for label, us in rows.items():
+            print("%-8s %-11s %8.2f us/frame  %6.2f%% of a core"
+                  % (section, label, us, us * frames_per_sec / 1e4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Concurrent get_candles, asyncio client vs threads on the sync client.
+
+Fires ``--requests`` get_candles at the stand-in server, run in a child
+process, from one event loop with :class:`AsyncExnova
+<exnovaapi.aio.AsyncExnova>` and from a thread pool sharing one
+:class:`Exnova <exnovaapi.stable_api.Exnova>`::
+
+    python -m benchmarks.bench_async
+    python -m benchmarks.bench_async --requests 5000 --threads 200
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from exnovaapi.aio import AsyncExnova
+from exnovaapi.stable_api import Exnova
+from benchmarks.bench_pool import _serve
+from benchmarks.traffic import asset_names
+
+
+def run_async(url, names, requests):
+    async def run():
+        bot = AsyncExnova("bench@async", "bench", wss_url=url)
+        bot.state.SSID = "ssid-bench-async"
+        ok, reason = await bot.connect()
+        if not ok:
+            raise RuntimeError(reason)
+        try:
+            end = int(time.time())
+            start = time.perf_counter()
+            results = await asyncio.gather(*[
+                bot.get_candles(names[i % len(names)], 60, 10, end) for i in range(requests)])
+            elapsed = time.perf_counter() - start
+            return elapsed, sum(1 for r in results if r), threading.active_count()
+        finally:
+            await bot.close()
+
+    return asyncio.run(run())
+
+
+def run_threads(url, names, requests, threads):
+    bot = Exnova("bench@threads", "bench", wss_url=url)
+    bot.state.SSID = "ssid-bench-threads"
+    ok, reason = bot.connect()
+    if not ok:
+        raise RuntimeError(reason)
+    try:
+        end = int(time.time())
+        peak = [0]
+
+        def one(i):
+            peak[0] = max(peak[0], threading.active_count())
+            return bot.get_candles(names[i % len(names)], 60, 10, end)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+        return elapsed, sum(1 for r in results if r), peak[0]
+    finally:
+        bot.api.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=100,
+                        help="thread pool size for the sync client")
+    parser.add_argument("--assets", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    server, url = _serve(0)
+    try:
+        names = asset_names(args.assets)
+        print("%d get_candles over %d assets" % (args.requests, len(names)))
+        for label, stats in (
+                ("asyncio", run_async(url, names, args.requests)),
+                ("threads", run_threads(url, names, args.requests, args.threads))):
+            elapsed, ok, threads = stats
+            print("%-8s %7.3f s  %8.0f req/s  %d ok  %d threads"
+                  % (label, elapsed, ok / elapsed, ok, threads))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
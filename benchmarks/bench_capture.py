@@ -0,0 +1,69 @@
+"""Reader-thread cost of recording websocket traffic.
+
+Feeds recorded (or synthetic) traffic through on_message with the capture
+off, on, and on with gzip, then replays the capture at max speed through a
+fresh client::
+
+    python -m benchmarks.bench_capture
+    python -m benchmarks.bench_capture --frames session.cap
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.ws.client import WebsocketClient
+from exnovaapi.ws.capture import CaptureWriter, replay
+from benchmarks.traffic import synthetic_frames, load_frames, prepare_api
+
+
+def _feed(frames, capture=None):
+    api = ExnovaAPI("localhost", "bench", "bench")
+    client = WebsocketClient(api)
+    prepare_api(api, frames)
+    api.capture = capture
+    start = time.perf_counter()
+    for text in frames:
+        client.on_message(None, text)
+    elapsed = time.perf_counter() - start
+    if capture is not None:
+        capture.close()
+    return elapsed / len(frames) * 1e6
+
+
+def run(frames, directory):
+    results = {"off": _feed(frames)}
+    paths = {}
+    for label, name in (("capture", "session.cap"), ("capture gz", "session.cap.gz")):
+        paths[label] = os.path.join(directory, name)
+        results[label] = _feed(frames, CaptureWriter(paths[label]))
+    sizes = {label: os.path.getsize(path) for label, path in paths.items()}
+
+    api = ExnovaAPI("localhost", "bench", "bench")
+    prepare_api(api, frames)
+    stats = replay(WebsocketClient(api), paths["capture"], speed=None)
+    return results, sizes, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", help="recorded frames, a capture or one JSON frame per line")
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else synthetic_frames(args.count)
+    raw = sum(len(text) for text in frames)
+    with tempfile.TemporaryDirectory() as directory:
+        results, sizes, stats = run(frames, directory)
+    base = results["off"]
+    print("%d frames, %d bytes of text" % (len(frames), raw))
+    for label, us in results.items():
+        size = " %6.1f%% of text size" % (sizes[label] * 100.0 / raw) if label in sizes else ""
+        print("%-11s %8.2f us/frame  +%5.2f us%s" % (label, us, us - base, size))
+    print("replay max speed: %.0f frames/s" % (stats["frames"] / stats["elapsed"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Reader-thread cost of decoding websocket frames.
+
+Replays recorded (or synthetic) traffic through the old on_message, which
+decoded every frame with json.loads, and the current one, which peeks at the
+name first and drops ignored or unhandled frames before decoding::
+
+    python -m benchmarks.bench_decode
+    python -m benchmarks.bench_decode --frames session.jsonl
+"""
+
+import argparse
+import json
+import time
+
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.ws.client import WebsocketClient
+from exnovaapi.ws import decoder
+from exnovaapi.ws.dispatch import dispatch
+from benchmarks.traffic import synthetic_frames, load_frames, prepare_api
+
+# the streams main.py / main_shock.py ignore
+UNUSED_STREAMS = (
+    "live-deal", "live-deal-binary-option-placed", "live-deal-digital-option",
+    "leaderboard-deals-client", "leaderboard-userinfo-deals-client",
+    "traders-mood-changed", "client-price-generated", "top-assets-updated",
+    "commission-changed",
+)
+
+
+def run(frames, repeat=3):
+    api = ExnovaAPI("localhost", "bench", "bench")
+    client = WebsocketClient(api)
+    prepare_api(api, frames)
+
+    def old(text):
+        message = json.loads(str(text))
+        dispatch(client, message)
+        api.notifier.notify(message.get("name"))
+
+    def new(text):
+        client.on_message(None, text)
+
+    cases = (("json.loads all", old, ()),
+             ("peek, no ignores", new, ()),
+             ("peek + ignores", new, UNUSED_STREAMS))
+    results = {}
+    for label, fn, ignored in cases:
+        api.ignored_messages = set(ignored)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for text in frames:
+                fn(text)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[label] = best / len(frames) * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", help="recorded frames, one JSON frame per line")
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else synthetic_frames(args.count)
+    print("json backend: %s, %d frames" % (decoder.BACKEND, len(frames)))
+    results = run(frames)
+    base = results["json.loads all"]
+    for label, us in results.items():
+        print("%-18s %8.2f us/frame  %5.2fx" % (label, us, base / us))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Per-frame dispatch cost of WebsocketClient.on_message.
+
+Compares the old behaviour, where every frame visits every handler, with the
+name-keyed dispatch table::
+
+    python -m benchmarks.bench_dispatch
+    python -m benchmarks.bench_dispatch --frames session.jsonl
+"""
+
+import argparse
+import json
+import time
+
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.ws.client import WebsocketClient
+from exnovaapi.ws import dispatch
+from benchmarks.traffic import synthetic_frames, load_frames, prepare_api
+
+
+def _sequential(client, message):
+    """Old on_message: hand the frame to every handler in turn."""
+    for name in dispatch.registered_names():
+        for handler, extra in dispatch.get_handlers(name):
+            if extra is None:
+                handler(client.api, message)
+            else:
+                handler(client.api, message, getattr(client, extra))
+
+
+def run(frames, repeat=3):
+    api = ExnovaAPI("localhost", "bench", "bench")
+    client = WebsocketClient(api)
+    prepare_api(api, frames)
+    messages = [json.loads(text) for text in frames]
+
+    results = {}
+    for label, fn in (("sequential", _sequential), ("dispatch", dispatch.dispatch)):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for message in messages:
+                fn(client, message)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[label] = best / len(messages) * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", help="recorded frames, one JSON frame per line")
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else synthetic_frames(args.count)
+    results = run(frames)
+    for label, us in results.items():
+        print("%-12s %8.2f us/frame" % (label, us))
+    print("speedup      %8.1fx" % (results["sequential"] / results["dispatch"]))
+
+
+if __name__ == "__main__":
+    main()
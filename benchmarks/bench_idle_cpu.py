@@ -0,0 +1,88 @@
+"""CPU use of an idle connected bot waiting on websocket responses.
+
+A reader thread feeds frames to WebsocketClient.on_message at a steady rate,
+like a connected bot with a few candle streams open, while waiter threads
+wait for a response that never comes (check_win, get_candles in flight, ...).
+Compares the old ``while x == None: pass`` spin with the notifier wait::
+
+    python -m benchmarks.bench_idle_cpu
+    python -m benchmarks.bench_idle_cpu --seconds 10 --waiters 4 --rate 500
+"""
+
+import argparse
+import json
+import threading
+import time
+
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.ws.client import WebsocketClient
+from benchmarks.traffic import synthetic_frames, prepare_api
+
+
+def _spin(api, stop):
+    while api.order_data == None and not stop.is_set():
+        pass
+
+
+def _notify(api, stop):
+    api.notifier.wait_for(
+        "order", lambda: api.order_data != None or stop.is_set())
+
+
+def run(mode, seconds, waiters, rate, frames):
+    api = ExnovaAPI("localhost", "bench", "bench")
+    client = WebsocketClient(api)
+    prepare_api(api, frames)
+    api.order_data = None
+    stop = threading.Event()
+
+    target = _spin if mode == "spin" else _notify
+    threads = [threading.Thread(target=target, args=(api, stop), daemon=True)
+               for _ in range(waiters)]
+    for thread in threads:
+        thread.start()
+
+    lag = []
+    interval = 1.0 / rate
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for i, text in enumerate(frames):
+        due = start + i * interval
+        if due - start > seconds:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        client.on_message(None, text)
+        lag.append(time.perf_counter() - due)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    stop.set()
+    api.notifier.notify("order")
+    for thread in threads:
+        thread.join()
+
+    lag.sort()
+    return {"cpu": cpu / wall,
+            "lag_p50": lag[len(lag) // 2] * 1e3,
+            "lag_p99": lag[int(len(lag) * 0.99)] * 1e3}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--waiters", type=int, default=2)
+    parser.add_argument("--rate", type=int, default=200, help="frames per second")
+    args = parser.parse_args()
+
+    frames = [text for text in synthetic_frames(int(args.seconds * args.rate) + 1)
+              if json.loads(text)["name"] != "order"]
+    for mode in ("spin", "notify"):
+        result = run(mode, args.seconds, args.waiters, args.rate, frames)
+        print("%-7s cpu %5.0f%% of a core   reader lag p50 %7.3f ms  p99 %7.3f ms"
+              % (mode, result["cpu"] * 100, result["lag_p50"], result["lag_p99"]))
+
+
+if __name__ == "__main__":
+    main()
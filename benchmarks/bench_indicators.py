@@ -0,0 +1,102 @@
+"""Per tick cost of the streaming indicators against recomputing them.
+
+For EMA, ATR, RSI, ADX and CHOP, times ``update`` (a candle closed),
+``preview`` (a live tick) and the batch function the bot called on every
+scan before: ``analysis.technical_indicators`` for the Wilder flavour,
+``main.TechnicalAnalysis``/``BehaviorAnalysis`` over ``--window`` candles
+for the simple one::
+
+    python -m benchmarks.bench_indicators
+    python -m benchmarks.bench_indicators --period 21 --window 120
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from analysis import technical_indicators
+from analysis.streaming import ADX, ATR, EMA, RSI, Choppiness
+from exnovaapi.candles import CandleSeries
+
+
+def random_walk(count, seed=1):
+    rnd = random.Random(seed)
+    price, candles = 1.1, []
+    for i in range(count):
+        open_ = price
+        price += rnd.gauss(0, 0.0004)
+        candles.append({"from": i * 60, "open": open_, "close": price,
+                        "min": min(open_, price) - abs(rnd.gauss(0, 0.0002)),
+                        "max": max(open_, price) + abs(rnd.gauss(0, 0.0002)), "volume": 1})
+    return candles
+
+
+def per_call(function, calls):
+    began = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - began) / calls * 1e6
+
+
+def stream_cost(indicator, series, calls):
+    # warm up on the history, then one closed candle per call
+    highs, lows, closes = series.max, series.min, series.close
+    half = len(series) // 2
+    for i in range(half):
+        indicator.update(highs[i], lows[i], closes[i])
+    ticks = iter(range(half, len(series)))
+
+    def close_one():
+        i = next(ticks)
+        indicator.update(highs[i], lows[i], closes[i])
+
+    update = per_call(close_one, len(series) - half)
+    preview = per_call(lambda: indicator.preview(highs[-1], lows[-1], closes[-1]), calls)
+    return update, preview
+
+
+def run(period=14, window=85, calls=2000):
+    import main
+
+    series = CandleSeries.from_candles(random_walk(20000))
+    recent = series[-window:]
+    batch_wilder = {
+        "EMA": lambda: technical_indicators.calculate_ema(series, period),
+        "ATR": lambda: technical_indicators.calculate_atr(series, period),
+        "RSI": lambda: technical_indicators.calculate_rsi(series, period),
+        "ADX": lambda: technical_indicators.calculate_adx(series, period),
+        "CHOP": lambda: technical_indicators.calculate_choppiness(series, period),
+    }
+    batch_simple = {
+        "EMA": lambda: main.TechnicalAnalysis.calculate_ema(recent, period),
+        "ATR": lambda: main.TechnicalAnalysis.calculate_atr(recent, period),
+        "RSI": lambda: main.TechnicalAnalysis.calculate_rsi(recent.close, period),
+        "ADX": lambda: main.BehaviorAnalysis.calculate_adx(recent, period),
+        "CHOP": lambda: main.BehaviorAnalysis.calculate_choppiness(recent, period),
+    }
+    rows = []
+    for name, cls in (("EMA", EMA), ("ATR", ATR), ("RSI", RSI), ("ADX", ADX), ("CHOP", Choppiness)):
+        for wilder, batch in ((True, batch_wilder), (False, batch_simple)):
+            update, preview = stream_cost(cls(period, wilder=wilder), series, calls)
+            rows.append((name, "wilder" if wilder else "simple", update, preview,
+                         per_call(batch[name], calls // 10)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--period", type=int, default=14)
+    parser.add_argument("--window", type=int, default=85,
+                        help="candles the main.py functions recompute over")
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    print("%-5s %-7s %9s %9s %9s" % ("", "", "update", "preview", "batch"))
+    for name, flavour, update, preview, batch in run(args.period, args.window, args.calls):
+        print("%-5s %-7s %7.2f us %7.2f us %7.1f us" % (name, flavour, update, preview, batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Order round trip under a market data burst, one connection vs a pool.
+
+Streams candle-generated for ``--assets`` assets from the stand-in server,
+run in a child process, and times ``Exnova.buy`` while the streams run, with every stream on the
+order connection and with the streams on ``--connections`` market data
+connections::
+
+    python -m benchmarks.bench_pool
+    python -m benchmarks.bench_pool --assets 130 --rate 20 --connections 3
+"""
+
+import argparse
+import logging
+import socket
+import subprocess
+import sys
+import time
+
+import exnovaapi.constants as OP_code
+from exnovaapi.stable_api import Exnova
+from benchmarks.traffic import asset_names
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(rate):
+    # the server gets its own process, so it does not compete for the GIL
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.standin_server", "--port", str(port),
+         "--candle-rate", str(rate), "--settle-after", "3600"],
+        stdout=subprocess.PIPE)
+    server.stdout.readline()
+    return server, "ws://127.0.0.1:%d/echo/websocket" % port
+
+
+def run(assets=100, rate=20.0, connections=2, buys=40):
+    server, url = _serve(rate)
+    bot = Exnova("bench@pool", "bench", wss_url=url,
+                 market_data_connections=connections)
+    bot.state.SSID = "ssid-bench-%d" % connections
+    try:
+        ok, reason = bot.connect()
+        if not ok:
+            raise RuntimeError(reason)
+        names = asset_names(assets)
+        for asset in names:
+            # subscribe without waiting for the first frame like start_candles_stream does
+            bot._market(asset).subscribe(OP_code.ACTIVES[asset], 60)
+        time.sleep(1.0)
+        samples = []
+        for _ in range(buys):
+            start = time.perf_counter()
+            ok, _ = bot.buy(1, "EURUSD", "call", 1)
+            if ok:
+                samples.append((time.perf_counter() - start) * 1e3)
+            time.sleep(0.05)
+        samples.sort()
+        return {"p50_ms": samples[len(samples) // 2], "p99_ms": samples[int(len(samples) * 0.99)],
+                "max_ms": samples[-1]}
+    finally:
+        bot.api.close()
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=20,
+                        help="candle-generated frames per second per asset")
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--buys", type=int, default=40)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    print("%d assets at %.0f frames/s each" % (args.assets, args.rate))
+    for connections in (0, args.connections):
+        stats = run(args.assets, args.rate, connections, args.buys)
+        label = "single" if not connections else "pool x%d" % connections
+        print("%-8s buy p50 %6.2f ms  p99 %6.2f ms  max %6.2f ms"
+              % (label, stats["p50_ms"], stats["p99_ms"], stats["max_ms"]))
+
+
+if __name__ == "__main__":
+    main()
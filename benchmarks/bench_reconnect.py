@@ -0,0 +1,65 @@
+"""Time to recover ``--streams`` candle streams after the websocket drops.
+
+The stand-in server drops every session, then ``Exnova.connect`` is timed
+until every stream has sent a frame again and its gap is backfilled::
+
+    python -m benchmarks.bench_reconnect
+    python -m benchmarks.bench_reconnect --streams 150 --latency 0.05
+"""
+
+import argparse
+import logging
+import time
+
+from exnovaapi.stable_api import Exnova
+from benchmarks.standin_server import StandinServer
+from benchmarks.traffic import asset_names
+
+
+def run(streams=100, rounds=3, rate=2.0, latency=0.0, size=1):
+    server = StandinServer(candle_rate=rate, latency=latency).start()
+    bot = Exnova("bench@reconnect", "bench", wss_url=server.url)
+    bot.state.SSID = "ssid-bench-reconnect"
+    try:
+        ok, reason = bot.connect()
+        if not ok:
+            raise RuntimeError(reason)
+        for asset in asset_names(streams):
+            bot.subscribe_candle.append(asset + "," + str(size))
+            bot.api.real_time_candles_maxdict_table[asset][size] = 100
+        bot.re_subscribe_stream()
+        samples = []
+        for _ in range(rounds):
+            for session in list(server.sessions):
+                session.close()
+            while bot.check_connect():
+                time.sleep(0.01)
+            time.sleep(1.0)
+            ok, reason = bot.connect()
+            if not ok:
+                raise RuntimeError(reason)
+            samples.append(bot.get_recovery_stats()[0])
+        return samples
+    finally:
+        bot.api.close()
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="candle-generated frames per second per stream")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="server reply delay in seconds")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    for stats in run(args.streams, args.rounds, args.rate, args.latency):
+        print("recovered %d/%d streams, %d candles backfilled in %.3f s"
+              % (stats["streaming"], stats["streams"], stats["backfilled"], stats["seconds"]))
+
+
+if __name__ == "__main__":
+    main()
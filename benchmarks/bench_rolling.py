@@ -0,0 +1,135 @@
+"""Rolling window operators against recomputing every window.
+
+Over ``--values`` random closes, times each operator of
+``analysis.rolling`` three ways: every window recomputed from its slice
+(what ``band_at``, ``get_sma34`` and ``calculate_wma`` did), the array
+function, and one ``push`` per value. Then times the strategy pieces that
+moved onto them, on an 85 candle window, against the previous code::
+
+    python -m benchmarks.bench_rolling
+    python -m benchmarks.bench_rolling --values 5000 --period 34
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from analysis.rolling import (RollingMax, RollingMean, RollingMin, RollingSum, RollingVariance, RollingWMA,
+                              rolling_max, rolling_mean, rolling_mean_std, rolling_min, rolling_sum,
+                              rolling_wma)
+
+
+def best_of(function, runs=5):
+    best = None
+    for _ in range(runs):
+        began = time.perf_counter()
+        function()
+        took = time.perf_counter() - began
+        best = took if best is None else min(best, took)
+    return best
+
+
+def recompute(values, period, function):
+    return [function(values[end - period:end]) for end in range(period, len(values) + 1)]
+
+
+def std(window):
+    mean = sum(window) / len(window)
+    return mean, (sum((x - mean) ** 2 for x in window) / len(window)) ** 0.5
+
+
+def wma(window):
+    return sum(x * w for w, x in enumerate(window, 1)) / (len(window) * (len(window) + 1) / 2)
+
+
+def push_all(values, op):
+    push = op.push
+    for value in values:
+        push(value)
+
+
+def operators(values, period):
+    rows = []
+    for name, slow, array, op in (
+            ("sum", sum, rolling_sum, RollingSum),
+            ("mean", lambda w: sum(w) / period, rolling_mean, RollingMean),
+            ("std", std, rolling_mean_std, RollingVariance),
+            ("max", max, rolling_max, RollingMax),
+            ("min", min, rolling_min, RollingMin),
+            ("wma", wma, rolling_wma, RollingWMA)):
+        rows.append((name, best_of(lambda: recompute(values, period, slow)),
+                     best_of(lambda: array(values, period)),
+                     best_of(lambda: push_all(values, op(period)))))
+    return rows
+
+
+def previous_band_at(closes, idx, period=20, std_mult=2.0):
+    window = closes[idx - period + 1: idx + 1]
+    if len(window) < period: return 0, 0, 0
+    sma = sum(window) / period
+    var = sum((x - sma) ** 2 for x in window) / period
+    std = var ** 0.5
+    return sma, sma + std_mult * std, sma - std_mult * std
+
+
+def previous_wma(data, period):
+    if len(data) < period: return 0
+    weighted_sum = 0; weight_sum = 0
+    for i in range(period):
+        weight = i + 1
+        weighted_sum += data[-(period-i)] * weight
+        weight_sum += weight
+    return weighted_sum / weight_sum
+
+
+def previous_gap(closes):
+    def get_sma34(arr, idx):
+        end = len(arr) + idx + 1 if idx < 0 else idx + 1
+        start = end - 34
+        if start < 0: return 0
+        return sum(arr[start:end]) / 34
+    line = [closes[idx] - get_sma34(closes, idx) for idx in range(-7, 0)]
+    return previous_wma(line[2:], 5), previous_wma(line[1:-1], 5)
+
+
+def strategies(closes, calls):
+    import main
+
+    def per_call(function):
+        return best_of(lambda: [function() for _ in range(calls)]) / calls
+
+    n = len(closes)
+    bb = main.BollingerReentryStrategy
+    return [
+        ("bollinger prev+curr", per_call(lambda: (previous_band_at(closes, n - 2), previous_band_at(closes, n - 1))),
+         per_call(lambda: bb.bands(closes, last=2))),
+        ("gap sma34+wma5", per_call(lambda: previous_gap(closes)),
+         per_call(lambda: rolling_wma([c - s for c, s in zip(closes[-7:], rolling_mean(closes, 34, last=7))][1:],
+                                      5, last=2))),
+        ("wma5", per_call(lambda: previous_wma(closes, 5)), per_call(lambda: main.TechnicalAnalysis.calculate_wma(closes, 5))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=2000)
+    parser.add_argument("--period", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    rnd = random.Random(1)
+    values = [1.1 + rnd.gauss(0, 0.001) for _ in range(args.values)]
+    print("%d values, period %d" % (args.values, args.period))
+    print("%-6s %10s %10s %10s" % ("", "recompute", "array", "push"))
+    for name, slow, array, push in operators(values, args.period):
+        print("%-6s %7.2f ms %7.2f ms %7.2f ms" % (name, slow * 1000, array * 1000, push * 1000))
+    print()
+    print("%-20s %10s %10s" % ("85 candles", "before", "rolling"))
+    for name, before, after in strategies(values[-85:], args.calls):
+        print("%-20s %7.2f us %7.2f us" % (name, before * 1e6, after * 1e6))
+
+
+if __name__ == "__main__":
+    main()
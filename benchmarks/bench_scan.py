@@ -0,0 +1,120 @@
+"""Per asset scan cost of the bot: candle ingestion plus every analysis.
+
+Builds random walk candles for ``--assets`` assets and runs what one scan
+does for each of them with ``--module`` (``main`` or ``main_shock``):
+fetch the M1 and M15 closed candles (from an in-memory broker),
+``analyze_behavior`` with the asset, as ``pre_scan_window`` calls it,
+``calculate_vol_metrics`` and every strategy of
+``check_strategy_signal``. Reports the time per asset (the best of 5
+passes of ``--rounds`` scans), the traced memory allocated while scanning
+and what the cached candles of one asset keep::
+
+    python -m benchmarks.bench_scan
+    python -m benchmarks.bench_scan --assets 40 --rounds 20 --module main_shock
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import random
+import time
+import tracemalloc
+
+# (size, count) of the scan windows, as fetch_candles_cached_tf asks them
+WINDOWS = ((60, 85), (900, 135))
+STRATEGIES = ("SHOCK_REVERSAL", "V2_TREND", "BB_REENTRY", "EMA_PULLBACK",
+              "TSUNAMI_FLOW", "VOLUME_REACTOR", "GAP_TRADER")
+
+
+def random_walk(count, size, seed, end):
+    rnd = random.Random(seed)
+    price = 1.0 + rnd.random()
+    candles = []
+    for i in range(count):
+        open_ = price
+        price += rnd.gauss(0, 0.0004)
+        candles.append({"id": i, "from": end - (count - i) * size, "to": end - (count - i - 1) * size,
+                        "at": 0, "open": open_, "close": price,
+                        "min": min(open_, price) - abs(rnd.gauss(0, 0.0002)),
+                        "max": max(open_, price) + abs(rnd.gauss(0, 0.0002)),
+                        "volume": rnd.randint(1, 500)})
+    return candles
+
+
+class FakeApi(object):
+    # what SimpleBot.get_closed_candles uses of Exnova, answered from memory
+    api = None
+
+    def __init__(self, history):
+        self.history = history
+
+    def get_candles(self, asset, size, count, end):
+        # new dicts every call, like a decoded reply
+        return [dict(candle) for candle in self.history[asset, size][-count:]]
+
+
+def scan(bot, asset):
+    m1 = bot.get_closed_candles(asset, 60, WINDOWS[0][1])
+    m15 = bot.get_closed_candles(asset, 900, WINDOWS[1][1])
+    bot.analyze_behavior(m1, m15, asset)
+    bot.calculate_vol_metrics(asset, m1)
+    for strategy in STRATEGIES:
+        bot.check_strategy_signal(strategy, m1, asset)
+    return m1, m15
+
+
+def run(module="main", assets=25, rounds=10):
+    # sem arquivo de velas: tudo vem do FakeApi
+    os.environ["CANDLE_STORE_FILE"] = ""
+    bot_module = importlib.import_module(module)
+    bot = bot_module.SimpleBot()
+    end = int(time.time()) // 900 * 900 + 30
+    names = ["ASSET%02d-OTC" % i for i in range(assets)]
+    bot.api = FakeApi({(name, size): random_walk(count + 1, size, i * 1000 + size, end)
+                       for i, name in enumerate(names) for size, count in WINDOWS})
+
+    # the best of 5 passes, the box is rarely idle
+    elapsed = None
+    for _ in range(5):
+        began = time.perf_counter()
+        for _ in range(rounds):
+            for name in names:
+                scan(bot, name)
+        took = (time.perf_counter() - began) / (rounds * assets)
+        elapsed = took if elapsed is None else min(elapsed, took)
+
+    gc.collect()
+    tracemalloc.start()
+    for name in names:
+        scan(bot, name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = scan(bot, names[0])
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return {"per_asset_ms": elapsed * 1000, "peak_kb": peak / 1024.0,
+            "retained_kb": retained / 1024.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main", help="main or main_shock")
+    parser.add_argument("--assets", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    result = run(args.module, args.assets, args.rounds)
+    print("%s  %.3f ms per asset  %.1f KB peak while scanning  %.1f KB kept per asset"
+          % (args.module, result["per_asset_ms"], result["peak_kb"], result["retained_kb"]))
+
+
+if __name__ == "__main__":
+    main()
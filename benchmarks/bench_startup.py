@@ -0,0 +1,84 @@
+"""Cold import time of the bot's entry point, checked against a budget.
+
+Runs ``python -X importtime -c "import <module>"`` in fresh interpreters
+and reports the best cumulative time of ``--module`` and how many chanel
+and received handler modules it loaded. ``--eager`` also imports every
+``exnovaapi.ws.chanels`` and ``exnovaapi.ws.received`` module, as the
+client did before they were loaded on first use. Exits 1 over budget::
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --budget 150 --runs 10
+    python -m benchmarks.bench_startup --eager
+"""
+
+import argparse
+import os
+import pkgutil
+import subprocess
+import sys
+
+import exnovaapi.ws.chanels
+import exnovaapi.ws.received
+
+LAZY_PACKAGES = ("exnovaapi.ws.chanels.", "exnovaapi.ws.received.")
+
+
+def eager_modules():
+    """Get every chanel and received handler module name."""
+    return [package.__name__ + "." + info.name
+            for package in (exnovaapi.ws.chanels, exnovaapi.ws.received)
+            for info in pkgutil.iter_modules(package.__path__)]
+
+
+def measure(module, eager=False):
+    """Import ``module`` in a fresh interpreter.
+
+    :returns: A tuple of the cumulative import time of ``module`` in ms and
+        the number of chanel and received modules imported.
+    """
+    code = "import " + module
+    if eager:
+        code += "; import " + ", ".join(eager_modules())
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=root, capture_output=True, text=True, check=True)
+    total, loaded, started = 0, 0, False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        if name.strip().startswith(LAZY_PACKAGES):
+            loaded += 1
+        # top level imports from the module's own line on, the module last
+        # among its children and the eager imports after it
+        started = started or name.strip() == module
+        if started and not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total / 1000.0, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="exnovaapi.stable_api")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=160.0,
+                        help="best cumulative import time allowed, in ms")
+    parser.add_argument("--eager", action="store_true",
+                        help="also import every chanel and received module")
+    args = parser.parse_args()
+
+    samples = [measure(args.module, args.eager) for _ in range(args.runs)]
+    best = min(ms for ms, _ in samples)
+    loaded = samples[0][1]
+    print("import %s: best %.1f ms of %d runs, %d chanel/received modules loaded"
+          % (args.module, best, args.runs, loaded))
+    if best > args.budget:
+        print("over the %.0f ms budget" % args.budget)
+        sys.exit(1)
+    print("within the %.0f ms budget" % args.budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Candle loading from startup to the first scan, cold vs warm store.
+
+Replays what the bot does before its first scan against the stand-in
+server: ``recalibrate_current_hour`` (120 M1 candles per asset), then the
+scan's M1 and M15 windows. Cold starts from an empty
+:class:`CandleStore <exnovaapi.candle_store.CandleStore>`, warm from one
+filled by a run ``--downtime`` seconds earlier::
+
+    python -m benchmarks.bench_warm_start
+    python -m benchmarks.bench_warm_start --assets 25 --latency 0.05 --downtime 600
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from exnovaapi.candle_store import CandleStore
+from exnovaapi.stable_api import Exnova
+from benchmarks.standin_server import StandinServer
+from benchmarks.traffic import asset_names
+
+# (size, count) in the order the bot asks for them
+STARTUP = ((60, 120), (60, 85), (900, 135))
+
+
+def load(bot, store, names, end):
+    start = time.perf_counter()
+    for size, count in STARTUP:
+        for asset in names:
+            if not store.fetch(bot.get_candles, asset, size, count, end):
+                raise RuntimeError("no candles for %s" % asset)
+    return time.perf_counter() - start
+
+
+def run(assets=25, latency=0.05, downtime=600):
+    server = StandinServer(latency=latency).start()
+    bot = Exnova("bench@warm", "bench", wss_url=server.url)
+    bot.state.SSID = "ssid-bench-warm"
+    folder = tempfile.mkdtemp()
+    try:
+        ok, reason = bot.connect()
+        if not ok:
+            raise RuntimeError(reason)
+        names = asset_names(assets)
+        now = int(time.time())
+        results = {}
+        for label, path in (("cold", None), ("warm", os.path.join(folder, "candles.sqlite3"))):
+            if path is None:
+                store = CandleStore(":memory:")
+            else:
+                # the run before the restart
+                previous = CandleStore(path)
+                load(bot, previous, names, now - downtime)
+                previous.close()
+                store = CandleStore(path)
+            elapsed = load(bot, store, names, now)
+            results[label] = (elapsed, store.stats())
+            store.close()
+        return results
+    finally:
+        bot.api.close()
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="server reply delay in seconds")
+    parser.add_argument("--downtime", type=int, default=600,
+                        help="seconds between the previous run and the restart")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    for label, (elapsed, stats) in run(args.assets, args.latency, args.downtime).items():
+        print("%s  %7.3f s  %4d requests  %6d candles fetched  %6d from disk"
+              % (label, elapsed, stats["requests"], stats["fetched"], stats["hits"]))
+
+
+if __name__ == "__main__":
+    main()
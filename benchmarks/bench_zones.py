@@ -0,0 +1,75 @@
+"""Cost of the S/R zones and pivot structure per scan.
+
+Times, over ``--candles`` random walk M15 candles with pivots of
+``--window`` candles each side, ``analysis.technical.get_sr_zones`` and
+``detect_structure``, ``main.BehaviorAnalysis.get_sr_zones`` and
+``detect_structure``, and what ``analyze_behavior`` pays for the M15 zones
+through ``ZoneTracker`` when no M15 candle closed since the last scan::
+
+    python -m benchmarks.bench_zones
+    python -m benchmarks.bench_zones --candles 400 --window 8
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from analysis import technical
+from exnovaapi.candles import CandleSeries
+
+
+def random_walk(count, seed=1):
+    rnd = random.Random(seed)
+    price, candles = 1.1, []
+    for i in range(count):
+        open_ = price
+        price += rnd.gauss(0, 0.002)
+        candles.append({"from": i * 900, "open": open_, "close": price,
+                        "min": min(open_, price) - abs(rnd.gauss(0, 0.001)),
+                        "max": max(open_, price) + abs(rnd.gauss(0, 0.001)), "volume": 1})
+    return CandleSeries.from_candles(candles, 900)
+
+
+def per_call(function, calls):
+    best = None
+    for _ in range(5):
+        began = time.perf_counter()
+        for _ in range(calls):
+            function()
+        took = (time.perf_counter() - began) / calls
+        best = took if best is None else min(best, took)
+    return best * 1e6
+
+
+def run(candles=400, window=5, calls=200):
+    import main
+
+    series = random_walk(candles)
+    ba = main.BehaviorAnalysis
+    tracker = technical.ZoneTracker(lambda c: ba.get_sr_zones(c, window_size=window, lookback=candles))
+    tracker.get("EURUSD-OTC", series)
+    return [
+        ("technical.get_sr_zones", per_call(lambda: technical.get_sr_zones(series, window, lookback=candles), calls)),
+        ("technical.detect_structure", per_call(lambda: technical.detect_structure(series, window, lookback=candles),
+                                                calls)),
+        ("BehaviorAnalysis.get_sr_zones", per_call(lambda: ba.get_sr_zones(series, window, lookback=candles), calls)),
+        ("BehaviorAnalysis.detect_structure", per_call(lambda: ba.detect_structure(series, window, lookback=60), calls)),
+        ("ZoneTracker.get, no new candle", per_call(lambda: tracker.get("EURUSD-OTC", series), calls * 10)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candles", type=int, default=400)
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    for name, took in run(args.candles, args.window, args.calls):
+        print("%-36s %9.1f us" % (name, took))
+
+
+if __name__ == "__main__":
+    main()
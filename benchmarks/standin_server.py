@@ -0,0 +1,581 @@
+"""Local stand-in for the Exnova websocket server.
+
+Speaks the subset of the protocol the bot uses: ``ssid``/``profile``,
+``timeSync``, ``heartbeat``, ``get-candles``, ``get-balances``, the
+``candle-generated`` and ``instrument-quotes-generated`` subscriptions,
+``binary-options.open-option`` settled with ``option-closed`` and
+``digital-options.place-digital-option`` settled with ``position-changed``.
+Streams are synthetic or replayed from recorded frames, at configurable
+rates and with injected latency, so the bot can be load tested by url::
+
+    server = StandinServer(candle_rate=4, latency=0.02).start()
+    bot = Exnova("user", "pass", wss_url=server.url)
+    bot.state.SSID = "any"
+    bot.connect()
+
+or from the command line::
+
+    python -m benchmarks.standin_server --port 8765 --candle-rate 4 --latency 0.02
+    python -m benchmarks.standin_server --frames recorded.jsonl --replay-rate 2000
+"""
+
+import argparse
+import base64
+import calendar
+import hashlib
+import heapq
+import itertools
+import json
+import random
+import re
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import Counter, deque
+
+import exnovaapi.constants as OP_code
+from exnovaapi.assets import name_of
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_DIGITAL_ID = re.compile(r"^do(.+?)(\d{12})PT(\d+)M([CP])")
+
+
+def candle_close(active_id, size, start):
+    """Deterministic synthetic close price of a candle."""
+    return round(1 + active_id / 1000.0 + (start // size % 97) / 10000.0, 6)
+
+
+def price_at(active_id, timestamp):
+    """Deterministic synthetic spot price at ``timestamp``."""
+    return candle_close(active_id, 1, int(timestamp))
+
+
+class Session(object):
+    """One client connection: the websocket framing and the replies.
+
+    Periodic streams, settlements and delayed frames run on one timer
+    thread per session, the reader thread only answers requests.
+    """
+
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.account = None
+        self.balance_id = None
+        # (name, filter) -> token of the ticker serving it
+        self.subscriptions = {}
+        # requests received, by name (the inner name for sendMessage)
+        self.requests = Counter()
+        self.__cond = threading.Condition()
+        self.__timers = []
+        self.__seq = itertools.count()
+        self.__last_due = 0.0
+
+    # ---------------------------------------------------------------- framing
+    def handshake(self):
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                return False
+            data += chunk
+        headers = {}
+        for line in data.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1(
+            (headers["sec-websocket-key"] + _GUID).encode()).digest()).decode()
+        self.sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            "Sec-WebSocket-Accept: %s\r\n\r\n" % accept).encode())
+        return True
+
+    def _recv_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client went away")
+            data += chunk
+        return data
+
+    def recv_frame(self):
+        head = self._recv_exact(2)
+        opcode = head[0] & 0x0F
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._recv_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._recv_exact(8))[0]
+        mask = self._recv_exact(4) if head[1] & 0x80 else None
+        payload = self._recv_exact(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    def send_frame(self, payload, opcode=0x1):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        length = len(payload)
+        if length < 126:
+            head = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 65536:
+            head = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        with self.lock:
+            self.sock.sendall(head + payload)
+
+    def send_text(self, text):
+        """Send a text frame after the injected latency, in order."""
+        self.server.count_sent()
+        delay = self.server.delay()
+        if delay <= 0:
+            self.send_frame(text)
+            return
+        with self.__cond:
+            due = max(time.monotonic() + delay, self.__last_due)
+            self.__last_due = due
+            heapq.heappush(self.__timers, (due, next(self.__seq), self.send_frame, (text,)))
+            self.__cond.notify()
+
+    def send(self, name, msg, request_id=None, **extra):
+        frame = {"name": name, "msg": msg}
+        if request_id is not None:
+            frame["request_id"] = request_id
+        frame.update(extra)
+        self.send_text(json.dumps(frame, separators=(",", ":")))
+
+    # ----------------------------------------------------------------- timers
+    def later(self, delay, fn, *args):
+        """Run ``fn(*args)`` on the timer thread after ``delay`` seconds."""
+        with self.__cond:
+            heapq.heappush(self.__timers, (time.monotonic() + delay, next(self.__seq), fn, args))
+            self.__cond.notify()
+
+    def every(self, interval, fn):
+        """Run ``fn()`` every ``interval`` seconds until it returns False."""
+        def tick():
+            if fn() is not False:
+                self.later(interval, tick)
+        self.later(interval, tick)
+
+    def _timer_loop(self):
+        while True:
+            with self.__cond:
+                while True:
+                    if self.closed.is_set():
+                        return
+                    now = time.monotonic()
+                    if self.__timers and self.__timers[0][0] <= now:
+                        _, _, fn, args = heapq.heappop(self.__timers)
+                        break
+                    self.__cond.wait(self.__timers[0][0] - now if self.__timers else None)
+            try:
+                fn(*args)
+            except OSError:
+                self.close()
+                return
+
+    def close(self):
+        self.closed.set()
+        with self.__cond:
+            self.__cond.notify_all()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------- loop
+    def run(self):
+        if not self.handshake():
+            return
+        threading.Thread(target=self._timer_loop, daemon=True).start()
+        try:
+            while not self.closed.is_set():
+                opcode, payload = self.recv_frame()
+                if opcode == 0x8:
+                    self.send_frame(payload[:2], 0x8)
+                    break
+                if opcode == 0x9:
+                    self.send_frame(payload, 0xA)
+                    continue
+                if opcode == 0x1:
+                    self.server.received.append(payload.decode())
+                    self.handle(json.loads(payload.decode()))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.closed.set()
+            with self.__cond:
+                self.__cond.notify_all()
+            self.server.sessions.discard(self)
+
+    def _start_streams(self):
+        server = self.server
+        if server.time_sync_interval:
+            self.every(server.time_sync_interval,
+                       lambda: self.send("timeSync", int(time.time() * 1000)))
+        if server.heartbeat_interval:
+            self.every(server.heartbeat_interval,
+                       lambda: self.send("heartbeat", int(time.time() * 1000)))
+        if server.frames:
+            self._start_replay()
+
+    def _start_replay(self):
+        frames = self.server.frames
+        rate = float(self.server.replay_rate)
+        state = {"start": time.monotonic(), "sent": 0}
+
+        def tick():
+            due = int((time.monotonic() - state["start"]) * rate)
+            while state["sent"] < due:
+                if state["sent"] >= len(frames) and not self.server.replay_loop:
+                    return False
+                self.send_text(frames[state["sent"] % len(frames)])
+                state["sent"] += 1
+        self.every(max(0.001, 1.0 / rate), tick)
+
+    # --------------------------------------------------------------- protocol
+    def handle(self, frame):
+        name = frame.get("name")
+        request_id = frame.get("request_id")
+        inner = (frame.get("msg") or {}).get("name") if name == "sendMessage" else None
+        self.requests[inner or name] += 1
+        if name == "ssid":
+            self.account = self.server.account_for(frame["msg"])
+            self.send("profile", self.account["profile"] if self.account else False)
+            if self.account:
+                self.balance_id = self.account["profile"]["balance_id"]
+                self.send("timeSync", int(time.time() * 1000))
+                self._start_streams()
+        elif name == "heartbeat":
+            body = frame.get("msg") or {}
+            body = body.get("msg", body)
+            if "heartbeatTime" in body:
+                self.server.heartbeat_rtt.append(
+                    time.time() * 1000 - int(body["heartbeatTime"]))
+        elif name == "sendMessage":
+            msg = frame.get("msg") or {}
+            handler = getattr(self, "on_" + msg.get("name", "").replace("-", "_").replace(".", "_"), None)
+            if handler is not None:
+                handler(msg.get("body") or {}, request_id)
+            else:
+                self.send("result", {"success": True}, request_id)
+        elif name in ("subscribeMessage", "unsubscribeMessage"):
+            msg = frame.get("msg") or {}
+            topic = msg.get("name")
+            filters = (msg.get("params") or {}).get("routingFilters") or {}
+            if topic in ("candle-generated", "instrument-quotes-generated"):
+                self.subscribe(topic, filters, name == "subscribeMessage")
+            self.send("result", {"success": True}, request_id)
+        elif name == "setOptions":
+            self.send("result", {"success": True}, request_id)
+
+    def subscribe(self, topic, filters, on):
+        """Start or stop the synthetic stream of a subscription."""
+        if topic == "candle-generated":
+            key = (topic, int(filters["active_id"]), int(filters["size"]))
+            rate, emit = self.server.candle_rate, self._emit_candle
+        else:
+            key = (topic, int(filters["active"]), int(filters["expiration_period"]))
+            rate, emit = self.server.quote_rate, self._emit_quotes
+        if not on:
+            self.subscriptions.pop(key, None)
+            return
+        token = object()
+        self.subscriptions[key] = token
+        if not rate:
+            return
+
+        def tick():
+            if self.subscriptions.get(key) is not token:
+                return False
+            emit(*key[1:])
+        self.later(0, tick)
+        self.every(1.0 / rate, tick)
+
+    def _emit_candle(self, active_id, size):
+        now = time.time()
+        start = int(now) - int(now) % size
+        close = price_at(active_id, now)
+        self.send("candle-generated", {
+            "active_id": active_id, "size": size, "at": int(now * 1e9),
+            "from": start, "to": start + size, "id": start // size,
+            "open": candle_close(active_id, size, start), "close": close,
+            "min": min(close, candle_close(active_id, size, start)),
+            "max": max(close, candle_close(active_id, size, start)),
+            "ask": close, "bid": close, "volume": 1, "phase": "T"})
+
+    def _emit_quotes(self, active_id, period):
+        asset = name_of(active_id)
+        if asset is None:
+            return
+        now = int(time.time())
+        expiration = now - now % period + period
+        stamp = time.strftime("%Y%m%d%H%M", time.gmtime(expiration))
+        minutes = period // 60
+        quotes = []
+        for side in ("C", "P"):
+            quotes.append({"symbols": ["do%s%sPT%dM%sSPT" % (asset, stamp, minutes, side)],
+                           "price": {"ask": 54.0, "bid": 50.0}})
+        self.send("instrument-quotes-generated", {
+            "active": active_id, "kind": "digital-option",
+            "expiration": {"timestamp": expiration, "period": period},
+            "quotes": quotes})
+
+    def on_get_candles(self, body, request_id):
+        active_id = int(body["active_id"])
+        size = int(body["size"])
+        end = int(body["to"]) - int(body["to"]) % size
+        candles = []
+        for i in range(int(body["count"]), 0, -1):
+            start = end - i * size
+            close = candle_close(active_id, size, start)
+            candles.append({"id": start // size, "from": start, "to": start + size,
+                            "open": close, "close": close, "min": close,
+                            "max": close, "volume": 1})
+        self.send("candles", {"candles": candles}, request_id)
+
+    def on_get_balances(self, body, request_id):
+        self.send("balances", self.account["profile"]["balances"], request_id)
+
+    def on_binary_options_open_option(self, body, request_id):
+        amount = float(body["price"])
+        active_id = int(body["active_id"])
+        option_id = self.server.next_id()
+        opened = time.time()
+        self.server.move_balance(self.account, body.get("user_balance_id"), -amount)
+        self.send("result", {"success": True}, request_id)
+        self.send("option", {"id": option_id, "active_id": active_id,
+                             "price": amount, "exp": int(body["expired"])}, request_id)
+        expired = int(body["expired"])
+        self.later(self.server.settle_delay(expired), self._settle_binary, option_id,
+                   body, price_at(active_id, opened), price_at(active_id, expired))
+
+    def _settle_binary(self, option_id, body, open_price, close_price):
+        amount = float(body["price"])
+        result = self.server.outcome(body["direction"] == "call", open_price, close_price)
+        payout = self.server.payout_for(result, amount)
+        self.server.move_balance(self.account, body.get("user_balance_id"), payout)
+        self.send("socket-option-closed", {"id": option_id, "win": result,
+                                           "sum": amount, "win_amount": payout})
+        self.send("option-closed", {"option_id": option_id, "result": result,
+                                    "profit_amount": payout, "active_id": int(body["active_id"])},
+                  microserviceName="binary-options")
+
+    def on_digital_options_place_digital_option(self, body, request_id):
+        match = _DIGITAL_ID.match(str(body.get("instrument_id", "")))
+        active_id = OP_code.ACTIVES.get(match.group(1)) if match else None
+        if active_id is None:
+            self.send("digital-option-placed", {"message": "unknown instrument"}, request_id)
+            return
+        amount = float(body["amount"])
+        order_id = self.server.next_id()
+        expired = calendar.timegm(time.strptime(match.group(2), "%Y%m%d%H%M"))
+        self.server.move_balance(self.account, body.get("user_balance_id"), -amount)
+        self.send("digital-option-placed", {"id": order_id}, request_id)
+        self.later(self.server.settle_delay(expired), self._settle_digital, order_id,
+                   body, match.group(4) == "C", price_at(active_id, time.time()),
+                   price_at(active_id, expired))
+
+    def _settle_digital(self, order_id, body, call, open_price, close_price):
+        amount = float(body["amount"])
+        payout = self.server.payout_for(self.server.outcome(call, open_price, close_price), amount)
+        self.server.move_balance(self.account, body.get("user_balance_id"), payout)
+        self.send("position-changed", {
+            "source": "digital-options", "instrument_type": "digital-option",
+            "raw_event": {"order_ids": [order_id]}, "status": "closed",
+            "close_reason": "expired", "invest": amount, "close_profit": payout,
+            "pnl_realized": payout - amount}, microserviceName="portfolio")
+
+
+class StandinServer(object):
+    """Threaded stand-in Exnova websocket server on localhost."""
+
+    def __init__(self, host="127.0.0.1", port=0, time_sync_interval=1.0, ssids=None,
+                 heartbeat_interval=None, candle_rate=1.0, quote_rate=1.0,
+                 latency=0.0, jitter=0.0, frames=None, replay_rate=1000.0,
+                 replay_loop=True, settle_after=None, payout=0.87):
+        """
+        :param int port: (optional) The port, 0 picks a free one.
+        :param float time_sync_interval: (optional) Seconds between timeSync frames.
+        :param ssids: (optional) Accepted ssids, any ssid when None.
+        :param float heartbeat_interval: (optional) Seconds between heartbeat
+            frames, none when None.
+        :param float candle_rate: (optional) candle-generated frames per second
+            per subscription.
+        :param float quote_rate: (optional) instrument-quotes-generated frames
+            per second per subscription.
+        :param float latency: (optional) Seconds every outbound frame is held.
+        :param float jitter: (optional) Extra random hold of up to ``jitter`` seconds.
+        :param frames: (optional) Recorded text frames replayed to every session
+            after login, see :func:`benchmarks.traffic.load_frames`.
+        :param float replay_rate: (optional) Replayed frames per second.
+        :param bool replay_loop: (optional) Start over at the end of ``frames``.
+        :param float settle_after: (optional) Seconds until options settle, the
+            option expiration when None.
+        :param float payout: (optional) Profit share paid on a win.
+        """
+        self.time_sync_interval = time_sync_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.candle_rate = candle_rate
+        self.quote_rate = quote_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.frames = list(frames) if frames else None
+        self.replay_rate = replay_rate
+        self.replay_loop = replay_loop
+        self.settle_after = settle_after
+        self.payout = payout
+        self.ssids = set(ssids) if ssids is not None else None
+        self.sessions = set()
+        self.received = []
+        self.sent_count = 0
+        self.heartbeat_rtt = deque(maxlen=10000)
+        self.__accounts = {}
+        self.__balance_ids = itertools.count(1001)
+        self.__ids = itertools.count(1)
+        self.__random = random.Random(7)
+        self.__lock = threading.Lock()
+        outer = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                session = Session(outer, self.request)
+                outer.sessions.add(session)
+                session.run()
+
+        self.__server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.__server.daemon_threads = True
+        self.host, self.port = self.__server.server_address[:2]
+        self.__thread = None
+
+    @property
+    def url(self):
+        """The websocket url for ``Exnova(..., wss_url=url)``."""
+        return "ws://%s:%d/echo/websocket" % (self.host, self.port)
+
+    def account_for(self, ssid):
+        """Get (or create) the account logged in with ``ssid``."""
+        if self.ssids is not None and ssid not in self.ssids:
+            return None
+        with self.__lock:
+            if ssid not in self.__accounts:
+                balance_id = next(self.__balance_ids)
+                balances = [{"id": balance_id, "type": 4, "amount": 10000.0, "currency": "USD"},
+                            {"id": balance_id + 500, "type": 1, "amount": 0.0, "currency": "USD"}]
+                self.__accounts[ssid] = {"ssid": ssid, "profile": {
+                    "balance": 10000.0, "balance_id": balance_id,
+                    "balance_type": 4, "balances": balances}}
+            return self.__accounts[ssid]
+
+    def move_balance(self, account, balance_id, amount):
+        """Add ``amount`` to a balance of ``account``, the practice one by default."""
+        with self.__lock:
+            balances = account["profile"]["balances"]
+            balance = next((b for b in balances if b["id"] == balance_id), balances[0])
+            balance["amount"] = round(balance["amount"] + amount, 2)
+            if balance["id"] == account["profile"]["balance_id"]:
+                account["profile"]["balance"] = balance["amount"]
+
+    def next_id(self):
+        with self.__lock:
+            return next(self.__ids)
+
+    def count_sent(self):
+        with self.__lock:
+            self.sent_count += 1
+
+    def delay(self):
+        """The hold of the next outbound frame in seconds."""
+        if not self.jitter:
+            return self.latency
+        with self.__lock:
+            return self.latency + self.__random.uniform(0, self.jitter)
+
+    def settle_delay(self, expired):
+        if self.settle_after is not None:
+            return self.settle_after
+        return max(0.0, expired - time.time())
+
+    @staticmethod
+    def outcome(call, open_price, close_price):
+        if close_price == open_price:
+            return "equal"
+        return "win" if (close_price > open_price) == call else "loose"
+
+    def payout_for(self, result, amount):
+        if result == "win":
+            return round(amount * (1 + self.payout), 2)
+        if result == "equal":
+            return amount
+        return 0.0
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        for session in list(self.sessions):
+            session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--time-sync", type=float, default=1.0)
+    parser.add_argument("--heartbeat", type=float, default=None)
+    parser.add_argument("--candle-rate", type=float, default=1.0)
+    parser.add_argument("--quote-rate", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--frames", help="recorded frames to replay, one per line")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="replay this many synthetic frames instead")
+    parser.add_argument("--replay-rate", type=float, default=1000.0)
+    parser.add_argument("--settle-after", type=float, default=None)
+    args = parser.parse_args()
+
+    frames = None
+    if args.frames:
+        from benchmarks.traffic import load_frames
+        frames = load_frames(args.frames)
+    elif args.synthetic:
+        from benchmarks.traffic import synthetic_frames
+        frames = synthetic_frames(args.synthetic)
+
+    server = StandinServer(
+        args.host, args.port, args.time_sync, heartbeat_interval=args.heartbeat,
+        candle_rate=args.candle_rate, quote_rate=args.quote_rate,
+        latency=args.latency, jitter=args.jitter, frames=frames,
+        replay_rate=args.replay_rate, settle_after=args.settle_after).start()
+    print("serving on %s" % server.url, flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        rtt = sorted(server.heartbeat_rtt)
+        print("%d frames received, %d sent" % (len(server.received), server.sent_count))
+        if rtt:
+            print("heartbeat rtt p50 %.1f ms  p99 %.1f ms"
+                  % (rtt[len(rtt) // 2], rtt[int(len(rtt) * 0.99)]))
+
+
+if __name__ == "__main__":
+    main()
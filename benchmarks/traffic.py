@@ -0,0 +1,112 @@
+"""Recorded and synthetic websocket traffic for the benchmarks."""
+
+import json
+import random
+
+import exnovaapi.constants as OP_code
+from exnovaapi.ws.capture import INBOUND, is_capture, read_capture
+
+# relative frequency of each frame type in a busy production session
+MIX = (
+    ("candle-generated", 55),
+    ("instrument-quotes-generated", 12),
+    ("live-deal-digital-option", 8),
+    ("client-price-generated", 6),
+    ("traders-mood-changed", 6),
+    ("leaderboard-deals-client", 3),
+    ("timeSync", 4),
+    ("heartbeat", 2),
+    ("position-changed", 2),
+    ("candles", 1),
+    ("socket-option-closed", 1),
+)
+
+
+def asset_names(count=130):
+    """Get ``count`` asset names known to :mod:`exnovaapi.constants`."""
+    return list(OP_code.ACTIVES)[:count]
+
+
+def _frame(name, asset, rnd, now):
+    active_id = OP_code.ACTIVES[asset]
+    price = round(1 + rnd.random(), 6)
+    if name == "candle-generated":
+        msg = {"active_id": active_id, "size": 60, "at": now * 1000000000,
+               "from": now - now % 60, "to": now - now % 60 + 60, "id": now // 60,
+               "open": price, "close": price, "min": price, "max": price,
+               "ask": price, "bid": price, "volume": rnd.randint(0, 50), "phase": "T"}
+    elif name == "instrument-quotes-generated":
+        msg = {"active": active_id, "kind": "digital-option",
+               "expiration": {"timestamp": now - now % 60 + 60, "period": 60},
+               "quotes": [{"symbols": ["do%sPT1MC%dSPT" % (asset, i)],
+                           "price": {"ask": 50 + i, "bid": 49 + i}} for i in range(8)]}
+    elif name == "live-deal-digital-option":
+        msg = {"instrument_active_id": active_id, "expiration_type": "PT1M",
+               "amount_enrolled": rnd.randint(1, 1000), "user_id": rnd.randint(1, 10 ** 8),
+               "instrument_dir": rnd.choice(("call", "put")), "created_at": now * 1000}
+    elif name == "client-price-generated":
+        msg = {"asset_id": active_id, "prices": [
+            {"strike": "SPT", "call": {"ask": 54.0, "bid": 50.0}, "put": {"ask": 55.0, "bid": 51.0}}]}
+    elif name == "traders-mood-changed":
+        msg = {"asset_id": active_id, "value": rnd.random()}
+    elif name == "leaderboard-deals-client":
+        msg = {"result": {"positional": {str(i): {"user_id": i, "score": rnd.random()} for i in range(20)}}}
+    elif name == "timeSync":
+        msg = now * 1000
+    elif name == "heartbeat":
+        msg = now * 1000
+    elif name == "position-changed":
+        msg = {"source": "binary-options", "external_id": rnd.randint(1, 10 ** 9), "status": "open"}
+    elif name == "candles":
+        msg = {"candles": [{"id": i, "from": now - 60 * i, "open": price, "close": price,
+                            "min": price, "max": price, "volume": 0} for i in range(100)]}
+    else:  # socket-option-closed
+        msg = {"id": rnd.randint(1, 10 ** 9), "win": "win", "sum": 1, "win_amount": 1.87}
+    frame = {"name": name, "msg": msg}
+    if name == "position-changed":
+        frame["microserviceName"] = "portfolio"
+    if name == "candles":
+        frame["request_id"] = str(rnd.randint(1, 10 ** 6))
+    return frame
+
+
+def synthetic_frames(count=20000, assets=130, seed=7):
+    """Generate ``count`` raw websocket frames following :data:`MIX`.
+
+    :returns: A list of JSON text frames.
+    """
+    rnd = random.Random(seed)
+    names = [name for name, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    pool = asset_names(assets)
+    now = 1700000000
+    frames = []
+    for i in range(count):
+        name = rnd.choices(names, weights)[0]
+        frames.append(json.dumps(_frame(name, rnd.choice(pool), rnd, now + i // 200),
+                                 separators=(",", ":")))
+    return frames
+
+
+def load_frames(path):
+    """Load recorded inbound frames.
+
+    Reads a websocket capture (see :mod:`exnovaapi.ws.capture`) or a text
+    file with one JSON frame per line.
+    """
+    if is_capture(path):
+        return [text for _, _, text in read_capture(path, INBOUND)]
+    with open(path) as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def prepare_api(api, frames, maxdict=100):
+    """Set up the stores the streaming handlers expect for ``frames``."""
+    for text in frames:
+        message = json.loads(text)
+        if message["name"] == "candle-generated":
+            active_id = message["msg"]["active_id"]
+            for name, value in OP_code.ACTIVES.items():
+                if value == active_id:
+                    api.real_time_candles_maxdict_table[name][message["msg"]["size"]] = maxdict
+                    break
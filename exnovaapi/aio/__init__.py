@@ -0,0 +1,4 @@
+"""Module for the asyncio Exnova API."""
+
+from exnovaapi.aio.client import AsyncExnova
+from exnovaapi.aio.websocket import ConnectionClosed
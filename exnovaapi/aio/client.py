@@ -0,0 +1,498 @@
+"""Module for the asyncio Exnova client."""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+
+import exnovaapi.constants as OP_code
+from exnovaapi.aio.websocket import ConnectionClosed, WebSocket
+from exnovaapi.expiration import get_digital_instrument_id
+from exnovaapi.state import ConnectionState
+from exnovaapi.ws.capture import INBOUND, OUTBOUND
+from exnovaapi.ws.chanels.buyv3 import Buyv3
+from exnovaapi.ws.chanels.candles import GetCandles
+from exnovaapi.ws.chanels.digital_option import Digital_options_place_digital_option
+from exnovaapi.ws.chanels.get_balances import Get_Balances
+from exnovaapi.ws.chanels.heartbeat import Heartbeat
+from exnovaapi.ws.chanels.ssid import Ssid
+from exnovaapi.ws.chanels.subscribe import Subscribe
+from exnovaapi.ws.chanels.unsubscribe import Unsubscribe
+from exnovaapi.ws.decoder import loads, peek_name
+from exnovaapi.ws.objects.profile import Profile
+from exnovaapi.ws.objects.timesync import TimeSync
+from exnovaapi.ws.pending import PendingRequests
+from exnovaapi.ws.received.heartbeat import heartbeat
+from exnovaapi.ws.received.profile import profile
+from exnovaapi.ws.received.time_sync import time_sync
+
+# settled option/order events nobody awaited yet, oldest dropped first
+MAX_SETTLED = 10000
+
+PORTFOLIO_INSTRUMENTS = ("cfd", "forex", "crypto",
+                         "digital-option", "turbo-option", "binary-option")
+
+
+class AsyncExnova(object):
+    """Exnova client running on one asyncio event loop.
+
+    The websocket is read by a single task and every operation is a
+    coroutine waiting on an :class:`asyncio.Future`, so thousands of
+    requests can be in flight without a thread each. Requests are built by
+    the same chanels as :class:`ExnovaAPI <exnovaapi.api.ExnovaAPI>`; this
+    class provides the ``send_websocket_request``, ``pending``,
+    ``timesync``, ``profile`` and ``state`` they use.
+
+    Only the http login runs on a worker thread, once per missing ssid.
+    """
+
+    def __init__(self, email, password, host="ws.trade.exnova.com", wss_url=None,
+                 state=None, request_timeout=30, connect_timeout=30):
+        """
+        :param str email: The account email.
+        :param str password: The account password.
+        :param str host: (optional) The Exnova websocket host.
+        :param str wss_url: (optional) The full websocket url, e.g. a local
+            stand-in server.
+        :param state: (optional) The :class:`ConnectionState
+            <exnovaapi.state.ConnectionState>`, a set ``SSID`` skips the login.
+        :param float request_timeout: (optional) Seconds to wait for a reply.
+        :param float connect_timeout: (optional) Seconds to wait for the
+            websocket, the profile and the first timeSync.
+        """
+        self.email = email
+        self.password = password
+        self.host = host
+        self.wss_url = wss_url or "wss://{host}/echo/websocket".format(host=host)
+        self.state = state if state is not None else ConnectionState()
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.timesync = TimeSync()
+        self.profile = Profile()
+        self.pending = PendingRequests()
+        self.ignored_messages = set()
+        self.capture = None
+        self.websocket = None
+        self.reader_task = None
+        self.__settled = OrderedDict()
+        self.__streams = {}
+        self.__profile_waiter = None
+        self.__synced = None
+
+    # ------------------------------------------------------------ transport
+    def send_websocket_request(self, name, msg, request_id="", priority=None):
+        """Write a frame to the websocket transport.
+
+        The frame goes straight into the transport buffer, there is no
+        writer thread to prioritise for, so ``priority`` is ignored.
+
+        :param str name: The websocket request name.
+        :param dict msg: The websocket request msg.
+        :param str request_id: (optional) The id the server echoes in its reply.
+        :param int priority: (optional) Accepted for the chanels, unused.
+
+        :returns: The request id.
+        """
+        data = json.dumps(dict(name=name, msg=msg, request_id=request_id))
+        if self.capture is not None:
+            self.capture.record(OUTBOUND, data)
+        if self.websocket is None:
+            raise ConnectionClosed("websocket is not connected")
+        self.websocket.send(data)
+        return request_id
+
+    @property
+    def heartbeat(self):
+        return Heartbeat(self)
+
+    async def _read_loop(self):
+        reason = "websocket connection lost"
+        try:
+            while True:
+                text = await self.websocket.recv()
+                if self.capture is not None:
+                    self.capture.record(INBOUND, text)
+                if self.ignored_messages and peek_name(text) in self.ignored_messages:
+                    continue
+                try:
+                    self._on_message(loads(text))
+                except Exception:
+                    logging.getLogger(__name__).exception('**warning** bad frame ' + text[:200])
+        except ConnectionClosed as e:
+            reason = str(e)
+        finally:
+            self._connection_lost(reason)
+
+    def _on_message(self, message):
+        name = message.get("name")
+        if name == "candle-generated":
+            self._on_candle(message["msg"])
+        elif name == "timeSync":
+            time_sync(self, message)
+            if self.__synced is not None and not self.__synced.done():
+                self.__synced.set_result(True)
+        elif name == "heartbeat":
+            heartbeat(self, message)
+        elif name == "profile":
+            profile(self, message)
+            if self.__profile_waiter is not None and not self.__profile_waiter.done():
+                self.__profile_waiter.set_result(message["msg"])
+        elif name == "socket-option-closed":
+            self._settle(("option", int(message["msg"]["id"])), message["msg"])
+        elif name == "position-changed":
+            msg = message["msg"]
+            if message.get("microserviceName") == "portfolio" and \
+                    msg.get("source") in ("digital-options", "trading"):
+                self._settle(("digital", int(msg["raw_event"]["order_ids"][0])), msg)
+        request_id = message.get("request_id")
+        # "result" is the bare ack sent ahead of some replies
+        if request_id and name != "result":
+            self.pending.resolve(request_id, message)
+
+    def _connection_lost(self, reason):
+        self.state.check_websocket_if_connect = 0
+        self.state.websocket_error_reason = reason
+        error = ConnectionClosed(reason)
+        self.pending.fail_all(error)
+        for future in [self.__profile_waiter, self.__synced] + list(self.__settled.values()):
+            if future is not None and not future.done():
+                future.set_exception(error)
+                # retrieved here, so futures nobody awaits log nothing
+                future.exception()
+        self.__settled.clear()
+        for queues in self.__streams.values():
+            for queue in queues:
+                _offer(queue, None)
+
+    # ------------------------------------------------------------ connection
+    async def _login(self):
+        from exnovaapi.api import ExnovaAPI
+        http = ExnovaAPI(self.host, self.email, self.password)
+        response = await asyncio.to_thread(http.get_ssid)
+        try:
+            self.state.SSID = response.cookies["ssid"]
+        except Exception:
+            return False, getattr(response, "text", str(response))
+        return True, None
+
+    async def _open(self):
+        loop = asyncio.get_running_loop()
+        self.pending = PendingRequests(future_factory=loop.create_future,
+                                       on_round_trip=self.timesync.clock.observe_rtt)
+        self.__settled.clear()
+        self.__profile_waiter = loop.create_future()
+        self.__synced = loop.create_future()
+        self.websocket = await WebSocket.connect(self.wss_url, timeout=self.connect_timeout)
+        self.state.check_websocket_if_connect = 1
+        self.state.websocket_error_reason = None
+        self.reader_task = loop.create_task(self._read_loop())
+        Ssid(self)(self.state.SSID)
+        await self.websocket.drain()
+        return await asyncio.wait_for(asyncio.shield(self.__profile_waiter),
+                                      self.connect_timeout)
+
+    async def connect(self):
+        """Log in, open the websocket and subscribe the portfolio events.
+
+        :returns: ``(True, None)`` or ``(False, reason)``.
+        """
+        await self.close()
+        try:
+            for attempt in range(2):
+                if self.state.SSID is None:
+                    ok, reason = await self._login()
+                    if not ok:
+                        return False, reason
+                if await self._open():
+                    break
+                # the ssid expired, log in again once
+                await self.close()
+                self.state.SSID = None
+            else:
+                return False, "Ssid rejected."
+            await asyncio.wait_for(asyncio.shield(self.__synced), self.connect_timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            await self.close()
+            return False, str(e) or "Server time sync timeout."
+
+        self._position_changed("subscribeMessage", self.state.balance_id)
+        self.send_websocket_request("setOptions", {"sendResults": True},
+                                    request_id=self.pending.next_request_id())
+        for active_id, size in self.__streams:
+            Subscribe(self)(active_id, size)
+        await self.websocket.drain()
+        return True, None
+
+    def _position_changed(self, main_name, balance_id):
+        for instrument_type in PORTFOLIO_INSTRUMENTS:
+            self.send_websocket_request(main_name, {
+                "name": "portfolio.position-changed",
+                "version": "2.0",
+                "params": {"routingFilters": {
+                    "instrument_type": instrument_type,
+                    "user_balance_id": balance_id}}},
+                request_id=self.pending.next_request_id())
+
+    async def change_balance(self, Balance_MODE):
+        """Trade on another balance of the account.
+
+        :param str Balance_MODE: ``"REAL"``, ``"PRACTICE"`` or ``"TOURNAMENT"``.
+        """
+        types = {"REAL": 1, "PRACTICE": 4, "TOURNAMENT": 2}
+        if Balance_MODE not in types:
+            raise ValueError("doesn't have this mode: " + str(Balance_MODE))
+        balance_id = None
+        for balance in self.profile.balances:
+            if balance["type"] == types[Balance_MODE]:
+                balance_id = balance["id"]
+        if self.state.balance_id != None:
+            self._position_changed("unsubscribeMessage", self.state.balance_id)
+        self.state.balance_id = balance_id
+        self._position_changed("subscribeMessage", balance_id)
+        await self.websocket.drain()
+
+    def check_connect(self):
+        """
+        :returns: True while the websocket is open.
+        """
+        return bool(self.state.check_websocket_if_connect) and self.websocket is not None \
+            and not self.websocket.closed
+
+    async def close(self):
+        """Close the websocket and fail everything still waiting on it."""
+        websocket, self.websocket = self.websocket, None
+        if websocket is not None:
+            await websocket.close()
+        task, self.reader_task = self.reader_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def __aenter__(self):
+        ok, reason = await self.connect()
+        if not ok:
+            raise ConnectionError(reason)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # -------------------------------------------------------------- requests
+    async def _request(self, send, name, timeout=None):
+        # send(request_id) writes the frame, the reply message is returned
+        timeout = self.request_timeout if timeout is None else timeout
+        request_id, future = self.pending.expect()
+        try:
+            send(request_id)
+            await self.websocket.drain()
+        except BaseException:
+            self.pending.discard(request_id)
+            raise
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.pending.discard(request_id)
+            logging.error('**warning** ' + name + ' late ' + str(timeout) + ' sec')
+            return None
+
+    def get_server_timestamp(self):
+        """
+        :returns: The last server time in seconds.
+        """
+        return self.timesync.server_timestamp
+
+    async def get_candles(self, ACTIVES, interval, count, endtime):
+        """Get closed candles, like :meth:`Exnova.get_candles
+        <exnovaapi.stable_api.Exnova.get_candles>`.
+
+        :param str ACTIVES: The asset name.
+        :param int interval: The candle size in seconds.
+        :param int count: The number of candles.
+        :param int endtime: The timestamp of the last candle.
+
+        :returns: The list of candle dicts, or None on timeout.
+        """
+        active_id = OP_code.ACTIVES[ACTIVES]
+        reply = await self._request(
+            lambda request_id: GetCandles(self)(active_id, interval, count, endtime, request_id),
+            "get_candles")
+        if reply is None:
+            return None
+        return reply["msg"].get("candles")
+
+    async def get_balances(self):
+        """
+        :returns: The balances reply message, or None on timeout.
+        """
+        return await self._request(lambda request_id: Get_Balances(self)(request_id),
+                                   "get_balances")
+
+    async def get_balance(self):
+        """
+        :returns: The amount of the selected balance.
+        """
+        balances = await self.get_balances()
+        if balances is None:
+            return None
+        for balance in balances["msg"]:
+            if balance["id"] == self.state.balance_id:
+                return balance["amount"]
+
+    async def buy(self, price, ACTIVES, ACTION, expirations):
+        """Open a binary/turbo option.
+
+        :param float price: The amount.
+        :param str ACTIVES: The asset name.
+        :param str ACTION: ``"call"`` or ``"put"``.
+        :param int expirations: The duration in minutes.
+
+        :returns: ``(True, option_id)`` or ``(False, message)``.
+        """
+        reply = await self._request(
+            lambda request_id: Buyv3(self)(float(price), OP_code.ACTIVES[ACTIVES],
+                                           str(ACTION), int(expirations), request_id),
+            "buy", 5)
+        if reply is None:
+            return False, None
+        option = reply["msg"]
+        if "message" in option:
+            logging.error('**warning** buy' + str(option["message"]))
+            return False, option["message"]
+        return True, option["id"]
+
+    async def buy_digital_spot(self, active, amount, action, duration):
+        """Open a digital spot option.
+
+        :param str active: The asset name.
+        :param float amount: The amount.
+        :param str action: ``"call"`` or ``"put"``.
+        :param int duration: The duration in minutes.
+
+        :returns: ``(True, order_id)`` or ``(False, reason)``.
+        """
+        action = action.lower()
+        if action not in ("call", "put"):
+            logging.error('buy_digital_spot active error')
+            return -1, None
+        instrument_id = get_digital_instrument_id(
+            active, "C" if action == "call" else "P", duration,
+            int(self.timesync.server_timestamp))
+        reply = await self._request(
+            lambda request_id: Digital_options_place_digital_option(self)(
+                instrument_id, amount, request_id=request_id),
+            "buy_digital_spot")
+        if reply is None:
+            return False, None
+        order_id = reply["msg"].get("id")
+        if isinstance(order_id, int):
+            return True, order_id
+        return False, {"code": "error_place_digital_order",
+                       "message": reply["msg"].get("message")}
+
+    # ---------------------------------------------------------------- events
+    def _event(self, key):
+        future = self.__settled.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.__settled[key] = future
+            while len(self.__settled) > MAX_SETTLED:
+                self.__settled.popitem(last=False)
+        return future
+
+    def _settle(self, key, msg):
+        future = self._event(key)
+        if not future.done():
+            future.set_result(msg)
+
+    async def _wait_event(self, key, timeout):
+        future = self._event(key)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        finally:
+            if future.done() or timeout is not None:
+                self.__settled.pop(key, None)
+
+    async def check_win(self, option_id, timeout=None):
+        """Wait for a binary/turbo option to close.
+
+        Resolved by its ``socket-option-closed`` event, which may have
+        arrived before the call.
+
+        :param int option_id: The id from :meth:`buy`.
+        :param float timeout: (optional) Seconds, forever when omitted.
+
+        :returns: ``(win, profit)`` like :meth:`Exnova.check_win_v4
+            <exnovaapi.stable_api.Exnova.check_win_v4>`.
+        """
+        x = await self._wait_event(("option", int(option_id)), timeout)
+        return x['win'], (0 if x['win'] == 'equal' else float(x['sum']) * -1 if x['win'] == 'loose' else float(x['win_amount']) - float(x['sum']))
+
+    async def check_win_digital(self, order_id, timeout=None):
+        """Wait for a digital option to close.
+
+        Resolved by its portfolio ``position-changed`` event.
+
+        :param int order_id: The id from :meth:`buy_digital_spot`.
+        :param float timeout: (optional) Seconds, forever when omitted.
+
+        :returns: ``(True, profit)``, or ``(False, None)`` when it did not expire.
+        """
+        order_data = await self._wait_event(("digital", int(order_id)), timeout)
+        if order_data["status"] == "closed":
+            if order_data["close_reason"] == "expired":
+                return True, order_data["close_profit"] - order_data["invest"]
+            elif order_data["close_reason"] == "default":
+                return True, order_data["pnl_realized"]
+        return False, None
+
+    # --------------------------------------------------------------- streams
+    def _on_candle(self, msg):
+        queues = self.__streams.get((int(msg["active_id"]), int(msg["size"])))
+        if queues:
+            for queue in queues:
+                _offer(queue, msg)
+
+    async def candles(self, ACTIVES, size, maxsize=100):
+        """Iterate the live ``candle-generated`` frames of an asset.
+
+        The first iterator of an asset and size subscribes, the last one
+        to finish unsubscribes. A consumer more than ``maxsize`` frames
+        behind loses the oldest ones.
+
+        :param str ACTIVES: The asset name.
+        :param int size: The candle size in seconds.
+        :param int maxsize: (optional) Frames buffered per iterator.
+
+        :returns: An async iterator of candle dicts.
+        :raises ConnectionClosed: When the websocket closes.
+        """
+        key = (OP_code.ACTIVES[ACTIVES], int(size))
+        queue = asyncio.Queue(maxsize)
+        queues = self.__streams.setdefault(key, set())
+        if not queues:
+            Subscribe(self)(key[0], key[1])
+            await self.websocket.drain()
+        queues.add(queue)
+        try:
+            while True:
+                candle = await queue.get()
+                if candle is None:
+                    raise ConnectionClosed(self.state.websocket_error_reason or
+                                           "websocket connection lost")
+                yield candle
+        finally:
+            queues.discard(queue)
+            if not queues:
+                del self.__streams[key]
+                if self.check_connect():
+                    Unsubscribe(self)(key[0], key[1])
+
+
+def _offer(queue, item):
+    # put without waiting, dropping the oldest item of a full queue
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
@@ -0,0 +1,189 @@
+"""Module for a minimal asyncio websocket client (RFC 6455)."""
+
+import asyncio
+import base64
+import hashlib
+import os
+import socket
+import ssl
+import struct
+from urllib.parse import urlsplit
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class ConnectionClosed(ConnectionError):
+    """The websocket was closed by either side."""
+
+
+def _mask(payload, key):
+    # one big integer xor instead of a per byte loop
+    length = len(payload)
+    if not length:
+        return payload
+    key = (key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "little") ^
+            int.from_bytes(key, "little")).to_bytes(length, "little")
+
+
+def _frame(opcode, payload):
+    length = len(payload)
+    if length < 126:
+        head = struct.pack(">BB", 0x80 | opcode, 0x80 | length)
+    elif length < 65536:
+        head = struct.pack(">BBH", 0x80 | opcode, 0x80 | 126, length)
+    else:
+        head = struct.pack(">BBQ", 0x80 | opcode, 0x80 | 127, length)
+    key = os.urandom(4)
+    return head + key + _mask(payload, key)
+
+
+class WebSocket(object):
+    """Client side websocket on an asyncio stream.
+
+    Only what the Exnova protocol needs: text frames, fragmented messages,
+    ping/pong and the close handshake. Frames are written straight into
+    the transport buffer, so :meth:`send` never blocks; await
+    :meth:`drain` to wait for the buffer to empty.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    @classmethod
+    async def connect(cls, url, origin=None, ssl_context=None, timeout=30):
+        """Open a websocket.
+
+        :param str url: The ``ws://`` or ``wss://`` url.
+        :param str origin: (optional) The Origin header, ``https://<host>``
+            when omitted.
+        :param ssl_context: (optional) The :class:`ssl.SSLContext` for
+            ``wss://``. Like the sync client, certificates are not checked
+            by default.
+        :param float timeout: (optional) Seconds for the TCP connect and
+            the handshake.
+
+        :returns: The connected :class:`WebSocket`.
+        """
+        parts = urlsplit(url)
+        secure = parts.scheme == "wss"
+        port = parts.port or (443 if secure else 80)
+        if secure and ssl_context is None:
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            parts.hostname, port, ssl=ssl_context if secure else None), timeout)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        writer.write((
+            "GET %s HTTP/1.1\r\n"
+            "Host: %s\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            "Sec-WebSocket-Key: %s\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            "Origin: %s\r\n\r\n"
+            % (path, parts.netloc, key, origin or "https://" + parts.hostname)).encode())
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            writer.close()
+            raise ConnectionClosed("websocket handshake failed") from e
+        lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+        if lines[0].split(" ")[1:2] != ["101"] or headers.get("sec-websocket-accept") != accept:
+            writer.close()
+            raise ConnectionClosed("websocket handshake failed: " + lines[0])
+        return cls(reader, writer)
+
+    def send(self, text):
+        """Queue a text frame on the transport.
+
+        :param str text: The message.
+        """
+        if self.closed:
+            raise ConnectionClosed("websocket is closed")
+        self.writer.write(_frame(OP_TEXT, text.encode("utf-8")))
+
+    async def drain(self):
+        """Wait until the transport buffer is below its high water mark."""
+        await self.writer.drain()
+
+    async def _read_frame(self):
+        head = await self.reader.readexactly(2)
+        opcode = head[0] & 0x0F
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await self.reader.readexactly(8))[0]
+        key = await self.reader.readexactly(4) if head[1] & 0x80 else None
+        payload = await self.reader.readexactly(length) if length else b""
+        if key:
+            payload = _mask(payload, key)
+        return bool(head[0] & 0x80), opcode, payload
+
+    async def recv(self):
+        """Read the next text message, answering pings on the way.
+
+        :returns: The message as str.
+        :raises ConnectionClosed: When the websocket is closed.
+        """
+        parts = []
+        try:
+            while True:
+                fin, opcode, payload = await self._read_frame()
+                if opcode == OP_PING:
+                    if not self.closed:
+                        self.writer.write(_frame(OP_PONG, payload))
+                    continue
+                if opcode == OP_PONG:
+                    continue
+                if opcode == OP_CLOSE:
+                    if not self.closed:
+                        self.closed = True
+                        self.writer.write(_frame(OP_CLOSE, payload[:2]))
+                    raise ConnectionClosed("websocket closed by server")
+                parts.append(payload)
+                if fin:
+                    return b"".join(parts).decode("utf-8")
+        except ConnectionClosed:
+            raise
+        except (asyncio.IncompleteReadError, OSError) as e:
+            self.closed = True
+            raise ConnectionClosed(str(e) or "websocket connection lost") from e
+
+    async def close(self):
+        """Send the close frame and close the transport."""
+        if not self.closed:
+            self.closed = True
+            try:
+                self.writer.write(_frame(OP_CLOSE, struct.pack(">H", 1000)))
+            except (OSError, RuntimeError):
+                pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (OSError, ConnectionError):
+            pass
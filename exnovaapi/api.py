@@ -23,52 +23,81 @@ from exnovaapi.http.buyback import Buyback
 from exnovaapi.http.changebalance import Changebalance
 from exnovaapi.http.events import Events
 from exnovaapi.ws.client import WebsocketClient
-from exnovaapi.ws.chanels.get_balances import *
-
-from exnovaapi.ws.chanels.ssid import Ssid
-from exnovaapi.ws.chanels.subscribe import *
-from exnovaapi.ws.chanels.unsubscribe import *
-from exnovaapi.ws.chanels.setactives import SetActives
-from exnovaapi.ws.chanels.candles import GetCandles
-from exnovaapi.ws.chanels.buyv2 import Buyv2
-from exnovaapi.ws.chanels.buyv3 import *
-from exnovaapi.ws.chanels.user import *
-from exnovaapi.ws.chanels.api_game_betinfo import Game_betinfo
-from exnovaapi.ws.chanels.instruments import Get_instruments
-from exnovaapi.ws.chanels.get_financial_information import GetFinancialInformation
-from exnovaapi.ws.chanels.strike_list import Strike_list
-from exnovaapi.ws.chanels.leaderboard import Leader_Board
-
-from exnovaapi.ws.chanels.traders_mood import Traders_mood_subscribe
-from exnovaapi.ws.chanels.traders_mood import Traders_mood_unsubscribe
-from exnovaapi.ws.chanels.technical_indicators import Technical_indicators
-from exnovaapi.ws.chanels.buy_place_order_temp import Buy_place_order_temp
-from exnovaapi.ws.chanels.get_order import Get_order
-from exnovaapi.ws.chanels.get_deferred_orders import GetDeferredOrders
-from exnovaapi.ws.chanels.get_positions import *
-
-from exnovaapi.ws.chanels.get_available_leverages import Get_available_leverages
-from exnovaapi.ws.chanels.cancel_order import Cancel_order
-from exnovaapi.ws.chanels.close_position import Close_position
-from exnovaapi.ws.chanels.get_overnight_fee import Get_overnight_fee
-from exnovaapi.ws.chanels.heartbeat import Heartbeat
-
-
-from exnovaapi.ws.chanels.digital_option import *
-from exnovaapi.ws.chanels.api_game_getoptions import *
-from exnovaapi.ws.chanels.sell_option import Sell_Option
-from exnovaapi.ws.chanels.sell_digital_option import Sell_Digital_Option
-from exnovaapi.ws.chanels.change_tpsl import Change_Tpsl
-from exnovaapi.ws.chanels.change_auto_margin_call import ChangeAutoMarginCall
-from exnovaapi.ws.chanels.buy_blitz_option import BuyBlitzOption
-
+from exnovaapi.ws.chanels import LazyChanel
 from exnovaapi.ws.objects.timesync import TimeSync
 from exnovaapi.ws.objects.profile import Profile
 from exnovaapi.ws.objects.candles import Candles
 from exnovaapi.ws.objects.listinfodata import ListInfoData
 from exnovaapi.ws.objects.betinfo import Game_betinfo_data
-import exnovaapi.global_value as global_value
+from exnovaapi.ws.pending import PendingRequests
+from exnovaapi.ws.notifier import Notifier, CONNECTION
+from exnovaapi.ws.writer import WebsocketWriter, priority_for
+from exnovaapi.ws.callbacks import CallbackExecutor
+from exnovaapi.ws.capture import OUTBOUND
+from exnovaapi.state import ConnectionState
+from exnovaapi.candles import CandleRing, DEFAULT_CAPACITY
+from exnovaapi.store import BoundedStore
 from collections import defaultdict
+from functools import partial
+
+# LazyChanel stand-ins for the chanel classes, each module is imported by
+# the first request that needs it
+Get_Balances = LazyChanel("get_balances", "Get_Balances")
+Ssid = LazyChanel("ssid", "Ssid")
+Subscribe = LazyChanel("subscribe", "Subscribe")
+SubscribeDigitalPriceSplitter = LazyChanel("subscribe", "SubscribeDigitalPriceSplitter")
+Subscribe_Instrument_Quites_Generated = LazyChanel("subscribe", "Subscribe_Instrument_Quites_Generated")
+Subscribe_candles = LazyChanel("subscribe", "Subscribe_candles")
+Subscribe_commission_changed = LazyChanel("subscribe", "Subscribe_commission_changed")
+Subscribe_live_deal = LazyChanel("subscribe", "Subscribe_live_deal")
+Subscribe_top_assets_updated = LazyChanel("subscribe", "Subscribe_top_assets_updated")
+Unscribe_live_deal = LazyChanel("unsubscribe", "Unscribe_live_deal")
+Unsubscribe = LazyChanel("unsubscribe", "Unsubscribe")
+UnsubscribeDigitalPriceSplitter = LazyChanel("unsubscribe", "UnsubscribeDigitalPriceSplitter")
+Unsubscribe_Instrument_Quites_Generated = LazyChanel("unsubscribe", "Unsubscribe_Instrument_Quites_Generated")
+Unsubscribe_candles = LazyChanel("unsubscribe", "Unsubscribe_candles")
+Unsubscribe_commission_changed = LazyChanel("unsubscribe", "Unsubscribe_commission_changed")
+Unsubscribe_top_assets_updated = LazyChanel("unsubscribe", "Unsubscribe_top_assets_updated")
+SetActives = LazyChanel("setactives", "SetActives")
+GetCandles = LazyChanel("candles", "GetCandles")
+Buyv2 = LazyChanel("buyv2", "Buyv2")
+Buyv3 = LazyChanel("buyv3", "Buyv3")
+Buyv3_by_raw_expired = LazyChanel("buyv3", "Buyv3_by_raw_expired")
+Get_user_profile_client = LazyChanel("user", "Get_user_profile_client")
+Get_users_availability = LazyChanel("user", "Get_users_availability")
+Request_leaderboard_userinfo_deals_client = LazyChanel("user", "Request_leaderboard_userinfo_deals_client")
+Game_betinfo = LazyChanel("api_game_betinfo", "Game_betinfo")
+Get_instruments = LazyChanel("instruments", "Get_instruments")
+GetFinancialInformation = LazyChanel("get_financial_information", "GetFinancialInformation")
+Strike_list = LazyChanel("strike_list", "Strike_list")
+Leader_Board = LazyChanel("leaderboard", "Leader_Board")
+Traders_mood_subscribe = LazyChanel("traders_mood", "Traders_mood_subscribe")
+Traders_mood_unsubscribe = LazyChanel("traders_mood", "Traders_mood_unsubscribe")
+Technical_indicators = LazyChanel("technical_indicators", "Technical_indicators")
+Buy_place_order_temp = LazyChanel("buy_place_order_temp", "Buy_place_order_temp")
+Get_order = LazyChanel("get_order", "Get_order")
+GetDeferredOrders = LazyChanel("get_deferred_orders", "GetDeferredOrders")
+Get_digital_position = LazyChanel("get_positions", "Get_digital_position")
+Get_position = LazyChanel("get_positions", "Get_position")
+Get_position_history = LazyChanel("get_positions", "Get_position_history")
+Get_position_history_v2 = LazyChanel("get_positions", "Get_position_history_v2")
+Get_positions = LazyChanel("get_positions", "Get_positions")
+Get_available_leverages = LazyChanel("get_available_leverages", "Get_available_leverages")
+Cancel_order = LazyChanel("cancel_order", "Cancel_order")
+Close_position = LazyChanel("close_position", "Close_position")
+Get_overnight_fee = LazyChanel("get_overnight_fee", "Get_overnight_fee")
+Heartbeat = LazyChanel("heartbeat", "Heartbeat")
+DigitalOptionsPlaceDigitalOptionV2 = LazyChanel("digital_option", "DigitalOptionsPlaceDigitalOptionV2")
+Digital_options_close_position = LazyChanel("digital_option", "Digital_options_close_position")
+Digital_options_place_digital_option = LazyChanel("digital_option", "Digital_options_place_digital_option")
+Get_options = LazyChanel("api_game_getoptions", "Get_options")
+Get_options_v2 = LazyChanel("api_game_getoptions", "Get_options_v2")
+Sell_Option = LazyChanel("sell_option", "Sell_Option")
+Sell_Digital_Option = LazyChanel("sell_digital_option", "Sell_Digital_Option")
+Change_Tpsl = LazyChanel("change_tpsl", "Change_Tpsl")
+ChangeAutoMarginCall = LazyChanel("change_auto_margin_call", "ChangeAutoMarginCall")
+BuyBlitzOption = LazyChanel("buy_blitz_option", "BuyBlitzOption")
+
 
 
 def nested_dict(n, type):
@@ -83,87 +112,46 @@ def nested_dict(n, type):
 # See: https://urllib3.readthedocs.org/en/latest/security.html
 requests.packages.urllib3.disable_warnings()  # pylint: disable=no-member
 
+# caps of the stores keyed by ids the server never repeats
+RESULT_MAXSIZE = 5000
+RESULT_TTL = 6 * 3600
+QUOTES_MAXSIZE = 512
+QUOTES_TTL = 600
+LIVE_DEAL_MAXLEN = 1000
+
+# ExnovaAPI attributes holding a BoundedStore, see store_stats
+BOUNDED_STORES = (
+    "socket_option_opened",
+    "socket_option_closed",
+    "instrument_quotes_generated_raw_data",
+    "order_async",
+    "order_binary",
+    "technical_indicators",
+    "digital_option_placed_id",
+    "buy_multi_option",
+)
+
 
 class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
     """Class for communication with exnova API."""
 
     # pylint: disable=too-many-public-methods
-    socket_option_opened = {}
-    socket_option_closed = {}
-    timesync = TimeSync()
-    profile = Profile()
-    candles = Candles()
-    listinfodata = ListInfoData()
-    api_option_init_all_result = []
-    api_option_init_all_result_v2 = []
-    # for digital
-    underlying_list_data = None
-    position_changed = None
-    instrument_quites_generated_data = nested_dict(2, dict)
-    instrument_quotes_generated_raw_data = nested_dict(2, dict)
-    instrument_quites_generated_timestamp = nested_dict(2, dict)
-    strike_list = None
-    leaderboard_deals_client = None
-    #position_changed_data = nested_dict(2, dict)
-    # microserviceName_binary_options_name_option=nested_dict(2,dict)
-    order_async = nested_dict(2, dict)
-    order_binary = {}
-    game_betinfo = Game_betinfo_data()
-    instruments = None
-    financial_information = None
-    buy_id = None
-    buy_order_id = None
-    traders_mood = {}  # get hight(put) %
-    technical_indicators = {}
-    order_data = None
-    positions = None
-    position = None
-    deferred_orders = None
-    position_history = None
-    position_history_v2 = None
-    available_leverages = None
-    order_canceled = None
-    close_position_data = None
-    overnight_fee = None
-    # ---for real time
-    digital_option_placed_id = {}
-    live_deal_data = nested_dict(3, deque)
-
-    subscribe_commission_changed_data = nested_dict(2, dict)
-    real_time_candles = nested_dict(3, dict)
-    real_time_candles_maxdict_table = nested_dict(2, dict)
-    candle_generated_check = nested_dict(2, dict)
-    candle_generated_all_size_check = nested_dict(1, dict)
-    # ---for api_game_getoptions_result
-    api_game_getoptions_result = None
-    sold_options_respond = None
-    sold_digital_options_respond = None
-    tpsl_changed_respond = None
-    auto_margin_call_changed_respond = None
-    top_assets_updated_data = {}
-    get_options_v2_data = None
-    # --for binary option multi buy
-    buy_multi_result = None
-    buy_multi_option = {}
-    #
-    result = None
-    training_balance_reset_request = None
-    balances_raw = None
-    user_profile_client = None
-    leaderboard_userinfo_deals_client = None
-    users_availability = None
-    # ------------------
-    digital_payout = None
-
-    def __init__(self, host, username, password, proxies=None):
+
+    def __init__(self, host, username, password, proxies=None, state=None, wss_url=None):
         """
         :param str host: The hostname or ip address of a exnova server.
         :param str username: The username of a exnova server.
         :param str password: The password of a exnova server.
         :param dict proxies: (optional) The http request proxies.
+        :param state: (optional) The :class:`ConnectionState
+            <exnovaapi.state.ConnectionState>` to share across reconnects.
+        :param str wss_url: (optional) The websocket url, derived from
+            ``host`` when None.
         """
+        self.state = state if state is not None else ConnectionState()
+        self.host = host
         self.https_url = "https://{host}/api".format(host=host)
-        self.wss_url = "wss://{host}/echo/websocket".format(host=host)
+        self.wss_url = wss_url or "wss://{host}/echo/websocket".format(host=host)
         self.websocket_client = None
         self.session = requests.Session()
         self.session.verify = False
@@ -180,6 +168,90 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
         self.buy_successful = None
         self.__active_account_type = None
 
+        # websocket stores, per connection so instances do not share them
+        self.socket_option_opened = BoundedStore(RESULT_MAXSIZE, RESULT_TTL)
+        self.socket_option_closed = BoundedStore(RESULT_MAXSIZE, RESULT_TTL)
+        self.timesync = TimeSync()
+        self.profile = Profile()
+        self.candles = Candles()
+        self.listinfodata = ListInfoData()
+        self.api_option_init_all_result = []
+        self.api_option_init_all_result_v2 = []
+        # for digital
+        self.underlying_list_data = None
+        self.position_changed = None
+        self.instrument_quites_generated_data = nested_dict(2, dict)
+        # whole raw messages, dropped once the active stops quoting
+        self.instrument_quotes_generated_raw_data = BoundedStore(
+            QUOTES_MAXSIZE, QUOTES_TTL, partial(defaultdict, dict))
+        self.instrument_quites_generated_timestamp = nested_dict(2, dict)
+        self.strike_list = None
+        self.leaderboard_deals_client = None
+        #position_changed_data = nested_dict(2, dict)
+        # microserviceName_binary_options_name_option=nested_dict(2,dict)
+        self.order_async = BoundedStore(RESULT_MAXSIZE, RESULT_TTL, partial(defaultdict, dict))
+        self.order_binary = BoundedStore(RESULT_MAXSIZE, RESULT_TTL)
+        self.game_betinfo = Game_betinfo_data()
+        self.instruments = None
+        self.financial_information = None
+        self.buy_id = None
+        self.buy_order_id = None
+        self.traders_mood = {}  # get hight(put) %
+        self.technical_indicators = BoundedStore(RESULT_MAXSIZE, RESULT_TTL)
+        self.order_data = None
+        self.positions = None
+        self.position = None
+        self.deferred_orders = None
+        self.position_history = None
+        self.position_history_v2 = None
+        self.available_leverages = None
+        self.order_canceled = None
+        self.close_position_data = None
+        self.overnight_fee = None
+        # ---for real time
+        self.digital_option_placed_id = BoundedStore(RESULT_MAXSIZE, RESULT_TTL)
+        self.live_deal_data = nested_dict(3, partial(deque, maxlen=LIVE_DEAL_MAXLEN))
+
+        self.subscribe_commission_changed_data = nested_dict(2, dict)
+        self.real_time_candles = nested_dict(1, dict)
+        self.real_time_candles_maxdict_table = nested_dict(2, dict)
+        self.candle_generated_check = nested_dict(2, dict)
+        self.candle_generated_all_size_check = nested_dict(1, dict)
+        # ---for api_game_getoptions_result
+        self.api_game_getoptions_result = None
+        self.sold_options_respond = None
+        self.sold_digital_options_respond = None
+        self.tpsl_changed_respond = None
+        self.auto_margin_call_changed_respond = None
+        self.top_assets_updated_data = {}
+        self.get_options_v2_data = None
+        # --for binary option multi buy
+        self.buy_multi_result = None
+        self.buy_multi_option = BoundedStore(RESULT_MAXSIZE, RESULT_TTL)
+        #
+        self.result = None
+        self.training_balance_reset_request = None
+        self.balances_raw = None
+        self.user_profile_client = None
+        self.leaderboard_userinfo_deals_client = None
+        self.users_availability = None
+        # ------------------
+        self.digital_payout = None
+        self.pending = PendingRequests(on_round_trip=self.timesync.clock.observe_rtt)
+        self.notifier = Notifier()
+        self.connect_timeout = 30
+        self.websocket_writer = None
+        self.ignored_messages = set()
+        self.callback_executor = CallbackExecutor()
+        # records every frame when set, see exnovaapi.ws.capture
+        self.capture = None
+        # extra connections for market data, see exnovaapi.pool
+        self.market_data = None
+        self.write_batch_size = 16
+        self.write_linger = 0.0
+        # False keeps the ssid valid after exit, see exnovaapi.session
+        self.logout_at_exit = True
+
     def prepare_http_url(self, resource):
         """Construct http url from resource url.
 
@@ -252,6 +324,28 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
         # response.raise_for_status()
         return response
 
+    def candle_ring(self, active, size, capacity=None):
+        """Get the real time candle buffer of an asset and size.
+
+        The buffer is created on first use, and replaced by an empty one
+        when a different ``capacity`` is asked for.
+
+        :param str active: The asset name.
+        :param int size: The candle size in seconds.
+        :param int capacity: (optional) The max number of candles kept,
+            ``real_time_candles_maxdict_table`` or 1000 when None.
+        :returns: The :class:`CandleRing <exnovaapi.candles.CandleRing>`.
+        """
+        rings = self.real_time_candles[active]
+        ring = rings.get(size)
+        if capacity is None:
+            if ring is not None:
+                return ring
+            capacity = self.real_time_candles_maxdict_table[active].get(size) or DEFAULT_CAPACITY
+        if ring is None or ring.capacity != int(capacity):
+            ring = rings[size] = CandleRing(capacity, size)
+        return ring
+
     @property
     def websocket(self):
         """Property to get websocket.
@@ -260,24 +354,33 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
         """
         return self.websocket_client.wss
 
-    def send_websocket_request(self, name, msg, request_id="", no_force_send=True):
+    def send_websocket_request(self, name, msg, request_id="", priority=None):
         """Send websocket request to exnova server.
 
+        The frame is queued for the writer thread, so the call returns
+        without waiting for the socket.
+
         :param str name: The websocket request name.
         :param dict msg: The websocket request msg.
-        """
-
-        logger = logging.getLogger(__name__)
+        :param str request_id: (optional) The id the server echoes in its reply.
+        :param int priority: (optional) The writer lane, see
+            :func:`priority_for <exnovaapi.ws.writer.priority_for>`.
 
+        :returns: The request id.
+        """
         data = json.dumps(dict(name=name,
                                msg=msg, request_id=request_id))
 
-        while (global_value.ssl_Mutual_exclusion or global_value.ssl_Mutual_exclusion_write) and no_force_send:
-            pass
-        global_value.ssl_Mutual_exclusion_write = True
-        self.websocket.send(data)
-        logger.debug(data)
-        global_value.ssl_Mutual_exclusion_write = False
+        if self.capture is not None:
+            self.capture.record(OUTBOUND, data)
+        if priority is None:
+            priority = priority_for(name, msg)
+        if self.websocket_writer is None:
+            self.websocket.send(data)
+            logging.getLogger(__name__).debug(data)
+        else:
+            self.websocket_writer.put(data, priority, request_id)
+        return request_id
 
     @property
     def logout(self):
@@ -624,13 +727,13 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
     def get_api_option_init_all(self):
         self.send_websocket_request(name="api_option_init_all", msg="")
 
-    def get_api_option_init_all_v2(self):
+    def get_api_option_init_all_v2(self, request_id=""):
 
         msg = {"name": "get-initialization-data",
                "version": "3.0",
                "body": {}
                }
-        self.send_websocket_request(name="sendMessage", msg=msg)
+        return self.send_websocket_request(name="sendMessage", msg=msg, request_id=request_id)
 # -------------get information-------------
 
     @property
@@ -684,12 +787,12 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
 
 # ____________________for_______digital____________________
 
-    def get_digital_underlying(self):
+    def get_digital_underlying(self, request_id=""):
         msg = {"name": "get-underlying-list",
                "version": "2.0",
                "body": {"type": "digital-option"}
                }
-        self.send_websocket_request(name="sendMessage", msg=msg)
+        return self.send_websocket_request(name="sendMessage", msg=msg, request_id=request_id)
 
     @property
     def get_strike_list(self):
@@ -783,9 +886,9 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
         requests.utils.add_dict_to_cookiejar(self.session.cookies, cookies)
 
     def start_websocket(self):
-        global_value.check_websocket_if_connect = None
-        global_value.check_websocket_if_error = False
-        global_value.websocket_error_reason = None
+        self.state.check_websocket_if_connect = None
+        self.state.check_websocket_if_error = False
+        self.state.websocket_error_reason = None
 
         self.websocket_client = WebsocketClient(self)
 
@@ -793,18 +896,20 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
                                                  "check_hostname": False, "cert_reqs": ssl.CERT_NONE, "ca_certs": "cacert.pem"}})  # for fix pyinstall error: cafile, capath and cadata cannot be all omitted
         self.websocket_thread.daemon = True
         self.websocket_thread.start()
-        while True:
-            try:
-                if global_value.check_websocket_if_error:
-                    return False, global_value.websocket_error_reason
-                if global_value.check_websocket_if_connect == 0:
-                    return False, "Websocket connection closed."
-                elif global_value.check_websocket_if_connect == 1:
-                    return True, None
-            except:
-                pass
-
-            pass
+        self.websocket_writer = WebsocketWriter(
+            self, self.write_batch_size, self.write_linger)
+        self.websocket_writer.start()
+        self.notifier.wait_for(
+            CONNECTION, lambda: self.state.check_websocket_if_error or
+            self.state.check_websocket_if_connect is not None,
+            self.connect_timeout)
+        if self.state.check_websocket_if_error:
+            return False, self.state.websocket_error_reason
+        if self.state.check_websocket_if_connect == 1:
+            return True, None
+        if self.state.check_websocket_if_connect == 0:
+            return False, "Websocket connection closed."
+        return False, "Websocket connection timeout."
 
     # @tokensms.setter
     def setTokenSMS(self, response):
@@ -833,30 +938,33 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
 
     def send_ssid(self):
         self.profile.msg = None
-        self.ssid(global_value.SSID)  # pylint: disable=not-callable
-        while self.profile.msg == None:
-            pass
-        if self.profile.msg == False:
+        self.ssid(self.state.SSID)  # pylint: disable=not-callable
+        if not self.notifier.wait_for(
+                ("profile", CONNECTION), lambda: self.profile.msg != None or
+                not self.state.check_websocket_if_connect,
+                self.connect_timeout):
+            logging.getLogger(__name__).error(
+                '**warning** send_ssid late ' + str(self.connect_timeout) + ' sec')
+        if self.profile.msg == None or self.profile.msg == False:
             return False
         else:
             return True
 
     def connect(self):
-
-        global_value.ssl_Mutual_exclusion = False
-        global_value.ssl_Mutual_exclusion_write = False
         """Method for connection to exnova API."""
         try:
             self.close()
         except:
             pass
+        # any timeSync on the new websocket will do, even one sent with the profile
+        synced = self.timesync.sync_count
         check_websocket, websocket_reason = self.start_websocket()
 
         if check_websocket == False:
             return check_websocket, websocket_reason
 
         # doing temp ssid reconnect for speed up
-        if global_value.SSID != None:
+        if self.state.SSID != None:
 
             check_ssid = self.send_ssid()
 
@@ -864,10 +972,13 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
                 # ssdi time out need reget,if sent error ssid,the weksocket will close by iqoption server
                 response = self.get_ssid()
                 try:
-                    global_value.SSID = response.cookies["ssid"]
+                    self.state.SSID = response.cookies["ssid"]
                 except:
                     return False, response.text
-                atexit.register(self.logout)
+                if self.logout_at_exit:
+                    atexit.register(self.logout)
+                # the server drops the socket of a bad ssid, stop its threads first
+                self.close()
                 self.start_websocket()
                 self.send_ssid()
 
@@ -875,24 +986,25 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
         else:
             response = self.get_ssid()
             try:
-                global_value.SSID = response.cookies["ssid"]
+                self.state.SSID = response.cookies["ssid"]
             except:
                 self.close()
                 return False, response.text
-            atexit.register(self.logout)
+            if self.logout_at_exit:
+                atexit.register(self.logout)
             self.send_ssid()
 
         # set ssis cookie
         requests.utils.add_dict_to_cookiejar(
-            self.session.cookies, {"ssid": global_value.SSID})
-
-        self.timesync.server_timestamp = None
-        while True:
-            try:
-                if self.timesync.server_timestamp != None:
-                    break
-            except:
-                pass
+            self.session.cookies, {"ssid": self.state.SSID})
+
+        if not self.notifier.wait_for(
+                ("timeSync", CONNECTION), lambda: self.timesync.sync_count != synced or
+                not self.state.check_websocket_if_connect,
+                self.connect_timeout):
+            return False, "Server time sync timeout."
+        if self.timesync.sync_count == synced:
+            return False, "Websocket connection closed."
         return True, None
 
     def connect2fa(self, sms_code):
@@ -908,8 +1020,34 @@ class ExnovaAPI(object):  # pylint: disable=too-many-instance-attributes
         return True, None
 
     def close(self):
+        if self.market_data is not None:
+            self.market_data.close()
+            self.market_data = None
+        if self.websocket_writer is not None:
+            self.websocket_writer.stop()
+            self.websocket_writer.join()
+            self.websocket_writer = None
         self.websocket.close()
         self.websocket_thread.join()
+        self.pending.fail_all(ConnectionError("Websocket connection closed."))
+
+    def send_latency(self):
+        """Get the writer queue-to-socket latency per priority lane.
+
+        :returns: The dict from :meth:`WebsocketWriter.latency_stats
+            <exnovaapi.ws.writer.WebsocketWriter.latency_stats>`.
+        """
+        if self.websocket_writer is None:
+            return {}
+        return self.websocket_writer.latency_stats()
+
+    def store_stats(self):
+        """Get the size and evictions of the bounded websocket stores.
+
+        :returns: A dict of store name to :meth:`BoundedStore.stats
+            <exnovaapi.store.BoundedStore.stats>`.
+        """
+        return dict((name, getattr(self, name).stats()) for name in BOUNDED_STORES)
 
     def websocket_alive(self):
         return self.websocket_thread.is_alive()
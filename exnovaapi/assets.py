@@ -0,0 +1,80 @@
+"""Module for Exnova asset name/active id lookup.
+
+Wraps :data:`exnovaapi.constants.ACTIVES` (name -> active id) with a reverse
+index so streaming handlers resolve the asset name of a frame in O(1).
+Lookups notice a replaced or grown dict, not a changed id, so entries are
+set with :func:`register`.
+"""
+
+import sys
+import threading
+
+import exnovaapi.constants as OP_code
+
+_lock = threading.Lock()
+_source = None
+_size = -1
+_by_id = {}
+
+
+def refresh():
+    """Rebuild the reverse index from ``OP_code.ACTIVES``.
+
+    Called after the instrument list is refreshed. Lookups also rebuild it
+    when ``OP_code.ACTIVES`` was replaced or grew.
+    """
+    global _source, _size, _by_id
+    with _lock:
+        actives = OP_code.ACTIVES
+        by_id = {}
+        for name, active_id in list(actives.items()):
+            # first name wins, like list(ACTIVES.values()).index() did
+            by_id.setdefault(active_id, sys.intern(str(name)))
+        _by_id = by_id
+        _source = actives
+        _size = len(actives)
+
+
+def name_of(active_id, default=None):
+    """Get the asset name for an active id.
+
+    :param int active_id: The active id sent by the server.
+    :param default: (optional) Returned for unknown ids.
+    :returns: The interned asset name.
+    """
+    actives = OP_code.ACTIVES
+    if actives is not _source or len(actives) != _size:
+        refresh()
+    return _by_id.get(active_id, default)
+
+
+def register(name, active_id):
+    """Set the active id of an asset name, in ``OP_code.ACTIVES`` and the index.
+
+    :param str name: The asset name.
+    :param int active_id: The active id.
+    """
+    global _size
+    with _lock:
+        actives = OP_code.ACTIVES
+        synced = actives is _source and len(actives) == _size
+        old = actives.get(name)
+        known = name in actives
+        actives[name] = active_id
+        if synced and not known:
+            _by_id.setdefault(active_id, sys.intern(str(name)))
+            _size += 1
+            return
+        if synced and old == active_id:
+            return
+    # an id changed: the name it had may be the first one of another id
+    refresh()
+
+
+def id_of(name, default=None):
+    """Get the active id for an asset name.
+
+    :param str name: The asset name, e.g. ``"EURUSD"``.
+    :param default: (optional) Returned for unknown names.
+    """
+    return OP_code.ACTIVES.get(name, default)
@@ -0,0 +1,162 @@
+"""Module for backfilling months of candles into a :class:`CandleStore
+<exnovaapi.candle_store.CandleStore>`.
+
+Every (asset, size) series is paged backwards with ``get-candles`` (a
+``to`` cursor, ``page`` candles per request), series run side by side on
+``workers`` threads and every request waits its turn on a shared rate
+limit. Only the spans the store never asked for are requested, so an
+interrupted run picks up where it stopped::
+
+    python -m exnovaapi.backfill --assets EURUSD-OTC,GBPUSD-OTC --sizes 60,900 --days 30
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from exnovaapi.candle_store import CandleStore
+
+
+class RateLimiter(object):
+    """Let at most ``rate`` calls a second through, in bursts of ``burst``."""
+
+    def __init__(self, rate, burst=1):
+        """
+        :param float rate: The calls per second.
+        :param int burst: (optional) The calls let through at once after idling.
+        """
+        self.rate = float(rate)
+        self.burst = burst
+        self.__tokens = float(burst)
+        self.__last = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next call may go."""
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__last) * self.rate)
+            self.__last = now
+            self.__tokens -= 1
+            delay = -self.__tokens / self.rate if self.__tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Backfill(object):
+    """Fills a :class:`CandleStore <exnovaapi.candle_store.CandleStore>`
+    with the history of several series."""
+
+    def __init__(self, get_candles, store, page=1000, workers=4, rate=5.0):
+        """
+        :param get_candles: ``get_candles(asset, size, count, end)``, e.g.
+            :meth:`Exnova.get_candles <exnovaapi.stable_api.Exnova.get_candles>`.
+        :param store: The :class:`CandleStore
+            <exnovaapi.candle_store.CandleStore>` written to.
+        :param int page: (optional) The candles per request.
+        :param int workers: (optional) The series fetched at the same time.
+        :param float rate: (optional) The requests per second over all series.
+        """
+        self.get_candles = get_candles
+        self.store = store
+        self.page = page
+        self.workers = workers
+        self.limiter = RateLimiter(rate, burst=workers)
+
+    def series(self, asset, size, start, stop):
+        """Fetch the missing spans of one series, newest first.
+
+        :returns: A dict with ``requests``, ``candles`` and the ``holes``
+            left in ``[start, stop)``, plus ``error`` when a page got no
+            reply. The rest of the series is then left for the next run.
+        """
+        requests = candles = 0
+        for span_start, span_stop in reversed(self.store.missing(asset, size, start, stop)):
+            cursor = span_stop
+            while cursor > span_start:
+                count = min(self.page, -(-(cursor - span_start) // size))
+                self.limiter.wait()
+                page = self.get_candles(asset, size, count, cursor)
+                requests += 1
+                if page is None:
+                    # timeout or failed request, not an empty history: nothing marked
+                    logging.error('**warning** backfill %s %s: no reply before %d', asset, size, cursor)
+                    return {"requests": requests, "candles": candles, "error": "no reply",
+                            "holes": self.store.holes(asset, size, start, stop)}
+                page = [c for c in page if int(c["from"]) < cursor]
+                if not page:
+                    # nothing older on the broker
+                    self.store.mark_fetched(asset, size, span_start, cursor)
+                    break
+                oldest = min(int(c["from"]) for c in page)
+                candles += self.store.put(asset, size, page)
+                self.store.mark_fetched(asset, size, min(oldest, cursor - count * size), cursor)
+                cursor = min(oldest, cursor - count * size)
+        return {"requests": requests, "candles": candles,
+                "holes": self.store.holes(asset, size, start, stop)}
+
+    def run(self, series, start, stop=None):
+        """Backfill every ``(asset, size)`` of ``series`` over ``[start, stop)``.
+
+        :param series: The ``(asset, size)`` pairs.
+        :param int start: The oldest timestamp wanted.
+        :param int stop: (optional) The newest timestamp, the last closed
+            candle when None.
+
+        :returns: A dict of ``(asset, size)`` to the :meth:`series` result.
+        """
+        now = int(time.time())
+        results = {}
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = {}
+            for asset, size in series:
+                end = stop if stop is not None else now - now % size
+                futures[asset, size] = pool.submit(self.series, asset, size, start, end)
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    logging.error('**warning** backfill %s %s failed: %s', key[0], key[1], e)
+                    results[key] = {"requests": 0, "candles": 0, "holes": [], "error": str(e)}
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", required=True, help="comma separated asset names")
+    parser.add_argument("--sizes", default="60", help="comma separated candle sizes in seconds")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--store", default=os.environ.get("CANDLE_HISTORY_FILE", "candle_history.sqlite3"))
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5.0, help="requests per second")
+    args = parser.parse_args()
+
+    from exnovaapi.stable_api import Exnova
+
+    bot = Exnova(os.environ.get("EXNOVA_EMAIL", ""), os.environ.get("EXNOVA_PASSWORD", ""),
+                 session_file=os.environ.get("EXNOVA_SESSION_FILE") or None)
+    ok, reason = bot.connect()
+    if not ok:
+        raise SystemExit("connect failed: %s" % reason)
+    store = CandleStore(args.store)
+    series = [(asset, int(size)) for asset in args.assets.split(",")
+              for size in args.sizes.split(",")]
+    started = time.time()
+    try:
+        results = Backfill(bot.get_candles, store, args.page, args.workers, args.rate).run(
+            series, int(started - args.days * 86400))
+    finally:
+        bot.api.close()
+    for (asset, size), result in sorted(results.items()):
+        print("%-16s %5d  %4d requests  %7d candles  %d holes"
+              % (asset, size, result["requests"], result["candles"], len(result["holes"])))
+    print("%.1f s, %d candles stored" % (time.time() - started, store.stats()["candles"]))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
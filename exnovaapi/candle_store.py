@@ -0,0 +1,234 @@
+"""Module for keeping closed candles on disk between restarts.
+
+A :class:`CandleStore` is a SQLite table of closed candles keyed by
+``(asset, size, from)``. :meth:`CandleStore.fetch` answers from disk and
+asks the broker only for the candles closed since the newest stored one::
+
+    store = CandleStore(".exnova_candles.sqlite3")
+    candles = store.fetch(api.get_candles, "EURUSD-OTC", 60, 120)
+
+It also records which spans were already asked for, so a backfill (see
+:mod:`exnovaapi.backfill`) can resume and tell market gaps from missing
+data.
+"""
+
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    asset TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    open REAL, close REAL, min REAL, max REAL, volume NUMERIC,
+    PRIMARY KEY (asset, size, start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fetched (
+    asset TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    PRIMARY KEY (asset, size, start)
+) WITHOUT ROWID;
+"""
+
+
+class CandleStore(object):
+    """Closed candles of many assets and sizes in one SQLite file."""
+
+    def __init__(self, path):
+        """
+        :param str path: The database file, created when missing.
+            ``":memory:"`` keeps it in memory.
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        self.__db.executescript(_SCHEMA)
+        self.__db.commit()
+        # candles served from disk and fetched from the broker by fetch()
+        self.hits = 0
+        self.fetched = 0
+        self.requests = 0
+
+    def put(self, asset, size, candles):
+        """Store candles, replacing the ones with the same ``from``.
+
+        :param str asset: The asset name.
+        :param int size: The candle size in seconds.
+        :param candles: The candle dicts as returned by ``get_candles``.
+
+        :returns: The number of candles written.
+        """
+        rows = [(asset, size, int(c["from"]), c["open"], c["close"], c["min"],
+                 c["max"], c.get("volume", 0)) for c in candles]
+        if not rows:
+            return 0
+        with self.__lock:
+            self.__db.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.__db.commit()
+        return len(rows)
+
+    def get(self, asset, size, count, end=None):
+        """Get the newest stored candles starting before ``end``.
+
+        :param str asset: The asset name.
+        :param int size: The candle size in seconds.
+        :param int count: The number of candles.
+        :param int end: (optional) The timestamp the candles start before,
+            all of them when None.
+
+        :returns: Up to ``count`` candle dicts, oldest first.
+        """
+        end = 2 ** 62 if end is None else int(end)
+        with self.__lock:
+            rows = self.__db.execute(
+                "SELECT start, open, close, min, max, volume FROM candles "
+                "WHERE asset = ? AND size = ? AND start < ? "
+                "ORDER BY start DESC LIMIT ?", (asset, size, end, int(count))).fetchall()
+        rows.reverse()
+        return [{"from": start, "to": start + size, "open": o, "close": c,
+                 "min": low, "max": high, "volume": volume}
+                for start, o, c, low, high, volume in rows]
+
+    def range(self, asset, size, start, stop):
+        """Get every stored candle with ``start <= from < stop``, oldest first."""
+        with self.__lock:
+            rows = self.__db.execute(
+                "SELECT start, open, close, min, max, volume FROM candles "
+                "WHERE asset = ? AND size = ? AND start >= ? AND start < ? "
+                "ORDER BY start", (asset, size, int(start), int(stop))).fetchall()
+        return [{"from": t, "to": t + size, "open": o, "close": c,
+                 "min": low, "max": high, "volume": volume}
+                for t, o, c, low, high, volume in rows]
+
+    def newest(self, asset, size):
+        """Get the ``from`` of the newest stored candle, None when empty."""
+        with self.__lock:
+            row = self.__db.execute(
+                "SELECT MAX(start) FROM candles WHERE asset = ? AND size = ?",
+                (asset, size)).fetchone()
+        return row[0]
+
+    def fetch(self, get_candles, asset, size, count, end=None):
+        """Get the newest ``count`` closed candles, fetching only the gap.
+
+        Stored candles answer as long as they are contiguous, the rest is
+        asked with one ``get_candles`` call and stored.
+
+        :param get_candles: ``get_candles(asset, size, count, end)``, e.g.
+            :meth:`Exnova.get_candles <exnovaapi.stable_api.Exnova.get_candles>`.
+        :param str asset: The asset name.
+        :param int size: The candle size in seconds.
+        :param int count: The number of candles.
+        :param int end: (optional) The server time, now when None.
+
+        :returns: Up to ``count`` closed candle dicts, oldest first, or None
+            when the gap could not be fetched.
+        """
+        end = int(time.time()) if end is None else int(end)
+        last = end - end % size - size
+        stored = self.get(asset, size, count, last + size)
+        contiguous = len(stored) == count and \
+            stored[-1]["from"] - stored[0]["from"] == (count - 1) * size
+        missing = (last - stored[-1]["from"]) // size if contiguous else count
+        if missing <= 0:
+            self.hits += len(stored)
+            return stored
+        # one more for the candle still forming, which the broker includes
+        candles = get_candles(asset, size, min(missing, count) + 1, end)
+        self.requests += 1
+        if not candles:
+            return None
+        closed = [c for c in candles if int(c["from"]) <= last]
+        self.fetched += len(closed)
+        self.hits += count - min(missing, count)
+        self.put(asset, size, closed)
+        return self.get(asset, size, count, last + size)
+
+    def mark_fetched(self, asset, size, start, stop):
+        """Record that the broker was asked for ``[start, stop)``.
+
+        Candles missing inside a fetched span are market gaps, not missing
+        data, see :meth:`missing` and :meth:`holes`.
+        """
+        start, stop = int(start), int(stop)
+        with self.__lock:
+            db = self.__db
+            rows = db.execute(
+                "SELECT start, stop FROM fetched WHERE asset = ? AND size = ? "
+                "AND start <= ? AND stop >= ?", (asset, size, stop, start)).fetchall()
+            for old_start, old_stop in rows:
+                start, stop = min(start, old_start), max(stop, old_stop)
+            db.executemany("DELETE FROM fetched WHERE asset = ? AND size = ? AND start = ?",
+                           [(asset, size, old_start) for old_start, _ in rows])
+            db.execute("INSERT INTO fetched VALUES (?, ?, ?, ?)", (asset, size, start, stop))
+            db.commit()
+
+    def missing(self, asset, size, start, stop):
+        """Get the spans of ``[start, stop)`` the broker was never asked for.
+
+        :returns: A list of ``(start, stop)`` tuples, oldest first.
+        """
+        with self.__lock:
+            rows = self.__db.execute(
+                "SELECT start, stop FROM fetched WHERE asset = ? AND size = ? "
+                "AND start < ? AND stop > ? ORDER BY start",
+                (asset, size, int(stop), int(start))).fetchall()
+        spans, cursor = [], int(start)
+        for fetched_start, fetched_stop in rows:
+            if fetched_start > cursor:
+                spans.append((cursor, fetched_start))
+            cursor = max(cursor, fetched_stop)
+        if cursor < stop:
+            spans.append((cursor, int(stop)))
+        return spans
+
+    def holes(self, asset, size, start, stop):
+        """Get the spans of ``[start, stop)`` between two stored candles
+        that are more than one candle apart.
+
+        :returns: A list of ``(start, stop)`` tuples, oldest first.
+        """
+        with self.__lock:
+            rows = self.__db.execute(
+                "SELECT prev + ?, start FROM ("
+                " SELECT start, LAG(start) OVER (ORDER BY start) AS prev FROM candles"
+                " WHERE asset = ? AND size = ? AND start >= ? AND start < ?)"
+                " WHERE start - prev > ?",
+                (size, asset, size, int(start), int(stop), size)).fetchall()
+        return [tuple(row) for row in rows]
+
+    def prune(self, keep):
+        """Keep only the newest ``keep`` candles of every asset and size.
+
+        :returns: The number of candles deleted.
+        """
+        with self.__lock:
+            cursor = self.__db.execute(
+                "DELETE FROM candles WHERE (asset, size, start) IN ("
+                " SELECT asset, size, start FROM ("
+                "  SELECT asset, size, start, ROW_NUMBER() OVER ("
+                "   PARTITION BY asset, size ORDER BY start DESC) AS n FROM candles)"
+                " WHERE n > ?)", (int(keep),))
+            self.__db.commit()
+        return cursor.rowcount
+
+    def stats(self):
+        """
+        :returns: A dict with the stored ``candles`` and ``series`` and the
+            ``hits``, ``fetched`` and ``requests`` counters of :meth:`fetch`.
+        """
+        with self.__lock:
+            candles, series = self.__db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT asset || ':' || size) FROM candles").fetchone()
+        return {"candles": candles, "series": series, "hits": self.hits,
+                "fetched": self.fetched, "requests": self.requests}
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
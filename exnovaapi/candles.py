@@ -0,0 +1,396 @@
+"""Module for fixed size real time candle buffers and candle series.
+
+Each streamed (asset, size) pair keeps its candles in a :class:`CandleRing`,
+one contiguous array per field instead of a dict of dicts keyed by
+timestamp::
+
+    ring = CandleRing(100, 60)
+    ring.update({"from": 1700000040, "open": 1.1, "close": 1.2, ...})
+    view = ring.last(20)
+    view[-1]["close"], view.close[-1]
+
+Closed candles handed to the analysis code are a :class:`CandleSeries`,
+float columns built once from the candle dicts.
+"""
+
+import threading
+from array import array
+
+DEFAULT_CAPACITY = 1000
+
+FIELDS = ("open", "close", "min", "max", "volume")
+
+
+class CandleView(object):
+    """Zero copy window over the newest candles of a :class:`CandleRing`.
+
+    Indexing gives a candle dict as returned by ``get_candles``, slicing
+    gives another view, and the ``from_``, ``open``, ``close``, ``min``,
+    ``max`` and ``volume`` columns are memoryviews over the ring arrays
+    (``numpy.frombuffer`` can wrap them without copying).
+
+    The view reads the live arrays: the last candle follows in place
+    updates, and old windows are overwritten once the ring wraps around.
+    Use :meth:`to_list` to keep the values.
+    """
+
+    __slots__ = ("size", "from_", "open", "close", "min", "max", "volume")
+
+    def __init__(self, size, from_, open_, close, low, high, volume):
+        self.size = size
+        self.from_ = from_
+        self.open = open_
+        self.close = close
+        self.min = low
+        self.max = high
+        self.volume = volume
+
+    def __len__(self):
+        return len(self.from_)
+
+    def _row(self, i):
+        start = self.from_[i]
+        return {"from": start, "to": start + self.size if self.size else start,
+                "open": self.open[i], "close": self.close[i], "min": self.min[i],
+                "max": self.max[i], "volume": self.volume[i]}
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            if item.step not in (None, 1):
+                return [self._row(i) for i in range(*item.indices(len(self)))]
+            return CandleView(self.size, self.from_[item], self.open[item],
+                              self.close[item], self.min[item], self.max[item],
+                              self.volume[item])
+        return self._row(item)
+
+    def __iter__(self):
+        for i in range(len(self.from_)):
+            yield self._row(i)
+
+    def to_list(self):
+        """Copy the window out.
+
+        :returns: The list of candle dicts, oldest first.
+        """
+        return list(self)
+
+    def to_dict(self):
+        """Copy the window out in the old ``real_time_candles`` layout.
+
+        :returns: A dict of candle dicts keyed by the candle ``from``.
+        """
+        return {row["from"]: row for row in self}
+
+
+class CandleRing(object):
+    """Fixed capacity candle buffer of one asset and candle size.
+
+    Every field lives in an array of twice the capacity and each slot is
+    written twice, at ``i`` and ``i + capacity``, so the newest ``n`` candles
+    are always one contiguous range and :meth:`last` can hand out views
+    without copying. Appending a new candle and updating the live one are
+    O(1).
+
+    The websocket thread writes the stream and callers write backfilled
+    history (``extend``), so writes take the ring lock. :meth:`last` views
+    follow later writes, :meth:`snapshot` copies the candles under the lock.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, size=0):
+        """
+        :param int capacity: (optional) The max number of candles kept.
+        :param int size: (optional) The candle size in seconds.
+        """
+        self.capacity = max(1, int(capacity))
+        self.size = int(size)
+        slots = 2 * self.capacity
+        self._from = array("q", bytes(8 * slots))
+        self._columns = [array("d", bytes(8 * slots)) for _ in FIELDS]
+        self._open, self._close, self._min, self._max, self._volume = self._columns
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_from(self):
+        """The ``from`` of the newest candle or None when empty."""
+        if not self._count:
+            return None
+        return self._from[(self._head + self._count - 1) % self.capacity]
+
+    def _write(self, slot, start, candle):
+        mirror = slot + self.capacity
+        get = candle.get
+        self._from[slot] = self._from[mirror] = start
+        self._open[slot] = self._open[mirror] = get("open") or 0.0
+        self._close[slot] = self._close[mirror] = get("close") or 0.0
+        self._min[slot] = self._min[mirror] = get("min") or 0.0
+        self._max[slot] = self._max[mirror] = get("max") or 0.0
+        self._volume[slot] = self._volume[mirror] = get("volume") or 0.0
+
+    def _find(self, start):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._from[(self._head + mid) % self.capacity] < start:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def update(self, candle):
+        """Add a candle, or update it in place if its ``from`` is stored.
+
+        Candles older than the oldest one kept are dropped once the ring is
+        full, a missing older candle (e.g. a backfilled gap) is inserted
+        in order.
+
+        :param dict candle: The candle with ``from``, ``open``, ``close``,
+            ``min``, ``max`` and ``volume``.
+        """
+        with self._lock:
+            self._update(candle)
+
+    def _update(self, candle):
+        start = int(candle["from"])
+        capacity = self.capacity
+        last = self.last_from
+        if last is None or start > last:
+            if self._count < capacity:
+                slot = (self._head + self._count) % capacity
+                self._count += 1
+            else:
+                slot = self._head
+                self._head = (self._head + 1) % capacity
+            self._write(slot, start, candle)
+            return
+        if start == last:
+            self._write((self._head + self._count - 1) % capacity, start, candle)
+            return
+        pos = self._find(start)
+        if self._from[(self._head + pos) % capacity] == start:
+            self._write((self._head + pos) % capacity, start, candle)
+            return
+        if self._count == capacity:
+            if pos == 0:
+                return
+            # drop the oldest to make room, everything before pos moves down
+            self._head = (self._head + 1) % capacity
+            self._count -= 1
+            pos -= 1
+        self._insert(pos, start, candle)
+
+    def _insert(self, pos, start, candle):
+        capacity = self.capacity
+        for i in range(self._count, pos, -1):
+            dst = (self._head + i) % capacity
+            src = (self._head + i - 1) % capacity
+            self._from[dst] = self._from[dst + capacity] = self._from[src]
+            for column in self._columns:
+                column[dst] = column[dst + capacity] = column[src]
+        self._count += 1
+        self._write((self._head + pos) % capacity, start, candle)
+
+    def extend(self, candles):
+        """Add several candles, e.g. a ``get_candles`` history.
+
+        :param candles: The candle dicts, in any order.
+        """
+        candles = sorted(candles, key=lambda c: int(c["from"]))
+        with self._lock:
+            for candle in candles:
+                self._update(candle)
+
+    def clear(self):
+        """Drop all the candles."""
+        with self._lock:
+            self._head = 0
+            self._count = 0
+
+    def last(self, count=None):
+        """Get a zero copy view of the newest candles.
+
+        :param int count: (optional) The number of candles, all when None.
+        :returns: A :class:`CandleView`, oldest first.
+        """
+        with self._lock:
+            return self._last(count)
+
+    def _last(self, count):
+        if count is None or count > self._count:
+            count = self._count
+        count = max(0, int(count))
+        start = (self._head + self._count - count) % self.capacity
+        end = start + count
+        return CandleView(self.size, memoryview(self._from)[start:end],
+                          *[memoryview(column)[start:end] for column in self._columns])
+
+    def snapshot(self, count=None):
+        """Copy the newest candles out, with no write in between.
+
+        :param int count: (optional) The number of candles, all when None.
+        :returns: The list of candle dicts, oldest first.
+        """
+        with self._lock:
+            return self._last(count).to_list()
+
+
+# candle dict keys to CandleSeries columns, "high"/"low" read like "max"/"min"
+_KEYS = {"from": "from_", "open": "open", "close": "close", "min": "min", "low": "min",
+         "max": "max", "high": "max", "volume": "volume"}
+
+
+def _price(candle, key, alias):
+    value = candle.get(key)
+    if value is None:
+        value = candle.get(alias)
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class CandleRow(object):
+    """One candle of a :class:`CandleSeries`, read like a candle dict.
+
+    ``row["close"]``, ``row["max"]`` (or ``row["high"]``) and ``row.get``
+    read the series columns, nothing is copied.
+    """
+
+    __slots__ = ("series", "index")
+
+    def __init__(self, series, index):
+        self.series = series
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == "to":
+            return self.series.from_[self.index] + self.series.size
+        return getattr(self.series, _KEYS[key])[self.index]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """
+        :returns: The candle dict as returned by ``get_candles``.
+        """
+        return self.series._row(self.index)
+
+
+class CandleSeries(object):
+    """Closed candles of one asset and size as float columns.
+
+    Built once from the broker (or :class:`CandleStore
+    <exnovaapi.candle_store.CandleStore>`) candle dicts, the analysis code
+    then reads the ``from_``, ``open``, ``close``, ``min``, ``max`` and
+    ``volume`` lists directly instead of converting every candle dict on
+    every call::
+
+        series = CandleSeries.from_candles(api.get_candles("EURUSD-OTC", 60, 120, end), 60)
+        series.close[-1], series[-1]["close"], series[-20:]
+
+    Indexing gives a :class:`CandleRow` and slicing another series (the
+    lists are copied, the floats are shared). The columns are plain lists,
+    treat them as read only.
+    """
+
+    __slots__ = ("size", "from_", "open", "close", "min", "max", "volume")
+
+    def __init__(self, size=0, from_=None, open_=None, close=None, low=None, high=None, volume=None):
+        """
+        :param int size: (optional) The candle size in seconds.
+        """
+        self.size = int(size)
+        self.from_ = from_ if from_ is not None else []
+        self.open = open_ if open_ is not None else []
+        self.close = close if close is not None else []
+        self.min = low if low is not None else []
+        self.max = high if high is not None else []
+        self.volume = volume if volume is not None else []
+
+    @classmethod
+    def from_candles(cls, candles, size=0):
+        """Build a series from candle dicts, a :class:`CandleView` or a series.
+
+        Candles missing a price are dropped, ``high``/``low`` are read when
+        ``max``/``min`` are missing, and dicts are put in ``from`` order. A
+        :class:`CandleSeries` is returned as is.
+
+        :param candles: The candles, e.g. as returned by ``get_candles``.
+        :param int size: (optional) The candle size in seconds.
+        """
+        if isinstance(candles, CandleSeries):
+            return candles
+        if isinstance(candles, CandleView):
+            return cls(candles.size, list(candles.from_), list(candles.open), list(candles.close),
+                       list(candles.min), list(candles.max), list(candles.volume))
+        series = cls(size)
+        from_, open_, close, low, high, volume = (series.from_, series.open, series.close,
+                                                  series.min, series.max, series.volume)
+        last = None
+        ordered = True
+        for candle in candles or ():
+            try:
+                o = float(candle["open"])
+                c = float(candle["close"])
+                h = float(candle["max"])
+                l = float(candle["min"])
+            except (KeyError, TypeError, ValueError):
+                # "high"/"low" dicts, or a price missing
+                o = _price(candle, "open", "open")
+                c = _price(candle, "close", "close")
+                h = _price(candle, "max", "high")
+                l = _price(candle, "min", "low")
+                if o is None or c is None or h is None or l is None:
+                    continue
+            start = int(candle.get("from") or 0)
+            if last is not None and start < last:
+                ordered = False
+            last = start
+            from_.append(start)
+            open_.append(o)
+            close.append(c)
+            low.append(l)
+            high.append(h)
+            volume.append(candle.get("volume") or 0)
+        if not ordered:
+            order = sorted(range(len(from_)), key=from_.__getitem__)
+            return cls(size, *[[column[i] for i in order] for column in
+                               (from_, open_, close, low, high, volume)])
+        return series
+
+    def __len__(self):
+        return len(self.close)
+
+    def _row(self, i):
+        start = self.from_[i]
+        return {"from": start, "to": start + self.size, "open": self.open[i],
+                "close": self.close[i], "min": self.min[i], "max": self.max[i],
+                "volume": self.volume[i]}
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return CandleSeries(self.size, self.from_[item], self.open[item], self.close[item],
+                                self.min[item], self.max[item], self.volume[item])
+        if item < 0:
+            item += len(self.close)
+        if not 0 <= item < len(self.close):
+            raise IndexError("candle index out of range")
+        return CandleRow(self, item)
+
+    def __iter__(self):
+        for i in range(len(self.close)):
+            yield CandleRow(self, i)
+
+    def to_list(self):
+        """
+        :returns: The list of candle dicts, oldest first.
+        """
+        return [self._row(i) for i in range(len(self.close))]
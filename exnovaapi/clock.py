@@ -0,0 +1,149 @@
+"""Module for estimating the Exnova server clock."""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+# bound on the estimated drift, 500 ppm is far beyond any real quartz
+MAX_DRIFT = 5e-4
+# points the drift is fitted on
+FIT_POINTS = 8
+
+
+class ServerClock(object):
+    """Offset and drift between the local monotonic clock and the server.
+
+    Every ``timeSync`` and ``heartbeat`` frame carries the server time it
+    was sent at, so ``server - local`` underestimates the offset by that
+    frame's network delay. The least delayed sample of the window, moved
+    along the fitted drift, plus half the fastest request round trip is
+    the estimate, like the NTP clock filter. A sample more than ``step``
+    seconds off the estimate is held back: a frame delivered late is
+    dropped, while ``confirm`` such samples in a row that agree on a new
+    offset mean the server clock jumped, and restart the window with them.
+    """
+
+    def __init__(self, window=512, max_age=600.0, step=1.0, confirm=3):
+        """
+        :param int window: (optional) The number of samples kept.
+        :param float max_age: (optional) Seconds a sample is kept.
+        :param float step: (optional) Seconds off the estimate that make a
+            sample a step candidate.
+        :param int confirm: (optional) Agreeing step candidates in a row
+            that reset the estimate.
+        """
+        self.max_age = max_age
+        self.step = step
+        self.confirm = confirm
+        self.__samples = deque(maxlen=window)
+        self.__steps = []
+        self.__rtts = deque(maxlen=window)
+        self.__lock = threading.Lock()
+        self.__offset = None
+        self.__drift = 0.0
+        self.__anchor = 0.0
+
+    def update(self, server_ms, local=None):
+        """Add a server time sample.
+
+        :param server_ms: The server time in ms from a frame.
+        :param float local: (optional) The ``time.monotonic()`` it arrived
+            at, now when omitted.
+        """
+        local = time.monotonic() if local is None else local
+        sample = server_ms / 1000.0 - local
+        with self.__lock:
+            if self.__offset is not None and \
+                    abs(sample + self._half_rtt() - self._offset_at(local)) > self.step:
+                steps = self.__steps
+                if steps and abs(sample - steps[0][1]) > self.step:
+                    steps.clear()
+                steps.append((local, sample))
+                if len(steps) < self.confirm:
+                    return
+                self.__samples.clear()
+                self.__samples.extend(steps[:-1])
+            self.__steps = []
+            samples = self.__samples
+            samples.append((local, sample))
+            while samples and local - samples[0][0] > self.max_age:
+                samples.popleft()
+            self._fit()
+
+    def observe_rtt(self, seconds):
+        """Add a request round trip, e.g. from :class:`PendingRequests
+        <exnovaapi.ws.pending.PendingRequests>`.
+
+        :param float seconds: The round trip.
+        """
+        self.__rtts.append(seconds)
+
+    def _half_rtt(self):
+        rtts = self.__rtts
+        return min(rtts) / 2 if rtts else 0.0
+
+    def _fit(self):
+        samples = self.__samples
+        n = len(samples)
+        anchor = samples[-1][0]
+        drift = 0.0
+        if n >= 2 * FIT_POINTS and anchor - samples[0][0] >= 30:
+            # regress the least delayed sample of each chunk, not the delay noise
+            chunk = n // FIT_POINTS
+            points = [max(itertools.islice(samples, i, i + chunk), key=lambda p: p[1])
+                      for i in range(n - chunk * FIT_POINTS, n, chunk)]
+            mean_t = sum(t for t, _ in points) / FIT_POINTS
+            mean_o = sum(o for _, o in points) / FIT_POINTS
+            var = sum((t - mean_t) ** 2 for t, _ in points)
+            if var > 0:
+                drift = sum((t - mean_t) * (o - mean_o) for t, o in points) / var
+                drift = max(-MAX_DRIFT, min(MAX_DRIFT, drift))
+        self.__drift = drift
+        self.__anchor = anchor
+        self.__offset = max(o + drift * (anchor - t) for t, o in samples)
+
+    def _offset_at(self, local):
+        return self.__offset + self.__drift * (local - self.__anchor) + self._half_rtt()
+
+    @property
+    def synced(self):
+        """True once a server time was seen."""
+        return self.__offset is not None
+
+    def server_now(self):
+        """Get the estimated server time, without waiting.
+
+        :returns: The server time in seconds, the local ``time.time()``
+            before the first sample.
+        """
+        if self.__offset is None:
+            return time.time()
+        local = time.monotonic()
+        return local + self._offset_at(local)
+
+    def reset(self):
+        """Forget every sample, e.g. for another server."""
+        with self.__lock:
+            self.__samples.clear()
+            self.__steps = []
+            self.__rtts.clear()
+            self.__offset = None
+            self.__drift = 0.0
+
+    def stats(self):
+        """
+        :returns: A dict with ``synced``, ``offset`` (server minus local
+            wall clock, seconds), ``drift_ppm``, ``rtt_min``, ``samples``
+            and ``rtts``.
+        """
+        with self.__lock:
+            synced = self.__offset is not None
+            return {
+                "synced": synced,
+                "offset": (self.server_now() - time.time()) if synced else None,
+                "drift_ppm": self.__drift * 1e6,
+                "rtt_min": min(self.__rtts) if self.__rtts else None,
+                "samples": len(self.__samples),
+                "rtts": len(self.__rtts),
+            }
@@ -78,3 +78,22 @@ def get_remaning_time(timestamp):
         remaning.append((dr, int(t)-int(time.time())))
 
     return remaning
+
+
+def get_digital_instrument_id(active, action, duration, timestamp):
+    # doEURUSD201907191250PT5MCSPT, expiration as YYYYMMDDHHII in GMT
+    if duration == 1:
+        exp, _ = get_expiration_time(timestamp, duration)
+    else:
+        now_date = datetime.fromtimestamp(
+            timestamp) + timedelta(minutes=1, seconds=30)
+        while True:
+            if now_date.minute % duration == 0 and time.mktime(now_date.timetuple()) - timestamp > 30:
+                break
+            now_date = now_date + timedelta(minutes=1)
+        exp = time.mktime(now_date.timetuple())
+
+    dateFormated = str(datetime.utcfromtimestamp(
+        exp).strftime("%Y%m%d%H%M"))
+    return "do" + active + dateFormated + \
+        "PT" + str(duration) + "M" + action + "SPT"
@@ -1,14 +1,16 @@
-#python
-check_websocket_if_connect=None
-# try fix ssl.SSLEOFError: EOF occurred in violation of protocol (_ssl.c:2361)
-ssl_Mutual_exclusion=False#mutex read write
-#if false websocket can sent self.websocket.send(data)
-#else can not sent self.websocket.send(data)
-ssl_Mutual_exclusion_write=False#if thread wirite 
+"""Deprecated: the connection state moved to :class:`exnovaapi.state.ConnectionState`.
 
-SSID=None
+The module globals were shared by every account of the process and are
+no longer set. Reading one raises instead of returning a stale value;
+use ``api.state`` (e.g. ``api.state.SSID``, ``api.state.balance_id``).
+"""
 
-check_websocket_if_error=False
-websocket_error_reason=None
+_MOVED = ("check_websocket_if_connect", "SSID", "check_websocket_if_error",
+          "websocket_error_reason", "balance_id")
 
-balance_id=None
\ No newline at end of file
+
+def __getattr__(name):
+    if name in _MOVED:
+        raise AttributeError(
+            "exnovaapi.global_value." + name + " was removed, use api.state." + name)
+    raise AttributeError("module 'exnovaapi.global_value' has no attribute " + repr(name))
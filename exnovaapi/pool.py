@@ -0,0 +1,167 @@
+"""Module for spreading Exnova market data over several websockets."""
+
+import logging
+import threading
+import time
+import zlib
+
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.state import ConnectionState
+
+# stores filled by the market data handlers, shared with the main connection
+SHARED_STORES = (
+    "real_time_candles",
+    "real_time_candles_maxdict_table",
+    "candle_generated_check",
+    "candle_generated_all_size_check",
+    "instrument_quites_generated_data",
+    "instrument_quotes_generated_raw_data",
+    "instrument_quites_generated_timestamp",
+    "traders_mood",
+    "notifier",
+    "ignored_messages",
+    "callback_executor",
+    "capture",
+)
+
+
+def shard_index(active, count):
+    """Get the shard of an asset, stable across processes.
+
+    :param active: The asset name or id.
+    :param int count: The number of shards.
+    """
+    return zlib.crc32(str(active).encode("utf-8")) % count
+
+
+class MarketDataPool(object):
+    """Extra websocket connections carrying the market data of one account.
+
+    Every shard is an :class:`ExnovaAPI <exnovaapi.api.ExnovaAPI>` logged in
+    with the main connection's ssid. Its market data stores and notifier
+    are the main connection's, so streams land where the getters read them,
+    while each shard decodes its frames on its own reader thread and
+    answers its own heartbeats. Orders, portfolio events and balances stay
+    on the main connection, away from market data bursts.
+
+    A shard whose websocket closed is reconnected by the next
+    :meth:`for_asset` that lands on it, at most once every
+    ``retry_interval`` seconds.
+    """
+
+    def __init__(self, api, connections=2, retry_interval=5, on_reconnect=None):
+        """
+        :param api: The main :class:`ExnovaAPI <exnovaapi.api.ExnovaAPI>`,
+            connected.
+        :param int connections: (optional) The number of shards.
+        :param float retry_interval: (optional) Seconds between reconnect
+            attempts of a dead shard.
+        :param on_reconnect: (optional) Called with a shard that was
+            reconnected, e.g. to subscribe its streams again.
+        """
+        self.api = api
+        self.connections = max(1, int(connections))
+        self.retry_interval = retry_interval
+        self.on_reconnect = on_reconnect
+        self.shards = []
+        self.__lock = threading.Lock()
+        self.__retry_at = {}
+
+    def _new_shard(self):
+        state = ConnectionState()
+        state.SSID = self.api.state.SSID
+        shard = ExnovaAPI(self.api.host, self.api.username, self.api.password,
+                          self.api.proxies, state=state, wss_url=self.api.wss_url)
+        for name in SHARED_STORES:
+            setattr(shard, name, getattr(self.api, name))
+        shard.write_batch_size = self.api.write_batch_size
+        shard.write_linger = self.api.write_linger
+        shard.logout_at_exit = self.api.logout_at_exit
+        return shard
+
+    def connect(self):
+        """Open and log in all the shards in parallel.
+
+        :returns: ``(True, None)``, or ``(False, reason)`` with every shard
+            closed again.
+        """
+        shards = [self._new_shard() for _ in range(self.connections)]
+        results = [None] * len(shards)
+
+        def run(i):
+            try:
+                results[i] = shards[i].connect()
+            except Exception as e:
+                results[i] = (False, str(e))
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(shards))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.shards = shards
+        for ok, reason in results:
+            if not ok:
+                self.close()
+                return False, reason
+        return True, None
+
+    def shard_of(self, active):
+        """Get the shard carrying an asset, connected or not.
+
+        :param active: The asset name.
+        :returns: The shard :class:`ExnovaAPI <exnovaapi.api.ExnovaAPI>`.
+        """
+        return self.shards[shard_index(active, len(self.shards))]
+
+    @staticmethod
+    def is_connected(shard):
+        """Check whether the websocket of a shard is open."""
+        return bool(shard.state.check_websocket_if_connect)
+
+    def for_asset(self, active):
+        """Get the shard carrying an asset, reconnecting it if it is down.
+
+        :param active: The asset name.
+        :returns: The shard :class:`ExnovaAPI <exnovaapi.api.ExnovaAPI>`,
+            still down while its reconnect waits out ``retry_interval``.
+        """
+        shard = self.shard_of(active)
+        if not self.is_connected(shard):
+            self._reconnect(shard)
+        return shard
+
+    def _reconnect(self, shard):
+        with self.__lock:
+            if self.is_connected(shard) or shard not in self.shards:
+                return
+            now = time.time()
+            if now < self.__retry_at.get(id(shard), 0):
+                return
+            self.__retry_at[id(shard)] = now + self.retry_interval
+            shard.state.SSID = self.api.state.SSID
+            try:
+                ok, reason = shard.connect()
+            except Exception as e:
+                ok, reason = False, str(e)
+            if not ok:
+                # a socket left open without a login would pass for a live shard
+                try:
+                    shard.close()
+                except Exception:
+                    pass
+        if not ok:
+            logging.getLogger(__name__).error('**warning** market data shard reconnect: ' + str(reason))
+            return
+        logging.getLogger(__name__).info('market data shard reconnected')
+        if self.on_reconnect is not None:
+            self.on_reconnect(shard)
+
+    def close(self):
+        """Close every shard."""
+        shards, self.shards = self.shards, []
+        for shard in shards:
+            try:
+                shard.close()
+            except Exception as e:
+                logging.getLogger(__name__).error('**warning** market data shard close: ' + str(e))
@@ -0,0 +1,75 @@
+"""Module for keeping Exnova session ids between runs."""
+
+import json
+import logging
+import os
+import threading
+import time
+
+
+class SessionStore(object):
+    """Ssids saved in a json file, keyed by account email.
+
+    A restarted bot sends the saved ssid straight away instead of doing
+    the http login again. The file holds credentials, so it is written
+    readable by its owner only.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: The json file, created on the first save.
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data):
+        tmp = self.path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def load(self, email):
+        """Get the saved ssid of an account.
+
+        :param str email: The account email.
+        :returns: The ssid or None.
+        """
+        with self.__lock:
+            entry = self._read().get(email)
+        return entry.get("ssid") if isinstance(entry, dict) else None
+
+    def save(self, email, ssid):
+        """Save the ssid of an account, a no-op when it is already saved.
+
+        :param str email: The account email.
+        :param str ssid: The session id.
+        """
+        with self.__lock:
+            data = self._read()
+            entry = data.get(email)
+            if isinstance(entry, dict) and entry.get("ssid") == ssid:
+                return
+            data[email] = {"ssid": ssid, "saved": int(time.time())}
+            try:
+                self._write(data)
+            except OSError as e:
+                logging.getLogger(__name__).error('**warning** session save: ' + str(e))
+
+    def forget(self, email):
+        """Drop the saved ssid of an account."""
+        with self.__lock:
+            data = self._read()
+            if data.pop(email, None) is not None:
+                try:
+                    self._write(data)
+                except OSError as e:
+                    logging.getLogger(__name__).error('**warning** session save: ' + str(e))
@@ -1,19 +1,24 @@
 # python
-from exnovaapi.api import ExnovaAPI
+from exnovaapi.api import ExnovaAPI, LIVE_DEAL_MAXLEN
+from exnovaapi.ws.callbacks import CallbackExecutor
+from exnovaapi.ws.capture import CaptureWriter
+from exnovaapi.pool import MarketDataPool
+from exnovaapi.session import SessionStore
 import exnovaapi.constants as OP_code
+import exnovaapi.assets as assets
 import exnovaapi.country_id as Country
 import threading
 import time
 import json
 import logging
 import operator
-import exnovaapi.global_value as global_value
+from exnovaapi.state import ConnectionState
 from collections import defaultdict
 from collections import deque
-from exnovaapi.expiration import get_expiration_time, get_remaning_time
+from exnovaapi.expiration import get_expiration_time, get_remaning_time, get_digital_instrument_id
 from exnovaapi.version_control import api_version
 from datetime import datetime, timedelta
-from random import randint
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 
 def nested_dict(n, type):
@@ -26,12 +31,38 @@ def nested_dict(n, type):
 class Exnova:
     __version__ = api_version
 
-    def __init__(self, email, password, active_account_type="PRACTICE", proxies=None):
+    def __init__(self, email, password, active_account_type="PRACTICE", proxies=None,
+                 host="ws.trade.exnova.com", wss_url=None, market_data_connections=0,
+                 session_file=None):
         self.size = [1, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800,
                      3600, 7200, 14400, 28800, 43200, 86400, 604800, 2592000]
         self.email = email
         self.password = password
+        # wss_url overrides the websocket of host, e.g. a local stand-in server
+        self.host = host
+        self.wss_url = wss_url
+        # extra websockets for candle/quote/mood streams, 0 keeps one connection
+        self.market_data_connections = market_data_connections
         self.suspend = 0.5
+        self.request_timeout = 30
+        # tries of the retrying getters (get_candles, ...) before they give up with None
+        self.request_retries = 5
+        # ssid, balance id and websocket flags of this account
+        self.state = ConnectionState()
+        # websocket message names dropped before decoding, see ignore_messages
+        self.ignored_messages = set()
+        # runs the set_*_cb callbacks, see set_callback_executor
+        self.callback_executor = CallbackExecutor()
+        # websocket recorder, see start_capture
+        self.capture = None
+        # ssid kept on disk between runs, see exnovaapi.session
+        self.session_store = SessionStore(session_file) if session_file else None
+        if self.session_store is not None:
+            self.state.SSID = self.session_store.load(email)
+        # how long each connect took to get the streams back, see get_recovery_stats
+        self.resubscribe_timeout = 5
+        self.recovery_stats = deque(maxlen=100)
+        self.api = None
         self.thread = None
         self.subscribe_candle = []
         self.subscribe_candle_all_size = []
@@ -52,42 +83,215 @@ class Exnova:
     # --------------------------------------------------------------------------
 
     def get_server_timestamp(self):
+        # estimated server time in seconds, never waits, see exnovaapi.clock
         return self.api.timesync.server_timestamp
 
-    def re_subscribe_stream(self):
-        try:
-            for ac in self.subscribe_candle:
-                sp = ac.split(",")
-                self.start_candles_one_stream(sp[0], sp[1])
-        except:
-            pass
-        # -----------------
+    def get_clock_stats(self):
+        # offset to the local clock, drift and the fastest round trip
+        return self.api.timesync.clock.stats()
+
+    def get_store_stats(self):
+        # size, evicted and expired entries of the bounded result stores
+        return self.api.store_stats()
+
+    def ignore_messages(self, *names):
+        # drop these streams in the reader thread without decoding them
+        self.ignored_messages.update(names)
+
+    def unignore_messages(self, *names):
+        self.ignored_messages.difference_update(names)
+
+    def start_capture(self, path, compress=None):
+        # record every websocket frame to path, replay with exnovaapi.ws.capture.replay
+        self.stop_capture()
+        self.capture = CaptureWriter(path, compress)
+        if getattr(self, "api", None) is not None:
+            self.api.capture = self.capture
+
+    def stop_capture(self):
+        capture, self.capture = self.capture, None
+        if getattr(self, "api", None) is not None:
+            self.api.capture = None
+        if capture is not None:
+            capture.close()
+
+    def get_send_latency(self):
+        # queue-to-socket latency per writer lane: high / normal / low
+        return self.api.send_latency()
+
+    def _wait_response(self, request_id, future, name, timeout=None, api=None):
+        # wait for the reply carrying request_id, None after the timeout
+        timeout = self.request_timeout if timeout is None else timeout
         try:
-            for ac in self.subscribe_candle_all_size:
-                self.start_candles_all_size_stream(ac)
-        except:
-            pass
+            return future.result(timeout)
+        except FutureTimeoutError:
+            (api or self.api).pending.discard(request_id)
+            logging.error('**warning** ' + name + ' late ' + str(timeout) + ' sec')
+            return None
+        except Exception as e:
+            # refused by the server, not sent or the connection was lost
+            logging.error('**warning** ' + name + ' failed: ' + str(e))
+            return None
+
+    def _wait_buy(self, request_id, future, name):
+        # wait for the "option" answer of a buy: its id or why it was refused
+        option = self._wait_response(request_id, future, name, 5)
+        if option is None:
+            return False, None
+        if "message" in option:
+            logging.error('**warning** ' + name + str(option["message"]))
+            return False, option["message"]
+        return True, option["id"]
+
+    def _market(self, ACTIVE):
+        # the connection carrying the market data of ACTIVE, see MarketDataPool
+        pool = self.api.market_data
+        if pool is None:
+            return self.api
+        return pool.for_asset(ACTIVE)
+
+    def _backoff(self, attempt):
+        # sleep before retry number attempt: suspend, 2*suspend, 4*suspend ... at most 10 sec
+        time.sleep(min(self.suspend * 2 ** (attempt - 1), 10))
+
+    def _resubscribe_shard(self, shard):
+        # a market data shard reconnected: subscribe the streams it carries again
+        pool = self.api.market_data
+        for ac in self.subscribe_candle:
+            ACTIVE, size = ac.split(",")
+            if pool.shard_of(ACTIVE) is shard:
+                shard.subscribe(OP_code.ACTIVES[ACTIVE], int(size))
+        for ACTIVE in self.subscribe_candle_all_size:
+            if pool.shard_of(ACTIVE) is shard:
+                shard.subscribe_all_size(OP_code.ACTIVES[ACTIVE])
+        for ACTIVE in self.subscribe_mood:
+            if pool.shard_of(ACTIVE) is shard:
+                shard.subscribe_Traders_mood(OP_code.ACTIVES[ACTIVE], "turbo-option")
+
+    def _wait(self, keys, predicate, name, timeout=None):
+        # sleep until predicate() holds, woken by the messages named in keys
+        timeout = self.request_timeout if timeout is None else timeout
+        if self.api.notifier.wait_for(keys, predicate, timeout):
+            return True
+        logging.error('**warning** ' + name + ' late ' + str(timeout) + ' sec')
+        return False
+
+    def re_subscribe_stream(self):
+        """Get the streams of a previous connection back.
+
+        Every candle stream's gap is backfilled with one ``get-candles``,
+        all of them in flight at once, before the streams are subscribed
+        again together. The first frames are awaited with one shared
+        ``resubscribe_timeout``, resending the missing subscriptions every
+        second.
+
+        :returns: ``(streams, streaming, backfilled)``, the number of
+            candle streams, how many of them sent a frame in time, and the
+            number of candles backfilled.
+        """
+        streams = []
+        for ac in self.subscribe_candle:
+            sp = ac.split(",")
+            streams.append((sp[0], int(sp[1])))
+        backfilled = self._backfill(streams)
+
+        for ACTIVE, size in streams:
+            self.api.candle_generated_check[str(ACTIVE)][size] = {}
+        for ACTIVE in self.subscribe_candle_all_size:
+            self.api.candle_generated_all_size_check[str(ACTIVE)] = {}
+
+        def missing():
+            return [(ACTIVE, size) for ACTIVE, size in streams
+                    if self.api.candle_generated_check[str(ACTIVE)][size] != True]
+
+        def subscribe(pending):
+            for ACTIVE, size in pending:
+                try:
+                    self._market(ACTIVE).subscribe(OP_code.ACTIVES[ACTIVE], size)
+                except:
+                    logging.error('**error** re_subscribe_stream ' + ACTIVE)
+
+        subscribe(streams)
+        for ACTIVE in self.subscribe_candle_all_size:
+            self._market(ACTIVE).subscribe_all_size(OP_code.ACTIVES[ACTIVE])
         # -------------reconnect subscribe_mood
-        try:
-            for ac in self.subscribe_mood:
-                self.start_mood_stream(ac)
-        except:
-            pass
+        for ACTIVE in self.subscribe_mood:
+            self._market(ACTIVE).subscribe_Traders_mood(OP_code.ACTIVES[ACTIVE], "turbo-option")
+
+        deadline = time.time() + self.resubscribe_timeout
+        pending = missing()
+        while pending and time.time() < deadline:
+            self.api.notifier.wait_for(
+                "candle-generated", lambda: not missing(),
+                min(1, max(0, deadline - time.time())))
+            pending = missing()
+            if pending and time.time() < deadline:
+                subscribe(pending)
+        if pending:
+            logging.error('**warning** re_subscribe_stream no frames for ' +
+                          str(len(pending)) + ' streams after ' +
+                          str(self.resubscribe_timeout) + ' sec')
+        return len(streams), len(streams) - len(pending), backfilled
+
+    def _backfill(self, streams):
+        # one get-candles per buffered stream, covering the candles missed
+        # while disconnected and the last one, which was still open
+        now = self.api.timesync.server_timestamp
+        requests = []
+        for ACTIVE, size in streams:
+            ring = self.api.real_time_candles[str(ACTIVE)].get(size)
+            if ring is None or ring.last_from is None:
+                continue
+            count = min(ring.capacity, int((now - ring.last_from) // size) + 2)
+            api = self._market(ACTIVE)
+            request_id, future = api.pending.expect()
+            api.getcandles(OP_code.ACTIVES[ACTIVE], size, count, now, request_id)
+            requests.append((ring, api, request_id, future))
+        backfilled = 0
+        for ring, api, request_id, future in requests:
+            candles = self._wait_response(request_id, future, "backfill", api=api)
+            if candles:
+                ring.extend(candles)
+                backfilled += len(candles)
+        return backfilled
+
+    def _record_recovery(self, started, reconnect, login, streams, streaming, backfilled):
+        stats = {"at": started, "seconds": time.time() - started,
+                 "reconnect": reconnect, "login": login, "streams": streams,
+                 "streaming": streaming, "backfilled": backfilled}
+        self.recovery_stats.append(stats)
+        if reconnect:
+            logging.getLogger(__name__).info(
+                'reconnect recovered %d/%d streams, %d candles backfilled in %.3f sec',
+                streaming, streams, backfilled, stats["seconds"])
+
+    def get_recovery_stats(self):
+        # the newest connect first: seconds to streams back, streams, backfilled candles
+        return list(reversed(self.recovery_stats))
 
     def set_session(self, header, cookie):
         self.SESSION_HEADER = header
         self.SESSION_COOKIE = cookie
 
     def connect(self, sms_code=None):
-        try:
-            self.api.close()
-        except:
-            pass
-            # logging.error('**warning** self.api.close() fail')
-
-        # Update the host - Try different endpoint format
-        self.api = ExnovaAPI(
-            "ws.trade.exnova.com", self.email, self.password)
+        started = time.time()
+        ssid = self.state.SSID
+        # a reconnect keeps the api, its candle buffers are backfilled below
+        reconnect = self.api is not None and sms_code is None
+        if not reconnect:
+            try:
+                self.api.close()
+            except:
+                pass
+                # logging.error('**warning** self.api.close() fail')
+
+            # Update the host - Try different endpoint format
+            self.api = ExnovaAPI(
+                self.host, self.email, self.password, state=self.state, wss_url=self.wss_url)
+            self.api.ignored_messages = self.ignored_messages
+            self.api.callback_executor = self.callback_executor
+            self.api.capture = self.capture
+            self.api.logout_at_exit = self.session_store is None
         check = None
 
         # 2FA--
@@ -104,15 +308,28 @@ class Exnova:
         check, reason = self.api.connect()
 
         if check == True:
+            if self.session_store is not None:
+                self.session_store.save(self.email, self.state.SSID)
+            if self.market_data_connections:
+                pool = MarketDataPool(self.api, self.market_data_connections,
+                                      on_reconnect=self._resubscribe_shard)
+                ok, reason = pool.connect()
+                if ok:
+                    self.api.market_data = pool
+                else:
+                    logging.error('**warning** market data connections: ' + str(reason))
             # -------------reconnect subscribe_candle
-            self.re_subscribe_stream()
+            streams, streaming, backfilled = self.re_subscribe_stream()
+            self._record_recovery(started, reconnect, ssid != self.state.SSID,
+                                  streams, streaming, backfilled)
 
             # ---------for async get name: "position-changed", microserviceName
-            while global_value.balance_id == None:
-                pass
+            if not self._wait("profile", lambda: self.state.balance_id != None,
+                              "connect balance_id"):
+                return False, "Balance id not received."
 
             self.position_change_all(
-                "subscribeMessage", global_value.balance_id)
+                "subscribeMessage", self.state.balance_id)
 
             self.order_changed_all("subscribeMessage")
             self.api.setOptions(1, True)
@@ -168,7 +385,7 @@ class Exnova:
         # True/False
         # if not connected, sometimes it's None, sometimes its '0', so
         # both will fall on this first case
-        if not global_value.check_websocket_if_connect:
+        if not self.state.check_websocket_if_connect:
             return False
         else:
             return True
@@ -187,6 +404,7 @@ class Exnova:
         for lis in sorted(OP_code.ACTIVES.items(), key=operator.itemgetter(1)):
             dicc[lis[0]] = lis[1]
         OP_code.ACTIVES = dicc
+        assets.refresh()
 
     def get_name_by_activeId(self, activeId):
         info = self.get_financial_information(activeId)
@@ -196,11 +414,9 @@ class Exnova:
             return None
 
     def get_financial_information(self, activeId):
-        self.api.financial_information = None
-        self.api.get_financial_information(activeId)
-        while self.api.financial_information == None:
-            pass
-        return self.api.financial_information
+        request_id, future = self.api.pending.expect()
+        self.api.get_financial_information(activeId, request_id)
+        return self._wait_response(request_id, future, "get_financial_information")
 
     def get_leader_board(self, country, from_position, to_position, near_traders_count, user_country_id=0, near_traders_country_count=0, top_country_count=0, top_count=0, top_type=2):
         self.api.leaderboard_deals_client = None
@@ -209,29 +425,39 @@ class Exnova:
         self.api.Get_Leader_Board(country_id, user_country_id, from_position, to_position,
                                   near_traders_country_count, near_traders_count, top_country_count, top_count, top_type)
 
-        while self.api.leaderboard_deals_client == None:
-            pass
+        self._wait("leaderboard-deals-client",
+                   lambda: self.api.leaderboard_deals_client != None, "get_leader_board")
         return self.api.leaderboard_deals_client
 
     def get_instruments(self, type):
         # type="crypto"/"forex"/"cfd"
+        # None after request_retries failed tries
         time.sleep(self.suspend)
-        self.api.instruments = None
-        while self.api.instruments == None:
+        for attempt in range(self.request_retries):
+            if attempt:
+                self._backoff(attempt)
             try:
-                self.api.get_instruments(type)
-                start = time.time()
-                while self.api.instruments == None and time.time() - start < 10:
-                    pass
+                request_id, future = self.api.pending.expect()
+                self.api.get_instruments(type, request_id)
+                instruments = self._wait_response(
+                    request_id, future, "get_instruments", 10)
             except:
                 logging.error('**error** api.get_instruments need reconnect')
                 self.connect()
-        return self.api.instruments
+                continue
+            if instruments != None:
+                return instruments
+            if not self.check_connect():
+                self.connect()
+        logging.error('**error** get_instruments gave up after ' + str(self.request_retries) + ' tries')
+        return None
 
     def instruments_input_to_ACTIVES(self, type):
         instruments = self.get_instruments(type)
+        if instruments == None:
+            return
         for ins in instruments["instruments"]:
-            OP_code.ACTIVES[ins["id"]] = ins["active_id"]
+            assets.register(ins["id"], ins["active_id"])
 
     def instruments_input_all_in_ACTIVES(self):
         self.instruments_input_to_ACTIVES("crypto")
@@ -258,16 +484,8 @@ class Exnova:
                     logging.error('**error** get_all_init need reconnect')
                     self.connect()
                     time.sleep(5)
-            start = time.time()
-            while True:
-                if time.time() - start > 30:
-                    logging.error('**warning** get_all_init late 30 sec')
-                    break
-                try:
-                    if self.api.api_option_init_all_result != None:
-                        break
-                except:
-                    pass
+            self._wait("api_option_init_all_result",
+                       lambda: self.api.api_option_init_all_result != None, "get_all_init", 30)
             try:
                 if self.api.api_option_init_all_result["isSuccessful"] == True:
                     return self.api.api_option_init_all_result
@@ -275,18 +493,12 @@ class Exnova:
                 pass
 
     def get_all_init_v2(self):
-        self.api.api_option_init_all_result_v2 = None
-
         if self.check_connect() == False:
             self.connect()
 
-        self.api.get_api_option_init_all_v2()
-        start_t = time.time()
-        while self.api.api_option_init_all_result_v2 == None:
-            if time.time() - start_t >= 30:
-                logging.error('**warning** get_all_init_v2 late 30 sec')
-                return None
-        return self.api.api_option_init_all_result_v2
+        request_id, future = self.api.pending.expect()
+        self.api.get_api_option_init_all_v2(request_id)
+        return self._wait_response(request_id, future, "get_all_init_v2", 30)
 
         # return OP_code.ACTIVES
 
@@ -391,8 +603,7 @@ class Exnova:
     # ______________________________________self.api.getprofile() https________________________________
 
     def get_profile_ansyc(self):
-        while self.api.profile.msg == None:
-            pass
+        self._wait("profile", lambda: self.api.profile.msg != None, "get_profile_ansyc")
         return self.api.profile.msg
 
     """def get_profile(self):
@@ -410,12 +621,14 @@ class Exnova:
 
     def get_currency(self):
         balances_raw = self.get_balances()
+        if balances_raw == None:
+            return None
         for balance in balances_raw["msg"]:
-            if balance["id"] == global_value.balance_id:
+            if balance["id"] == self.state.balance_id:
                 return balance["currency"]
 
     def get_balance_id(self):
-        return global_value.balance_id
+        return self.state.balance_id
 
     """ def get_balance(self):
         self.api.profile.balance = None
@@ -433,22 +646,32 @@ class Exnova:
     def get_balance(self):
 
         balances_raw = self.get_balances()
+        if balances_raw == None:
+            return None
         for balance in balances_raw["msg"]:
-            if balance["id"] == global_value.balance_id:
+            if balance["id"] == self.state.balance_id:
                 return balance["amount"]
 
     def get_balances(self):
-        self.api.balances_raw = None
-        self.api.get_balances()
-        while self.api.balances_raw == None:
-            pass
-        return self.api.balances_raw
+        # None after request_retries failed tries
+        for attempt in range(self.request_retries):
+            if attempt:
+                self._backoff(attempt)
+            request_id, future = self.api.pending.expect()
+            self.api.get_balances(request_id)
+            balances_raw = self._wait_response(request_id, future, "get_balances")
+            if balances_raw != None:
+                return balances_raw
+            if not self.check_connect():
+                self.connect()
+        logging.error('**error** get_balances gave up after ' + str(self.request_retries) + ' tries')
+        return None
 
     def get_balance_mode(self):
         # self.api.profile.balance_type=None
         profile = self.get_profile_ansyc()
         for balance in profile.get("balances"):
-            if balance["id"] == global_value.balance_id:
+            if balance["id"] == self.state.balance_id:
                 if balance["type"] == 1:
                     return "REAL"
                 elif balance["type"] == 4:
@@ -460,8 +683,9 @@ class Exnova:
     def reset_practice_balance(self):
         self.api.training_balance_reset_request = None
         self.api.reset_training_balance()
-        while self.api.training_balance_reset_request == None:
-            pass
+        self._wait("training-balance-reset",
+                   lambda: self.api.training_balance_reset_request != None,
+                   "reset_practice_balance")
         return self.api.training_balance_reset_request
 
     def position_change_all(self, Main_Name, user_balance_id):
@@ -480,11 +704,11 @@ class Exnova:
 
     def change_balance(self, Balance_MODE):
         def set_id(b_id):
-            if global_value.balance_id != None:
+            if self.state.balance_id != None:
                 self.position_change_all(
-                    "unsubscribeMessage", global_value.balance_id)
+                    "unsubscribeMessage", self.state.balance_id)
 
-            global_value.balance_id = b_id
+            self.state.balance_id = b_id
 
             self.position_change_all("subscribeMessage", b_id)
 
@@ -519,23 +743,32 @@ class Exnova:
     # ________________________self.api.getcandles() wss________________________
 
     def get_candles(self, ACTIVES, interval, count, endtime):
-        self.api.candles.candles_data = None
-        while True:
+        # every call waits on its own request_id, so calls for different
+        # assets can be in flight at the same time; None after
+        # request_retries failed tries
+        if ACTIVES not in OP_code.ACTIVES:
+            print('Asset {} not found on consts'.format(ACTIVES))
+            return None
+        for attempt in range(self.request_retries):
+            if attempt:
+                self._backoff(attempt)
+            # a dead market data shard is reconnected here, not the main connection
+            api = self._market(ACTIVES)
             try:
-                if ACTIVES not in OP_code.ACTIVES:
-                    print('Asset {} not found on consts'.format(ACTIVES))
-                    break
-                self.api.getcandles(
-                    OP_code.ACTIVES[ACTIVES], interval, count, endtime)
-                while self.check_connect and self.api.candles.candles_data == None:
-                    pass
-                if self.api.candles.candles_data != None:
-                    break
-            except:
+                request_id, future = api.pending.expect()
+                api.getcandles(
+                    OP_code.ACTIVES[ACTIVES], interval, count, endtime, request_id)
+                candles = self._wait_response(request_id, future, "get_candles", api=api)
+            except Exception as e:
+                logging.error('**error** get_candles: ' + str(e))
+                candles = None
+            if candles != None:
+                return candles
+            if api is self.api and not self.check_connect():
                 logging.error('**error** get_candles need reconnect')
                 self.connect()
-
-        return self.api.candles.candles_data
+        logging.error('**error** get_candles gave up after ' + str(self.request_retries) + ' tries')
+        return None
 
     #######################################################
     # ______________________________________________________
@@ -568,27 +801,36 @@ class Exnova:
             logging.error(
                 '**error** start_candles_stream please input right size')
 
-    def get_realtime_candles(self, ACTIVE, size):
+    def get_realtime_candles(self, ACTIVE, size, count=None):
+        """Get the streamed candles of an asset.
+
+        :param str ACTIVE: The asset name.
+        :param size: The candle size in seconds or ``"all"``.
+        :param int count: (optional) Only the newest ``count`` candles.
+        :returns: A zero copy :class:`CandleView <exnovaapi.candles.CandleView>`,
+            oldest first, or a dict of them keyed by size for ``"all"``.
+        """
         if size == "all":
-            try:
-                return self.api.real_time_candles[ACTIVE]
-            except:
+            rings = self.api.real_time_candles.get(ACTIVE)
+            if not rings:
                 logging.error(
                     '**error** get_realtime_candles() size="all" can not get candle')
                 return False
+            return {s: ring.last(count) for s, ring in rings.items()}
         elif size in self.size:
-            try:
-                return self.api.real_time_candles[ACTIVE][size]
-            except:
+            ring = self.api.real_time_candles.get(ACTIVE, {}).get(size)
+            if ring is None:
                 logging.error(
                     '**error** get_realtime_candles() size=' + str(size) + ' can not get candle')
                 return False
+            return ring.last(count)
         else:
             logging.error(
                 '**error** get_realtime_candles() please input right "size"')
 
     def get_all_realtime_candles(self):
-        return self.api.real_time_candles
+        return {active: {size: ring.last() for size, ring in rings.items()}
+                for active, rings in self.api.real_time_candles.items()}
 
     ################################################
     # ---------REAL TIME CANDLE Subset Function---------
@@ -598,9 +840,8 @@ class Exnova:
     def full_realtime_get_candle(self, ACTIVE, size, maxdict):
         candles = self.get_candles(
             ACTIVE, size, maxdict, self.api.timesync.server_timestamp)
-        for can in candles:
-            self.api.real_time_candles[str(
-                ACTIVE)][int(size)][can["from"]] = can
+        if candles:
+            self.api.candle_ring(str(ACTIVE), int(size), maxdict).extend(candles)
 
     # ------------------------Subscribe ONE SIZE-----------------------
     def start_candles_one_stream(self, ACTIVE, size):
@@ -620,11 +861,13 @@ class Exnova:
                 pass
             try:
 
-                self.api.subscribe(OP_code.ACTIVES[ACTIVE], size)
+                self._market(ACTIVE).subscribe(OP_code.ACTIVES[ACTIVE], size)
             except:
                 logging.error('**error** start_candles_stream reconnect')
                 self.connect()
-            time.sleep(1)
+            self.api.notifier.wait_for(
+                "candle-generated",
+                lambda: self.api.candle_generated_check[str(ACTIVE)][int(size)] == True, 1)
 
     def stop_candles_one_stream(self, ACTIVE, size):
         if ((ACTIVE + "," + str(size)) in self.subscribe_candle) == True:
@@ -636,7 +879,7 @@ class Exnova:
             except:
                 pass
             self.api.candle_generated_check[str(ACTIVE)][int(size)] = {}
-            self.api.unsubscribe(OP_code.ACTIVES[ACTIVE], size)
+            self._market(ACTIVE).unsubscribe(OP_code.ACTIVES[ACTIVE], size)
             time.sleep(self.suspend * 10)
 
     # ------------------------Subscribe ALL SIZE-----------------------
@@ -657,12 +900,14 @@ class Exnova:
             except:
                 pass
             try:
-                self.api.subscribe_all_size(OP_code.ACTIVES[ACTIVE])
+                self._market(ACTIVE).subscribe_all_size(OP_code.ACTIVES[ACTIVE])
             except:
                 logging.error(
                     '**error** start_candles_all_size_stream reconnect')
                 self.connect()
-            time.sleep(1)
+            self.api.notifier.wait_for(
+                "candles-generated",
+                lambda: self.api.candle_generated_all_size_check[str(ACTIVE)] == True, 1)
 
     def stop_candles_all_size_stream(self, ACTIVE):
         if (str(ACTIVE) in self.subscribe_candle_all_size) == True:
@@ -674,7 +919,7 @@ class Exnova:
             except:
                 pass
             self.api.candle_generated_all_size_check[str(ACTIVE)] = {}
-            self.api.unsubscribe_all_size(OP_code.ACTIVES[ACTIVE])
+            self._market(ACTIVE).unsubscribe_all_size(OP_code.ACTIVES[ACTIVE])
             time.sleep(self.suspend * 10)
 
     # ------------------------top_assets_updated---------------------------------------------
@@ -712,7 +957,7 @@ class Exnova:
             self.subscribe_mood.append(ACTIVES)
 
         while True:
-            self.api.subscribe_Traders_mood(
+            self._market(ACTIVES).subscribe_Traders_mood(
                 OP_code.ACTIVES[ACTIVES], instrument)
             try:
                 self.api.traders_mood[OP_code.ACTIVES[ACTIVES]]
@@ -723,7 +968,7 @@ class Exnova:
     def stop_mood_stream(self, ACTIVES, instrument="turbo-option"):
         if ACTIVES in self.subscribe_mood == True:
             del self.subscribe_mood[ACTIVES]
-        self.api.unsubscribe_Traders_mood(OP_code.ACTIVES[ACTIVES], instrument)
+        self._market(ACTIVES).unsubscribe_Traders_mood(OP_code.ACTIVES[ACTIVES], instrument)
 
     def get_traders_mood(self, ACTIVES):
         # return highter %
@@ -738,33 +983,35 @@ class Exnova:
     # -----------------technical_indicators----------------------
 
     def get_technical_indicators(self, ACTIVES):
-        request_id = self.api.get_Technical_indicators(
-            OP_code.ACTIVES[ACTIVES])
-        while self.api.technical_indicators.get(request_id) == None:
-            pass
-        return self.api.technical_indicators[request_id]
+        request_id, future = self.api.pending.expect()
+        self.api.get_Technical_indicators(OP_code.ACTIVES[ACTIVES], request_id)
+        return self._wait_response(request_id, future, "get_technical_indicators")
 
 ##############################################################################################
 
 
 ##############################################################################################
 
-    def check_binary_order(self, order_id):
-        while order_id not in self.api.order_binary:
-            pass
+    def check_binary_order(self, order_id, timeout=None):
+        # None when the option-closed frame did not arrive in time
+        if not self._wait("option-closed", lambda: order_id in self.api.order_binary,
+                          "check_binary_order", timeout):
+            return None
         your_order = self.api.order_binary[order_id]
         del self.api.order_binary[order_id]
         return your_order
 
-    def check_win(self, id_number):
+    def check_win(self, id_number, timeout=None):
         # 'win':win money 'equal':no win no loose   'loose':loose money
-        while True:
+        # None when the option did not close in time
+        def closed():
             try:
-                listinfodata_dict = self.api.listinfodata.get(id_number)
-                if listinfodata_dict["game_state"] == 1:
-                    break
+                return self.api.listinfodata.get(id_number)["game_state"] == 1
             except:
-                pass
+                return False
+        if not self._wait("listInfoData", closed, "check_win", timeout):
+            return None
+        listinfodata_dict = self.api.listinfodata.get(id_number)
         self.api.listinfodata.delete(id_number)
         return listinfodata_dict["win"]
 
@@ -784,13 +1031,12 @@ class Exnova:
         # Function by kkagill ( https://github.com/Lu-Yi-Hsun/exnovaAPI/issues/196 | https://github.com/kkagill )
         # Function only work with Options!
 
-    def check_win_v4(self, id_number):
-        while True:
-            try:
-                if self.api.socket_option_closed[id_number] != None:
-                    break
-            except:
-                pass
+    def check_win_v4(self, id_number, timeout=None):
+        # (None, None) when the option did not close in time
+        if not self._wait("socket-option-closed",
+                          lambda: self.api.socket_option_closed.get(id_number) != None,
+                          "check_win_v4", timeout):
+            return None, None
         x = self.api.socket_option_closed[id_number]
         return x['msg']['win'], (0 if x['msg']['win'] == 'equal' else float(x['msg']['sum']) * -1 if x['msg']['win'] == 'loose' else float(x['msg']['win_amount']) - float(x['msg']['sum']))
 
@@ -808,20 +1054,20 @@ class Exnova:
         # INPUT:int
         while True:
             self.api.game_betinfo.isSuccessful = None
-            start = time.time()
             try:
                 self.api.get_betinfo(id_number)
             except:
                 logging.error(
                     '**error** def get_betinfo  self.api.get_betinfo reconnect')
                 self.connect()
-            while self.api.game_betinfo.isSuccessful == None:
-                if time.time() - start > 10:
-                    logging.error(
-                        '**error** get_betinfo time out need reconnect')
-                    self.connect()
-                    self.api.get_betinfo(id_number)
-                    time.sleep(self.suspend * 10)
+            while not self._wait("api_game_betinfo_result",
+                                 lambda: self.api.game_betinfo.isSuccessful != None,
+                                 "get_betinfo", 10):
+                logging.error(
+                    '**error** get_betinfo time out need reconnect')
+                self.connect()
+                self.api.get_betinfo(id_number)
+                time.sleep(self.suspend * 10)
             if self.api.game_betinfo.isSuccessful == True:
                 return self.api.game_betinfo.isSuccessful, self.api.game_betinfo.dict
             else:
@@ -829,38 +1075,31 @@ class Exnova:
             time.sleep(self.suspend * 10)
 
     def get_optioninfo(self, limit):
-        self.api.api_game_getoptions_result = None
-        self.api.get_options(limit)
-        while self.api.api_game_getoptions_result == None:
-            pass
-
-        return self.api.api_game_getoptions_result
+        request_id, future = self.api.pending.expect()
+        self.api.get_options(limit, request_id)
+        return self._wait_response(request_id, future, "get_optioninfo")
 
     def get_optioninfo_v2(self, limit):
-        self.api.get_options_v2_data = None
-        self.api.get_options_v2(limit, "binary,turbo")
-        while self.api.get_options_v2_data == None:
-            pass
-
-        return self.api.get_options_v2_data
+        request_id, future = self.api.pending.expect()
+        self.api.get_options_v2(limit, "binary,turbo", request_id)
+        return self._wait_response(request_id, future, "get_optioninfo_v2")
 
     # __________________________BUY__________________________
 
     # __________________FOR OPTION____________________________
 
     def buy_multi(self, price, ACTIVES, ACTION, expirations):
-        self.api.buy_multi_option = {}
         if len(price) == len(ACTIVES) == len(ACTION) == len(expirations):
-            buy_len = len(price)
-            for idx in range(buy_len):
+            requests = []
+            for idx in range(len(price)):
+                request_id, future = self.api.pending.expect()
                 self.api.buyv3(
-                    price[idx], OP_code.ACTIVES[ACTIVES[idx]], ACTION[idx], expirations[idx], idx)
-            while len(self.api.buy_multi_option) < buy_len:
-                pass
+                    price[idx], OP_code.ACTIVES[ACTIVES[idx]], ACTION[idx], expirations[idx], request_id)
+                requests.append((request_id, future))
             buy_id = []
-            for key in sorted(self.api.buy_multi_option.keys()):
+            for request_id, future in requests:
+                value = self._wait_response(request_id, future, "buy_multi")
                 try:
-                    value = self.api.buy_multi_option[str(key)]
                     buy_id.append(value["id"])
                 except:
                     buy_id.append(None)
@@ -877,131 +1116,73 @@ class Exnova:
         return "ERROR duration"
 
     def buy_by_raw_expirations(self, price, active, direction, option, expired):
-
-        self.api.buy_multi_option = {}
-        self.api.buy_successful = None
-        req_id = "buyraw"
-        try:
-            self.api.buy_multi_option[req_id]["id"] = None
-        except:
-            pass
+        request_id, future = self.api.pending.expect()
         self.api.buyv3_by_raw_expired(
-            price, OP_code.ACTIVES[active], direction, option, expired, request_id=req_id)
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[req_id].keys():
-                    logging.error(
-                        '**warning** buy' + str(self.api.buy_multi_option[req_id]["message"]))
-                    return False, self.api.buy_multi_option[req_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[req_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[req_id]["id"]
+            price, OP_code.ACTIVES[active], direction, option, expired, request_id=request_id)
+        return self._wait_buy(request_id, future, "buy")
 
     def buy(self, price, ACTIVES, ACTION, expirations):
-        self.api.buy_multi_option = {}
-        self.api.buy_successful = None
-        # req_id = "buy"
-        req_id = str(randint(0, 10000))
-        try:
-            self.api.buy_multi_option[req_id]["id"] = None
-        except:
-            pass
+        # every buy waits on its own request_id, so buys can run concurrently
+        request_id, future = self.api.pending.expect()
         self.api.buyv3(
-            float(price), OP_code.ACTIVES[ACTIVES], str(ACTION), int(expirations), req_id)
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[req_id].keys():
-                    return False, self.api.buy_multi_option[req_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[req_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[req_id]["id"]
+            float(price), OP_code.ACTIVES[ACTIVES], str(ACTION), int(expirations), request_id)
+        return self._wait_buy(request_id, future, "buy")
 
     def sell_option(self, options_ids):
-        self.api.sell_option(options_ids)
         self.api.sold_options_respond = None
-        while self.api.sold_options_respond == None:
-            pass
+        self.api.sell_option(options_ids)
+        self._wait("sold-options", lambda: self.api.sold_options_respond != None, "sell_option")
         return self.api.sold_options_respond
 
     def sell_digital_option(self, options_ids):
-        self.api.sell_digital_option(options_ids)
         self.api.sold_digital_options_respond = None
-        while self.api.sold_digital_options_respond == None:
-            pass
+        self.api.sell_digital_option(options_ids)
+        self._wait("position-closed", lambda: self.api.sold_digital_options_respond != None, "sell_digital_option")
         return self.api.sold_digital_options_respond
 # __________________for Digital___________________
 
     def get_digital_underlying_list_data(self):
-        self.api.underlying_list_data = None
-        self.api.get_digital_underlying()
-        start_t = time.time()
-        while self.api.underlying_list_data == None:
-            if time.time() - start_t >= 30:
-                logging.error(
-                    '**warning** get_digital_underlying_list_data late 30 sec')
-                return None
-
-        return self.api.underlying_list_data
+        request_id, future = self.api.pending.expect()
+        self.api.get_digital_underlying(request_id)
+        return self._wait_response(
+            request_id, future, "get_digital_underlying_list_data", 30)
 
     def get_strike_list(self, ACTIVES, duration):
-        self.api.strike_list = None
-        self.api.get_strike_list(ACTIVES, duration)
+        request_id, future = self.api.pending.expect()
+        self.api.get_strike_list(ACTIVES, duration, request_id)
+        strike_list = self._wait_response(request_id, future, "get_strike_list")
         ans = {}
-        while self.api.strike_list == None:
-            pass
         try:
-            for data in self.api.strike_list["msg"]["strike"]:
+            for data in strike_list["msg"]["strike"]:
                 temp = {}
                 temp["call"] = data["call"]["id"]
                 temp["put"] = data["put"]["id"]
                 ans[("%.6f" % (float(data["value"]) * 10e-7))] = temp
         except:
             logging.error('**error** get_strike_list read problem...')
-            return self.api.strike_list, None
-        return self.api.strike_list, ans
+            return strike_list, None
+        return strike_list, ans
 
     def subscribe_strike_list(self, ACTIVE, expiration_period):
-        self.api.subscribe_instrument_quites_generated(
+        self._market(ACTIVE).subscribe_instrument_quites_generated(
             ACTIVE, expiration_period)
 
     def unsubscribe_strike_list(self, ACTIVE, expiration_period):
         del self.api.instrument_quites_generated_data[ACTIVE]
-        self.api.unsubscribe_instrument_quites_generated(
+        self.api.instrument_quotes_generated_raw_data.pop(ACTIVE, None)
+        self._market(ACTIVE).unsubscribe_instrument_quites_generated(
             ACTIVE, expiration_period)
 
     def get_instrument_quites_generated_data(self, ACTIVE, duration):
-        while self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60] == {}:
-            pass
+        self._wait("instrument-quotes-generated",
+                   lambda: self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60] != {},
+                   "get_instrument_quites_generated_data")
         return self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60]
 
     def get_realtime_strike_list(self, ACTIVE, duration):
-        while True:
-            if not self.api.instrument_quites_generated_data[ACTIVE][duration * 60]:
-                pass
-            else:
-                break
+        self._wait("instrument-quotes-generated",
+                   lambda: self.api.instrument_quites_generated_data[ACTIVE][duration * 60],
+                   "get_realtime_strike_list")
         """
         strike_list dict: price:{call:id,put:id}
         """
@@ -1056,29 +1237,13 @@ class Exnova:
             logging.error('buy_digital_spot active error')
             return -1, None
         # doEURUSD201907191250PT5MPSPT
-        timestamp = int(self.api.timesync.server_timestamp)
-        if duration == 1:
-            exp, _ = get_expiration_time(timestamp, duration)
-        else:
-            now_date = datetime.fromtimestamp(
-                timestamp) + timedelta(minutes=1, seconds=30)
-            while True:
-                if now_date.minute % duration == 0 and time.mktime(now_date.timetuple()) - timestamp > 30:
-                    break
-                now_date = now_date + timedelta(minutes=1)
-            exp = time.mktime(now_date.timetuple())
-
-        dateFormated = str(datetime.utcfromtimestamp(
-            exp).strftime("%Y%m%d%H%M"))
-        instrument_id = "do" + active + dateFormated + \
-                        "PT" + str(duration) + "M" + action + "SPT"
+        instrument_id = get_digital_instrument_id(
+            active, action, duration, int(self.api.timesync.server_timestamp))
         # self.api.digital_option_placed_id = None
 
-        request_id = self.api.place_digital_option(instrument_id, amount)
-
-        while self.api.digital_option_placed_id.get(request_id) == None:
-            pass
-        digital_order_id = self.api.digital_option_placed_id.get(request_id)
+        request_id, future = self.api.pending.expect()
+        self.api.place_digital_option(instrument_id, amount, request_id=request_id)
+        digital_order_id = self._wait_response(request_id, future, "buy_digital_spot")
         if isinstance(digital_order_id, int):
             return True, digital_order_id
         else:
@@ -1098,8 +1263,10 @@ class Exnova:
                     return row["price"]["bid"]
             return None
 
-        while self.get_async_order(position_id)["position-changed"] == {}:
-            pass
+        if not self._wait("position-changed",
+                          lambda: self.get_async_order(position_id)["position-changed"] != {},
+                          "get_digital_spot_profit_after_sale"):
+            return None
         # ___________________/*position*/_________________
         position = self.get_async_order(position_id)["position-changed"]["msg"]
         # doEURUSD201911040628PT1MPSPT
@@ -1185,24 +1352,24 @@ class Exnova:
             return None
 
     def buy_digital(self, amount, instrument_id):
-        self.api.digital_option_placed_id = None
-        self.api.place_digital_option(instrument_id, amount)
-        start_t = time.time()
-        while self.api.digital_option_placed_id == None:
-            if time.time() - start_t > 30:
-                logging.error('buy_digital loss digital_option_placed_id')
-                return False, None
-        return True, self.api.digital_option_placed_id
+        request_id, future = self.api.pending.expect()
+        self.api.place_digital_option(instrument_id, amount, request_id=request_id)
+        digital_order_id = self._wait_response(request_id, future, "buy_digital", 30)
+        if digital_order_id == None:
+            logging.error('buy_digital loss digital_option_placed_id')
+            return False, None
+        return True, digital_order_id
 
     def close_digital_option(self, position_id):
         self.api.result = None
-        while self.get_async_order(position_id)["position-changed"] == {}:
-            pass
+        if not self._wait("position-changed",
+                          lambda: self.get_async_order(position_id)["position-changed"] != {},
+                          "close_digital_option"):
+            return False
         position_changed = self.get_async_order(
             position_id)["position-changed"]["msg"]
         self.api.close_digital_option(position_changed["external_id"])
-        while self.api.result == None:
-            pass
+        self._wait("result", lambda: self.api.result != None, "close_digital_option")
         return self.api.result
 
     def check_win_digital(self, buy_order_id, polling_time):
@@ -1218,8 +1385,10 @@ class Exnova:
 
     def check_win_digital_v2(self, buy_order_id):
 
-        while self.get_async_order(buy_order_id)["position-changed"] == {}:
-            pass
+        if not self._wait("position-changed",
+                          lambda: self.get_async_order(buy_order_id)["position-changed"] != {},
+                          "check_win_digital_v2"):
+            return False, None
         order_data = self.get_async_order(
             buy_order_id)["position-changed"]["msg"]
         if order_data != None:
@@ -1257,8 +1426,8 @@ class Exnova:
             use_token_for_commission=use_token_for_commission
         )
 
-        while self.api.buy_order_id == None:
-            pass
+        if not self._wait("order-placed-temp", lambda: self.api.buy_order_id != None, "buy_order"):
+            return False, None
         check, data = self.get_order(self.api.buy_order_id)
         while data["status"] == "pending_new":
             check, data = self.get_order(self.api.buy_order_id)
@@ -1276,8 +1445,8 @@ class Exnova:
     def change_auto_margin_call(self, ID_Name, ID, auto_margin_call):
         self.api.auto_margin_call_changed_respond = None
         self.api.change_auto_margin_call(ID_Name, ID, auto_margin_call)
-        while self.api.auto_margin_call_changed_respond == None:
-            pass
+        if not self._wait("auto-margin-call-changed", lambda: self.api.auto_margin_call_changed_respond != None, "change_auto_margin_call"):
+            return False, None
         if self.api.auto_margin_call_changed_respond["status"] == 2000:
             return True, self.api.auto_margin_call_changed_respond
         else:
@@ -1306,8 +1475,8 @@ class Exnova:
                 use_trail_stop=use_trail_stop)
             self.change_auto_margin_call(
                 ID_Name=ID_Name, ID=ID, auto_margin_call=auto_margin_call)
-            while self.api.tpsl_changed_respond == None:
-                pass
+            if not self._wait("tpsl-changed", lambda: self.api.tpsl_changed_respond != None, "change_order"):
+                return False, None
             if self.api.tpsl_changed_respond["status"] == 2000:
                 return True, self.api.tpsl_changed_respond["msg"]
             else:
@@ -1326,45 +1495,51 @@ class Exnova:
         # pending_new:this order is working now
         # filled:this order is ok now
         # new
-        self.api.order_data = None
-        self.api.get_order(buy_order_id)
-        while self.api.order_data == None:
-            pass
-        if self.api.order_data["status"] == 2000:
-            return True, self.api.order_data["msg"]
+        request_id, future = self.api.pending.expect()
+        self.api.get_order(buy_order_id, request_id)
+        order_data = self._wait_response(request_id, future, "get_order")
+        if order_data == None:
+            return False, None
+        if order_data["status"] == 2000:
+            return True, order_data["msg"]
         else:
             return False, None
 
     def get_pending(self, instrument_type):
-        self.api.deferred_orders = None
-        self.api.get_pending(instrument_type)
-        while self.api.deferred_orders == None:
-            pass
-        if self.api.deferred_orders["status"] == 2000:
-            return True, self.api.deferred_orders["msg"]
+        request_id, future = self.api.pending.expect()
+        self.api.get_pending(instrument_type, request_id)
+        deferred_orders = self._wait_response(request_id, future, "get_pending")
+        if deferred_orders == None:
+            return False, None
+        if deferred_orders["status"] == 2000:
+            return True, deferred_orders["msg"]
         else:
             return False, None
 
     # this function is heavy
     def get_positions(self, instrument_type):
-        self.api.positions = None
-        self.api.get_positions(instrument_type)
-        while self.api.positions == None:
-            pass
-        if self.api.positions["status"] == 2000:
-            return True, self.api.positions["msg"]
+        request_id, future = self.api.pending.expect()
+        self.api.get_positions(instrument_type, request_id)
+        positions = self._wait_response(request_id, future, "get_positions")
+        if positions == None:
+            return False, None
+        if positions["status"] == 2000:
+            return True, positions["msg"]
         else:
             return False, None
 
     def get_position(self, buy_order_id):
-        self.api.position = None
         check, order_data = self.get_order(buy_order_id)
+        if not check:
+            return False, None
         position_id = order_data["position_id"]
-        self.api.get_position(position_id)
-        while self.api.position == None:
-            pass
-        if self.api.position["status"] == 2000:
-            return True, self.api.position["msg"]
+        request_id, future = self.api.pending.expect()
+        self.api.get_position(position_id, request_id)
+        position = self._wait_response(request_id, future, "get_position")
+        if position == None:
+            return False, None
+        if position["status"] == 2000:
+            return True, position["msg"]
         else:
             return False, None
 
@@ -1373,26 +1548,26 @@ class Exnova:
     def get_digital_position_by_position_id(self, position_id):
         self.api.position = None
         self.api.get_digital_position(position_id)
-        while self.api.position == None:
-            pass
+        self._wait("position", lambda: self.api.position != None, "get_digital_position_by_position_id")
         return self.api.position
 
     def get_digital_position(self, order_id):
         self.api.position = None
-        while self.get_async_order(order_id)["position-changed"] == {}:
-            pass
+        if not self._wait("position-changed",
+                          lambda: self.get_async_order(order_id)["position-changed"] != {},
+                          "get_digital_position"):
+            return None
         position_id = self.get_async_order(
             order_id)["position-changed"]["msg"]["external_id"]
         self.api.get_digital_position(position_id)
-        while self.api.position == None:
-            pass
+        self._wait("position", lambda: self.api.position != None, "get_digital_position")
         return self.api.position
 
     def get_position_history(self, instrument_type):
         self.api.position_history = None
         self.api.get_position_history(instrument_type)
-        while self.api.position_history == None:
-            pass
+        if not self._wait("position-history", lambda: self.api.position_history != None, "get_position_history"):
+            return False, None
 
         if self.api.position_history["status"] == 2000:
             return True, self.api.position_history["msg"]
@@ -1404,8 +1579,8 @@ class Exnova:
         self.api.position_history_v2 = None
         self.api.get_position_history_v2(
             instrument_type, limit, offset, start, end)
-        while self.api.position_history_v2 == None:
-            pass
+        if not self._wait("history-positions", lambda: self.api.position_history_v2 != None, "get_position_history_v2"):
+            return False, None
 
         if self.api.position_history_v2["status"] == 2000:
             return True, self.api.position_history_v2["msg"]
@@ -1419,8 +1594,8 @@ class Exnova:
         else:
             self.api.get_available_leverages(
                 instrument_type, OP_code.ACTIVES[actives])
-        while self.api.available_leverages == None:
-            pass
+        if not self._wait("available-leverages", lambda: self.api.available_leverages != None, "get_available_leverages"):
+            return False, None
         if self.api.available_leverages["status"] == 2000:
             return True, self.api.available_leverages["msg"]
         else:
@@ -1429,8 +1604,8 @@ class Exnova:
     def cancel_order(self, buy_order_id):
         self.api.order_canceled = None
         self.api.cancel_order(buy_order_id)
-        while self.api.order_canceled == None:
-            pass
+        if not self._wait("order-canceled", lambda: self.api.order_canceled != None, "cancel_order"):
+            return False
         if self.api.order_canceled["status"] == 2000:
             return True
         else:
@@ -1441,8 +1616,8 @@ class Exnova:
         if data["position_id"] != None:
             self.api.close_position_data = None
             self.api.close_position(data["position_id"])
-            while self.api.close_position_data == None:
-                pass
+            if not self._wait("position-closed", lambda: self.api.close_position_data != None, "close_position"):
+                return False
             if self.api.close_position_data["status"] == 2000:
                 return True
             else:
@@ -1455,8 +1630,8 @@ class Exnova:
             pass
         position_changed = self.get_async_order(position_id)
         self.api.close_position(position_changed["id"])
-        while self.api.close_position_data == None:
-            pass
+        if not self._wait("position-closed", lambda: self.api.close_position_data != None, "close_position_v2"):
+            return False
         if self.api.close_position_data["status"] == 2000:
             return True
         else:
@@ -1465,8 +1640,8 @@ class Exnova:
     def get_overnight_fee(self, instrument_type, active):
         self.api.overnight_fee = None
         self.api.get_overnight_fee(instrument_type, OP_code.ACTIVES[active])
-        while self.api.overnight_fee == None:
-            pass
+        if not self._wait("overnight-fee", lambda: self.api.overnight_fee != None, "get_overnight_fee"):
+            return False, None
         if self.api.overnight_fee["status"] == 2000:
             return True, self.api.overnight_fee["msg"]
         else:
@@ -1481,7 +1656,10 @@ class Exnova:
     # -----------------------------------------------------------------
 
     def opcode_to_name(self, opcode):
-        return list(OP_code.ACTIVES.keys())[list(OP_code.ACTIVES.values()).index(opcode)]
+        name = assets.name_of(opcode)
+        if name is None:
+            raise ValueError("%r is not a known active id" % (opcode,))
+        return name
 
     # name:
     # "live-deal-binary-option-placed"
@@ -1509,6 +1687,18 @@ class Exnova:
             time.sleep(1)
         """
 
+    def set_callback_executor(self, workers=2, maxsize=1000, policy="drop-oldest"):
+        # policy: "drop-oldest" or "coalesce" (keep only the newest event per asset)
+        old = self.callback_executor
+        self.callback_executor = CallbackExecutor(workers, maxsize, policy)
+        if getattr(self, "api", None) is not None:
+            self.api.callback_executor = self.callback_executor
+        old.stop()
+
+    def get_callback_stats(self):
+        # queue depth, dropped / coalesced events of the set_*_cb callbacks
+        return self.callback_executor.stats()
+
     def set_digital_live_deal_cb(self, cb):
         self.api.digital_live_deal_cb = cb
 
@@ -1522,14 +1712,14 @@ class Exnova:
         return self.api.live_deal_data[name][active][_type].pop()
 
     def clear_live_deal(self, name, active, _type, buffersize):
+        # a buffer without buffersize would grow for as long as the bot runs
         self.api.live_deal_data[name][active][_type] = deque(
-            list(), buffersize)
+            list(), buffersize or LIVE_DEAL_MAXLEN)
 
     def get_user_profile_client(self, user_id):
         self.api.user_profile_client = None
         self.api.Get_User_Profile_Client(user_id)
-        while self.api.user_profile_client == None:
-            pass
+        self._wait("user-profile-client", lambda: self.api.user_profile_client != None, "get_user_profile_client")
 
         return self.api.user_profile_client
 
@@ -1562,10 +1752,9 @@ class Exnova:
 
         self.api.subscribe_digital_price_splitter(asset_id)
 
-        start = time.time()
-        while self.api.digital_payout is None:
-            if seconds and int(time.time() - start) > seconds:
-                break
+        self.api.notifier.wait_for(
+            "client-price-generated", lambda: self.api.digital_payout is not None,
+            seconds or None)
 
         self.api.unsubscribe_digital_price_splitter(asset_id)
 
@@ -1607,12 +1796,9 @@ class Exnova:
             "00T" + str(duration) + "M" + action + "SPT"
         logger = logging.getLogger(__name__)
         logger.info(instrument_id)
-        request_id = self.api.place_digital_option_v2(instrument_id, active_id, amount)
-
-        while self.api.digital_option_placed_id.get(request_id) is None:
-            pass
-
-        digital_order_id = self.api.digital_option_placed_id.get(request_id)
+        request_id, future = self.api.pending.expect()
+        self.api.place_digital_option_v2(instrument_id, active_id, amount, request_id)
+        digital_order_id = self._wait_response(request_id, future, "buy_digital_spot_v2")
         if isinstance(digital_order_id, int):
             return True, digital_order_id
         else:
@@ -1627,14 +1813,7 @@ class Exnova:
         :param expiration: The expiration time in seconds (typically 3, 5 or 10).
         :returns: A tuple of (result, order_id).
         """
-        self.api.buy_multi_option = {}
-        self.api.buy_successful = None
-        
-        request_id = str(randint(0, 10000))
-        try:
-            self.api.buy_multi_option[request_id]["id"] = None
-        except:
-            pass
+        request_id, future = self.api.pending.expect()
         
         # Convert active name to active_id if needed
         if isinstance(active, str):
@@ -1649,25 +1828,7 @@ class Exnova:
         
         self.api.buy_blitz_option(price, active_id, direction, expiration, profit_percent, value, request_id)
         
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[request_id].keys():
-                    return False, self.api.buy_multi_option[request_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[request_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy_blitz late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[request_id]["id"]
+        return self._wait_buy(request_id, future, "buy_blitz")
 
     def get_blitz_payout(self, active):
         """
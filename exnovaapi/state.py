@@ -0,0 +1,18 @@
+"""Module for Exnova per-account connection state."""
+
+
+class ConnectionState(object):
+    """Session and connection flags of one Exnova account.
+
+    Used instead of the :mod:`exnovaapi.global_value` module globals, so
+    several accounts can be driven from one process. The ssid and balance
+    id outlive reconnects, the websocket flags are reset by every new
+    websocket.
+    """
+
+    def __init__(self):
+        self.SSID = None
+        self.balance_id = None
+        self.check_websocket_if_connect = None
+        self.check_websocket_if_error = False
+        self.websocket_error_reason = None
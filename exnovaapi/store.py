@@ -0,0 +1,146 @@
+"""Module for bounded websocket result stores.
+
+Handlers keep what the server pushes (closed options, order events, digital
+order ids, quotes) in dicts keyed by ids that never repeat, so over days of
+uptime they only grow. A :class:`BoundedStore` is a dict that forgets its
+least recently used entries past ``maxsize`` and entries unused for
+``ttl`` seconds::
+
+    store = BoundedStore(maxsize=5000, ttl=6 * 3600)
+    store[option_id] = message
+    store.stats()["evicted"]
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+_MISSING = object()
+
+
+class BoundedStore(MutableMapping):
+    """Thread safe dict with a size cap and an idle time to live.
+
+    Reading or writing a key marks it used. ``default_factory`` works like
+    the one of :class:`collections.defaultdict`: ``store[key]`` creates the
+    missing entry, while ``get`` and ``in`` never do.
+    """
+
+    def __init__(self, maxsize=None, ttl=None, default_factory=None, clock=time.monotonic):
+        """
+        :param int maxsize: (optional) The number of entries kept, None for
+            no cap.
+        :param float ttl: (optional) Seconds an entry is kept after its last
+            use, None to keep it until evicted.
+        :param default_factory: (optional) The callable building missing
+            entries on ``store[key]``.
+        :param clock: (optional) The monotonic clock the ttl is measured on.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.default_factory = default_factory
+        self.clock = clock
+        self.evicted = 0
+        self.expired = 0
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def _expire(self, now):
+        # entries are in last use order, so the stale ones are at the front
+        if self.ttl is None:
+            return
+        data = self.__data
+        deadline = now - self.ttl
+        while data:
+            key, (stamp, _) = next(iter(data.items()))
+            if stamp > deadline:
+                break
+            del data[key]
+            self.expired += 1
+
+    def _lookup(self, key, now):
+        entry = self.__data.get(key)
+        if entry is None:
+            return _MISSING
+        if self.ttl is not None and entry[0] <= now - self.ttl:
+            del self.__data[key]
+            self.expired += 1
+            return _MISSING
+        self.__data[key] = (now, entry[1])
+        self.__data.move_to_end(key)
+        return entry[1]
+
+    def _insert(self, key, value, now):
+        data = self.__data
+        data[key] = (now, value)
+        data.move_to_end(key)
+        self._expire(now)
+        if self.maxsize is not None:
+            while len(data) > self.maxsize:
+                data.popitem(last=False)
+                self.evicted += 1
+
+    def __getitem__(self, key):
+        with self.__lock:
+            now = self.clock()
+            value = self._lookup(key, now)
+            if value is _MISSING:
+                if self.default_factory is None:
+                    raise KeyError(key)
+                value = self.default_factory()
+                self._insert(key, value, now)
+            return value
+
+    def __setitem__(self, key, value):
+        with self.__lock:
+            self._insert(key, value, self.clock())
+
+    def __delitem__(self, key):
+        with self.__lock:
+            del self.__data[key]
+
+    def __contains__(self, key):
+        with self.__lock:
+            return self._lookup(key, self.clock()) is not _MISSING
+
+    def get(self, key, default=None):
+        with self.__lock:
+            value = self._lookup(key, self.clock())
+        return default if value is _MISSING else value
+
+    def pop(self, key, default=_MISSING):
+        with self.__lock:
+            value = self._lookup(key, self.clock())
+            if value is not _MISSING:
+                del self.__data[key]
+                return value
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def __iter__(self):
+        with self.__lock:
+            self._expire(self.clock())
+            return iter(list(self.__data))
+
+    def __len__(self):
+        with self.__lock:
+            self._expire(self.clock())
+            return len(self.__data)
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+
+    def __repr__(self):
+        return "%s(%d/%s)" % (type(self).__name__, len(self), self.maxsize)
+
+    def stats(self):
+        """
+        :returns: A dict with ``size``, ``maxsize``, ``ttl``, ``evicted``
+            (dropped past ``maxsize``) and ``expired`` (dropped past ``ttl``).
+        """
+        size = len(self)
+        return {"size": size, "maxsize": self.maxsize, "ttl": self.ttl,
+                "evicted": self.evicted, "expired": self.expired}
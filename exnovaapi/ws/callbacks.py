@@ -0,0 +1,117 @@
+"""Module for delivering websocket events to user callbacks."""
+
+import logging
+import threading
+from collections import deque
+
+DROP_OLDEST = "drop-oldest"
+COALESCE = "coalesce"
+
+
+class CallbackExecutor(object):
+    """Bounded worker pool running user callbacks off the reader thread.
+
+    Events wait in one queue of at most ``maxsize`` entries. When it is full
+    the oldest event is dropped. With the ``coalesce`` policy an event
+    replaces the queued one with the same key (e.g. the asset), so a slow
+    callback sees the latest deal per asset instead of a growing backlog.
+    """
+
+    def __init__(self, workers=2, maxsize=1000, policy=DROP_OLDEST):
+        """
+        :param int workers: (optional) Number of worker threads.
+        :param int maxsize: (optional) Max events waiting for a worker.
+        :param str policy: (optional) ``drop-oldest`` or ``coalesce``.
+        """
+        if policy not in (DROP_OLDEST, COALESCE):
+            raise ValueError("unknown overflow policy %r" % (policy,))
+        self.workers = max(1, int(workers))
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.__cond = threading.Condition()
+        self.__queue = deque()
+        self.__by_key = {}
+        self.__threads = []
+        self.__stopped = False
+        self.__stats = dict.fromkeys(
+            ("submitted", "delivered", "dropped", "coalesced", "errors", "max_depth"), 0)
+
+    def submit(self, fn, kwargs, key=None):
+        """Queue ``fn(**kwargs)`` for a worker thread.
+
+        :param fn: The user callback.
+        :param dict kwargs: The keyword arguments for the callback.
+        :param key: (optional) The coalescing key, e.g. the asset name.
+        """
+        with self.__cond:
+            if self.__stopped:
+                return
+            self.__stats["submitted"] += 1
+            if self.policy == COALESCE and key is not None:
+                entry = self.__by_key.get((fn, key))
+                if entry is not None:
+                    entry[2] = kwargs
+                    self.__stats["coalesced"] += 1
+                    return
+            if len(self.__queue) >= self.maxsize:
+                old = self.__queue.popleft()
+                self.__forget(old)
+                self.__stats["dropped"] += 1
+            entry = [fn, key, kwargs]
+            self.__queue.append(entry)
+            if self.policy == COALESCE and key is not None:
+                self.__by_key[(fn, key)] = entry
+            if len(self.__queue) > self.__stats["max_depth"]:
+                self.__stats["max_depth"] = len(self.__queue)
+            if len(self.__threads) < self.workers:
+                self.__start_worker()
+            self.__cond.notify()
+
+    def __forget(self, entry):
+        if entry[1] is not None and self.__by_key.get((entry[0], entry[1])) is entry:
+            del self.__by_key[(entry[0], entry[1])]
+
+    def __start_worker(self):
+        thread = threading.Thread(target=self.__work, name="exnova-callback")
+        thread.daemon = True
+        self.__threads.append(thread)
+        thread.start()
+
+    def __work(self):
+        while True:
+            with self.__cond:
+                while not self.__queue and not self.__stopped:
+                    self.__cond.wait()
+                if self.__stopped:
+                    return
+                entry = self.__queue.popleft()
+                self.__forget(entry)
+            fn, _, kwargs = entry
+            try:
+                fn(**kwargs)
+            except Exception:
+                logging.getLogger(__name__).exception('**error** callback failed')
+                with self.__cond:
+                    self.__stats["errors"] += 1
+            else:
+                with self.__cond:
+                    self.__stats["delivered"] += 1
+
+    def stop(self):
+        """Stop the workers and drop the queued events."""
+        with self.__cond:
+            self.__stopped = True
+            self.__queue.clear()
+            self.__by_key.clear()
+            self.__cond.notify_all()
+
+    def stats(self):
+        """Get the queue metrics.
+
+        :returns: A dict with ``depth`` and the ``submitted``, ``delivered``,
+            ``dropped``, ``coalesced``, ``errors`` and ``max_depth`` counters.
+        """
+        with self.__cond:
+            stats = dict(self.__stats)
+            stats["depth"] = len(self.__queue)
+        return stats
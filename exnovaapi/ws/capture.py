@@ -0,0 +1,236 @@
+"""Module for recording and replaying Exnova websocket traffic.
+
+A capture is an append-only file of length prefixed frames. Every
+recording session starts with a header giving the wall clock and
+monotonic time it started at, followed by one record per frame::
+
+    header  b"EXCAP" version:B wall:d monotonic_ns:q
+    record  direction:B monotonic_ns:q length:I payload
+
+Files named ``*.gz`` (or opened with ``compress=True``) are gzip streams,
+each session appends one gzip member.
+"""
+
+import gzip
+import queue
+import struct
+import threading
+import time
+
+INBOUND = 0
+OUTBOUND = 1
+
+MAGIC = b"EXCAP"
+VERSION = 1
+
+_HEADER = struct.Struct(">Bdq")
+_RECORD = struct.Struct(">BqI")
+
+
+def _is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+
+def is_capture(path):
+    """Check whether ``path`` holds a capture.
+
+    :param str path: The file path.
+    :returns: True when the file starts with a capture header.
+    """
+    try:
+        opener = gzip.open if _is_gzip(path) else open
+        with opener(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (OSError, EOFError):
+        return False
+
+
+class CaptureWriter(object):
+    """Thread safe capture recorder.
+
+    The reader thread records inbound frames and the writer thread the
+    outbound ones. A record is one ``struct`` pack and one buffered write,
+    so the recorder can stay on in production. With compression the
+    records are gathered in chunks of ``buffer_size`` bytes and gzipped on
+    a background thread.
+    """
+
+    def __init__(self, path, compress=None, buffer_size=1 << 16):
+        """
+        :param str path: The capture file, appended to if it exists.
+        :param bool compress: (optional) Gzip the file, from the ``.gz``
+            suffix when None.
+        :param int buffer_size: (optional) Bytes buffered before a write.
+        """
+        if compress is None:
+            compress = path.endswith(".gz")
+        self.path = path
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.frames = 0
+        self.bytes = 0
+        self.__lock = threading.Lock()
+        self.__raw = open(path, "ab", buffering=buffer_size)
+        self.__closed = False
+        self.__chunk = []
+        self.__chunk_size = 0
+        self.__queue = None
+        header = MAGIC + _HEADER.pack(VERSION, time.time(), time.monotonic_ns())
+        if compress:
+            self.__file = gzip.GzipFile(fileobj=self.__raw, mode="ab", compresslevel=1)
+            self.__queue = queue.Queue()
+            self.__thread = threading.Thread(target=self.__compress, name="exnova-capture")
+            self.__thread.daemon = True
+            self.__thread.start()
+            self.__chunk.append(header)
+        else:
+            self.__file = self.__raw
+            self.__file.write(header)
+
+    def record(self, direction, frame):
+        """Append a frame.
+
+        :param int direction: :data:`INBOUND` or :data:`OUTBOUND`.
+        :param frame: The text or binary frame.
+        """
+        if isinstance(frame, str):
+            frame = frame.encode("utf-8")
+        head = _RECORD.pack(direction, time.monotonic_ns(), len(frame))
+        with self.__lock:
+            if self.__closed:
+                return
+            self.frames += 1
+            self.bytes += len(frame)
+            if self.__queue is None:
+                self.__file.write(head)
+                self.__file.write(frame)
+                return
+            self.__chunk.append(head)
+            self.__chunk.append(frame)
+            self.__chunk_size += len(head) + len(frame)
+            if self.__chunk_size >= self.buffer_size:
+                self.__hand_off()
+
+    def __hand_off(self):
+        self.__queue.put(b"".join(self.__chunk))
+        self.__chunk = []
+        self.__chunk_size = 0
+
+    def __compress(self):
+        while True:
+            chunk = self.__queue.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, threading.Event):
+                self.__file.flush()
+                self.__raw.flush()
+                chunk.set()
+            else:
+                self.__file.write(chunk)
+
+    def flush(self):
+        """Push the buffered records to the file."""
+        with self.__lock:
+            if self.__closed:
+                return
+            if self.__queue is None:
+                self.__file.flush()
+                return
+            if self.__chunk:
+                self.__hand_off()
+            done = threading.Event()
+            self.__queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Flush and close the file, later records are ignored."""
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            if self.__queue is not None:
+                if self.__chunk:
+                    self.__hand_off()
+                self.__queue.put(None)
+        if self.__queue is not None:
+            self.__thread.join()
+            self.__file.close()
+        self.__raw.close()
+
+
+def read_capture(path, direction=None):
+    """Iterate over the frames of a capture.
+
+    Timestamps of every recording session are rebased on the first one,
+    so appended sessions follow each other in time. A capture still being
+    written, or cut short by a crash, reads up to its last whole record.
+
+    :param str path: The capture file.
+    :param int direction: (optional) Only :data:`INBOUND` or :data:`OUTBOUND`
+        frames, all when None.
+    :returns: A generator of ``(direction, seconds, text)`` tuples, seconds
+        since the start of the capture.
+    """
+    opener = gzip.open if _is_gzip(path) else open
+    with opener(path, "rb") as f:
+        try:
+            for record in _records(f, path, direction):
+                yield record
+        except EOFError:
+            return
+
+
+def _records(f, path, direction):
+    origin = None
+    offset = 0.0
+    last = 0.0
+    while True:
+        tag = f.read(1)
+        if not tag:
+            return
+        if tag == MAGIC[:1]:
+            rest = f.read(len(MAGIC) - 1 + _HEADER.size)
+            if len(rest) < len(MAGIC) - 1 + _HEADER.size or tag + rest[:4] != MAGIC:
+                raise ValueError("%s is not a websocket capture" % path)
+            _, _, mono = _HEADER.unpack(rest[4:])
+            if origin is not None:
+                offset = last
+            origin = mono
+            continue
+        rest = f.read(_RECORD.size - 1)
+        if len(rest) < _RECORD.size - 1:
+            return
+        kind, mono, length = _RECORD.unpack(tag + rest)
+        payload = f.read(length)
+        if len(payload) < length:
+            return
+        last = offset + (mono - origin) / 1e9
+        if direction is None or kind == direction:
+            yield kind, last, payload.decode("utf-8")
+
+
+def replay(client, path, speed=1.0):
+    """Feed the inbound frames of a capture through ``client.on_message``.
+
+    :param client: The :class:`WebsocketClient
+        <exnovaapi.ws.client.WebsocketClient>` to drive.
+    :param str path: The capture file.
+    :param float speed: (optional) Time scale, 1 for real time, 10 for ten
+        times faster, None or 0 for as fast as possible.
+    :returns: A dict with the ``frames`` fed, the ``elapsed`` seconds and
+        the ``late`` seconds of the frame delivered furthest behind schedule.
+    """
+    frames = 0
+    late = 0.0
+    start = time.perf_counter()
+    for _, at, text in read_capture(path, INBOUND):
+        if speed:
+            wait = at / speed - (time.perf_counter() - start)
+            if wait > 0:
+                time.sleep(wait)
+            elif -wait > late:
+                late = -wait
+        client.on_message(None, text)
+        frames += 1
+    return {"frames": frames, "elapsed": time.perf_counter() - start, "late": late}
@@ -1 +1,32 @@
 """Module for Exnova API websocket chanels."""
+
+import importlib
+
+
+class LazyChanel(object):
+    """Stand-in for a chanel class, imported by its first instance.
+
+    ``LazyChanel("candles", "GetCandles")(api)`` is
+    ``exnovaapi.ws.chanels.candles.GetCandles(api)``.
+    """
+
+    __slots__ = ("module", "name", "cls")
+
+    def __init__(self, module, name):
+        """
+        :param str module: The module in :mod:`exnovaapi.ws.chanels`.
+        :param str name: The chanel class in that module.
+        """
+        self.module = module
+        self.name = name
+        self.cls = None
+
+    def __call__(self, *args, **kwargs):
+        cls = self.cls
+        if cls is None:
+            module = importlib.import_module(__name__ + "." + self.module)
+            cls = self.cls = getattr(module, self.name)
+        return cls(*args, **kwargs)
+
+    def __repr__(self):
+        return "<lazy chanel %s.%s.%s>" % (__name__, self.module, self.name)
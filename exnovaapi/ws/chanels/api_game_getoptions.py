@@ -3,28 +3,27 @@
 
 from exnovaapi.ws.chanels.base import Base
 import time
-import exnovaapi.global_value as global_value
 class Get_options(Base):
 
     name = "api_game_getoptions"
 
-    def __call__(self,limit):
+    def __call__(self,limit, request_id=""):
     
         data = {"limit":int(limit),
-               "user_balance_id":int(global_value.balance_id)
+               "user_balance_id":int(self.api.state.balance_id)
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
  
 class Get_options_v2(Base):
     name = "sendMessage"
-    def __call__(self,limit,instrument_type):    
+    def __call__(self,limit,instrument_type, request_id=""):    
         data = {
             "name":"get-options" ,
             "body":{
                 "limit":limit,
                 "instrument_type":instrument_type,
-                "user_balance_id":int(global_value.balance_id)
+                "user_balance_id":int(self.api.state.balance_id)
                 }
         }
-        self.send_websocket_request(self.name, data)
\ No newline at end of file
+        return self.send_websocket_request(self.name, data, request_id)
\ No newline at end of file
@@ -1,5 +1,4 @@
 """Module for base Exnova base websocket chanel."""
-import time
 
 class Base(object):
     """Class for base Exnova websocket chanel."""
@@ -12,14 +11,16 @@ class Base(object):
         """
         self.api = api
 
-    def send_websocket_request(self, name, msg,request_id=""):
+    def send_websocket_request(self, name, msg,request_id="", priority=None):
         """Send request to Exnova server websocket.
 
         :param str name: The websocket chanel name.
         :param dict msg: The websocket chanel msg.
+        :param int priority: (optional) The writer lane, picked from the name when omitted.
 
-        :returns: The instance of :class:`requests.Response`.
+        :returns: The request id the message was sent with.
         """
         if request_id == '':
-            request_id = int(str(time.time()).split('.')[1])
-        return self.api.send_websocket_request(name, msg,request_id)
+            request_id = self.api.pending.next_request_id()
+        self.api.send_websocket_request(name, msg,request_id, priority)
+        return request_id
@@ -9,12 +9,15 @@ class GetCandles(Base):
 
     name = "sendMessage"
 
-    def __call__(self, active_id, interval, count,endtime):
+    def __call__(self, active_id, interval, count,endtime, request_id=""):
         """Method to send message to candles websocket chanel.
 
         :param active_id: The active/asset identifier.
         :param duration: The candle duration (timeframe for the candles).
         :param amount: The number of candles you want to have
+        :param request_id: (optional) The request id the response will carry.
+
+        :returns: The request id.
         """
         #thank SeanStayn share new request
         #https://github.com/n1nj4z33/iqoptionapi/issues/88
@@ -30,4 +33,4 @@ class GetCandles(Base):
                         }
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
@@ -3,15 +3,13 @@
 import datetime
 import time
 from exnovaapi.ws.chanels.base import Base
-import exnovaapi.global_value as global_value
-from random import randint
 # work for forex digit cfd(stock)
 
 
 class Digital_options_place_digital_option(Base):
     name = "sendMessage"
 
-    def __call__(self, instrument_id, amount, user_balance_id=None):
+    def __call__(self, instrument_id, amount, user_balance_id=None, request_id=""):
         if user_balance_id == None:
             user_balance_id = int(self.api.profile.balance_id)
 
@@ -19,14 +17,12 @@ class Digital_options_place_digital_option(Base):
             "name": "digital-options.place-digital-option",
             "version": "1.0",
             "body": {
-                "user_balance_id": int(global_value.balance_id),
+                "user_balance_id": int(self.api.state.balance_id),
                 "instrument_id": str(instrument_id),
                 "amount": str(amount)
             }
         }
-        request_id = str(randint(0, 100000))
-        self.send_websocket_request(self.name, data, request_id)
-        return request_id
+        return self.send_websocket_request(self.name, data, request_id)
 
 
 class Digital_options_close_position(Base):
@@ -46,7 +42,7 @@ class Digital_options_close_position(Base):
 class DigitalOptionsPlaceDigitalOptionV2(Base):
     name = "sendMessage"
 
-    def __call__(self, instrument_id, asset_id, amount):
+    def __call__(self, instrument_id, asset_id, amount, request_id=""):
         data = {
             "name": "digital-options.place-digital-option",
             "version": "2.0",
@@ -55,11 +51,8 @@ class DigitalOptionsPlaceDigitalOptionV2(Base):
                 "asset_id": int(asset_id),
                 "instrument_id": instrument_id,
                 "instrument_index": 0,
-                "user_balance_id": int(global_value.balance_id)
+                "user_balance_id": int(self.api.state.balance_id)
             }
         }
 
-        request_id = str(randint(0, 100000))
-        self.send_websocket_request(self.name, data, request_id)
-
-        return request_id
+        return self.send_websocket_request(self.name, data, request_id)
@@ -4,7 +4,7 @@ import time
 
 class Get_Balances(Base):
     name = "sendMessage"
-    def __call__(self):
+    def __call__(self, request_id=""):
         """ 
         :param options_ids: list or int
         """
@@ -14,4 +14,4 @@ class Get_Balances(Base):
                 "version":"1.0"
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
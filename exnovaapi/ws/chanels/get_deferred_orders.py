@@ -1,19 +1,18 @@
 from exnovaapi.ws.chanels.base import Base
 import time
-import exnovaapi.global_value as global_value
 class GetDeferredOrders(Base):
     
     name = "sendMessage"
 
-    def __call__(self,instrument_type):
+    def __call__(self,instrument_type, request_id=""):
      
         data = {"name":"get-deferred-orders",
                 "version":"1.0",
                 "body":{
-                        "user_balance_id":int(global_value.balance_id),
+                        "user_balance_id":int(self.api.state.balance_id),
                         "instrument_type":instrument_type                 
                      
                         }
                 }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
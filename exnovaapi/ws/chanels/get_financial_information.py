@@ -1,7 +1,7 @@
 from exnovaapi.ws.chanels.base import Base
 class GetFinancialInformation(Base):
     name = "sendMessage"
-    def __call__(self,activeId):
+    def __call__(self,activeId, request_id=""):
         data = {
             "name":"get-financial-information",
             "version":"1.0",
@@ -13,6 +13,6 @@ class GetFinancialInformation(Base):
                 }
             }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
  
  
\ No newline at end of file
@@ -5,14 +5,14 @@ from exnovaapi.ws.chanels.base import Base
 
 class Get_order(Base):
     name = "sendMessage"
-    def __call__(self,order_id):
+    def __call__(self,order_id, request_id=""):
         data = {
             "name":"get-order",
             "body":{
                 "order_id":int(order_id)
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
  
 
 
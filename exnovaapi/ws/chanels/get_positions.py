@@ -1,11 +1,10 @@
 import datetime
 import time
 from exnovaapi.ws.chanels.base import Base
-import exnovaapi.global_value as global_value
 
 class Get_positions(Base):
     name = "sendMessage"
-    def __call__(self,instrument_type):
+    def __call__(self,instrument_type, request_id=""):
         if instrument_type=="digital-option":
             name="digital-options.get-positions"
         elif instrument_type=="fx-option":
@@ -16,20 +15,20 @@ class Get_positions(Base):
             "name":name ,
             "body":{
                 "instrument_type":instrument_type,
-                "user_balance_id":int(global_value.balance_id)
+                "user_balance_id":int(self.api.state.balance_id)
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
 class Get_position(Base):
     name = "sendMessage"
-    def __call__(self,position_id):
+    def __call__(self,position_id, request_id=""):
         data = {
             "name":"get-position",
             "body":{
                 "position_id":position_id,
                 }
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
 
 class Get_position_history(Base):
     name = "sendMessage"
@@ -38,7 +37,7 @@ class Get_position_history(Base):
             "name":"get-position-history",
             "body":{
                 "instrument_type":instrument_type,
-                "user_balance_id":int(global_value.balance_id)
+                "user_balance_id":int(self.api.state.balance_id)
                 }
         }
         self.send_websocket_request(self.name, data)
@@ -54,7 +53,7 @@ class Get_position_history_v2(Base):
                 "offset":offset,
                 "start":start,
                 "end":end,
-                "user_balance_id":int(global_value.balance_id)
+                "user_balance_id":int(self.api.state.balance_id)
                 }
         }
         self.send_websocket_request(self.name, data)
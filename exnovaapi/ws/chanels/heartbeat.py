@@ -1,5 +1,6 @@
 import datetime
 from exnovaapi.ws.chanels.base import Base
+from exnovaapi.ws.writer import PRIORITY_HIGH
 class Heartbeat(Base):
     name = "heartbeat"
     
@@ -12,4 +13,4 @@ class Heartbeat(Base):
                     }
            
         }
-        self.send_websocket_request(self.name, data,no_force_send=False)
+        self.send_websocket_request(self.name, data, priority=PRIORITY_HIGH)
@@ -9,7 +9,7 @@ class Get_instruments(Base):
 
     name = "sendMessage"
 
-    def __call__(self,types):
+    def __call__(self,types, request_id=""):
    
     
         data = {
@@ -18,4 +18,4 @@ class Get_instruments(Base):
         "body":{"type":types}
         }
 
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
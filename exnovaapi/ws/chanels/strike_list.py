@@ -4,7 +4,7 @@ import logging
 class Strike_list(Base):
     name = "sendMessage"
     
-    def __call__(self,name,duration):  
+    def __call__(self,name,duration, request_id=""):  
         """
         duration:minute
         """
@@ -18,7 +18,7 @@ class Strike_list(Base):
                     },
             "version": "4.0"
         }
-        self.send_websocket_request(self.name, data)
+        return self.send_websocket_request(self.name, data, request_id)
 
     def get_digital_expiration_time(self, duration):
         exp=int(self.api.timesync.server_timestamp)
@@ -1,12 +1,10 @@
-import datetime
-import time
 from exnovaapi.ws.chanels.base import Base
 
 
 class Technical_indicators(Base):
     name = "sendMessage"
 
-    def __call__(self, active):
+    def __call__(self, active, request_id=""):
         data = {
             "name": "trading-signals.get-technical-indicators",
             "version": "1.0",
@@ -14,6 +12,4 @@ class Technical_indicators(Base):
                 "id": active
             }
         }
-        request_id = str(time.time()).split('.')[1]
-        self.send_websocket_request(self.name, data, request_id)
-        return request_id
+        return self.send_websocket_request(self.name, data, request_id)
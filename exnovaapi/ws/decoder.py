@@ -0,0 +1,56 @@
+"""Module for Exnova websocket frame decoding."""
+
+import json
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+try:
+    import ujson
+    _HAS_UJSON = True
+except ImportError:
+    _HAS_UJSON = False
+
+if _HAS_ORJSON:
+    loads = orjson.loads
+    BACKEND = "orjson"
+elif _HAS_UJSON:
+    loads = ujson.loads
+    BACKEND = "ujson"
+else:
+    loads = json.loads
+    BACKEND = "json"
+
+_NAME_KEY = '"name"'
+
+
+def peek_name(text):
+    """Read the top level ``name`` of a frame without decoding it.
+
+    Exnova frames start with the name, ``{"name":"candle-generated","msg":...``.
+    Anything else returns None and the caller decodes the whole frame.
+
+    :param str text: The raw websocket frame.
+    :returns: The message name or None.
+    """
+    start = text.find(_NAME_KEY, 0, 16)
+    if start < 0 or text[:start].strip() != "{":
+        return None
+    pos = start + len(_NAME_KEY)
+    colon = text.find(":", pos, pos + 4)
+    if colon < 0:
+        return None
+    quote = text.find('"', colon + 1, colon + 4)
+    if quote < 0:
+        return None
+    end = text.find('"', quote + 1, quote + 96)
+    if end < 0:
+        return None
+    name = text[quote + 1:end]
+    if "\\" in name:
+        return None
+    return name
+
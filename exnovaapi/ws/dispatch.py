@@ -0,0 +1,135 @@
+"""Module for Exnova websocket message dispatch."""
+
+import importlib
+import sys
+
+_handlers = {}
+
+
+class _LazyHandler(object):
+    """Stand-in for a handler given as ``"package.module:function"``.
+
+    The module is imported by the first message that reaches the handler,
+    which then takes the stand-in's place in the registry.
+    """
+
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        module, _, attr = self.path.partition(":")
+        return getattr(importlib.import_module(module), attr)
+
+    def __call__(self, api, message, *extra):
+        handler = self.load()
+        for name, entries in list(_handlers.items()):
+            if any(entry[0] is self for entry in entries):
+                _handlers[name] = tuple(
+                    (handler, e) if h is self else (h, e) for h, e in entries)
+        return handler(api, message, *extra)
+
+    def __eq__(self, other):
+        if isinstance(other, _LazyHandler):
+            other = other.path
+        elif not isinstance(other, str):
+            other = "%s:%s" % (getattr(other, "__module__", None),
+                               getattr(other, "__name__", None))
+        return self.path == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return "<lazy handler %s>" % self.path
+
+
+def _default_fallback(api, message):  # pylint: disable=unused-argument
+    """Handler for messages nobody registered for."""
+
+
+_fallback = _default_fallback
+
+
+def register_handler(name, handler, extra=None):
+    """Register a handler for websocket messages called ``name``.
+
+    Handlers are called as ``handler(api, message)``. When ``extra`` is given
+    it names an attribute of the :class:`WebsocketClient
+    <exnovaapi.ws.client.WebsocketClient>` passed as third argument.
+
+    A ``"package.module:function"`` string defers the import of the module
+    to the first message called ``name``.
+
+    :param str name: The websocket message name.
+    :param handler: The callable to run for this message name, or its path.
+    :param str extra: (optional) The client attribute passed to the handler.
+    """
+    if isinstance(handler, str):
+        handler = _LazyHandler(handler)
+        if handler.path.partition(":")[0] in sys.modules:
+            handler = handler.load()
+    entries = _handlers.get(name, ())
+    if (handler, extra) not in entries:
+        _handlers[name] = entries + ((handler, extra),)
+
+
+def unregister_handler(name, handler):
+    """Remove a handler registered with :func:`register_handler`, by the
+    callable or its ``"package.module:function"`` path."""
+    entries = tuple(e for e in _handlers.get(name, ())
+                    if e[0] is not handler and e[0] != handler)
+    if entries:
+        _handlers[name] = entries
+    else:
+        _handlers.pop(name, None)
+
+
+def set_fallback_handler(handler=None):
+    """Set the handler used for message names without registered handlers.
+
+    :param handler: (optional) The callable, ``None`` restores the no-op.
+    """
+    global _fallback
+    _fallback = handler if handler is not None else _default_fallback
+
+
+def get_handlers(name):
+    """Get the handlers registered for a message name.
+
+    :returns: A tuple of ``(handler, extra)`` pairs.
+    """
+    return _handlers.get(name, ())
+
+
+def registered_names():
+    """Get every message name with at least one handler."""
+    return frozenset(_handlers)
+
+
+def is_handled(name):
+    """Check if a message called ``name`` would reach any handler."""
+    return name in _handlers or _fallback is not _default_fallback
+
+
+def dispatch(client, message):
+    """Run the handlers registered for ``message["name"]``.
+
+    :param client: The instance of :class:`WebsocketClient
+        <exnovaapi.ws.client.WebsocketClient>` that received the message.
+    :param dict message: The decoded websocket message.
+    """
+    entries = _handlers.get(message.get("name"))
+    if entries is None:
+        _fallback(client.api, message)
+        return
+    for handler, extra in entries:
+        if extra is None:
+            handler(client.api, message)
+        else:
+            handler(client.api, message, getattr(client, extra))
+
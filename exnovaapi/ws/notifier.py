@@ -0,0 +1,77 @@
+"""Module for Exnova websocket wait/notify."""
+
+import threading
+import time
+
+CONNECTION = "connection"
+"""Key notified when the websocket opens, fails or closes."""
+
+
+class Notifier(object):
+    """Wake threads waiting for websocket messages.
+
+    The websocket client notifies the message name after its handlers ran.
+    Waiters register an event under the keys they care about and sleep until
+    one of them is notified, instead of spinning on the shared state.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__waiters = {}
+
+    def notify(self, key):
+        """Wake every thread waiting on ``key``."""
+        waiters = self.__waiters.get(key)
+        if not waiters:
+            return
+        with self.__lock:
+            events = list(waiters)
+        for event in events:
+            event.set()
+
+    def notify_all(self):
+        """Wake every waiting thread, e.g. when the connection is lost."""
+        with self.__lock:
+            events = [e for waiters in self.__waiters.values() for e in waiters]
+        for event in events:
+            event.set()
+
+    def wait_for(self, keys, predicate, timeout=None):
+        """Wait until ``predicate()`` is true.
+
+        The predicate is checked again every time one of ``keys`` is notified.
+
+        :param keys: The message name or a tuple of names to wake up on.
+        :param predicate: Callable returning a true value when done.
+        :param float timeout: (optional) Seconds to wait, forever when None.
+        :returns: True if the predicate became true, False on timeout.
+        """
+        if predicate():
+            return True
+        if isinstance(keys, str):
+            keys = (keys,)
+        event = threading.Event()
+        with self.__lock:
+            for key in keys:
+                self.__waiters.setdefault(key, set()).add(event)
+        try:
+            deadline = None if timeout is None else time.time() + timeout
+            while True:
+                event.clear()
+                if predicate():
+                    return True
+                if deadline is None:
+                    event.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    event.wait(remaining)
+        finally:
+            with self.__lock:
+                for key in keys:
+                    waiters = self.__waiters.get(key)
+                    if waiters is not None:
+                        waiters.discard(event)
+                        if not waiters:
+                            del self.__waiters[key]
@@ -3,6 +3,7 @@
 import time
 import datetime
 
+from exnovaapi.clock import ServerClock
 from exnovaapi.ws.objects.base import Base
 
 
@@ -12,25 +13,40 @@ class TimeSync(Base):
     def __init__(self):
         super(TimeSync, self).__init__()
         self.__name = "timeSync"
-        self.__server_timestamp = time.time()
+        self.__server_timestamp = None
         self.__expiration_time = 1
+        # estimated from the timeSync/heartbeat frames, see exnovaapi.clock
+        self.clock = ServerClock()
+        # timeSync frames seen, lets connect wait for a fresh one
+        self.sync_count = 0
 
     @property
     def server_timestamp(self):
         """Property to get server timestamp.
 
-        :returns: The server timestamp.
+        :returns: The estimated server time in seconds, see
+            :meth:`ServerClock.server_now <exnovaapi.clock.ServerClock.server_now>`.
+            It does not wait for the first timeSync.
         """
-        while self.__server_timestamp==None:
-            time.sleep(0.2)
-            pass
-
-        return self.__server_timestamp / 1000
+        return self.clock.server_now()
 
     @server_timestamp.setter
     def server_timestamp(self, timestamp):
         """Method to set server timestamp."""
         self.__server_timestamp = timestamp
+        if timestamp is not None:
+            self.clock.update(timestamp)
+        self.sync_count += 1
+
+    @property
+    def last_sync(self):
+        """Property to get the server time of the last timeSync frame.
+
+        :returns: The timestamp in seconds or None.
+        """
+        if self.__server_timestamp is None:
+            return None
+        return self.__server_timestamp / 1000
 
     @property
     def server_datetime(self):
@@ -0,0 +1,104 @@
+"""Module for Exnova websocket request/response correlation."""
+
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+
+class RequestRejected(Exception):
+    """The server answered a request with a failed ``result`` ack."""
+
+
+class PendingRequests(object):
+    """Futures for websocket requests waiting on their response.
+
+    Every outgoing request gets a unique ``request_id``. The server echoes it
+    back in the response, and the response handler completes the matching
+    future. Many requests can be in flight over one socket at a time.
+    """
+
+    def __init__(self, prefix="r", future_factory=Future, on_round_trip=None):
+        """
+        :param str prefix: (optional) Prefix for generated request ids. It keeps
+            them apart from the numeric ids some chanels pick themselves.
+        :param future_factory: (optional) Makes the futures, e.g.
+            ``loop.create_future`` for awaitable ones. Resolve those on their
+            event loop.
+        :param on_round_trip: (optional) Called with the seconds from
+            :meth:`expect` to :meth:`resolve` of every answered request,
+            e.g. :meth:`ServerClock.observe_rtt
+            <exnovaapi.clock.ServerClock.observe_rtt>`.
+        """
+        self.__prefix = prefix
+        self.__future_factory = future_factory
+        self.on_round_trip = on_round_trip
+        self.__counter = itertools.count(1)
+        self.__lock = threading.Lock()
+        self.__futures = {}
+
+    def next_request_id(self):
+        """Get a new unique request id.
+
+        :returns: The request id string.
+        """
+        return "%s%d" % (self.__prefix, next(self.__counter))
+
+    def expect(self, request_id=None):
+        """Register a future for the response to ``request_id``.
+
+        Call this before the request is sent so a fast reply can not be lost.
+
+        :param str request_id: (optional) The request id, a new one when omitted.
+        :returns: A tuple of ``(request_id, future)``.
+        """
+        if request_id is None:
+            request_id = self.next_request_id()
+        request_id = str(request_id)
+        future = self.__future_factory()
+        with self.__lock:
+            self.__futures[request_id] = (future, time.monotonic())
+        return request_id, future
+
+    def resolve(self, request_id, value):
+        """Complete the future waiting on ``request_id``.
+
+        :returns: True if a request was waiting, else False.
+        """
+        with self.__lock:
+            entry = self.__futures.pop(str(request_id), None)
+        if entry is None or entry[0].done():
+            return False
+        if self.on_round_trip is not None:
+            self.on_round_trip(time.monotonic() - entry[1])
+        entry[0].set_result(value)
+        return True
+
+    def fail(self, request_id, exception):
+        """Fail the future waiting on ``request_id`` with ``exception``."""
+        with self.__lock:
+            entry = self.__futures.pop(str(request_id), None)
+        if entry is None or entry[0].done():
+            return False
+        entry[0].set_exception(exception)
+        return True
+
+    def fail_all(self, exception):
+        """Fail every pending future, e.g. when the connection is lost."""
+        with self.__lock:
+            futures = [future for future, _ in self.__futures.values()]
+            self.__futures.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(exception)
+
+    def discard(self, request_id):
+        """Forget ``request_id`` without completing its future."""
+        with self.__lock:
+            self.__futures.pop(str(request_id), None)
+
+    def __contains__(self, request_id):
+        return str(request_id) in self.__futures
+
+    def __len__(self):
+        return len(self.__futures)
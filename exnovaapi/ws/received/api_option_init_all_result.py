@@ -2,4 +2,5 @@
 
 def api_option_init_all_result(api, message):
     if message["name"] == "api_option_init_all_result":
-        api.api_option_init_all_result = message["msg"]
\ No newline at end of file
+        api.api_option_init_all_result = message["msg"]
+        api.pending.resolve(message.get("request_id"), message["msg"])
\ No newline at end of file
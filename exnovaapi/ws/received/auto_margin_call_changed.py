@@ -2,4 +2,5 @@
 
 def auto_margin_call_changed(api, message):
     if message["name"] == "auto-margin-call-changed":
-        api.auto_margin_call_changed_respond = message
\ No newline at end of file
+        api.auto_margin_call_changed_respond = message
+        api.pending.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def available_leverages(api, message):
     if message["name"] == "available-leverages":
-        api.available_leverages = message
\ No newline at end of file
+        api.available_leverages = message
+        api.pending.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -1,18 +1,13 @@
 """Module for Exnova websocket."""
-import exnovaapi.constants as OP_code
-import exnovaapi.global_value as global_value
+from exnovaapi.assets import name_of
 
-def candle_generated_realtime(api, message, dict_queue_add):
+def candle_generated_realtime(api, message):
     if message["name"] == "candle-generated":
-        Active_name = list(OP_code.ACTIVES.keys())[list(
-            OP_code.ACTIVES.values()).index(message["msg"]["active_id"])]
+        Active_name = name_of(message["msg"]["active_id"])
+        if Active_name is None:
+            return
 
         active = str(Active_name)
         size = int(message["msg"]["size"])
-        from_ = int(message["msg"]["from"])
-        msg = message["msg"]
-        maxdict = api.real_time_candles_maxdict_table[Active_name][size]
-
-        dict_queue_add(api.real_time_candles,
-                            maxdict, active, size, from_, msg)
-        api.candle_generated_check[active][size] = True
\ No newline at end of file
+        api.candle_ring(active, size).update(message["msg"])
+        api.candle_generated_check[active][size] = True
@@ -1,21 +1,14 @@
-import exnovaapi.constants as OP_code
+from exnovaapi.assets import name_of
 
-def candle_generated_v2(api, message, dict_queue_add):
+def candle_generated_v2(api, message):
     if message["name"] == "candles-generated":
-        Active_name = list(OP_code.ACTIVES.keys())[list(
-                OP_code.ACTIVES.values()).index(message["msg"]["active_id"])]
+        Active_name = name_of(message["msg"]["active_id"])
+        if Active_name is None:
+            return
         active = str(Active_name)
+        close = message["msg"]["value"]
         for k, v in message["msg"]["candles"].items():
-            v["active_id"] = message["msg"]["active_id"]
-            v["at"] = message["msg"]["at"]
-            v["ask"] = message["msg"]["ask"]
-            v["bid"] = message["msg"]["bid"]
-            v["close"] = message["msg"]["value"]
-            v["size"] = int(k)
-            size = int(v["size"])
-            from_ = int(v["from"])
-            maxdict = api.real_time_candles_maxdict_table[Active_name][size]
-            msg = v
-            dict_queue_add(api.real_time_candles, maxdict, active, size, from_, msg)
+            v["close"] = close
+            api.candle_ring(active, int(k)).update(v)
 
-        api.candle_generated_all_size_check[active] = True
\ No newline at end of file
+        api.candle_generated_all_size_check[active] = True
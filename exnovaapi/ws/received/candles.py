@@ -5,4 +5,6 @@ def candles(api, message):
         try:
             api.candles.candles_data = message["msg"]["candles"]
         except:
-            pass
\ No newline at end of file
+            pass
+        else:
+            api.pending.resolve(message.get("request_id"), message["msg"]["candles"])
\ No newline at end of file
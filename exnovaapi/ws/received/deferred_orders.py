@@ -2,4 +2,5 @@
 
 def deferred_orders(api, message):
     if message["name"] == "deferred-orders":
-        api.deferred_orders = message
\ No newline at end of file
+        api.deferred_orders = message
+        api.pending.resolve(message.get("request_id"), message)
\ No newline at end of file
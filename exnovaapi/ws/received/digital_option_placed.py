@@ -1,13 +1,13 @@
 """Module for Exnova websocket."""
 
-def digital_option_placed(api, message, api_dict_clean):
+def digital_option_placed(api, message):
     if message["name"] == "digital-option-placed":
         if message["msg"].get("id") != None:
-            api_dict_clean(api.digital_option_placed_id)
             api.digital_option_placed_id[message["request_id"]
                                                 ] = message["msg"]["id"]
         else:
             api.digital_option_placed_id[message["request_id"]] = {
                 "code": "error_place_digital_order",
                 "message": message["msg"]["message"]
-            }
\ No newline at end of file
+            }
+        api.pending.resolve(message["request_id"], api.digital_option_placed_id[message["request_id"]])
\ No newline at end of file
@@ -2,6 +2,8 @@
 
 def heartbeat(api, message):
     if message["name"] == "heartbeat":
+        if isinstance(message["msg"], int):
+            api.timesync.clock.update(message["msg"])
         try:
             api.heartbeat(message["msg"])
         except:
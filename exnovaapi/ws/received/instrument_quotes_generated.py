@@ -1,10 +1,12 @@
 """Module for Exnova websocket."""
-import exnovaapi.constants as OP_code
+from exnovaapi.assets import name_of
 
 def instrument_quotes_generated(api, message):
     if message["name"] == "instrument-quotes-generated":
 
-        Active_name = list(OP_code.ACTIVES.keys())[list(OP_code.ACTIVES.values()).index(message["msg"]["active"])]
+        Active_name = name_of(message["msg"]["active"])
+        if Active_name is None:
+            return
         period = message["msg"]["expiration"]["period"]
         ans = {}
         for data in message["msg"]["quotes"]:
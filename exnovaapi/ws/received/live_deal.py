@@ -1,13 +1,13 @@
 """Module for Exnova websocket."""
-import exnovaapi.constants as OP_code
-from threading import Thread
+from exnovaapi.assets import name_of
 
 def live_deal(api, message): 
     if message["name"] == "live-deal":
         # name = message["name"]
         active_id = message["msg"]["instrument_active_id"]
-        active = list(OP_code.ACTIVES.keys())[
-            list(OP_code.ACTIVES.values()).index(active_id)]
+        active = name_of(active_id)
+        if active is None:
+            return
         _type = message["msg"]["instrument_type"]
         try:
             # api.live_deal_data[name][active][_type].appendleft(
@@ -17,9 +17,6 @@ def live_deal(api, message):
                     "active": active,
                     **message["msg"]
                 }
-                livedeal = Thread(target=api.live_deal_cb,
-                                kwargs=(cb_data))
-                livedeal.daemon = True
-                livedeal.start()
+                api.callback_executor.submit(api.live_deal_cb, cb_data, key=active)
         except:
             pass
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def option(api, message):
     if message["name"] == "option":
-        api.buy_multi_option[str(message["request_id"])] = message["msg"]
\ No newline at end of file
+        api.buy_multi_option[str(message["request_id"])] = message["msg"]
+        api.pending.resolve(message.get("request_id"), message["msg"])
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def option(api, message):
     if message["name"] == "options":
-        api.get_options_v2_data = message
\ No newline at end of file
+        api.get_options_v2_data = message
+        api.pending.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def order_canceled(api, message):
     if message["name"] == "order-canceled":
-        api.order_canceled = message
\ No newline at end of file
+        api.order_canceled = message
+        api.pending.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -3,4 +3,5 @@
 def position_closed(api, message):
     if message["name"] == "position-closed":
         api.close_position_data = message
-        api.sold_digital_options_respond = message
\ No newline at end of file
+        api.sold_digital_options_respond = message
+        api.pending.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -3,3 +3,4 @@
 def positions(api, message):
     if message["name"] == "positions":
         api.positions = message
+        api.pending.resolve(message.get("request_id"), message)
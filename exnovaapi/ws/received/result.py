@@ -1,5 +1,9 @@
 """Module for Exnova websocket."""
+from exnovaapi.ws.pending import RequestRejected
 
 def result(api, message):
     if message["name"] == "result":
-        api.result = message["msg"]["success"]
\ No newline at end of file
+        api.result = message["msg"]["success"]
+        if not api.result and message.get("request_id"):
+            # refused, no reply will follow
+            api.pending.fail(message["request_id"], RequestRejected(message["msg"]))
@@ -1,12 +1,12 @@
 """Module for Exnova websocket."""
 
-def technical_indicators(api, message, api_dict_clean):
+def technical_indicators(api, message):
     if message["name"] == "technical-indicators":
         if message["msg"].get("indicators") != None:
-            api_dict_clean(api.technical_indicators)
             api.technical_indicators[message["request_id"]] = message["msg"]["indicators"]
         else:
             api.technical_indicators[message["request_id"]] = {
                 "code": "no_technical_indicator_available",
                 "message": message["msg"]["message"]
-            }
\ No newline at end of file
+            }
+        api.pending.resolve(message["request_id"], api.technical_indicators[message["request_id"]])
\ No newline at end of file
@@ -2,4 +2,5 @@
 
 def tpsl_changed(api, message):
     if message["name"] == "tpsl-changed":
-            api.tpsl_changed_respond = message
\ No newline at end of file
+            api.tpsl_changed_respond = message
+            api.pending.resolve(message.get("request_id"), message)
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""Module for the Exnova websocket writer thread."""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+# sendMessage requests that place, change or close a trade
+ORDER_MESSAGES = frozenset((
+    "binary-options.open-option",
+    "digital-options.place-digital-option",
+    "digital-options.close-position",
+    "digital-options.close-position-batch",
+    "place-order-temp",
+    "close-position",
+    "cancel-order",
+    "change-tpsl",
+    "change-auto-margin-call",
+    "sell-options",
+))
+
+
+def priority_for(name, msg):
+    """Get the writer lane for an outgoing frame.
+
+    Orders, heartbeats and the ssid go first, subscribe/unsubscribe churn last.
+
+    :param str name: The websocket request name.
+    :param msg: The websocket request msg.
+    """
+    if name in ("subscribeMessage", "unsubscribeMessage"):
+        return PRIORITY_LOW
+    if name in ("heartbeat", "ssid", "buyback"):
+        return PRIORITY_HIGH
+    if isinstance(msg, dict) and msg.get("name") in ORDER_MESSAGES:
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+
+class WebsocketWriter(threading.Thread):
+    """Single thread writing every outgoing frame to the websocket.
+
+    Frames are queued per priority and written in order of priority, then
+    arrival. With ``batch_size`` above one, the frames queued at wake-up are
+    taken in one go and written back to back, without going back to the
+    queue between them.
+    """
+
+    def __init__(self, api, batch_size=16, linger=0.0, samples=1000):
+        """
+        :param api: The instance of :class:`ExnovaAPI
+            <exnovaapi.api.ExnovaAPI>`.
+        :param int batch_size: (optional) Max frames per socket write, 1 disables batching.
+        :param float linger: (optional) Seconds to wait for more frames before a write.
+        :param int samples: (optional) Send latencies kept per priority.
+        """
+        super(WebsocketWriter, self).__init__(name="exnova-writer")
+        self.daemon = True
+        self.api = api
+        self.batch_size = max(1, int(batch_size))
+        self.linger = linger
+        self.__queue = queue.PriorityQueue()
+        self.__counter = itertools.count()
+        self.__latency = {p: deque(maxlen=samples) for p in PRIORITY_NAMES}
+        self.__sent = dict.fromkeys(PRIORITY_NAMES, 0)
+        self.__lock = threading.Lock()
+
+    def put(self, data, priority=PRIORITY_NORMAL, request_id=None):
+        """Queue a frame for sending.
+
+        :param str data: The encoded websocket frame.
+        :param int priority: (optional) One of the ``PRIORITY_*`` lanes.
+        :param str request_id: (optional) Failed with the send error, if any.
+        """
+        self.__queue.put((priority, next(self.__counter), data, request_id, time.time()))
+
+    def stop(self):
+        """Stop the thread. Frames still queued are dropped."""
+        self.__queue.put((-1, next(self.__counter), None, None, 0))
+
+    def pending(self):
+        """Get the number of frames waiting to be written."""
+        return self.__queue.qsize()
+
+    def run(self):
+        while True:
+            item = self.__queue.get()
+            if item[2] is None:
+                break
+            batch = [item]
+            deadline = time.time() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    if self.linger:
+                        item = self.__queue.get(timeout=max(0, deadline - time.time()))
+                    else:
+                        item = self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[2] is None:
+                    self.__queue.put(item)
+                    break
+                batch.append(item)
+            self.__write(batch)
+        self.__drop()
+
+    def __write(self, batch):
+        sent = 0
+        try:
+            for item in batch:
+                self.api.websocket.send(item[2])
+                sent += 1
+        except Exception as e:
+            logging.getLogger(__name__).error('**error** websocket send: ' + str(e))
+            for item in batch[sent:]:
+                if item[3]:
+                    self.api.pending.fail(item[3], e)
+        now = time.time()
+        with self.__lock:
+            for priority, _, data, _, queued in batch[:sent]:
+                self.__latency[priority].append(now - queued)
+                self.__sent[priority] += 1
+                logging.getLogger(__name__).debug(data)
+
+    def __drop(self):
+        while True:
+            try:
+                item = self.__queue.get_nowait()
+            except queue.Empty:
+                return
+            if item[3]:
+                self.api.pending.fail(item[3], ConnectionError("websocket writer stopped"))
+
+    def latency_stats(self):
+        """Get the queue-to-socket latency per priority.
+
+        :returns: A dict of lane name to ``count``, ``mean_ms``, ``p50_ms``,
+            ``p99_ms`` and ``max_ms`` over the recent samples.
+        """
+        stats = {}
+        with self.__lock:
+            for priority, name in PRIORITY_NAMES.items():
+                samples = sorted(self.__latency[priority])
+                if not samples:
+                    stats[name] = {"count": self.__sent[priority]}
+                    continue
+                stats[name] = {
+                    "count": self.__sent[priority],
+                    "mean_ms": sum(samples) / len(samples) * 1e3,
+                    "p50_ms": samples[len(samples) // 2] * 1e3,
+                    "p99_ms": samples[int(len(samples) * 0.99)] * 1e3,
+                    "max_ms": samples[-1] * 1e3,
+                }
+        return stats
@@ -6,35 +6,34 @@ import threading
 import os
 import random
 import math
-import subprocess
 from datetime import datetime, timedelta, timezone
-from collections import deque, defaultdict
-
-# --- AUTO-INSTALAÇÃO DE DEPENDÊNCIAS ---
-def install_package(package):
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-    except Exception as e:
-        print(f"[SYSTEM] Erro ao instalar {package}: {e}")
-
-try:
-    from supabase import create_client
-except ImportError:
-    print("[SYSTEM] Instalando supabase...")
-    install_package("supabase")
-    from supabase import create_client
+from collections import deque, defaultdict, OrderedDict
+
+# --- DEPENDÊNCIAS ---
+# Nada de sondar/instalar pacotes na partida: o watchdog reinicia o bot com
+# os._exit(1) e cada reinício tem que subir rápido. AUTO_INSTALL=1 instala
+# o que faltar antes de importar.
+if os.environ.get("AUTO_INSTALL") == "1":
+    import importlib.util
+    import subprocess
+    for _module in ("supabase", "exnovaapi"):
+        if importlib.util.find_spec(_module) is None:
+            print(f"[SYSTEM] Instalando {_module}...")
+            try:
+                subprocess.check_call([sys.executable, "-m", "pip", "install", _module])
+            except Exception as e:
+                print(f"[SYSTEM] Erro ao instalar {_module}: {e}")
 
-# Tenta importar Exnova API, se falhar instala
 try:
     from exnovaapi.stable_api import Exnova
+    from exnovaapi.candle_store import CandleStore
+    from exnovaapi.candles import CandleSeries
+    from analysis.streaming import ADX, Choppiness, IndicatorBook
+    from analysis.rolling import rolling_max, rolling_mean, rolling_mean_std, rolling_min, rolling_wma
+    from analysis.technical import ZoneTracker
 except ImportError:
-    print("[SYSTEM] Biblioteca 'exnovaapi' não encontrada. Instalando...")
-    install_package("exnovaapi")
-    try:
-        from exnovaapi.stable_api import Exnova
-    except ImportError:
-        print("[ERRO CRÍTICO] Falha ao carregar 'exnovaapi'. Verifique a instalação.")
-        sys.exit(1)
+    print("[ERRO CRÍTICO] Falha ao carregar 'exnovaapi'. Verifique a instalação (ou use AUTO_INSTALL=1).")
+    sys.exit(1)
 
 
 BOT_VERSION = "SHOCK_ENGINE_V73.2_RESTRICT_MODE"
@@ -48,6 +47,13 @@ SUPABASE_KEY = os.environ.get("SUPABASE_KEY", "")
 
 EXNOVA_EMAIL = os.environ.get("EXNOVA_EMAIL", "")
 EXNOVA_PASSWORD = os.environ.get("EXNOVA_PASSWORD", "")
+# Conexões extras só para velas/cotações (0 = tudo numa conexão)
+MARKET_DATA_CONNECTIONS = int(os.environ.get("MARKET_DATA_CONNECTIONS", "0"))
+# Guarda o ssid entre reinícios para pular o login http (opcional, ex. ".exnova_session.json")
+EXNOVA_SESSION_FILE = os.environ.get("EXNOVA_SESSION_FILE", "")
+# Velas fechadas em disco: no reinício só busca o que fechou desde a parada ("" desativa)
+CANDLE_STORE_FILE = os.environ.get("CANDLE_STORE_FILE", ".exnova_candles.sqlite3")
+CANDLE_STORE_KEEP = int(os.environ.get("CANDLE_STORE_KEEP", "3000"))
 
 # Ajustes finos de Pipeline (Batch 3 = Equilíbrio)
 SCAN_BATCH = int(os.environ.get("SCAN_BATCH", "3")) 
@@ -63,6 +69,17 @@ RESERVE_SECONDS = [58, 59]
 GLOBAL_COOLDOWN_SECONDS = 50
 ASSET_LOSS_COOLDOWN_SECONDS = 180
 
+# Janelas de velas com indicadores em memória (o scan usa 1 por ativo, a recalibração ~40)
+FEATURES_CACHE_SIZE = 512
+
+# Streams que o bot não usa: descartados no leitor antes do json decode
+UNUSED_STREAMS = (
+    "live-deal", "live-deal-binary-option-placed", "live-deal-digital-option",
+    "leaderboard-deals-client", "leaderboard-userinfo-deals-client",
+    "traders-mood-changed", "client-price-generated", "top-assets-updated",
+    "commission-changed",
+)
+
 if not EXNOVA_EMAIL or not EXNOVA_PASSWORD:
     print("⚠️ AVISO: EXNOVA_EMAIL ou EXNOVA_PASSWORD não configurados.")
 
@@ -109,11 +126,12 @@ def clamp(v, a, b):
 class TechnicalAnalysis:
     @staticmethod
     def calculate_atr(candles, period=14):
-        if not candles or len(candles) < period + 1: return 0.0
+        candles = CandleSeries.from_candles(candles)
+        if len(candles) < period + 1: return 0.0
+        highs = candles.max; lows = candles.min; closes = candles.close
         trs = []
         for i in range(-period, 0):
-            c = candles[i]; p = candles[i - 1]
-            high = float(c["max"]); low = float(c["min"]); prev_close = float(p["close"])
+            high = highs[i]; low = lows[i]; prev_close = closes[i - 1]
             tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
             trs.append(tr)
         return sum(trs) / len(trs) if trs else 0.0
@@ -132,49 +150,61 @@ class TechnicalAnalysis:
 
     @staticmethod
     def calculate_ema(candles, period):
-        if len(candles) < period: return 0
-        prices = [float(c["close"]) for c in candles]
+        return TechnicalAnalysis.ema_of(CandleSeries.from_candles(candles).close, period)
+
+    @staticmethod
+    def ema_of(prices, period):
+        if len(prices) < period: return 0
         ema = sum(prices[:period]) / period
         k = 2 / (period + 1)
-        for price in prices[period:]:
-            ema = (price * k) + (ema * (1 - k))
+        for i in range(period, len(prices)):
+            ema = (prices[i] * k) + (ema * (1 - k))
         return ema
     
     @staticmethod
     def calculate_wma(data, period):
         if len(data) < period: return 0
-        weighted_sum = 0; weight_sum = 0
-        for i in range(period):
-            weight = i + 1
-            weighted_sum += data[-(period-i)] * weight
-            weight_sum += weight
-        return weighted_sum / weight_sum
+        return rolling_wma(data, period, last=1)[-1]
 
     @staticmethod
     def analyze_candle(candle):
-        o = float(candle["open"]); c = float(candle["close"]); h = float(candle["max"]); l = float(candle["min"])
+        return TechnicalAnalysis._analyze(float(candle["open"]), float(candle["close"]), float(candle["max"]), float(candle["min"]))
+
+    @staticmethod
+    def analyze_at(candles, i):
+        # Lê direto das colunas da série, sem montar o dict da vela
+        return TechnicalAnalysis._analyze(candles.open[i], candles.close[i], candles.max[i], candles.min[i])
+
+    @staticmethod
+    def _analyze(o, c, h, l):
         body = abs(c - o); rng = max(h - l, 1e-12)
         color = "green" if c > o else "red" if c < o else "doji"
         return {"open": o, "close": c, "max": h, "min": l, "body": body, "range": rng, "color": color, "upper_wick": h - max(o, c), "lower_wick": min(o, c) - l}
 
     @staticmethod
     def check_compression(candles):
+        candles = CandleSeries.from_candles(candles)
         if len(candles) < 20: return False
-        ema9 = TechnicalAnalysis.calculate_ema(candles, 9)
-        ema21 = TechnicalAnalysis.calculate_ema(candles, 21)
+        ema9 = TechnicalAnalysis.ema_of(candles.close, 9)
+        ema21 = TechnicalAnalysis.ema_of(candles.close, 21)
+        return TechnicalAnalysis.compression_of(candles, ema9, ema21)
+
+    @staticmethod
+    def compression_of(candles, ema9, ema21):
         spread = abs(ema9 - ema21)
-        bodies = [abs(float(c["close"]) - float(c["open"])) for c in candles[-10:]]
+        bodies = [abs(c - o) for c, o in zip(candles.close[-10:], candles.open[-10:])]
         avg_body = sum(bodies) / len(bodies) if bodies else 0.00001
         return spread < (avg_body * 0.15)
 
     @staticmethod
-    def get_signal_v2(candles):
-        if len(candles) < 60: return None, "Dados insuficientes"
-        ema9 = TechnicalAnalysis.calculate_ema(candles, 9)
-        ema21 = TechnicalAnalysis.calculate_ema(candles, 21)
-        ema21_prev = TechnicalAnalysis.calculate_ema(candles[:-1], 21)
-        c_confirm = TechnicalAnalysis.analyze_candle(candles[-1]) 
-        c_reject = TechnicalAnalysis.analyze_candle(candles[-2])  
+    def get_signal_v2(candles, features=None):
+        f = features or FeatureSnapshot(candles)
+        if f.size < 60: return None, "Dados insuficientes"
+        ema9 = f.ema(9)
+        ema21 = f.ema(21)
+        ema21_prev = f.ema(21, back=1)
+        c_confirm = f.anatomy[-1]
+        c_reject = f.anatomy[-2]
         slope = ema21 - ema21_prev
         
         if ema9 > ema21 and slope > 0:
@@ -183,10 +213,63 @@ class TechnicalAnalysis:
             if c_reject["color"] == "green" and c_confirm["color"] == "red": return "put", "V2_PUT"
         return None, "Sem V2"
 
+class FeatureSnapshot:
+    """ Indicadores de uma janela de velas fechadas: cada um é calculado uma vez e lido por todas as estratégias """
+
+    def __init__(self, candles):
+        candles = CandleSeries.from_candles(candles)
+        self.candles = candles
+        self.closes = candles.close
+        self.size = len(candles)
+        self._cache = {}
+
+        # anatomia das 3 últimas velas: anatomy[-1] é a última fechada
+        self.anatomy = [TechnicalAnalysis.analyze_at(candles, i) for i in range(-min(3, self.size), 0)]
+
+        # as 20 velas antes da última (Shock/Reactor) e as 20 últimas (Pullback)
+        bodies = [abs(c - o) for c, o in zip(candles.close[-21:-1], candles.open[-21:-1])]
+        ranges = [(h - l) for h, l in zip(candles.max[-21:-1], candles.min[-21:-1])]
+        self.avg_body_20_prev = (sum(bodies) / len(bodies)) if bodies else 0.00001
+        self.avg_range_20_prev = (sum(ranges) / len(ranges)) if ranges else 0.00001
+        ranges = [(h - l) for h, l in zip(candles.max[-20:], candles.min[-20:])]
+        self.avg_range_20 = (sum(ranges) / len(ranges)) if ranges else 0.00001
+
+    def _get(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    def ema(self, period, back=0):
+        # back=1: a mesma EMA sem a última vela
+        return self._get(("ema", period, back),
+                         lambda: TechnicalAnalysis.ema_of(self.closes[:-back] if back else self.closes, period))
+
+    def compression(self, last=None):
+        # last=30: check_compression(candles[-30:]), que tem EMAs próprias
+        if last is not None:
+            return self._get(("compression", last), lambda: TechnicalAnalysis.check_compression(self.candles[-last:]))
+        if self.size < 20: return False
+        return self._get(("compression", None), lambda: TechnicalAnalysis.compression_of(self.candles, self.ema(9), self.ema(21)))
+
+    def atr(self, period=14):
+        return self._get(("atr", period), lambda: TechnicalAnalysis.calculate_atr(self.candles, period))
+
+    def rsi(self, period=14):
+        return self._get(("rsi", period), lambda: TechnicalAnalysis.calculate_rsi(self.closes, period))
+
+    def bands(self, back=0, period=20, std_mult=2.0):
+        # (sma, upper, lower) de Bollinger na vela -1-back; as duas últimas saem de uma janela deslizante só
+        bands = self._get(("bands", period, std_mult),
+                          lambda: BollingerReentryStrategy.bands(self.closes, period, std_mult, last=2))
+        if back < len(bands): return bands[-1 - back]
+        return BollingerReentryStrategy.band_at(self.closes, self.size - 1 - back, period, std_mult)
+
 class ShockLiveDetector:
     @staticmethod
-    def detect(candles, asset_name, dynamic_config=None):
-        if len(candles) < 30: return None, "Dados insuficientes", {}
+    def detect(candles, asset_name, dynamic_config=None, features=None):
+        f = features or FeatureSnapshot(candles)
+        if f.size < 30: return None, "Dados insuficientes", {}
         dyn = dynamic_config or {}
         if not bool(dyn.get("shock_enabled", True)): return None, "Shock OFF", {}
 
@@ -197,16 +280,14 @@ class ShockLiveDetector:
         trend_filter = bool(dyn.get("trend_filter_enabled", True))
 
         # OBS: Agora recebe candles normalizados (fechados), então -1 é a última vela fechada.
-        live = TechnicalAnalysis.analyze_candle(candles[-1])
-        closed = candles[:-1]
-        ema9 = TechnicalAnalysis.calculate_ema(closed, 9)
-        ema21 = TechnicalAnalysis.calculate_ema(closed, 21)
+        live = f.anatomy[-1]
+        ema9 = f.ema(9, back=1)
+        ema21 = f.ema(21, back=1)
         trend_up = ema9 > ema21; trend_down = ema9 < ema21
 
-        bodies = [abs(float(c["close"]) - float(c["open"])) for c in closed[-20:]]
-        ranges = [(float(c["max"]) - float(c["min"])) for c in closed[-20:]]
-        avg_body = (sum(bodies) / len(bodies)) if bodies else 0.00001
-        avg_range = (sum(ranges) / len(ranges)) if ranges else 0.00001
+        # as 20 velas antes da última
+        avg_body = f.avg_body_20_prev
+        avg_range = f.avg_range_20_prev
 
         explosive = (live["body"] >= avg_body * body_mult) and (live["range"] >= avg_range * range_mult)
         if not explosive: return None, "Sem explosão", {"body_mult": body_mult}
@@ -230,23 +311,15 @@ class ShockLiveDetector:
 
 class GapTraderStrategy:
     @staticmethod
-    def get_signal(candles):
-        if len(candles) < 45: return None, "Dados insuficientes"
-        closes = [float(c["close"]) for c in candles]
-        def get_sma34(arr, idx):
-            end = len(arr) + idx + 1 if idx < 0 else idx + 1
-            start = end - 34
-            if start < 0: return 0
-            return sum(arr[start:end]) / 34
-        buffer1_series = []
-        for i in range(7):
-            idx = -7 + i 
-            sma = get_sma34(closes, idx)
-            val = closes[idx] - sma
-            buffer1_series.append(val)
-        wma_curr = TechnicalAnalysis.calculate_wma(buffer1_series[2:], 5)
+    def get_signal(candles, features=None):
+        f = features or FeatureSnapshot(candles)
+        if f.size < 45: return None, "Dados insuficientes"
+        closes = f.closes
+        # fechamento - SMA34 nas últimas 7 velas, e a WMA5 dessa linha agora e uma vela atrás
+        smas = rolling_mean(closes, 34, last=7)
+        buffer1_series = [c - sma for c, sma in zip(closes[-7:], smas)]
+        wma_prev, wma_curr = rolling_wma(buffer1_series[1:], 5, last=2)
         line_curr = buffer1_series[-1]
-        wma_prev = TechnicalAnalysis.calculate_wma(buffer1_series[1:-1], 5)
         line_prev = buffer1_series[-2]
         if line_curr > wma_curr and line_prev < wma_prev: return "put", "GAP_PUT"
         if line_curr < wma_curr and line_prev > wma_prev: return "call", "GAP_CALL"
@@ -254,11 +327,10 @@ class GapTraderStrategy:
 
 class TsunamiFlowStrategy:
     @staticmethod
-    def get_signal(candles):
-        if len(candles) < 4: return None, "Dados insuficientes"
-        c1 = TechnicalAnalysis.analyze_candle(candles[-1]) 
-        c2 = TechnicalAnalysis.analyze_candle(candles[-2])
-        c3 = TechnicalAnalysis.analyze_candle(candles[-3])
+    def get_signal(candles, features=None):
+        f = features or FeatureSnapshot(candles)
+        if f.size < 4: return None, "Dados insuficientes"
+        c3, c2, c1 = f.anatomy
         if c1["color"] == "green" and c2["color"] == "green" and c3["color"] == "green":
             if c1["body"] > c2["body"]: return "call", "TSUNAMI_UP"
         if c1["color"] == "red" and c2["color"] == "red" and c3["color"] == "red":
@@ -267,11 +339,11 @@ class TsunamiFlowStrategy:
 
 class VolumeReactorStrategy:
     @staticmethod
-    def get_signal(candles):
-        if len(candles) < 30: return None, "Dados insuficientes"
-        c1 = TechnicalAnalysis.analyze_candle(candles[-1]) 
-        bodies = [abs(float(c["close"]) - float(c["open"])) for c in candles[-21:-1]]
-        avg_body = sum(bodies) / len(bodies) if bodies else 0.00001
+    def get_signal(candles, features=None):
+        f = features or FeatureSnapshot(candles)
+        if f.size < 30: return None, "Dados insuficientes"
+        c1 = f.anatomy[-1]
+        avg_body = f.avg_body_20_prev
         if c1["body"] > avg_body * 2.5:
             if c1["color"] == "green": return "put", "REACTOR_TOP"
             if c1["color"] == "red": return "call", "REACTOR_BOTTOM"
@@ -279,18 +351,18 @@ class VolumeReactorStrategy:
 
 class EmaPullbackStrategy:
     @staticmethod
-    def get_signal(candles, ema_fast=9, ema_slow=21, touch_k=0.25):
-        if not candles or len(candles) < 60: return None, "Dados insuficientes"
-        ema9 = TechnicalAnalysis.calculate_ema(candles, ema_fast)
-        ema21 = TechnicalAnalysis.calculate_ema(candles, ema_slow)
-        ema21_prev = TechnicalAnalysis.calculate_ema(candles[:-1], ema_slow)
+    def get_signal(candles, ema_fast=9, ema_slow=21, touch_k=0.25, features=None):
+        f = features or FeatureSnapshot(candles)
+        if f.size < 60: return None, "Dados insuficientes"
+        ema9 = f.ema(ema_fast)
+        ema21 = f.ema(ema_slow)
+        ema21_prev = f.ema(ema_slow, back=1)
         slope = ema21 - ema21_prev
-        c0 = TechnicalAnalysis.analyze_candle(candles[-1]) 
-        c1 = TechnicalAnalysis.analyze_candle(candles[-2]) 
+        c0 = f.anatomy[-1]
+        c1 = f.anatomy[-2]
         trend_up = (ema9 > ema21) and (slope > 0)
         trend_down = (ema9 < ema21) and (slope < 0)
-        ranges = [(float(c["max"]) - float(c["min"])) for c in candles[-20:]]
-        avg_range = (sum(ranges) / len(ranges)) if ranges else c1["range"]
+        avg_range = f.avg_range_20
         tol = avg_range * touch_k
         near_ema9_low = abs(c1["min"] - ema9) <= tol
         near_ema9_high = abs(c1["max"] - ema9) <= tol
@@ -304,22 +376,24 @@ class EmaPullbackStrategy:
 
 class BollingerReentryStrategy:
     @staticmethod
-    def get_signal(candles, period=20, std_mult=2.0):
-        if not candles or len(candles) < period + 5: return None, "Dados insuficientes"
-        if not TechnicalAnalysis.check_compression(candles[-30:]): return None, "Sem range"
-        closes = [float(c["close"]) for c in candles]
-        def band_at(idx):
-            window = closes[idx - period + 1: idx + 1]
-            if len(window) < period: return 0, 0, 0
-            sma = sum(window) / period
-            var = sum((x - sma) ** 2 for x in window) / period
-            std = var ** 0.5
-            return sma, sma + std_mult * std, sma - std_mult * std
-        prev_idx = len(candles) - 2; curr_idx = len(candles) - 1
-        _, up_prev, lo_prev = band_at(prev_idx)
-        _, up_curr, lo_curr = band_at(curr_idx)
-        prev_close = closes[-2]; curr_close = closes[-1]
-        rsi = TechnicalAnalysis.calculate_rsi(closes, 14)
+    def band_at(closes, idx, period=20, std_mult=2.0):
+        bands = BollingerReentryStrategy.bands(closes[max(idx - period + 1, 0): idx + 1], period, std_mult, last=1)
+        return bands[-1] if bands else (0, 0, 0)
+
+    @staticmethod
+    def bands(closes, period=20, std_mult=2.0, last=None):
+        # (sma, upper, lower) de cada janela (só as `last` últimas), da mais antiga pra mais nova
+        return [(sma, sma + std_mult * std, sma - std_mult * std) for sma, std in rolling_mean_std(closes, period, last)]
+
+    @staticmethod
+    def get_signal(candles, period=20, std_mult=2.0, features=None):
+        f = features or FeatureSnapshot(candles)
+        if f.size < period + 5: return None, "Dados insuficientes"
+        if not f.compression(last=30): return None, "Sem range"
+        _, up_prev, lo_prev = f.bands(1, period, std_mult)
+        _, up_curr, lo_curr = f.bands(0, period, std_mult)
+        prev_close = f.closes[-2]; curr_close = f.closes[-1]
+        rsi = f.rsi(14)
         if prev_close < lo_prev and curr_close > lo_curr and rsi <= 35: return "call", "BB_REENTRY_CALL"
         if prev_close > up_prev and curr_close < up_curr and rsi >= 65: return "put", "BB_REENTRY_PUT"
         return None, "Sem BB"
@@ -332,11 +406,12 @@ class BehaviorAnalysis:
     
     @staticmethod
     def calculate_adx(candles, period=14):
+        candles = CandleSeries.from_candles(candles)
         if len(candles) < period * 2: return {}
         
-        highs = [float(c['max']) for c in candles]
-        lows = [float(c['min']) for c in candles]
-        closes = [float(c['close']) for c in candles]
+        highs = candles.max
+        lows = candles.min
+        closes = candles.close
         
         plus_dm = []
         minus_dm = []
@@ -382,11 +457,12 @@ class BehaviorAnalysis:
 
     @staticmethod
     def calculate_choppiness(candles, period=14):
+        candles = CandleSeries.from_candles(candles)
         if len(candles) < period + 1: return 50.0
         
-        highs = [float(c['max']) for c in candles]
-        lows = [float(c['min']) for c in candles]
-        closes = [float(c['close']) for c in candles]
+        highs = candles.max
+        lows = candles.min
+        closes = candles.close
         
         tr_sum = 0
         for i in range(1, period + 1):
@@ -411,20 +487,21 @@ class BehaviorAnalysis:
 
     @staticmethod
     def detect_structure(candles, pivot_window=3, lookback=60):
+        candles = CandleSeries.from_candles(candles)
         if len(candles) < lookback: return {"state": "UNKNOWN"}
         
-        highs = [float(c['max']) for c in candles]
-        lows = [float(c['min']) for c in candles]
+        highs = candles.max
+        lows = candles.min
         
         pivot_highs = []
         pivot_lows = []
         
+        # extremo de cada janela de 2*pivot_window+1 velas (a janela k está centrada em k+pivot_window)
+        window_highs = rolling_max(highs, 2 * pivot_window + 1)
+        window_lows = rolling_min(lows, 2 * pivot_window + 1)
         for i in range(pivot_window, len(candles) - pivot_window):
-            window_highs = highs[i-pivot_window:i+pivot_window+1]
-            window_lows = lows[i-pivot_window:i+pivot_window+1]
-            
-            if highs[i] == max(window_highs): pivot_highs.append(highs[i])
-            if lows[i] == min(window_lows): pivot_lows.append(lows[i])
+            if highs[i] == window_highs[i - pivot_window]: pivot_highs.append(highs[i])
+            if lows[i] == window_lows[i - pivot_window]: pivot_lows.append(lows[i])
             
         if len(pivot_highs) < 2 or len(pivot_lows) < 2: return {"state": "UNKNOWN"}
         
@@ -439,37 +516,42 @@ class BehaviorAnalysis:
 
     @staticmethod
     def get_sr_zones(candles, window_size=5, tolerance_pct=0.0015, top_n=5, lookback=400):
+        candles = CandleSeries.from_candles(candles)
         if not candles:
             return {"support": [], "resistance": []}
 
-        cs = candles[-lookback:] if len(candles) > lookback else candles
-        highs = [float(c["max"]) for c in cs]
-        lows = [float(c["min"]) for c in cs]
+        highs = candles.max[-lookback:]
+        lows = candles.min[-lookback:]
 
         piv_hi = []
         piv_lo = []
 
-        # Detecção de pivôs locais
-        for i in range(window_size, len(cs) - window_size):
+        # Detecção de pivôs locais (máximo/mínimo deslizante de 2*window_size+1 velas)
+        window_highs = rolling_max(highs, 2 * window_size + 1)
+        window_lows = rolling_min(lows, 2 * window_size + 1)
+        for i in range(window_size, len(highs) - window_size):
             h = highs[i]
             l = lows[i]
-            if h == max(highs[i-window_size:i+window_size+1]):
+            if h == window_highs[i - window_size]:
                 piv_hi.append(h)
-            if l == min(lows[i-window_size:i+window_size+1]):
+            if l == window_lows[i - window_size]:
                 piv_lo.append(l)
 
-        # Clusterização (Agrupa níveis próximos)
+        # Clusterização (Agrupa níveis próximos): uma passada, soma corrida do grupo aberto
         def cluster(levels):
             if not levels: return []
             levels = sorted(levels)
-            clusters = [[levels[0]]]
+            clusters = []
+            total, count = levels[0], 1
             for lvl in levels[1:]:
-                base = sum(clusters[-1]) / len(clusters[-1])
+                base = total / count
                 if abs(lvl - base) / max(base, 1e-12) <= tolerance_pct:
-                    clusters[-1].append(lvl)
+                    total += lvl; count += 1
                 else:
-                    clusters.append([lvl])
-            return [sum(c) / len(c) for c in clusters]
+                    clusters.append(total / count)
+                    total, count = lvl, 1
+            clusters.append(total / count)
+            return clusters
 
         res = cluster(piv_hi)
         sup = cluster(piv_lo)
@@ -573,6 +655,9 @@ class SimpleBot:
         self.candles_cache = {} # M1 cache
         self.candles_cache_m15 = {} # M15 cache
         self.candles_lock = threading.RLock()
+        self.candle_store = self.open_candle_store()
+        self.start_ts = time.time()
+        self.first_scan_ts = None
         self.minute_candidates = []
         self.scan_cursor = 0
         self.last_scan_second = -1
@@ -587,6 +672,13 @@ class SimpleBot:
 
         self.vol_lock = threading.RLock()
         self.vol_memory = defaultdict(lambda: deque(maxlen=240))
+        # ADX/CHOP do M1 por ativo, atualizados só com as velas que fecharam desde o último scan;
+        # o ADX guarda até 240 velas pra dar o valor semeado no início da janela do scan
+        self.behavior_indicators = IndicatorBook(lambda: {"adx": ADX(14, wilder=False, window=240), "chop": Choppiness(14)})
+        # Zonas de S/R do M15 por ativo: recalculadas só quando fecha uma vela M15
+        self.sr_zones = ZoneTracker(lambda candles: BehaviorAnalysis.get_sr_zones(candles, lookback=120))
+        # FeatureSnapshot por janela de velas fechadas, compartilhada pelas estratégias
+        self.features_cache = OrderedDict()
         self.vol_last_log = {} 
         self.behavior_last_log = {} 
 
@@ -683,6 +775,8 @@ class SimpleBot:
     def init_supabase(self):
         try:
             if not SUPABASE_URL or not SUPABASE_KEY: self.supabase = None; return
+            # importado só aqui: sem supabase configurado a partida não paga o import
+            from supabase import create_client
             self.supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
             print("✅ Supabase conectado.")
         except Exception as e: print(f"❌ Erro Supabase: {e}"); self.supabase = None
@@ -705,18 +799,31 @@ class SimpleBot:
         except Exception as e:
             self.log_to_db(f"⚠️ Erro Sync Saldo: {e}", "ERROR")
 
+    # --- RELÓGIO DA CORRETORA ---
+    def server_now(self):
+        # relógio da corretora estimado (offset + drift), sem bloquear; local se desconectado
+        if self.api and self.api.api is not None:
+            return self.api.get_server_timestamp()
+        return time.time()
+
+    def server_dt(self):
+        return datetime.fromtimestamp(self.server_now(), BR_TIMEZONE)
+
     # --- CONNECTION ---
     def connect(self):
         self.log_to_db("🔌 Conectando Exnova...", "SYSTEM")
         try:
             with self.api_lock:
-                if self.api: 
-                    try: self.api.api.close()
-                    except: pass
-                self.api = Exnova(EXNOVA_EMAIL, EXNOVA_PASSWORD)
+                # reconexão reaproveita o ssid e os buffers de velas
+                if not self.api:
+                    self.api = Exnova(EXNOVA_EMAIL, EXNOVA_PASSWORD,
+                                      market_data_connections=MARKET_DATA_CONNECTIONS,
+                                      session_file=EXNOVA_SESSION_FILE or None)
+                    self.api.ignore_messages(*UNUSED_STREAMS)
                 ok, reason = self.api.connect()
                 if ok:
-                    self.log_to_db("✅ Conectado!", "SUCCESS")
+                    rec = self.api.get_recovery_stats()[0]
+                    self.log_to_db(f"✅ Conectado! ({rec['seconds']:.1f}s, {rec['streaming']}/{rec['streams']} streams)", "SUCCESS")
                     self.api.change_balance(self.config["account_type"])
                     return True
                 else: self.log_to_db(f"❌ Falha conexão: {reason}", "ERROR")
@@ -846,34 +953,44 @@ class SimpleBot:
         mult = mult * clamp(plan_confidence / 0.80, 0.80, 1.05)
         return round(base_amount * clamp(mult, 0.50, 1.0), 2)
 
-    def check_strategy_signal(self, strategy_name, candles, asset_name=""):
+    def check_strategy_signal(self, strategy_name, candles, asset_name="", features=None):
+        f = features or self.get_features(asset_name, candles)
         if strategy_name == "SHOCK_REVERSAL":
             with self.dynamic_lock: dyn = self.dynamic.copy()
-            sig, lbl, _ = ShockLiveDetector.detect(candles, asset_name, dyn)
+            sig, lbl, _ = ShockLiveDetector.detect(candles, asset_name, dyn, features=f)
             return sig, lbl
         if strategy_name == "V2_TREND":
-            if TechnicalAnalysis.check_compression(candles): return None, "Compressão"
-            return TechnicalAnalysis.get_signal_v2(candles)
-        if strategy_name == "BB_REENTRY": return BollingerReentryStrategy.get_signal(candles)
-        if strategy_name == "EMA_PULLBACK": return EmaPullbackStrategy.get_signal(candles)
-        if strategy_name == "TSUNAMI_FLOW": return TsunamiFlowStrategy.get_signal(candles)
-        if strategy_name == "VOLUME_REACTOR": return VolumeReactorStrategy.get_signal(candles)
-        if strategy_name == "GAP_TRADER": return GapTraderStrategy.get_signal(candles)
+            if f.compression(): return None, "Compressão"
+            return TechnicalAnalysis.get_signal_v2(candles, features=f)
+        if strategy_name == "BB_REENTRY": return BollingerReentryStrategy.get_signal(candles, features=f)
+        if strategy_name == "EMA_PULLBACK": return EmaPullbackStrategy.get_signal(candles, features=f)
+        if strategy_name == "TSUNAMI_FLOW": return TsunamiFlowStrategy.get_signal(candles, features=f)
+        if strategy_name == "VOLUME_REACTOR": return VolumeReactorStrategy.get_signal(candles, features=f)
+        if strategy_name == "GAP_TRADER": return GapTraderStrategy.get_signal(candles, features=f)
         return None, "Estratégia inválida"
 
-    # --- HELPER: Velas ---
-    def _candle_ts(self, c):
-        try: return int(c.get("from", 0))
-        except: return 0
+    def get_features(self, asset, candles):
+        # Uma FeatureSnapshot por (ativo, tf, janela até a última vela fechada): o scan e a
+        # recalibração passam a mesma janela por várias estratégias
+        candles = CandleSeries.from_candles(candles)
+        if not asset or not candles: return FeatureSnapshot(candles)
+        key = (asset, candles.size, len(candles), candles.from_[0], candles.from_[-1])
+        features = self.features_cache.get(key)
+        if features is None:
+            features = self.features_cache[key] = FeatureSnapshot(candles)
+            if len(self.features_cache) > FEATURES_CACHE_SIZE: self.features_cache.popitem(last=False)
+        return features
 
-    def normalize_candles(self, candles):
-        return sorted(candles, key=lambda c: int(c.get("from", 0)))
+    # --- HELPER: Velas ---
+    def normalize_candles(self, candles, tf_sec=0):
+        # Convertidas uma vez na chegada: daqui pra frente tudo lê as colunas da série
+        return CandleSeries.from_candles(candles, tf_sec)
 
     def normalize_closed_candles(self, candles, tf_sec=60):
         if not candles or len(candles) < 3: return candles
-        candles = self.normalize_candles(candles)
-        now_ts = int(time.time())
-        last_ts = self._candle_ts(candles[-1])
+        candles = self.normalize_candles(candles, tf_sec)
+        now_ts = int(self.server_now())
+        last_ts = candles.from_[-1]
         if last_ts > 0 and now_ts < (last_ts + tf_sec):
             return candles[:-1]
         return candles
@@ -889,25 +1006,54 @@ class SimpleBot:
                 if closed and len(closed) >= need: return closed
         
         try:
-            with self.api_lock: candles = self.api.get_candles(asset, tf_sec, max(need + 5, 60), int(time.time()))
+            candles = self.get_closed_candles(asset, tf_sec, max(need + 5, 60))
             if candles:
-                candles = self.normalize_candles(candles)
                 with self.candles_lock: cache_dict[asset] = {"ts": now, "candles": candles}
-                return self.normalize_closed_candles(candles, tf_sec)
+                return candles
         except: pass
         return None
 
-    def analyze_behavior(self, m1_candles, m15_candles):
-        adx_pack = BehaviorAnalysis.calculate_adx(m1_candles, period=14) or {}
-        chop = BehaviorAnalysis.calculate_choppiness(m1_candles, period=14)
+    # --- HELPER: Velas em disco ---
+    def open_candle_store(self):
+        if not CANDLE_STORE_FILE: return None
+        try:
+            store = CandleStore(CANDLE_STORE_FILE)
+            store.prune(CANDLE_STORE_KEEP)
+            return store
+        except Exception as e:
+            print(f"[SYSTEM] Velas em disco desativadas: {e}")
+            return None
+
+    def get_closed_candles(self, asset, tf_sec, count):
+        # Só as velas fechadas; com o store em disco, só o buraco desde a última gravada vai pra corretora
+        if self.candle_store is not None:
+            candles = self.candle_store.fetch(self.api.get_candles, asset, tf_sec, count, int(self.server_now()))
+            return self.normalize_candles(candles, tf_sec) if candles else None
+        candles = self.api.get_candles(asset, tf_sec, count, int(time.time()))
+        if not candles: return None
+        return self.normalize_closed_candles(self.normalize_candles(candles, tf_sec), tf_sec)
+
+    def analyze_behavior(self, m1_candles, m15_candles, asset=None):
+        if asset:
+            stream = self.behavior_indicators.feed(asset, 60, m1_candles)
+            # mesmo valor do calculate_adx sobre a janela (os limiares 25/20 foram ajustados nele)
+            adx_pack = stream.indicators["adx"].over(len(m1_candles))
+            chop = stream["chop"] if stream["chop"] is not None else 50.0
+        else:
+            adx_pack = None
+            chop = BehaviorAnalysis.calculate_choppiness(m1_candles, period=14)
+        if adx_pack is None:
+            # janela maior do que o stream já viu: calcula no batch
+            adx_pack = BehaviorAnalysis.calculate_adx(m1_candles, period=14) or {}
         adx = float(adx_pack.get("adx", 0.0))
         di_p = float(adx_pack.get("di_plus", 0.0))
         di_m = float(adx_pack.get("di_minus", 0.0))
         regime = BehaviorAnalysis.classify_regime(adx, chop)
         struct = BehaviorAnalysis.detect_structure(m1_candles, pivot_window=3, lookback=60)
         zones = {}
-        if m15_candles: zones = BehaviorAnalysis.get_sr_zones(m15_candles, lookback=120)
-        last_close = float(m1_candles[-1]["close"])
+        if m15_candles:
+            zones = self.sr_zones.get(asset, m15_candles) if asset else BehaviorAnalysis.get_sr_zones(m15_candles, lookback=120)
+        last_close = m1_candles.close[-1]
         d_sup = BehaviorAnalysis.distance_to_nearest_level(last_close, zones.get("support", [])) if zones else 999.0
         d_res = BehaviorAnalysis.distance_to_nearest_level(last_close, zones.get("resistance", [])) if zones else 999.0
         return {
@@ -939,14 +1085,15 @@ class SimpleBot:
         except Exception as e: self.log_to_db(f"⚠️ update_signal: {e}", "ERROR")
 
     # --- VOLATILITY CALC ---
-    def calculate_vol_metrics(self, asset, candles):
+    def calculate_vol_metrics(self, asset, candles, features=None):
         with self.dynamic_lock:
             atr_period = int(self.dynamic.get("atr_period", 14))
             low_mult = float(self.dynamic.get("vol_low_mult", 0.60))
             high_mult = float(self.dynamic.get("vol_high_mult", 1.50)) # Reduzido de 1.80 para 1.50
 
-        atr = TechnicalAnalysis.calculate_atr(candles, period=atr_period)
-        price = float(candles[-1]["close"])
+        f = features or self.get_features(asset, candles)
+        atr = f.atr(atr_period)
+        price = candles.close[-1]
         atr_pct = atr / max(price, 1e-12)
 
         with self.vol_lock:
@@ -977,7 +1124,7 @@ class SimpleBot:
 
     # --- SCANNING ---
     def pre_scan_window(self):
-        sec = datetime.now(BR_TIMEZONE).second
+        sec = self.server_dt().second
         if sec < 30 or sec > 57: return
         if self.last_scan_second == sec: return
         self.last_scan_second = sec
@@ -995,7 +1142,7 @@ class SimpleBot:
         with self.trade_lock:
             if self.active_trades: return 
 
-        now_dt = datetime.now(BR_TIMEZONE)
+        now_dt = self.server_dt()
         batch_size = SCAN_BATCH
         local_candidates = []
         active_pool = self.best_assets[:]
@@ -1009,12 +1156,13 @@ class SimpleBot:
             # --- BEHAVIOR ANALYSIS ---
             m1 = self.fetch_candles_cached_tf(asset, 60, need=80, ttl=SCAN_TTL)
             if not m1: continue
+            features = self.get_features(asset, m1)
             
             # --- FILTRO ANTI-NOTÍCIA (SPIKE DETECTOR) ---
             # Compara a última vela com a média das 20 anteriores.
-            bodies = [abs(float(c["close"]) - float(c["open"])) for c in m1[-20:-1]]
+            bodies = [abs(c - o) for c, o in zip(m1.close[-20:-1], m1.open[-20:-1])]
             avg_body = (sum(bodies) / len(bodies)) if bodies else 0.00001
-            last_body = abs(float(m1[-1]["close"]) - float(m1[-1]["open"]))
+            last_body = abs(m1.close[-1] - m1.open[-1])
             
             if last_body > avg_body * 3.5: # Anomalia absurda (Vela 3.5x maior que o normal)
                 self.log_to_db(f"⚠️ {asset}: Anomalia de Preço/Notícia detectada! Par bloqueado por 15 min.", "WARNING")
@@ -1026,15 +1174,16 @@ class SimpleBot:
             # --- FILTRO MULTI-TIMEFRAME (MACRO TENDÊNCIA EM M15) ---
             m15_trend = "NONE"
             if m15 and len(m15) >= 21:
-                ema9_m15 = TechnicalAnalysis.calculate_ema(m15, 9)
-                ema21_m15 = TechnicalAnalysis.calculate_ema(m15, 21)
+                f15 = self.get_features(asset, m15)
+                ema9_m15 = f15.ema(9)
+                ema21_m15 = f15.ema(21)
                 if ema9_m15 > ema21_m15: m15_trend = "UP"
                 elif ema9_m15 < ema21_m15: m15_trend = "DOWN"
 
-            behavior = self.analyze_behavior(m1, m15)
+            behavior = self.analyze_behavior(m1, m15, asset)
             
             # Logging Throttled
-            log_key = (asset, datetime.now(BR_TIMEZONE).strftime("%Y%m%d%H%M"))
+            log_key = (asset, self.server_dt().strftime("%Y%m%d%H%M"))
             if not self.behavior_last_log.get(log_key):
                 self.behavior_last_log[log_key] = True
                 self.log_to_db(f"🧭 BEHAVIOR {asset} reg={behavior['regime']} adx={behavior['adx']:.1f} struct={behavior['structure']['state']} dS={behavior['dist_support']:.4f} dR={behavior['dist_resistance']:.4f}", "DEBUG")
@@ -1069,7 +1218,7 @@ class SimpleBot:
             vol_metrics = None
             vol_enabled = self.dynamic.get("vol_enabled", True)
             if vol_enabled:
-                 vol_metrics = self.calculate_vol_metrics(asset, m1) # Reuse m1
+                 vol_metrics = self.calculate_vol_metrics(asset, m1, features) # Reuse m1
                  if vol_metrics["state"] == "WARMUP_BLOCK": continue
 
             best_local = None
@@ -1083,7 +1232,7 @@ class SimpleBot:
                     if not self.vol_ok_for_strategy(strat, vol_metrics["current"], med_val):
                          continue
 
-                sig, lbl = self.check_strategy_signal(strat, m1, asset)
+                sig, lbl = self.check_strategy_signal(strat, m1, asset, features)
                 if not sig: continue
                 
                 # --- CONFIRMAÇÃO MACRO (NOVO) ---
@@ -1125,11 +1274,16 @@ class SimpleBot:
             if best_local and best_local["confidence"] >= threshold:
                 local_candidates.append(best_local)
 
+        if self.first_scan_ts is None:
+            self.first_scan_ts = time.time()
+            disk = self.candle_store.stats() if self.candle_store is not None else {}
+            self.log_to_db(f"⏱️ Partida → 1º scan: {self.first_scan_ts - self.start_ts:.1f}s | velas do disco={disk.get('hits', 0)} buscadas={disk.get('fetched', 0)}", "SYSTEM")
+
         if local_candidates:
             with self.trade_lock: self.minute_candidates.extend(local_candidates)
 
     def reserve_best_candidate(self):
-        sec = datetime.now(BR_TIMEZONE).second
+        sec = self.server_dt().second
         if sec < 58 or sec > 59: return 
         if self.next_trade_plan: return 
 
@@ -1143,7 +1297,7 @@ class SimpleBot:
         best = cands[0]
         
         self.next_trade_plan = best
-        self.next_trade_key = datetime.now(BR_TIMEZONE).strftime("%Y%m%d%H%M")
+        self.next_trade_key = self.server_dt().strftime("%Y%m%d%H%M")
         
         risk = self.asset_risk[best["asset"]]
         self.log_to_db(
@@ -1175,7 +1329,7 @@ class SimpleBot:
             if self.config["mode"] == "OBSERVE":
                 st, tid = True, "VIRTUAL"
             else:
-                with self.api_lock: st, tid = self.api.buy(amt, asset, direction, 1)
+                st, tid = self.api.buy(amt, asset, direction, 1)
                 if not st: 
                     # Tenta digital
                     with self.api_lock:
@@ -1225,7 +1379,7 @@ class SimpleBot:
                 # Se saldo não mudou, assume LOSS ou DOJI (em Digital, empate é loss)
                 # Vamos tentar ver pela vela pra ter certeza
                 try:
-                    with self.api_lock: c_res = self.api.get_candles(asset, 60, 3, int(time.time()))
+                    c_res = self.api.get_candles(asset, 60, 3, int(time.time()))
                     if c_res:
                         c_res = self.normalize_candles(c_res)
                         last = self.normalize_closed_candles(c_res, tf_sec=60)[-1]
@@ -1284,6 +1438,7 @@ class SimpleBot:
     def recalibrate_current_hour(self, assets_limit=25, backtest_steps=40):
         if not self.api or not self.api.check_connect(): return
         self.log_to_db("⚙️ Brain: Recalibrando hora atual...", "SYSTEM")
+        started = time.time()
         now_dt = datetime.now(BR_TIMEZONE)
         sample_assets = self.best_assets[:]
         random.shuffle(sample_assets)
@@ -1291,21 +1446,24 @@ class SimpleBot:
         
         for asset in sample_assets:
             try:
-                time.sleep(0.1)
-                with self.api_lock: candles = self.api.get_candles(asset, 60, 120, int(time.time()))
+                if self.candle_store is None: time.sleep(0.1)
+                candles = self.get_closed_candles(asset, 60, 120)
                 if not candles: continue
-                candles = self.normalize_candles(candles)
-                candles = self.normalize_closed_candles(candles)
+                closes = candles.close; opens = candles.open
                 
-                # Backtest simples para popular memória
+                # Backtest simples para popular memória (janelas e indicadores montados uma vez
+                # para todas as estratégias, fora do cache do scan)
+                windows = []
+                for i in range(len(candles) - backtest_steps - 2, len(candles) - 2):
+                    window = candles[i-60:i+1]
+                    windows.append((i, window, FeatureSnapshot(window)))
                 for s in self.strategies_pool:
                     wins = 0; total = 0
-                    for i in range(len(candles) - backtest_steps - 2, len(candles) - 2):
-                         window = candles[i-60:i+1]; result = candles[i+1]
-                         sig, _ = self.check_strategy_signal(s, window, asset)
+                    for i, window, features in windows:
+                         sig, _ = self.check_strategy_signal(s, window, asset, features)
                          if sig:
                              total += 1
-                             win = (sig == "call" and result["close"] > result["open"]) or (sig == "put" and result["close"] < result["open"])
+                             win = (sig == "call" and closes[i+1] > opens[i+1]) or (sig == "put" and closes[i+1] < opens[i+1])
                              if win: wins += 1
                     
                     if total >= 3:
@@ -1318,10 +1476,11 @@ class SimpleBot:
 
             except: pass
         self.last_recalibrate_ts = time.time()
-        self.log_to_db("🧠 Brain: Recalibração concluída.", "SUCCESS")
+        self.log_to_db(f"🧠 Brain: Recalibração concluída em {time.time() - started:.1f}s.", "SUCCESS")
 
     # --- MAIN LOOP ---
     def start(self):
+        self.start_ts = time.time()
         threading.Thread(target=watchdog, daemon=True).start()
         self.log_to_db("🧠 Inicializando Bot (Real Balance Guard V73.2 RESTRICT)...", "SYSTEM")
         
@@ -1359,7 +1518,7 @@ class SimpleBot:
                 # Alterado de 1800 (30 min) para 43200 (12 horas) = 2x ao dia.
                 if (now - self.last_recalibrate_ts) > 43200: self.recalibrate_current_hour()
 
-                sec = datetime.now(BR_TIMEZONE).second
+                sec = self.server_dt().second
                 if 30 <= sec <= 57: self.pre_scan_window()
                 elif 58 <= sec <= 59: self.reserve_best_candidate()
                 elif sec in NEXT_CANDLE_EXEC_SECONDS: self.execute_reserved()
@@ -1,19 +1,22 @@
-import asyncio
 import time
 from datetime import datetime
-from exnovaapi.stable_api import Exnova
+from exnovaapi.aio import AsyncExnova
+from exnovaapi.candles import CandleSeries
 
 class AsyncExnovaService:
-    def __init__(self, email, password):
-        self.api = Exnova(email=email, password=password)
+    def __init__(self, email, password, wss_url=None):
+        # cliente asyncio: as chamadas rodam no event loop, sem threads
+        self.api = AsyncExnova(email=email, password=password, wss_url=wss_url)
         self.email = email
         self.password = password
+        # espera máxima pelo resultado de uma operação (expiração + folga)
+        self.check_win_timeout = 330.0
 
     async def connect(self):
         try:
-            check, reason = await asyncio.to_thread(self.api.connect)
+            check, reason = await self.api.connect()
             if check:
-                print("[EXNOVA] Conectado com sucesso (Stable API).")
+                print("[EXNOVA] Conectado com sucesso (asyncio).")
                 return True
             else:
                 print(f"[EXNOVA ERROR] Falha na conexão: {reason}")
@@ -32,14 +35,14 @@ class AsyncExnovaService:
 
     async def get_current_balance(self):
         try:
-            bal = await asyncio.to_thread(self.api.get_balance)
+            bal = await self.api.get_balance()
             return float(bal) if bal is not None else 0.0
         except Exception:
             return 0.0
 
     async def change_balance(self, balance_type="PRACTICE"):
         try:
-            await asyncio.to_thread(self.api.change_balance, balance_type)
+            await self.api.change_balance(balance_type)
         except Exception:
             pass
 
@@ -49,28 +52,14 @@ class AsyncExnovaService:
     async def get_historical_candles(self, asset, timeframe_seconds, count):
         end_from_time = int(time.time())
         try:
-            candles = await asyncio.to_thread(self.api.get_candles, asset, timeframe_seconds, count, end_from_time)
+            candles = await self.api.get_candles(asset, timeframe_seconds, count, end_from_time)
             
             if not candles:
                 return []
 
-            # --- CORREÇÃO DEFINITIVA: LISTA DE DICIONÁRIOS PUROS ---
-            # Pandas converte Lista de Dicts em DataFrame automaticamente e sem erros.
-            formatted_candles = []
-            for c in candles:
-                formatted_candles.append({
-                    'open': float(c.get('open', 0)),
-                    'close': float(c.get('close', 0)),
-                    'high': float(c.get('max', 0)), # Standard name
-                    'low': float(c.get('min', 0)),  # Standard name
-                    'max': float(c.get('max', 0)),  # Legacy support
-                    'min': float(c.get('min', 0)),  # Legacy support
-                    'volume': float(c.get('volume', 0)),
-                    'at': c.get('at', 0),
-                    'id': c.get('id', 0)
-                })
-            
-            return formatted_candles
+            # Uma série só (colunas de float), sem o dict duplicado high/max por vela.
+            # candles[i]["high"] e candles[i]["max"] continuam funcionando.
+            return CandleSeries.from_candles(candles, timeframe_seconds)
 
         except Exception as e:
             print(f"[EXNOVA] Erro ao obter velas para {asset}: {e}")
@@ -79,8 +68,7 @@ class AsyncExnovaService:
     async def execute_trade(self, amount, asset, direction, duration_minutes):
         try:
             action = direction.lower()
-            result, order_id = await asyncio.to_thread(
-                self.api.buy, 
+            result, order_id = await self.api.buy(
                 float(amount), 
                 asset, 
                 action, 
@@ -93,12 +81,17 @@ class AsyncExnovaService:
         except Exception:
             return None
 
-    async def check_win(self, order_id):
+    async def check_win(self, order_id, timeout=None):
+        if timeout is None:
+            timeout = self.check_win_timeout
         try:
-            status, profit = await asyncio.to_thread(self.api.check_win_v3, order_id)
+            status, profit = await self.api.check_win(order_id, timeout=timeout)
             if status == 'equal': return 'draw'
             elif status == 'loose': return 'loss'
             elif status == 'win': return 'win'
             return 'unknown'
         except Exception:
              return 'unknown'
+
+    async def close(self):
+        await self.api.close()
@@ -0,0 +1,15 @@
+import exnovaapi.constants as OP_code
+from exnovaapi import assets
+
+
+def test_reverse_index_follows_registered_ids(monkeypatch):
+    monkeypatch.setattr(OP_code, "ACTIVES", {"EURUSD": 1, "GBPUSD": 5})
+    assert assets.name_of(1) == "EURUSD"
+    assets.register("EURUSD-OTC", 76)
+    assert assets.name_of(76) == "EURUSD-OTC"
+    # same size, new id for a known name
+    assets.register("EURUSD", 2)
+    assert assets.name_of(2) == "EURUSD" and assets.name_of(1) is None
+    assert OP_code.ACTIVES["EURUSD"] == 2
+    assets.register("GBPUSD", 5)
+    assert assets.name_of(5) == "GBPUSD"
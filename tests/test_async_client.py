@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from exnovaapi.aio import AsyncExnova, ConnectionClosed
+from benchmarks.standin_server import StandinServer
+from services.exnova_service import AsyncExnovaService
+
+
+@pytest.fixture
+def server():
+    server = StandinServer(time_sync_interval=0.5, candle_rate=20, settle_after=0.2).start()
+    yield server
+    server.stop()
+
+
+def connected(server, ssid="ssid-async"):
+    bot = AsyncExnova("async@test", "secret", wss_url=server.url)
+    bot.state.SSID = ssid
+    return bot
+
+
+def test_concurrent_requests_share_one_thread(server):
+    async def run():
+        async with connected(server) as bot:
+            threads = threading.active_count()
+            end = int(time.time())
+            results = await asyncio.gather(*[
+                bot.get_candles(asset, 60, 5, end)
+                for asset in ("EURUSD", "GBPUSD", "USDJPY") * 300])
+            assert threading.active_count() == threads
+            return results
+
+    results = asyncio.run(run())
+    assert len(results) == 900
+    assert all(len(candles) == 5 for candles in results)
+    assert results[0] == results[3] and results[0] != results[1]
+
+
+def test_buy_and_check_win(server):
+    async def run():
+        async with connected(server) as bot:
+            ok, option_id = await bot.buy(10, "EURUSD", "call", 1)
+            assert ok
+            win, profit = await bot.check_win(option_id, timeout=5)
+            assert win in ("win", "loose", "equal")
+            assert profit == {"win": 8.7, "loose": -10.0, "equal": 0}[win]
+
+            ok, order_id = await bot.buy_digital_spot("EURUSD", 10, "put", 1)
+            assert ok
+            assert (await bot.check_win_digital(order_id, timeout=5))[0]
+
+            balance = await bot.get_balance()
+            assert balance < 10000
+
+    asyncio.run(run())
+
+
+def test_candle_stream_subscribes_once(server):
+    async def take(bot, count):
+        candles = []
+        async for candle in bot.candles("EURUSD", 60):
+            candles.append(candle)
+            if len(candles) == count:
+                return candles
+
+    async def run():
+        async with connected(server) as bot:
+            first, second = await asyncio.gather(take(bot, 3), take(bot, 5))
+            session = next(iter(server.sessions))
+            assert session.requests["subscribeMessage"] == 7  # 6 portfolio + 1 candle
+            return first, second
+
+    first, second = asyncio.run(run())
+    assert first[0]["active_id"] == 1 and first[0]["size"] == 60
+    assert first == second[:3]
+
+
+def test_closing_fails_waiters(server):
+    async def run():
+        async with connected(server) as bot:
+            stream = bot.candles("EURUSD", 60)
+            await stream.__anext__()
+            server.stop()
+            with pytest.raises(ConnectionClosed):
+                while True:  # frames buffered before the close come first
+                    await asyncio.wait_for(stream.__anext__(), 5)
+            assert not bot.check_connect()
+
+    asyncio.run(run())
+
+
+def test_rejected_ssid():
+    server = StandinServer(ssids={"good"}).start()
+    try:
+        bot = AsyncExnova("async@test", "secret", wss_url=server.url)
+        bot.state.SSID = "bad"
+        bot._login = lambda: asyncio.sleep(0, (False, "login failed"))
+        assert asyncio.run(bot.connect()) == (False, "login failed")
+    finally:
+        server.stop()
+
+
+def test_service_on_async_client(server):
+    async def run():
+        service = AsyncExnovaService("async@test", "secret", wss_url=server.url)
+        service.api.state.SSID = "ssid-service"
+        assert await service.connect()
+        assert await service.is_connected()
+        candles = await service.get_historical_candles("EURUSD", 60, 10)
+        assert len(candles) == 10 and candles[-1]["high"] >= candles[-1]["low"]
+        order_id = await service.execute_trade(5, "EURUSD", "CALL", 1)
+        assert isinstance(order_id, int)
+        assert await service.check_win(order_id) in ("win", "loss", "draw")
+        assert await service.check_win(-1, timeout=0.2) == "unknown"
+        await service.close()
+
+    asyncio.run(run())
+
+
+def test_failed_send_drops_the_pending_request(server):
+    def send(request_id):
+        raise ConnectionResetError("gone")
+
+    async def run():
+        async with connected(server) as bot:
+            with pytest.raises(ConnectionResetError):
+                await bot._request(send, "broken")
+            assert len(bot.pending) == 0
+
+    asyncio.run(run())
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from exnovaapi.backfill import Backfill, RateLimiter
+from exnovaapi.candle_store import CandleStore
+
+STOP = 1700000000 - 1700000000 % 60
+FIRST = STOP - 600 * 60  # the oldest candle the broker has
+GAP = (STOP - 200 * 60, STOP - 150 * 60)  # market closed
+
+
+class FakeBroker(object):
+    # like get-candles: the `count` newest candles that started before `to`
+    def __init__(self, fail_after=None, silent_at=None):
+        self.requests = 0
+        self.fail_after = fail_after
+        self.silent_at = silent_at
+        self.lock = threading.Lock()
+
+    def get_candles(self, asset, size, count, to):
+        with self.lock:
+            self.requests += 1
+            if self.fail_after is not None and self.requests > self.fail_after:
+                raise ConnectionError("dropped")
+            if self.requests == self.silent_at:
+                return None  # timed out, like Exnova.get_candles after its retries
+        candles, start = [], to - to % size - size
+        while len(candles) < count and start >= FIRST:
+            if not GAP[0] <= start < GAP[1]:
+                candles.append({"from": start, "open": 1.0, "close": 1.0, "min": 1.0,
+                                "max": 1.0, "volume": 0})
+            start -= size
+        return candles[::-1]
+
+
+def test_backfill_pages_resumes_and_finds_gaps(tmp_path):
+    store = CandleStore(str(tmp_path / "history.sqlite3"))
+    series = [("EURUSD", 60), ("GBPUSD", 60)]
+    start = STOP - 800 * 60
+
+    broker = FakeBroker(fail_after=3)
+    first = Backfill(broker.get_candles, store, page=100, workers=1, rate=1000).run(series, start, STOP)
+    assert "error" in first["EURUSD", 60] and first["EURUSD", 60]["requests"] == 0
+    assert store.stats()["candles"] == 300
+
+    broker = FakeBroker()
+    second = Backfill(broker.get_candles, store, page=100, workers=2, rate=1000).run(series, start, STOP)
+    for key in series:
+        assert len(store.range(key[0], 60, start, STOP)) == 550
+        assert second[key]["holes"] == [GAP]
+    # EURUSD kept its 3 pages, the last page of each series finds nothing
+    assert broker.requests == 4 + 7
+
+    broker = FakeBroker()
+    again = Backfill(broker.get_candles, store, page=100, rate=1000).run(series, start, STOP)
+    assert broker.requests == 0 and again["GBPUSD", 60]["candles"] == 0
+
+
+def test_page_without_reply_is_fetched_again(tmp_path):
+    store = CandleStore(str(tmp_path / "history.sqlite3"))
+    start = STOP - 1000 * 60
+
+    broker = FakeBroker(silent_at=2)
+    first = Backfill(broker.get_candles, store, page=100, rate=1000).series("EURUSD", 60, start, STOP)
+    assert first["error"] and first["requests"] == 2 and first["candles"] == 100
+
+    broker = FakeBroker()
+    second = Backfill(broker.get_candles, store, page=100, rate=1000).series("EURUSD", 60, start, STOP)
+    assert broker.requests > 0 and second["holes"] == [GAP]
+    assert len(store.range("EURUSD", 60, start, STOP)) == 550
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(50, burst=2)
+    began = time.monotonic()
+    for _ in range(12):
+        limiter.wait()
+    assert time.monotonic() - began >= 10 / 50 * 0.9
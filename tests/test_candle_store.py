@@ -0,0 +1,46 @@
+from exnovaapi.candle_store import CandleStore
+
+
+class FakeBroker(object):
+    # get_candles of the broker: count candles up to end, the last still forming
+    def __init__(self):
+        self.calls = []
+
+    def get_candles(self, asset, size, count, end):
+        self.calls.append(count)
+        top = end - end % size
+        return [{"id": 1, "from": top - i * size, "at": 0, "open": 1.0, "close": 1.0 + i,
+                 "min": 0.5, "max": 2.0 + i, "volume": i} for i in range(count - 1, -1, -1)]
+
+
+def test_put_get_replaces_and_orders(tmp_path):
+    store = CandleStore(str(tmp_path / "candles.sqlite3"))
+    candle = {"from": 120, "open": 1.0, "close": 2.0, "min": 0.5, "max": 2.5, "volume": 3}
+    store.put("EURUSD", 60, [dict(candle, **{"from": 180}), candle])
+    store.put("EURUSD", 60, [dict(candle, close=2.2)])
+    assert store.get("EURUSD", 60, 10) == [
+        {"from": 120, "to": 180, "open": 1.0, "close": 2.2, "min": 0.5, "max": 2.5, "volume": 3},
+        {"from": 180, "to": 240, "open": 1.0, "close": 2.0, "min": 0.5, "max": 2.5, "volume": 3}]
+    assert store.get("EURUSD", 60, 10, end=180)[-1]["from"] == 120
+    assert store.newest("EURUSD", 60) == 180 and store.newest("EURUSD", 900) is None
+    assert store.prune(1) == 1 and store.stats()["candles"] == 1
+
+
+def test_fetch_only_asks_for_the_gap(tmp_path):
+    path = str(tmp_path / "candles.sqlite3")
+    broker = FakeBroker()
+    now = 1700000000 - 1700000000 % 60 + 30
+
+    store = CandleStore(path)
+    cold = store.fetch(broker.get_candles, "EURUSD", 60, 120, now)
+    assert broker.calls == [121] and len(cold) == 120
+    assert cold[-1]["from"] == now - 30 - 60  # the forming candle is left out
+    store.close()
+
+    # restart 5 minutes later
+    store = CandleStore(path)
+    assert store.fetch(broker.get_candles, "EURUSD", 60, 120, now) == cold
+    warm = store.fetch(broker.get_candles, "EURUSD", 60, 120, now + 300)
+    assert broker.calls == [121, 6]
+    assert [c["from"] for c in warm] == [c["from"] + 300 for c in cold]
+    assert store.stats()["fetched"] == 5 and store.stats()["requests"] == 1
@@ -0,0 +1,126 @@
+import math
+import threading
+
+import pytest
+
+from analysis import technical, technical_indicators
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.candles import CandleRing, CandleSeries
+from exnovaapi.ws.received.candle_generated import candle_generated_realtime
+
+
+def candle(start, close, size=60):
+    return {"from": start, "to": start + size, "open": close - 1, "close": close,
+            "min": close - 2, "max": close + 1, "volume": 3}
+
+
+@pytest.mark.parametrize("capacity,count", [(5, 3), (5, 5), (5, 12), (1, 4)])
+def test_ring_keeps_newest_in_order(capacity, count):
+    ring = CandleRing(capacity, 60)
+    for i in range(count):
+        ring.update(candle(i * 60, float(i)))
+    view = ring.last()
+    kept = list(range(max(0, count - capacity), count))
+    assert len(view) == len(kept)
+    assert [c["from"] for c in view] == [i * 60 for i in kept]
+    assert list(view.close) == [float(i) for i in kept]
+    assert view[-1]["to"] == kept[-1] * 60 + 60
+
+
+def test_live_candle_updates_in_place_and_views_follow():
+    ring = CandleRing(4, 60)
+    ring.extend([candle(120, 3.0), candle(0, 1.0), candle(60, 2.0)])
+    view = ring.last(2)
+    ring.update(candle(120, 9.0))
+    assert len(ring) == 3
+    assert view[-1]["close"] == 9.0
+    assert view.close.obj is ring.last().close.obj
+
+
+def test_missing_older_candle_is_inserted():
+    ring = CandleRing(3, 60)
+    for start in (0, 120, 180):
+        ring.update(candle(start, float(start)))
+    ring.update(candle(60, 60.0))
+    assert [c["from"] for c in ring.last()] == [60, 120, 180]
+    ring.update(candle(0, 0.0))
+    assert [c["from"] for c in ring.last()] == [60, 120, 180]
+
+
+def test_view_slices_like_a_candle_list():
+    ring = CandleRing(50, 60)
+    for i in range(30):
+        ring.update(candle(i * 60, float(i)))
+    view = ring.last(20)
+    closed = view[:-1]
+    assert len(closed) == 19
+    assert closed[-1]["close"] == 28.0
+    assert [c["close"] for c in view[-3:]] == [27.0, 28.0, 29.0]
+    assert view[::10] == [view[0], view[10]]
+    assert sorted(view, key=lambda c: -c["from"])[0]["from"] == 29 * 60
+
+
+def test_backfill_and_stream_write_the_same_ring():
+    ring = CandleRing(400, 60)
+    history = [candle(i * 60, float(i)) for i in range(0, 400, 2)]
+
+    def backfill():
+        for i in range(0, len(history), 10):
+            ring.extend(history[i:i + 10])
+
+    thread = threading.Thread(target=backfill)
+    thread.start()
+    for i in range(1, 400, 2):
+        ring.update(candle(i * 60, float(i)))
+        starts = [c["from"] for c in ring.snapshot()]
+        assert starts == sorted(set(starts))
+    thread.join()
+    assert [c["from"] for c in ring.snapshot()] == [i * 60 for i in range(400)]
+
+
+def test_stream_handler_fills_ring():
+    api = ExnovaAPI("localhost", "user", "pass")
+    api.real_time_candles_maxdict_table["EURUSD"][60] = 3
+    for i in range(5):
+        message = {"name": "candle-generated",
+                   "msg": dict(candle(i * 60, float(i)), active_id=1, size=60)}
+        candle_generated_realtime(api, message)
+    ring = api.real_time_candles["EURUSD"][60]
+    assert ring.capacity == 3
+    assert [c["close"] for c in ring.last()] == [2.0, 3.0, 4.0]
+
+
+def test_series_normalizes_once():
+    raw = [candle(120, 3.0), candle(0, 1.0), {"from": 60, "open": "1", "close": 2, "high": 3.5,
+                                              "low": 0.5}, dict(candle(180, 4.0), close=None)]
+    series = CandleSeries.from_candles(raw, 60)
+    assert CandleSeries.from_candles(series) is series
+    assert series.from_ == [0, 60, 120] and series.close == [1.0, 2.0, 3.0]
+    assert series.open[1] == 1.0 and series.max[1] == 3.5 and series.min[1] == 0.5
+    assert series[-1]["close"] == 3.0 and series[-1]["high"] == series[-1]["max"] == 4.0
+    assert series[-1]["to"] == 180 and series[0].get("id") is None
+    closed = series[:-1]
+    assert isinstance(closed, CandleSeries) and closed.close == [1.0, 2.0]
+    assert series.to_list()[0] == candle(0, 1.0)
+    ring = CandleRing(5, 60)
+    ring.extend(raw[:2])
+    assert CandleSeries.from_candles(ring.last()).close == [1.0, 3.0]
+
+
+def test_analysis_reads_series_like_dicts():
+    raw = [candle(i * 60, 1.0 + math.sin(i / 3.0) * 0.01 + i * 0.0001) for i in range(200)]
+    series = CandleSeries.from_candles(raw, 60)
+    for name in ("calculate_ema", "calculate_atr", "calculate_rsi", "calculate_adx",
+                 "calculate_choppiness"):
+        function = getattr(technical_indicators, name)
+        assert function(series, 14) == function(raw, 14)
+    assert technical.get_sr_zones(series, 5) == technical.get_sr_zones(raw, 5)
+
+
+def test_invalid_candle_inside_the_window_is_cut_before_filtering():
+    raw = [candle(i * 60, 1.0 + i * 0.001) for i in range(60)]
+    raw[-10] = dict(raw[-10], close=None)
+    # max_len = 5 * 6: the last 30 candles, one of them dropped
+    window = [c for c in raw[-30:] if c["close"] is not None]
+    assert len(window) == 29
+    assert technical_indicators.calculate_ema(raw, 5) == technical_indicators.calculate_ema(window, 5)
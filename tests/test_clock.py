@@ -0,0 +1,85 @@
+import random
+import time
+
+from exnovaapi.clock import ServerClock
+from exnovaapi.stable_api import Exnova
+from exnovaapi.ws.objects.timesync import TimeSync
+from benchmarks.standin_server import StandinServer
+
+
+def feed(clock, base, seconds, shift, drift, rng):
+    # a frame sent every second at server time shift + local (+ drift), delayed 5 ms + jitter
+    for i in range(seconds):
+        sent = base + i
+        server = sent + shift + drift * (sent - base)
+        clock.update(server * 1000, sent + 0.005 + rng.expovariate(1 / 0.02))
+        clock.observe_rtt(0.010 + rng.expovariate(1 / 0.02))
+
+
+def expected(base, shift, drift):
+    now = time.monotonic()
+    return now + shift + drift * (now - base)
+
+
+def test_estimate_follows_offset_and_drift():
+    rng = random.Random(3)
+    clock = ServerClock()
+    assert not clock.synced
+    assert abs(clock.server_now() - time.time()) < 0.01
+
+    base = time.monotonic() - 120
+    shift, drift = time.time() - time.monotonic() + 2.5, 2e-4
+    feed(clock, base, 120, shift, drift, rng)
+    assert clock.synced
+    assert abs(clock.server_now() - expected(base, shift, drift)) < 0.003
+    assert abs(clock.stats()["drift_ppm"] - 200) < 40
+
+
+def test_clock_step_restarts_the_window():
+    rng = random.Random(5)
+    clock = ServerClock()
+    base = time.monotonic() - 60
+    shift = time.time() - time.monotonic()
+    feed(clock, base, 30, shift + 30, 0.0, rng)
+    feed(clock, base + 30, 30, shift, 0.0, rng)
+    assert abs(clock.server_now() - expected(base, shift, 0.0)) < 0.003
+
+
+def test_one_late_frame_does_not_move_the_estimate():
+    rng = random.Random(7)
+    clock = ServerClock()
+    base = time.monotonic() - 61
+    shift = time.time() - time.monotonic()
+    feed(clock, base, 30, shift, 0.0, rng)
+    # sent at base + 30, delivered 1.5 s late
+    clock.update((base + 30 + shift) * 1000, base + 31.5)
+    feed(clock, base + 31, 30, shift, 0.0, rng)
+    assert clock.stats()["samples"] == 60
+    assert abs(clock.server_now() - expected(base, shift, 0.0)) < 0.003
+
+
+def test_timesync_getter_does_not_wait():
+    timesync = TimeSync()
+    start = time.perf_counter()
+    assert abs(timesync.server_timestamp - time.time()) < 0.01
+    assert time.perf_counter() - start < 0.01
+    assert timesync.last_sync is None
+
+
+def test_estimate_against_standin_server():
+    server = StandinServer(time_sync_interval=0.2, heartbeat_interval=0.2, latency=0.02).start()
+    bot = Exnova("clock@test", "secret", wss_url=server.url)
+    bot.state.SSID = "ssid-clock"
+    try:
+        ok, reason = bot.connect()
+        assert ok, reason
+        for _ in range(5):
+            bot.get_balances()
+        time.sleep(1)
+        stats = bot.get_clock_stats()
+        assert stats["synced"] and stats["rtt_min"] >= 0.02
+        # one way delay 20 ms, half the round trip added back
+        assert abs(bot.get_server_timestamp() - time.time()) < 0.02
+    finally:
+        bot.api.close()
+        server.stop()
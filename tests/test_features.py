@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from exnovaapi.candles import CandleSeries
+
+
+def random_walk(count, seed, start=0):
+    rnd = random.Random(seed)
+    price, candles = 1.0 + rnd.random(), []
+    for i in range(count):
+        open_ = price
+        price += rnd.gauss(0, 0.0004) * (5 if rnd.random() < 0.1 else 1)
+        candles.append({"from": (start + i) * 60, "open": open_, "close": price,
+                        "min": min(open_, price) - abs(rnd.gauss(0, 0.0002)),
+                        "max": max(open_, price) + abs(rnd.gauss(0, 0.0002)), "volume": 1})
+    return CandleSeries.from_candles(candles, 60)
+
+
+@pytest.fixture
+def main(monkeypatch):
+    main = pytest.importorskip("main")
+    monkeypatch.setattr(main, "CANDLE_STORE_FILE", "")
+    return main
+
+
+def test_snapshot_matches_direct_calculation(main):
+    ta = main.TechnicalAnalysis
+    for seed in range(8):
+        s = random_walk(85, seed)
+        f = main.FeatureSnapshot(s)
+        assert f.ema(9) == ta.ema_of(s.close, 9)
+        assert f.ema(21, back=1) == ta.ema_of(s.close[:-1], 21)
+        assert f.compression() == ta.check_compression(s)
+        assert f.compression(last=30) == ta.check_compression(s[-30:])
+        assert f.atr(14) == ta.calculate_atr(s, 14)
+        assert f.rsi(14) == ta.calculate_rsi(s.close, 14)
+        assert f.anatomy == [ta.analyze_candle(s[k]) for k in (-3, -2, -1)]
+        assert f.avg_body_20_prev == pytest.approx(
+            sum(abs(c - o) for c, o in zip(s.close[-21:-1], s.open[-21:-1])) / 20)
+
+        # a mesma resposta com a snapshot recebida ou montada pela estratégia
+        for strategy in (main.TsunamiFlowStrategy, main.VolumeReactorStrategy, main.EmaPullbackStrategy,
+                         main.BollingerReentryStrategy, main.GapTraderStrategy):
+            assert strategy.get_signal(s, features=f) == strategy.get_signal(s)
+        assert main.ShockLiveDetector.detect(s, "A", features=f) == main.ShockLiveDetector.detect(s, "A")
+
+
+def test_bot_memoizes_one_snapshot_per_closed_window(main):
+    bot = main.SimpleBot()
+    m1 = random_walk(86, 1)
+    window = m1[:-1]
+    features = bot.get_features("EURUSD-OTC", window)
+    assert bot.get_features("EURUSD-OTC", m1[:-1]) is features
+    assert bot.get_features("GBPUSD-OTC", window) is not features
+    assert bot.get_features("", window) is not bot.get_features("", window)
+
+    # vela nova fechada: outra janela, outra snapshot
+    assert bot.get_features("EURUSD-OTC", m1[1:]) is not features
+
+    for strategy in bot.strategies_pool:
+        assert bot.check_strategy_signal(strategy, window, "EURUSD-OTC") == \
+            bot.check_strategy_signal(strategy, window, "", main.FeatureSnapshot(window))
+
+    for i in range(main.FEATURES_CACHE_SIZE + 10):
+        bot.get_features("A", random_walk(30, 2, start=i))
+    assert len(bot.features_cache) == main.FEATURES_CACHE_SIZE
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.ws import dispatch
+from exnovaapi.ws.chanels import LazyChanel
+
+
+def test_import_loads_no_chanel_or_handler_module():
+    code = ("import sys, exnovaapi.stable_api; print(sorted(m for m in sys.modules if "
+            "m.startswith(('exnovaapi.ws.chanels.', 'exnovaapi.ws.received.'))))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_handler_and_chanel_load_on_first_use():
+    path = "exnovaapi.ws.received.time_sync:time_sync"
+    dispatch.register_handler("timeSync", path)  # already registered, lazy or loaded
+    before = dispatch.get_handlers("timeSync")
+    assert len(before) == 1 and dispatch._LazyHandler(path) == before[0][0]
+
+    api = ExnovaAPI("localhost", "lazy@test", "secret")
+    dispatch.dispatch(SimpleNamespace(api=api), {"name": "timeSync", "msg": 1700000000000})
+    assert api.timesync.last_sync == 1700000000.0
+    from exnovaapi.ws.received.time_sync import time_sync
+    assert dispatch.get_handlers("timeSync") == ((time_sync, None),)
+    assert dispatch.get_handlers("timeSync")[0][0] is time_sync
+
+    chanel = LazyChanel("heartbeat", "Heartbeat")
+    from exnovaapi.ws.chanels.heartbeat import Heartbeat
+    assert isinstance(chanel(api), Heartbeat) and chanel.cls is Heartbeat
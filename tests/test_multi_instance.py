@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+import exnovaapi.constants as OP_code
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.stable_api import Exnova
+from benchmarks.standin_server import StandinServer, candle_close
+
+ASSETS = ["EURUSD", "GBPUSD", "USDJPY", "AUDCAD"]
+
+
+@pytest.fixture
+def server():
+    server = StandinServer(time_sync_interval=0.5).start()
+    yield server
+    server.stop()
+
+
+def connect(server, email):
+    bot = Exnova(email, "secret")
+    bot.state.SSID = "ssid-" + email
+    bot.api = ExnovaAPI("localhost", email, "secret", state=bot.state)
+    bot.api.wss_url = server.url
+    ok, reason = bot.api.connect()
+    assert ok, reason
+    return bot
+
+
+def test_instances_do_not_share_state(server):
+    bots = [connect(server, "user%d@test" % i) for i in range(len(ASSETS))]
+    try:
+        balance_ids = [bot.get_balance_id() for bot in bots]
+        assert len(set(balance_ids)) == len(bots)
+
+        results = {}
+
+        def work(bot, asset):
+            candles = bot.get_candles(asset, 60, 20, time.time())
+            results[asset] = (bot, candles, bot.get_balances())
+
+        threads = [threading.Thread(target=work, args=(bot, asset))
+                   for bot, asset in zip(bots, ASSETS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        for asset in ASSETS:
+            bot, candles, balances = results[asset]
+            active_id = OP_code.ACTIVES[asset]
+            assert len(candles) == 20
+            assert all(c["close"] == candle_close(active_id, 60, c["from"]) for c in candles)
+            assert balances["msg"][0]["id"] == bot.get_balance_id()
+
+        assert bots[0].api.real_time_candles is not bots[1].api.real_time_candles
+        assert bots[0].api.candles is not bots[1].api.candles
+    finally:
+        for bot in bots:
+            bot.api.close()
+
+
+def test_global_value_is_gone():
+    import exnovaapi.global_value as global_value
+    with pytest.raises(AttributeError, match="api.state.SSID"):
+        global_value.SSID
+
+
+def test_bad_ssid_fails_only_its_instance(server):
+    server.ssids = {"ssid-good@test"}
+    good = connect(server, "good@test")
+    bad = Exnova("bad@test", "secret")
+    bad.state.SSID = "ssid-bad@test"
+    bad.api = ExnovaAPI("localhost", "bad@test", "secret", state=bad.state)
+    bad.api.wss_url = server.url
+    bad.api.start_websocket()
+    try:
+        assert bad.api.send_ssid() is False
+        assert good.check_connect()
+        assert good.get_balance_id() is not None
+        assert bad.get_balance_id() is None
+    finally:
+        good.api.close()
+        bad.api.close()
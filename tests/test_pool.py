@@ -0,0 +1,93 @@
+import time
+
+import pytest
+import exnovaapi.constants as OP_code
+from exnovaapi.pool import shard_index
+from exnovaapi.stable_api import Exnova
+from benchmarks.standin_server import StandinServer
+
+ASSETS = ["EURUSD", "GBPUSD", "USDJPY", "AUDCAD", "EURJPY", "EURGBP"]
+
+
+@pytest.fixture
+def server():
+    server = StandinServer(time_sync_interval=0.5, candle_rate=20, settle_after=0.2).start()
+    yield server
+    server.stop()
+
+
+def test_shard_index_is_stable_and_spread():
+    assert shard_index("EURUSD", 3) == shard_index("EURUSD", 3)
+    assert len({shard_index(asset, 3) for asset in OP_code.ACTIVES}) == 3
+
+
+def test_market_data_on_shards_orders_on_main(server):
+    bot = Exnova("pool@test", "secret", wss_url=server.url, market_data_connections=2)
+    bot.state.SSID = "ssid-pool"
+    ok, reason = bot.connect()
+    assert ok, reason
+    try:
+        assert len(server.sessions) == 3
+        pool = bot.api.market_data
+        for asset in ASSETS:
+            bot.start_candles_stream(asset, 60, 10)
+            assert bot.get_realtime_candles(asset, 60)[-1]["from"] == int(time.time()) // 60 * 60
+            assert pool.for_asset(asset).real_time_candles is bot.api.real_time_candles
+
+        ok, option_id = bot.buy(10, "EURUSD", "call", 1)
+        assert ok
+        bot.check_win_v4(option_id)
+
+        sessions = list(server.sessions)
+        main = [s for s in sessions if s.requests["binary-options.open-option"]]
+        shards = [s for s in sessions if s not in main]
+        assert len(main) == 1 and not main[0].subscriptions
+        assert not main[0].requests["get-candles"]
+        subscribed = {key[1] for s in shards for key in s.subscriptions}
+        assert subscribed == {OP_code.ACTIVES[asset] for asset in ASSETS}
+        assert all(s.requests["get-candles"] for s in shards)
+    finally:
+        bot.api.close()
+    assert bot.api.market_data is None
+
+
+def test_dead_shard_is_reconnected_and_resubscribed(server):
+    bot = Exnova("dead@test", "secret", wss_url=server.url, market_data_connections=2)
+    bot.state.SSID = "ssid-dead"
+    ok, reason = bot.connect()
+    assert ok, reason
+    try:
+        eurusd = OP_code.ACTIVES["EURUSD"]
+        bot.start_candles_stream("EURUSD", 60, 10)
+        shard = bot.api.market_data.shard_of("EURUSD")
+        [session] = [s for s in server.sessions if any(key[1] == eurusd for key in s.subscriptions)]
+        session.close()
+        deadline = time.time() + 5
+        while shard.state.check_websocket_if_connect and time.time() < deadline:
+            time.sleep(0.05)
+        assert not shard.state.check_websocket_if_connect
+        assert bot.check_connect()
+
+        candles = bot.get_candles("EURUSD", 60, 10, time.time())
+        assert len(candles) == 10
+        assert bot.api.market_data.shard_of("EURUSD") is shard and shard.state.check_websocket_if_connect
+        assert any(key[1] == eurusd for s in server.sessions if s is not session
+                   for key in s.subscriptions)
+    finally:
+        bot.api.close()
+
+
+def test_get_candles_gives_up_on_a_shard_that_stays_down(server):
+    bot = Exnova("down@test", "secret", wss_url=server.url, market_data_connections=2)
+    bot.state.SSID = "ssid-down"
+    ok, reason = bot.connect()
+    assert ok, reason
+    try:
+        bot.suspend = 0.05
+        bot.request_retries = 3
+        server.stop()
+        start = time.perf_counter()
+        assert bot.get_candles("EURUSD", 60, 10, time.time()) is None
+        assert time.perf_counter() - start < 5
+    finally:
+        bot.api.close()
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.session import SessionStore
+from exnovaapi.stable_api import Exnova
+from benchmarks.standin_server import StandinServer
+
+ASSETS = ["EURUSD", "GBPUSD", "USDJPY"]
+
+
+@pytest.fixture
+def server():
+    server = StandinServer(time_sync_interval=0.5, heartbeat_interval=0.2,
+                           candle_rate=20, ssids={"ssid-saved"}).start()
+    yield server
+    server.stop()
+
+
+def test_session_store(tmp_path):
+    path = str(tmp_path / "session.json")
+    store = SessionStore(path)
+    assert store.load("a@test") is None
+    store.save("a@test", "one")
+    store.save("b@test", "two")
+    assert SessionStore(path).load("a@test") == "one"
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    store.forget("a@test")
+    assert store.load("a@test") is None and store.load("b@test") == "two"
+    with open(path, "w") as f:
+        f.write('{"a@test": "legacy"}')
+    store.save("a@test", "three")
+    assert store.load("a@test") == "three"
+
+
+def wait_disconnected(bot):
+    deadline = time.time() + 5
+    while bot.check_connect() and time.time() < deadline:
+        time.sleep(0.05)
+    assert not bot.check_connect()
+
+
+def test_reconnect_reuses_ssid_and_fills_gaps(server, tmp_path):
+    path = str(tmp_path / "session.json")
+    SessionStore(path).save("re@test", "ssid-saved")
+    bot = Exnova("re@test", "secret", wss_url=server.url, session_file=path)
+    assert bot.state.SSID == "ssid-saved"
+    ok, reason = bot.connect()
+    assert ok, reason
+    assert not bot.api.logout_at_exit
+    try:
+        for asset in ASSETS:
+            bot.start_candles_stream(asset, 1, 30)
+        rings = [bot.api.real_time_candles[asset][1] for asset in ASSETS]
+
+        for session in list(server.sessions):
+            session.close()
+        wait_disconnected(bot)
+        time.sleep(2.5)
+
+        ok, reason = bot.connect()
+        assert ok, reason
+        stats = bot.get_recovery_stats()[0]
+        assert stats["reconnect"] and not stats["login"]
+        assert stats["streams"] == stats["streaming"] == len(ASSETS)
+        assert stats["backfilled"] >= 3 * len(ASSETS)
+        assert stats["seconds"] < 2
+
+        session = next(iter(server.sessions))
+        assert session.requests["get-candles"] == len(ASSETS)
+        for asset, ring in zip(ASSETS, rings):
+            assert bot.api.real_time_candles[asset][1] is ring
+            starts = list(ring.last(10).from_)
+            assert starts == list(range(starts[0], starts[0] + 10))
+    finally:
+        bot.api.close()
+
+
+def test_expired_ssid_relogin_stops_the_first_socket(server, monkeypatch):
+    api = ExnovaAPI("localhost", "old@test", "secret")
+    api.wss_url = server.url
+    api.state.SSID = "ssid-expired"
+    writers = []
+    start_websocket = api.start_websocket
+
+    def start():
+        result = start_websocket()
+        writers.append(api.websocket_writer)
+        return result
+
+    class Login:
+        cookies = {"ssid": "ssid-saved"}
+
+    monkeypatch.setattr(api, "start_websocket", start)
+    monkeypatch.setattr(api, "get_ssid", lambda: Login())
+    monkeypatch.setattr(api, "logout_at_exit", False)
+    try:
+        ok, reason = api.connect()
+        assert ok, reason
+        assert len(writers) == 2
+        assert not writers[0].is_alive() and writers[1].is_alive()
+    finally:
+        api.close()
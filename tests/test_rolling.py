@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from analysis.rolling import (RESYNC, RollingMax, RollingMean, RollingMin, RollingSum, RollingVariance,
+                              RollingWMA, rolling_max, rolling_mean, rolling_mean_std, rolling_min,
+                              rolling_sum, rolling_wma)
+
+
+def naive(values, period):
+    # cada janela recalculada do zero, como as funções antigas do main.py
+    out = {"sum": [], "mean": [], "var": [], "max": [], "min": [], "wma": []}
+    for end in range(period, len(values) + 1):
+        window = values[end - period:end]
+        mean = sum(window) / period
+        out["sum"].append(sum(window))
+        out["mean"].append(mean)
+        out["var"].append(sum((x - mean) ** 2 for x in window) / period)
+        out["max"].append(max(window))
+        out["min"].append(min(window))
+        out["wma"].append(sum(x * w for w, x in enumerate(window, 1)) / (period * (period + 1) / 2))
+    return out
+
+
+def close(a, b):
+    assert a == pytest.approx(b, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("period", [1, 5, 20, 34])
+def test_incremental_and_arrays_match_recomputed_windows(period):
+    rnd = random.Random(period)
+    values = [1.1 + rnd.gauss(0, 0.001) for _ in range(RESYNC + 300)]
+    values[100:110] = [values[99]] * 10  # empates nos extremos
+    expected = naive(values, period)
+
+    ops = {"sum": RollingSum(period), "mean": RollingMean(period), "var": RollingVariance(period),
+           "max": RollingMax(period), "min": RollingMin(period), "wma": RollingWMA(period)}
+    for i, value in enumerate(values):
+        for name, op in ops.items():
+            peeked = op.peek(value)
+            pushed = op.push(value)
+            if i < period - 1:
+                assert name in ("max", "min") or (peeked is None and pushed is None)
+                continue
+            close(peeked, pushed)
+            close(pushed, expected[name][i - period + 1])
+    close(ops["var"].std, expected["var"][-1] ** 0.5)
+
+    arrays = {"sum": rolling_sum, "mean": rolling_mean, "max": rolling_max, "min": rolling_min, "wma": rolling_wma}
+    for name, function in arrays.items():
+        for got, want in zip(function(values, period), expected[name]):
+            close(got, want)
+        tail = function(values, period, last=3)
+        assert len(tail) == 3
+        for got, want in zip(tail, expected[name][-3:]):
+            close(got, want)
+    for (mean, std), want_mean, want_var in zip(rolling_mean_std(values, period), expected["mean"], expected["var"]):
+        close(mean, want_mean)
+        close(std, want_var ** 0.5)
+    assert rolling_sum(values[:period - 1], period) == []
+
+
+def test_strategies_match_previous_formulas():
+    main = pytest.importorskip("main")
+    from exnovaapi.candles import CandleSeries
+
+    def band_at(closes, idx, period=20, std_mult=2.0):
+        window = closes[idx - period + 1: idx + 1]
+        if len(window) < period: return 0, 0, 0
+        sma = sum(window) / period
+        std = (sum((x - sma) ** 2 for x in window) / period) ** 0.5
+        return sma, sma + std_mult * std, sma - std_mult * std
+
+    def gap_lines(closes):
+        line = [closes[idx] - sum(closes[len(closes) + idx - 33:len(closes) + idx + 1]) / 34 for idx in range(-7, 0)]
+        wma = lambda data: sum(x * w for w, x in enumerate(data[-5:], 1)) / 15
+        return line, wma(line[1:-1]), wma(line[2:])
+
+    for seed in range(20):
+        rnd = random.Random(seed)
+        price, candles = 1.0 + rnd.random(), []
+        for i in range(85):
+            open_ = price
+            price += rnd.gauss(0, 0.0004)
+            candles.append({"from": i * 60, "open": open_, "close": price, "volume": 1,
+                            "min": min(open_, price) - 0.0001, "max": max(open_, price) + 0.0001})
+        s = CandleSeries.from_candles(candles)
+        closes = s.close
+        f = main.FeatureSnapshot(s)
+        for back in (0, 1):
+            for got, want in zip(f.bands(back), band_at(closes, len(closes) - 1 - back)):
+                close(got, want)
+        assert main.BollingerReentryStrategy.band_at(closes, 10) == (0, 0, 0)
+        assert main.TechnicalAnalysis.calculate_wma(closes[-9:], 5) == \
+            sum(x * w for w, x in enumerate(closes[-5:], 1)) / 15
+
+        line, wma_prev, wma_curr = gap_lines(closes)
+        signal = "put" if line[-1] > wma_curr and line[-2] < wma_prev else \
+            "call" if line[-1] < wma_curr and line[-2] > wma_prev else None
+        assert main.GapTraderStrategy.get_signal(s)[0] == signal
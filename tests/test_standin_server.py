@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import exnovaapi.constants as OP_code
+from exnovaapi.stable_api import Exnova
+from benchmarks.standin_server import StandinServer, candle_close
+
+
+@pytest.fixture
+def server():
+    server = StandinServer(time_sync_interval=0.5, heartbeat_interval=0.2,
+                           candle_rate=20, quote_rate=20, settle_after=0.3).start()
+    yield server
+    server.stop()
+
+
+def connect(server, email="user@test"):
+    bot = Exnova(email, "secret", wss_url=server.url)
+    bot.state.SSID = "ssid-" + email
+    ok, reason = bot.connect()
+    assert ok, reason
+    return bot
+
+
+def test_connect_by_url_and_fetch(server):
+    bot = connect(server)
+    try:
+        assert bot.get_balance() == 10000.0
+        candles = bot.get_candles("EURUSD", 60, 10, time.time())
+        assert [c["close"] for c in candles] == [
+            candle_close(OP_code.ACTIVES["EURUSD"], 60, c["from"]) for c in candles]
+        for _ in range(50):
+            if server.heartbeat_rtt:
+                break
+            time.sleep(0.05)
+        assert server.heartbeat_rtt
+    finally:
+        bot.api.close()
+
+
+def test_candle_stream(server):
+    bot = connect(server)
+    try:
+        bot.start_candles_stream("EURUSD", 60, 30)
+        view = bot.get_realtime_candles("EURUSD", 60)
+        assert len(view) >= 30
+        assert view[-1]["from"] == int(time.time()) // 60 * 60
+    finally:
+        bot.api.close()
+
+
+def test_binary_and_digital_orders_settle(server):
+    bot = connect(server)
+    try:
+        ok, option_id = bot.buy(10, "EURUSD", "call", 1)
+        assert ok and option_id
+        win, profit = bot.check_win_v4(option_id)
+        assert win in ("win", "loose", "equal")
+        assert bot.check_win_v4(-1, timeout=0.2) == (None, None)
+        assert bot.check_win(-1, timeout=0.2) is None
+
+        bot.subscribe_strike_list("EURUSD", 1)
+        ok, order_id = bot.buy_digital_spot("EURUSD", 5, "put", 1)
+        assert ok and isinstance(order_id, int)
+        closed, pnl = bot.check_win_digital_v2(order_id)
+        assert closed
+        assert bot.get_balance() == pytest.approx(10000.0 + profit + pnl)
+    finally:
+        bot.api.close()
+
+
+def test_concurrent_buys_get_their_own_option(server):
+    bot = connect(server)
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            bought = list(pool.map(lambda asset: bot.buy(10, asset, "call", 1),
+                                   ["EURUSD", "EURJPY", "GBPUSD", "EURUSD"]))
+        assert all(ok for ok, _ in bought)
+        assert len({option_id for _, option_id in bought}) == 4
+    finally:
+        bot.api.close()
+
+
+def test_lost_connection_fails_requests_in_flight(server):
+    bot = connect(server)
+    try:
+        # the stand-in never answers get-order, only the disconnect ends the wait
+        threading.Timer(0.3, lambda: [s.close() for s in list(server.sessions)]).start()
+        start = time.perf_counter()
+        assert bot.get_order(1) == (False, None)
+        assert time.perf_counter() - start < 5
+    finally:
+        bot.api.close()
+
+
+def test_balance_is_none_once_the_server_is_gone(server):
+    bot = connect(server)
+    try:
+        bot.suspend = 0.05
+        bot.request_retries = 2
+        server.stop()
+        start = time.perf_counter()
+        assert bot.get_balance() is None
+        assert bot.get_currency() is None
+        assert time.perf_counter() - start < 10
+    finally:
+        bot.api.close()
+
+
+def test_injected_latency_delays_replies():
+    server = StandinServer(latency=0.2).start()
+    bot = connect(server)
+    try:
+        start = time.perf_counter()
+        bot.get_balances()
+        assert time.perf_counter() - start >= 0.2
+    finally:
+        bot.api.close()
+        server.stop()
@@ -0,0 +1,102 @@
+import gc
+import os
+from types import SimpleNamespace
+
+import pytest
+from exnovaapi.api import ExnovaAPI, BOUNDED_STORES, RESULT_MAXSIZE
+from exnovaapi.store import BoundedStore
+from exnovaapi.ws.client import WebsocketClient  # registers the handlers
+from exnovaapi.ws.dispatch import dispatch
+from benchmarks.traffic import asset_names
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_store_caps_size_and_age():
+    clock = FakeClock()
+    store = BoundedStore(maxsize=3, ttl=10, clock=clock)
+    for key in "abcd":
+        store[key] = key
+    assert list(store) == ["b", "c", "d"] and store.evicted == 1
+
+    clock.now = 6
+    assert store.get("b") == "b"  # used, so kept another ttl
+    clock.now = 12
+    assert list(store) == ["b"] and store.expired == 2
+    assert "c" not in store and store.get("c") is None
+
+    orders = BoundedStore(ttl=10, default_factory=dict, clock=clock)
+    orders[1]["option-opened"] = "x"
+    assert orders.get(2) is None and len(orders) == 1
+    assert orders.stats() == {"size": 1, "maxsize": None, "ttl": 10,
+                              "evicted": 0, "expired": 0}
+
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def trade_frames(i, asset, now):
+    # everything the server pushes for one binary and one digital trade
+    pad = "x" * 400
+    option_id, order_id = 10 ** 9 + i, 2 * 10 ** 9 + i
+    return [
+        {"name": "option", "request_id": str(i), "msg": {"id": option_id, "pad": pad}},
+        {"name": "option-opened", "microserviceName": "binary-options",
+         "msg": {"option_id": option_id, "pad": pad}},
+        {"name": "option-closed", "microserviceName": "binary-options",
+         "msg": {"option_id": option_id, "win": "win", "pad": pad}},
+        {"name": "socket-option-opened", "msg": {"id": option_id, "pad": pad}},
+        {"name": "socket-option-closed", "msg": {"id": option_id, "win": "win", "pad": pad}},
+        {"name": "digital-option-placed", "request_id": "d%d" % i, "msg": {"id": order_id}},
+        {"name": "position-changed", "microserviceName": "portfolio",
+         "msg": {"source": "digital-options", "raw_event": {"order_ids": [order_id]},
+                 "pad": pad}},
+        {"name": "technical-indicators", "request_id": "t%d" % i,
+         "msg": {"indicators": [{"name": "RSI", "pad": pad}]}},
+        {"name": "instrument-quotes-generated",
+         "msg": {"active": asset, "expiration": {"timestamp": int(now), "period": 60},
+                 "quotes": [{"symbols": ["do%dC%d" % (i, k)], "price": {"ask": 50 + k}}
+                            for k in range(8)]}},
+    ]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_soak_day_of_traffic_keeps_rss_flat():
+    import exnovaapi.constants as OP_code
+
+    api = ExnovaAPI("localhost", "soak@test", "secret")
+    clock = FakeClock()
+    for name in BOUNDED_STORES:
+        getattr(api, name).clock = clock
+    client = SimpleNamespace(api=api)
+    # a new quoted active every 20 minutes
+    actives = [OP_code.ACTIVES[name] for name in asset_names(200)]
+
+    def run(start, end, step=5):
+        for i in range(int(start / step), int(end / step)):
+            clock.now = i * step
+            for frame in trade_frames(i, actives[i // 240 % len(actives)], clock.now):
+                dispatch(client, frame)
+
+    run(0, 8 * 3600)
+    gc.collect()
+    before = rss()
+    run(8 * 3600, 24 * 3600)
+    gc.collect()
+    grown = rss() - before
+
+    stats = api.store_stats()
+    for name in BOUNDED_STORES:
+        assert stats[name]["size"] <= RESULT_MAXSIZE
+    assert stats["socket_option_closed"]["expired"] > 10000
+    assert stats["instrument_quotes_generated_raw_data"]["size"] == 1
+    # the same 16 hours grow unbounded stores by about 50 MB
+    assert grown < 8 * 1024 * 1024, grown
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from analysis import technical_indicators as ti
+from analysis.streaming import ADX, ATR, EMA, RSI, Choppiness, IndicatorBook, IndicatorSet
+from exnovaapi.candles import CandleSeries
+
+
+def random_walk(count, seed=7):
+    rnd = random.Random(seed)
+    price, candles = 1.1, []
+    for i in range(count):
+        open_ = price
+        price += rnd.gauss(0, 0.0005)
+        candles.append({"from": i * 60, "open": open_, "close": price,
+                        "min": min(open_, price) - abs(rnd.gauss(0, 0.0003)),
+                        "max": max(open_, price) + abs(rnd.gauss(0, 0.0003)), "volume": 1})
+    # um trecho parado, sem perdas, pro RSI e o CHOP
+    for i in range(count, count + 20):
+        candles.append({"from": i * 60, "open": price, "close": price + 1e-5 * (i - count),
+                        "min": price, "max": price + 1e-5 * (i - count), "volume": 1})
+    return candles
+
+
+def same(a, b):
+    if isinstance(a, dict) or isinstance(b, dict):
+        assert (a or {}).keys() == (b or {}).keys()
+        for key in a or {}:
+            same(a[key], b[key])
+        return
+    assert (a is None) == (b is None)
+    if a is not None:
+        assert a == pytest.approx(b, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("indicator,batch,window", [
+    (EMA(9), lambda c: ti.calculate_ema(c, 9), 9 * 6),
+    (ATR(14), lambda c: ti.calculate_atr(c, 14), 14 * 8),
+    (RSI(14), lambda c: ti.calculate_rsi(c, 14), 14 * 8),
+    (ADX(14), lambda c: ti.calculate_adx(c, 14), 14 * 10),
+    (Choppiness(14), lambda c: ti.calculate_choppiness(c, 14), 14 * 8),
+])
+def test_streaming_matches_technical_indicators(indicator, batch, window):
+    candles = random_walk(window - 20)
+    for n, c in enumerate(candles, 1):
+        preview = indicator.preview(c["max"], c["min"], c["close"])
+        assert preview == indicator.update(c["max"], c["min"], c["close"])
+        same(indicator.value, batch(candles[:n]))
+
+
+def test_streaming_matches_main_duplicates():
+    main = pytest.importorskip("main")
+    ta, ba = main.TechnicalAnalysis, main.BehaviorAnalysis
+    candles = random_walk(180)
+    stream = IndicatorSet({"ema": EMA(21, wilder=False), "atr": ATR(14, wilder=False),
+                           "rsi": RSI(14, wilder=False), "adx": ADX(14, wilder=False),
+                           "chop": Choppiness(14, wilder=False)})
+    for n in range(1, len(candles) + 1):
+        c, prefix = candles[n - 1], CandleSeries.from_candles(candles[:n])
+        preview = stream.preview(c["max"], c["min"], c["close"])
+        values = stream.update(c["max"], c["min"], c["close"])
+        same(preview, values)
+        same(values["ema"] or 0, ta.calculate_ema(prefix, 21))
+        same(values["atr"] or 0.0, ta.calculate_atr(prefix, 14))
+        same(values["rsi"] or 50.0, ta.calculate_rsi(prefix.close, 14))
+        same(values["adx"] or {}, ba.calculate_adx(prefix, 14))
+        same(values["chop"] or 50.0, ba.calculate_choppiness(prefix, 14))
+
+
+def test_windowed_adx_matches_main_over_the_scan_window():
+    main = pytest.importorskip("main")
+    ba = main.BehaviorAnalysis
+    candles = random_walk(200)
+    last = candles[-1]
+    # parado de vez: TR e DM zerados na janela
+    candles += [dict(last, **{"from": last["from"] + 60 * i, "open": last["close"],
+                              "min": last["close"], "max": last["close"]}) for i in range(1, 31)]
+    book = IndicatorBook(lambda: {"adx": ADX(14, wilder=False, window=120)})
+    for n in range(85, len(candles) + 1):
+        # a janela do scan anda uma vela e às vezes muda de tamanho
+        size = 85 if n % 3 else 84
+        window = candles[n - size:n]
+        adx = book.feed("EURUSD", 60, window).indicators["adx"]
+        same(adx.over(len(window)), ba.calculate_adx(window, 14) or None)
+        same(adx.over(28), ba.calculate_adx(window[-28:], 14) or None)
+        assert adx.over(27) is None
+
+
+def test_windowed_adx_is_none_until_the_stream_saw_the_window():
+    candles = random_walk(200)
+    book = IndicatorBook(lambda: {"adx": ADX(14, wilder=False, window=120)})
+    assert book.feed("EURUSD", 60, candles[140:200]).indicators["adx"].over(60) is not None
+    # o scan seguinte pede 85 velas, mas o stream só viu 61 delas
+    adx = book.feed("EURUSD", 60, candles[116:201]).indicators["adx"]
+    assert adx.over(85) is None
+    assert adx.over(61) is not None
+
+
+def test_feed_only_takes_new_candles_and_preview_keeps_state():
+    candles = random_walk(120)
+    book = IndicatorBook(lambda: {"adx": ADX(14), "ema": EMA(9)})
+    for end in range(30, len(candles) + 1, 7):
+        stream = book.feed("EURUSD", 60, candles[max(0, end - 40):end])
+    whole = IndicatorSet({"adx": ADX(14), "ema": EMA(9)})
+    whole.feed(candles[:end])
+    assert stream.values() == whole.values() and stream.last_from == candles[end - 1]["from"]
+
+    before = stream.values()
+    live = candles[-1]
+    stream.preview(live["max"] * 1.01, live["min"], live["close"] * 1.01)
+    assert stream.values() == before
+
+    # a janela não alcança a última vela vista: recomeça com ela toda
+    stream.feed(candles[:50])
+    assert stream.last_from == candles[49]["from"]
+    assert book.get("EURUSD", 60) is stream and book.get("EURUSD", 900) is not stream
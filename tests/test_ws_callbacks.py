@@ -0,0 +1,66 @@
+import threading
+import time
+
+from exnovaapi.ws.callbacks import CallbackExecutor, COALESCE
+
+
+def blocked_executor(**kwargs):
+    # one worker stuck in the first callback, so later events stay queued
+    gate = threading.Event()
+    started = threading.Event()
+    seen = []
+
+    def cb(**event):
+        if event.get("block"):
+            started.set()
+            gate.wait(5)
+        seen.append(event)
+
+    executor = CallbackExecutor(workers=1, **kwargs)
+    executor.submit(cb, {"block": True})
+    started.wait(5)
+    return executor, cb, gate, seen
+
+
+def wait_delivered(executor, count):
+    for _ in range(500):
+        if executor.stats()["delivered"] >= count:
+            return
+        time.sleep(0.01)
+
+
+def test_drop_oldest_keeps_newest_events():
+    executor, cb, gate, seen = blocked_executor(maxsize=3)
+    for i in range(10):
+        executor.submit(cb, {"i": i}, key="EURUSD")
+    stats = executor.stats()
+    assert stats["depth"] == 3
+    assert stats["dropped"] == 7
+    gate.set()
+    wait_delivered(executor, 4)
+    assert [e["i"] for e in seen[1:]] == [7, 8, 9]
+
+
+def test_coalesce_keeps_latest_per_asset():
+    executor, cb, gate, seen = blocked_executor(maxsize=100, policy=COALESCE)
+    for i in range(5):
+        executor.submit(cb, {"active": "EURUSD", "i": i}, key="EURUSD")
+        executor.submit(cb, {"active": "GBPUSD", "i": i}, key="GBPUSD")
+    assert executor.stats()["coalesced"] == 8
+    gate.set()
+    wait_delivered(executor, 3)
+    assert [(e["active"], e["i"]) for e in seen[1:]] == [("EURUSD", 4), ("GBPUSD", 4)]
+
+
+def test_callback_errors_are_counted():
+    executor = CallbackExecutor(workers=1)
+
+    def boom(**event):
+        raise RuntimeError("user bug")
+
+    executor.submit(boom, {})
+    for _ in range(500):
+        if executor.stats()["errors"]:
+            break
+        time.sleep(0.01)
+    assert executor.stats()["errors"] == 1
@@ -0,0 +1,76 @@
+import json
+import time
+
+import pytest
+
+from exnovaapi.api import ExnovaAPI
+from exnovaapi.ws.client import WebsocketClient
+from exnovaapi.ws.capture import (CaptureWriter, INBOUND, OUTBOUND, is_capture,
+                                  read_capture, replay)
+from benchmarks.traffic import load_frames
+
+
+def candle_frame(i):
+    return json.dumps({"name": "candle-generated", "msg": {
+        "active_id": 1, "size": 60, "from": 60 * i, "to": 60 * i + 60, "open": 1.0,
+        "close": 1.0 + i, "min": 1.0, "max": 1.0 + i, "volume": 1}})
+
+
+@pytest.mark.parametrize("name", ["session.cap", "session.cap.gz"])
+def test_round_trip_and_append(tmp_path, name):
+    path = str(tmp_path / name)
+    for session in range(2):
+        capture = CaptureWriter(path)
+        capture.record(OUTBOUND, '{"name":"ssid","msg":"x"}')
+        for i in range(50):
+            capture.record(INBOUND, candle_frame(session * 50 + i))
+        capture.close()
+        capture.record(INBOUND, "ignored after close")
+
+    assert is_capture(path)
+    records = list(read_capture(path))
+    assert len(records) == 102
+    assert [r[0] for r in records[:2]] == [OUTBOUND, INBOUND]
+    times = [r[1] for r in records]
+    assert times == sorted(times)
+    inbound = [text for _, _, text in read_capture(path, INBOUND)]
+    assert inbound == [candle_frame(i) for i in range(100)]
+    assert load_frames(path) == inbound
+
+
+def test_flush_makes_records_readable(tmp_path):
+    path = str(tmp_path / "live.cap.gz")
+    capture = CaptureWriter(path)
+    capture.record(INBOUND, candle_frame(1))
+    capture.flush()
+    assert [text for _, _, text in read_capture(path)] == [candle_frame(1)]
+    capture.close()
+
+
+def test_client_records_and_replay_rebuilds_state(tmp_path):
+    path = str(tmp_path / "session.cap")
+    api = ExnovaAPI("localhost", "user", "pass")
+    api.capture = CaptureWriter(path)
+    client = WebsocketClient(api)
+    for i in range(20):
+        client.on_message(None, candle_frame(i))
+    api.capture.close()
+
+    fresh = ExnovaAPI("localhost", "user", "pass")
+    stats = replay(WebsocketClient(fresh), path, speed=None)
+    assert stats["frames"] == 20
+    ring = fresh.real_time_candles["EURUSD"][60]
+    assert list(ring.last().close) == list(api.real_time_candles["EURUSD"][60].last().close)
+
+
+def test_replay_speed_follows_timestamps(tmp_path):
+    path = str(tmp_path / "paced.cap")
+    capture = CaptureWriter(path)
+    capture.record(INBOUND, candle_frame(0))
+    time.sleep(0.4)
+    capture.record(INBOUND, candle_frame(1))
+    capture.close()
+
+    client = WebsocketClient(ExnovaAPI("localhost", "user", "pass"))
+    assert replay(client, path, speed=1)["elapsed"] >= 0.4
+    assert replay(client, path, speed=4)["elapsed"] < 0.3
@@ -0,0 +1,18 @@
+import pytest
+from exnovaapi.ws.decoder import loads, peek_name
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"name":"candle-generated","msg":{"active_id":1}}', "candle-generated"),
+    ('{"name": "timeSync", "msg": 1700000000000}', "timeSync"),
+    ('{"msg":{"name":"nested"},"name":"profile"}', None),
+    ('{"name":"we\\"ird","msg":1}', None),
+    ('[]', None),
+])
+def test_peek_name(text, expected):
+    assert peek_name(text) == expected
+
+
+def test_peek_name_matches_full_decode():
+    text = '{"name":"position-changed","microserviceName":"portfolio","msg":{"id":1}}'
+    assert peek_name(text) == loads(text)["name"]
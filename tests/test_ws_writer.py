@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from exnovaapi.ws.pending import PendingRequests
+from exnovaapi.ws.writer import (WebsocketWriter, priority_for,
+                                 PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+
+class FakeSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+        self.sock = None
+
+    def send(self, data):
+        if self.fail:
+            raise ConnectionError("closed")
+        self.sent.append(json.loads(data)["name"])
+
+
+class FakeApi:
+    def __init__(self, fail=False):
+        self.websocket = FakeSocket(fail)
+        self.pending = PendingRequests()
+
+
+def frame(name, msg=""):
+    return json.dumps({"name": name, "msg": msg, "request_id": ""})
+
+
+@pytest.mark.parametrize("name, msg, expected", [
+    ("subscribeMessage", {"name": "candle-generated"}, PRIORITY_LOW),
+    ("unsubscribeMessage", {"name": "candle-generated"}, PRIORITY_LOW),
+    ("sendMessage", {"name": "binary-options.open-option"}, PRIORITY_HIGH),
+    ("sendMessage", {"name": "get-candles"}, PRIORITY_NORMAL),
+    ("heartbeat", {}, PRIORITY_HIGH),
+])
+def test_priority_for(name, msg, expected):
+    assert priority_for(name, msg) == expected
+
+
+def test_orders_jump_ahead_of_subscriptions():
+    api = FakeApi()
+    writer = WebsocketWriter(api)
+    for i in range(3):
+        writer.put(frame("subscribeMessage"), PRIORITY_LOW)
+    writer.put(frame("sendMessage"), PRIORITY_NORMAL)
+    writer.put(frame("buy"), PRIORITY_HIGH)
+    writer.start()
+    writer.stop()
+    writer.join(5)
+    # queued before start, so the whole backlog is written by priority
+    assert api.websocket.sent == ["buy", "sendMessage"] + ["subscribeMessage"] * 3
+    stats = writer.latency_stats()
+    assert stats["high"]["count"] == 1
+    assert stats["low"]["count"] == 3
+
+
+def test_send_error_fails_the_request():
+    api = FakeApi(fail=True)
+    writer = WebsocketWriter(api, batch_size=1)
+    request_id, future = api.pending.expect()
+    writer.put(frame("sendMessage"), PRIORITY_NORMAL, request_id)
+    writer.start()
+    with pytest.raises(ConnectionError):
+        future.result(5)
+    writer.stop()
+    writer.join(5)
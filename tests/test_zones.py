@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from analysis import technical
+from exnovaapi.candles import CandleSeries
+
+
+def random_walk(count, seed, size=900):
+    rnd = random.Random(seed)
+    price, candles = 1.0 + rnd.random(), []
+    for i in range(count):
+        open_ = price
+        price += rnd.gauss(0, 0.002)
+        high = max(open_, price) + abs(rnd.gauss(0, 0.001))
+        low = min(open_, price) - abs(rnd.gauss(0, 0.001))
+        if seed % 2:
+            high, low = round(high, 3), round(low, 3)  # empates entre vizinhos
+        candles.append({"from": i * size, "open": open_, "close": price, "max": high, "min": low, "volume": 1})
+    return CandleSeries.from_candles(candles, size)
+
+
+def previous_cluster_levels(levels, tolerance_pct):
+    zones = []
+    for p in sorted(levels):
+        for z in zones:
+            if abs(p - z["price"]) / z["price"] <= tolerance_pct:
+                z["prices"].append(p)
+                z["price"] = sum(z["prices"]) / len(z["prices"])
+                break
+        else:
+            zones.append({"price": p, "prices": [p]})
+    zones.sort(key=lambda z: len(z["prices"]), reverse=True)
+    return [{"price": z["price"], "hits": len(z["prices"])} for z in zones]
+
+
+def previous_pivots(highs, lows, window):
+    piv_hi = [highs[i] for i in range(window, len(highs) - window)
+              if highs[i] == max(highs[i - window:i + window + 1])]
+    piv_lo = [lows[i] for i in range(window, len(lows) - window)
+              if lows[i] == min(lows[i - window:i + window + 1])]
+    return piv_hi, piv_lo
+
+
+def test_zones_match_previous_implementations():
+    main = pytest.importorskip("main")
+    for seed in range(12):
+        s = random_walk(300, seed)
+        for tolerance in (0.0015, 0.004):
+            levels = [p["price"] for p in technical._pivot_points(s, 3)["highs"]]
+            assert technical._cluster_levels(levels, tolerance) == previous_cluster_levels(levels, tolerance)
+
+        piv_hi, piv_lo = previous_pivots(s.max[-120:], s.min[-120:], 5)
+        zones = main.BehaviorAnalysis.get_sr_zones(s, lookback=120)
+        assert zones["resistance"] == sorted(z["price"] for z in previous_cluster_levels(piv_hi, 0.0015))[::-1][:5]
+        assert zones["support"] == sorted(z["price"] for z in previous_cluster_levels(piv_lo, 0.0015))[:5]
+
+        piv_hi, piv_lo = previous_pivots(s.max, s.min, 3)
+        state = main.BehaviorAnalysis.detect_structure(s)["state"]
+        up = piv_hi[-1] > piv_hi[-2] and piv_lo[-1] > piv_lo[-2]
+        down = piv_hi[-1] < piv_hi[-2] and piv_lo[-1] < piv_lo[-2]
+        assert state == ("UP_HH_HL" if up else "DOWN_LH_LL" if down else "MIXED")
+
+
+def test_zone_tracker_recomputes_only_on_a_new_close():
+    calls = []
+    tracker = technical.ZoneTracker(lambda candles: calls.append(len(candles)) or technical.get_sr_zones(candles, 5))
+    m15 = random_walk(136, 1)
+    first = tracker.get("EURUSD-OTC", m15[:-1])
+    assert tracker.get("EURUSD-OTC", m15[:-1]) is first
+    assert tracker.get("GBPUSD-OTC", m15[:-1]) is not first
+    assert tracker.get("EURUSD-OTC", m15[1:]) == technical.get_sr_zones(m15[1:], 5)
+    assert tracker.get("EURUSD-OTC", random_walk(135, 1, size=3600)) is not first  # H1 tem o seu
+    assert calls == [135, 135, 135, 135]